@@ -3,11 +3,32 @@ P2E - Python to EXE Converter
 A modern, modular tool for converting Python scripts to executables.
 """
 
+import importlib
+from typing import Any, List
+
 __version__ = "2.0.0"
 __author__ = "Varun S V"
 __license__ = "MIT"
 
-from p2e.core.converter import PyConverter
-from p2e.core.config import BuildConfig
+# Public names and the modules defining them, imported on first access so
+# that "import p2e" (and "p2e --version") does not load the build machinery
+_LAZY = {
+    "PyConverter": "p2e.core.converter",
+    "BuildConfig": "p2e.core.config",
+}
 
 __all__ = ["PyConverter", "BuildConfig"]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    # Cache it, so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
@@ -2,22 +2,48 @@
 Modern CLI for P2E using Click and Rich.
 """
 
+import json
+import shlex
 import sys
+import time
 from pathlib import Path
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, List
 
 import click
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.panel import Panel
-from rich.table import Table
-from rich import box
-
-from p2e.core.config import BuildConfig
-from p2e.core.converter import PyConverter
+
 from p2e import __version__
 
-console = Console()
+# Commands import what they need when they run, so "p2e --help" and
+# "p2e --version" stay fast
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from p2e.core.analyzer import BundleReport
+    from p2e.core.bench import StartupReport
+    from p2e.core.config import BuildConfig
+    from p2e.core.importtime import ImportTimeProfile, Suggestion
+    from p2e.core.ledger import BuildLedger
+    from p2e.core.result import BuildResult
+
+
+class _LazyConsole:
+    """Rich console created on first use, so commands that print nothing skip importing Rich."""
+
+    def __init__(self):
+        self._console: Optional['Console'] = None
+
+    def get(self) -> 'Console':
+        """Get the Rich console, creating it if needed."""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+
+    def __getattr__(self, name: str):
+        return getattr(self.get(), name)
+
+
+console = _LazyConsole()
 
 
 @click.group()
@@ -35,29 +61,77 @@ def cli():
 @click.option('-o', '--output', type=click.Path(path_type=Path), help='Output directory')
 @click.option('-n', '--name', help='Executable name')
 @click.option('--onefile/--onedir', default=True, help='Build as single file or directory')
-@click.option('--console/--windowed', default=True, help='Console or windowed mode')
+@click.option('--console/--windowed', 'console_mode', default=True, help='Console or windowed mode')
 @click.option('-i', '--icon', type=click.Path(exists=True, path_type=Path), help='Icon file (.ico)')
 @click.option('--clean/--no-clean', default=True, help='Clean build artifacts')
+@click.option('--entry-point', multiple=True, type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='Further script built into the same onedir distribution (can use multiple times)')
+@click.option('--incremental', is_flag=True, help='Reuse a persistent work dir to skip unchanged analysis')
 @click.option('--add-file', multiple=True, help='Add file (format: src:dst)')
 @click.option('--add-folder', multiple=True, help='Add folder (format: src:dst)')
 @click.option('--hidden-import', multiple=True, help='Hidden import module')
+@click.option('--auto-imports', is_flag=True, help='Add hidden imports found by scanning for dynamic imports')
+@click.option('--exclude-module', multiple=True, help='Module to leave out of the bundle')
+@click.option('--trace-profile', type=click.Path(exists=True, dir_okay=False, resolve_path=True, path_type=Path),
+              help='Exclude modules a traced run (p2e trace) never imported')
+@click.option('--use-trace', is_flag=True, help="Use the script's cached trace profile from p2e trace")
+@click.option('--variant', multiple=True, help='Extra build variant (format: name:key=value,...), e.g. "onedir:one_file=false"')
+@click.option('--debug', is_flag=True, help='Build with bootloader debug messages')
+@click.option('--python-option', multiple=True, help='Interpreter option of the frozen app, e.g. "u" or "X importtime"')
 @click.option('--proxy', help='Proxy URL for pip installs')
+@click.option('--requirements', type=click.Path(exists=True, dir_okay=False, resolve_path=True, path_type=Path),
+              help='Build in a pooled virtual environment with these requirements (see p2e envs)')
+@click.option('--python', 'python_path', help='Interpreter running PyInstaller or creating the build environment')
+@click.option('--wheelhouse', 'wheelhouse_dir', type=click.Path(exists=True, file_okay=False, resolve_path=True, path_type=Path),
+              help='Install PyInstaller and requirements offline from a wheelhouse (see p2e wheelhouse sync)')
 @click.option('--config', type=click.Path(exists=True, path_type=Path), help='Load config from file')
+@click.option('--cache', 'use_cache', is_flag=True, help='Reuse a cached build when no input changed')
+@click.option('--cache-dir', type=click.Path(path_type=Path), help='Build cache directory')
+@click.option('--timings/--no-timings', default=True, help='Show per-phase build timings')
+@click.option('--report', type=click.Path(path_type=Path), help='Write a JSON build report')
+@click.option('--log-file', type=click.Path(path_type=Path), help='Save the full compressed build log (read with p2e log)')
+@click.option('--ledger/--no-ledger', 'use_ledger', default=True, help='Record the build in the build ledger (see p2e stats)')
+@click.option('--analyze', 'analyze_output', is_flag=True, help='Show the largest contributors to the output size')
 def build(
     script: Path,
     output: Optional[Path],
     name: Optional[str],
     onefile: bool,
-    console: bool,
+    console_mode: bool,
     icon: Optional[Path],
     clean: bool,
+    entry_point: tuple,
+    incremental: bool,
     add_file: tuple,
     add_folder: tuple,
     hidden_import: tuple,
+    auto_imports: bool,
+    exclude_module: tuple,
+    trace_profile: Optional[Path],
+    use_trace: bool,
+    variant: tuple,
+    debug: bool,
+    python_option: tuple,
     proxy: Optional[str],
-    config: Optional[Path]
+    requirements: Optional[Path],
+    python_path: Optional[str],
+    wheelhouse_dir: Optional[Path],
+    config: Optional[Path],
+    use_cache: bool,
+    cache_dir: Optional[Path],
+    timings: bool,
+    report: Optional[Path],
+    log_file: Optional[Path],
+    use_ledger: bool,
+    analyze_output: bool
 ):
     """Build a Python script into an executable."""
+    from p2e.core.analyzer import analyze_bundle
+    from p2e.core.config import BuildConfig, parse_variant
+    from p2e.core.converter import PyConverter
+    from p2e.core.trace import default_profile_path
+    from p2e.utils.logsink import ThrottledLogSink
+    from p2e.utils.logstore import LogStore
     
     try:
         # Load config from file if provided
@@ -100,7 +174,7 @@ def build(
                 output_dir=output,
                 exe_name=name,
                 one_file=onefile,
-                console_mode=console,
+                console_mode=console_mode,
                 icon_path=icon,
                 clean_build=clean,
                 additional_files=additional_files,
@@ -109,28 +183,80 @@ def build(
                 use_proxy=bool(proxy),
                 proxy_url=proxy
             )
+
+        if entry_point:
+            build_config.entry_points = list(dict.fromkeys(
+                build_config.entry_points + [str(path.absolute()) for path in entry_point]
+            ))
+        if incremental:
+            build_config.incremental = True
+        if auto_imports:
+            build_config.auto_hidden_imports = True
+        if exclude_module:
+            build_config.exclude_modules = list(dict.fromkeys(build_config.exclude_modules + list(exclude_module)))
+        if use_trace and not trace_profile:
+            trace_profile = default_profile_path(script)
+            if not trace_profile.exists():
+                console.print(f"[red]No trace profile for {script}; record one with: p2e trace {script}[/red]")
+                sys.exit(1)
+        if trace_profile:
+            build_config.trace_profile = trace_profile
+        if variant:
+            build_config.variants = build_config.variants + [parse_variant(text) for text in variant]
+        if debug:
+            build_config.debug = True
+        if python_option:
+            build_config.python_options = list(dict.fromkeys(build_config.python_options + list(python_option)))
+        if requirements:
+            build_config.requirements = requirements
+        if python_path:
+            build_config.python = python_path
+        if wheelhouse_dir:
+            build_config.wheelhouse = wheelhouse_dir
+        if use_cache:
+            build_config.use_cache = True
+        if cache_dir:
+            build_config.cache_dir = cache_dir
         
         # Display build configuration
         display_config(build_config)
         
-        # Create converter with rich logging
-        logs = []
-        
-        def log_callback(message: str):
-            logs.append(message)
-            console.print(f"  {message}")
+        # Create converter with rich logging, rendered at most 10 times per second;
+        # the full log is spilled to a compressed file instead of kept in memory
+        logs = LogStore(log_file)
         
-        converter = PyConverter(build_config, log_callback=log_callback)
+        def render_logs(batch: List[str]):
+            console.print("\n".join(f"  {message}" for message in batch), markup=False, highlight=False)
         
         # Build
         console.print("\n[bold cyan]Starting build...[/bold cyan]")
-        success = converter.build(realtime_output=True)
+        try:
+            with ThrottledLogSink(render_logs, persist=logs.append, background=True) as log_sink:
+                converter = PyConverter(build_config, log_callback=log_sink)
+                result = converter.build(realtime_output=True)
+        finally:
+            if log_file:
+                logs.close()
+            else:
+                logs.discard()
+        
+        if log_file:
+            console.print(f"[cyan]Build log ({len(logs)} lines) written to {log_file}[/cyan]")
+        
+        record_build(use_ledger, build_config, result, log_file)
         
-        if success:
+        if timings:
+            display_timings(result)
+        if report:
+            result.save_json(report)
+            console.print(f"[cyan]Build report written to {report}[/cyan]")
+        
+        if result.success:
             console.print("\n[bold green]✓ Build completed successfully![/bold green]")
-            output_path = converter.get_output_path()
-            if output_path:
+            for output_path in converter.get_output_paths():
                 console.print(f"[green]Executable: {output_path}[/green]")
+                if analyze_output:
+                    display_bundle(analyze_bundle(output_path), top=10)
         else:
             console.print("\n[bold red]✗ Build failed![/bold red]")
             sys.exit(1)
@@ -140,12 +266,84 @@ def build(
         sys.exit(1)
 
 
+@cli.command()
+@click.argument('manifest', type=click.Path(exists=True, path_type=Path))
+@click.option('-j', '--jobs', type=click.IntRange(min=1), help='Concurrent builds (default: CPU count)')
+@click.option('--fail-fast/--keep-going', default=False, help='Stop after the first failed build')
+@click.option('--log-dir', type=click.Path(path_type=Path), help='Write one full log file per build')
+@click.option('--ledger/--no-ledger', 'use_ledger', default=True, help='Record every build in the build ledger (see p2e stats)')
+def build_many(manifest: Path, jobs: Optional[int], fail_fast: bool, log_dir: Optional[Path], use_ledger: bool):
+    """Build every configuration listed in a manifest concurrently."""
+    from rich.table import Table
+    from rich import box
+    from p2e.core.batch import BatchBuilder, BatchJob, JobStatus
+    
+    try:
+        status_styles = {
+            JobStatus.RUNNING: "cyan",
+            JobStatus.SUCCESS: "green",
+            JobStatus.FAILED: "red",
+            JobStatus.SKIPPED: "yellow",
+        }
+        
+        def status_callback(job: BatchJob):
+            style = status_styles.get(job.status, "white")
+            message = f"  [{style}]{job.status.value:>8}[/{style}] {job.name}"
+            if job.status in (JobStatus.SUCCESS, JobStatus.FAILED):
+                message += f" ({job.duration:.1f}s)"
+            if job.status == JobStatus.FAILED and job.error:
+                message += f" - {job.error}"
+            console.print(message)
+        
+        batch = BatchBuilder.from_manifest(
+            manifest,
+            jobs=jobs,
+            fail_fast=fail_fast,
+            log_dir=log_dir,
+            status_callback=status_callback,
+            ledger=open_ledger() if use_ledger else None
+        )
+        
+        console.print(
+            f"[bold cyan]Building {len(batch.jobs)} executable(s) "
+            f"with {batch.max_workers} worker(s)...[/bold cyan]"
+        )
+        result = batch.run()
+        
+        table = Table(title="Batch Results", box=box.ROUNDED)
+        table.add_column("Executable", style="cyan", no_wrap=True)
+        table.add_column("Status")
+        table.add_column("Time", justify="right")
+        table.add_column("Output", style="green")
+        for job in result.jobs:
+            style = status_styles.get(job.status, "white")
+            table.add_row(
+                job.name,
+                f"[{style}]{job.status.value}[/{style}]",
+                f"{job.duration:.1f}s" if job.duration else "-",
+                str(job.output_path or job.log_file or "")
+            )
+        console.print(table)
+        
+        console.print(
+            f"{len(result.succeeded)} succeeded, {len(result.failed)} failed, "
+            f"{len(result.skipped)} skipped in {result.duration:.1f}s"
+        )
+        if not result.success:
+            sys.exit(1)
+            
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
 @cli.command()
 @click.argument('script', type=click.Path(exists=True, path_type=Path))
 @click.argument('output', type=click.Path(path_type=Path))
 @click.option('-f', '--format', type=click.Choice(['json', 'yaml']), default='json', help='Config format')
 def save_config(script: Path, output: Path, format: str):
     """Save a build configuration to a file."""
+    from p2e.core.config import BuildConfig
     
     try:
         # Create a basic config
@@ -172,6 +370,7 @@ def save_config(script: Path, output: Path, format: str):
 @click.argument('config_file', type=click.Path(exists=True, path_type=Path))
 def show_config(config_file: Path):
     """Display a configuration file."""
+    from p2e.core.config import BuildConfig
     
     try:
         # Load config
@@ -190,8 +389,601 @@ def show_config(config_file: Path):
         sys.exit(1)
 
 
-def display_config(config: BuildConfig):
+@cli.command()
+@click.option('--host', default='127.0.0.1', show_default=True, help='Interface to bind')
+@click.option('--port', default=8765, show_default=True, help='Port to listen on')
+@click.option('-w', '--workers', type=click.IntRange(min=1), default=2, show_default=True,
+              help='Builds running at once')
+@click.option('--queue-size', type=click.IntRange(min=1), default=100, show_default=True,
+              help='Maximum queued builds')
+@click.option('--max-running-per-user', type=click.IntRange(min=1),
+              help='Builds one user (X-P2E-User header) may run at once')
+@click.option('--max-queued-per-user', type=click.IntRange(min=1),
+              help='Builds one user may have queued')
+@click.option('--ledger/--no-ledger', 'use_ledger', default=True, help='Record every build in the build ledger')
+@click.option('-v', '--verbose', is_flag=True, help='Log every HTTP request')
+def serve(
+    host: str,
+    port: int,
+    workers: int,
+    queue_size: int,
+    max_running_per_user: Optional[int],
+    max_queued_per_user: Optional[int],
+    use_ledger: bool,
+    verbose: bool
+):
+    """Run a local build server with an HTTP/JSON API."""
+    from rich.panel import Panel
+    from p2e.server import create_server
+    
+    try:
+        server = create_server(
+            host,
+            port,
+            workers=workers,
+            queue_size=queue_size,
+            quiet=not verbose,
+            max_running_per_user=max_running_per_user,
+            max_queued_per_user=max_queued_per_user,
+            ledger=open_ledger() if use_ledger else None
+        )
+    except OSError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+    
+    bound_host, bound_port = server.server_address[:2]
+    console.print(Panel(
+        f"[bold cyan]P2E build server[/bold cyan] listening on http://{bound_host}:{bound_port}\n"
+        f"Workers: {workers} | Queue size: {queue_size}\n\n"
+        f"Submit:   POST /builds  (JSON build config)\n"
+        f"Status:   GET  /builds/<id>\n"
+        f"Logs:     GET  /builds/<id>/logs?follow=1\n"
+        f"Artifact: GET  /builds/<id>/artifact",
+        border_style="cyan"
+    ))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Shutting down...[/yellow]")
+    finally:
+        server.server_close()
+
+
+@cli.command()
+@click.option('--cache-dir', type=click.Path(path_type=Path), help='Build cache directory')
+def clear_cache(cache_dir: Optional[Path]):
+    """Remove all cached build artifacts."""
+    from p2e.core.cache import BuildCache
+    
+    try:
+        cache = BuildCache(cache_dir)
+        removed = cache.clear()
+        console.print(f"[green]✓ Removed {removed} cached build(s) from {cache.builds_dir}[/green]")
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--cache-dir', type=click.Path(path_type=Path), help='Cache directory holding the pool')
+@click.option('--prune', is_flag=True, help='Remove least recently used environments over the budget')
+@click.option('--max-size', type=click.FloatRange(min=0), help='Disk budget in GB for --prune (default: 5)')
+@click.option('--clear', is_flag=True, help='Remove every environment not in use')
+def envs(cache_dir: Optional[Path], prune: bool, max_size: Optional[float], clear: bool):
+    """List or prune the pooled build environments."""
+    from rich.table import Table
+    from rich import box
+    from p2e.core.venvs import EnvPool
+    
+    try:
+        pool = EnvPool(cache_dir / "venvs" if cache_dir else None)
+        if clear or prune:
+            budget = int(max_size * 1024 ** 3) if max_size is not None else None
+            removed = pool.clear() if clear else pool.prune(budget)
+            freed = sum(env.size for env in removed) / (1024 * 1024)
+            console.print(f"[green]✓ Removed {len(removed)} environment(s), {freed:.0f} MB[/green]")
+        
+        environments = pool.environments()
+        if not environments:
+            console.print(f"[yellow]No build environments in {pool.root}[/yellow]")
+            return
+        
+        table = Table(title=f"Build Environments ({pool.root})", box=box.ROUNDED)
+        table.add_column("Key", style="cyan", no_wrap=True)
+        table.add_column("Requirements", style="green")
+        table.add_column("Python")
+        table.add_column("Size", justify="right")
+        table.add_column("Last Used", justify="right")
+        for env in environments:
+            table.add_row(
+                env.key[:12],
+                env.requirements or "-",
+                env.base_python,
+                f"{env.size / (1024 * 1024):.0f} MB",
+                time.strftime('%Y-%m-%d %H:%M', time.localtime(env.last_used))
+            )
+        console.print(table)
+        total = sum(env.size for env in environments) / (1024 * 1024)
+        console.print(f"[dim]{len(environments)} environment(s), {total:.0f} MB[/dim]")
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.group()
+def wheelhouse():
+    """Manage the local wheelhouse for offline installs."""
+
+
+@wheelhouse.command('sync')
+@click.argument('packages', nargs=-1)
+@click.option('-r', '--requirements', multiple=True, type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='Requirements file to fetch (can use multiple times)')
+@click.option('--from', 'sources', multiple=True, type=click.Path(exists=True, file_okay=False, path_type=Path),
+              help='Copy wheels from a folder instead of or besides fetching (can use multiple times)')
+@click.option('--offline', is_flag=True, help='Only copy wheels from --from folders')
+@click.option('--dir', 'root', type=click.Path(file_okay=False, path_type=Path), help='Wheelhouse folder (default: in the cache directory)')
+@click.option('--python', 'python_path', help='Interpreter the wheels must suit')
+@click.option('--proxy', help='Proxy URL for pip')
+def wheelhouse_sync(
+    packages: tuple,
+    requirements: tuple,
+    sources: tuple,
+    offline: bool,
+    root: Optional[Path],
+    python_path: Optional[str],
+    proxy: Optional[str]
+):
+    """Fetch PyInstaller, requirements and PACKAGES into the wheelhouse."""
+    from p2e.core.wheelhouse import Wheelhouse
+    
+    try:
+        house = Wheelhouse(root, log_callback=lambda line: console.print(f"[dim]{line}[/dim]"))
+        added = house.sync(
+            requirements=requirements,
+            packages=packages,
+            sources=sources,
+            python=python_path,
+            proxy_url=proxy,
+            download=not offline
+        )
+        console.print(f"[green]✓ Added {len(added)} file(s); {len(house.manifest())} in {house.root}[/green]")
+        console.print(f"[dim]Build offline with: p2e build SCRIPT --wheelhouse {house.root}[/dim]")
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@wheelhouse.command('verify')
+@click.option('--dir', 'root', type=click.Path(file_okay=False, path_type=Path), help='Wheelhouse folder (default: in the cache directory)')
+def wheelhouse_verify(root: Optional[Path]):
+    """Check the wheelhouse against its hash manifest."""
+    from p2e.core.wheelhouse import Wheelhouse
+    
+    try:
+        house = Wheelhouse(root)
+        problems = house.verify()
+        if problems:
+            for problem in problems:
+                console.print(f"[red]✗ {problem}[/red]")
+            sys.exit(1)
+        console.print(f"[green]✓ {len(house.manifest())} file(s) in {house.root} match the manifest[/green]")
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('log_file', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--grep', 'pattern', help='Only show lines matching a regular expression')
+@click.option('-i', '--ignore-case', is_flag=True, help='Match the pattern case-insensitively')
+@click.option('--page', type=click.IntRange(min=1), help='Show one page of the log (default: last page)')
+@click.option('--page-size', type=click.IntRange(min=1), default=100, help='Lines per page')
+def log(log_file: Path, pattern: Optional[str], ignore_case: bool, page: Optional[int], page_size: int):
+    """Page or search through a build log saved with --log-file."""
+    from p2e.utils.logstore import LogStore
+
+    try:
+        store = LogStore.open(log_file, tail_size=1)
+
+        if pattern:
+            for number, line in store.grep(pattern, ignore_case=ignore_case):
+                console.print(f"[cyan]{number + 1}:[/cyan] ", end="")
+                console.print(line, markup=False, highlight=False)
+            return
+
+        pages = max(store.pages(page_size), 1)
+        page = min(page or pages, pages)
+        for line in store.page(page - 1, page_size):
+            console.print(line, markup=False, highlight=False)
+        console.print(f"[dim]Page {page}/{pages} ({len(store)} lines)[/dim]")
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('script', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('-j', '--jobs', type=click.IntRange(min=1), help='Processes parsing changed files (default: CPU count)')
+@click.option('--cache-dir', type=click.Path(path_type=Path), help='Cache directory for scan results')
+def scan_imports(script: Path, jobs: Optional[int], cache_dir: Optional[Path]):
+    """Propose hidden imports for dynamic imports in a script and its local modules."""
+    from rich.table import Table
+    from rich import box
+    from p2e.core.imports import ImportScanner
+    from p2e.core.timing import format_duration
+
+    try:
+        scanner = ImportScanner(cache_dir / "imports.sqlite3" if cache_dir else None, workers=jobs)
+        report = scanner.scan(script)
+
+        if report.hidden_imports:
+            table = Table(title="Proposed Hidden Imports", box=box.ROUNDED)
+            table.add_column("Module", style="green")
+            for name in report.hidden_imports:
+                table.add_row(name)
+            console.print(table)
+            console.print("[cyan]Add them with --auto-imports, or list them under hidden_imports in a config file[/cyan]")
+        else:
+            console.print("[green]✓ No hidden imports needed[/green]")
+
+        if report.plugin_packages:
+            console.print(f"Plugin packages: {', '.join(report.plugin_packages)}")
+        for location in report.unresolved:
+            console.print(f"[yellow]Warning: dynamic import at {location} could not be resolved[/yellow]")
+        console.print(
+            f"[dim]Scanned {report.files_scanned} file(s), {report.cache_hits} cached, "
+            f"in {format_duration(report.duration)}[/dim]"
+        )
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.command(context_settings={'ignore_unknown_options': True})
+@click.argument('script', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument('args', nargs=-1, type=click.UNPROCESSED)
+@click.option('--command', 'test_command', help='Command exercising the app instead of running it, e.g. "python -m pytest"')
+@click.option('--timeout', type=click.FloatRange(min=0, min_open=True), help='Stop the traced run after N seconds')
+@click.option('--profile', 'profile_path', type=click.Path(dir_okay=False, path_type=Path),
+              help='Where to save the profile (default: cache directory, used by p2e build --use-trace)')
+@click.option('--keep', multiple=True, help='Module never to exclude')
+@click.option('--apply', 'apply_to', type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='Write the exclude and hidden import lists into a config file')
+def trace(
+    script: Path,
+    args: tuple,
+    test_command: Optional[str],
+    timeout: Optional[float],
+    profile_path: Optional[Path],
+    keep: tuple,
+    apply_to: Optional[Path]
+):
+    """Run a script under an import tracer to find modules the bundle can leave out.
+    
+    Arguments after the script are passed to it. Exclusions only cover what the
+    traced run exercised, so trace a representative workload.
+    """
+    from rich.table import Table
+    from rich import box
+    from p2e.core.trace import default_profile_path, trace_imports
+    
+    try:
+        # Read the config first, so a bad one fails before the traced run
+        config = load_config(apply_to) if apply_to else None
+        command = shlex.split(test_command) if test_command else None
+        profile = trace_imports(
+            script,
+            args=args,
+            command=command,
+            timeout=timeout,
+            log_callback=lambda message: console.print(f"[cyan]{message}[/cyan]")
+        )
+        if profile.returncode:
+            console.print(f"[yellow]Warning: traced run exited with code {profile.returncode}[/yellow]")
+        
+        default_path = default_profile_path(script)
+        profile_path = profile_path or default_path
+        profile.save(profile_path)
+        plan = profile.plan(keep=keep, sizes=True)
+        
+        table = Table(title="Modules to Exclude", box=box.ROUNDED)
+        table.add_column("Module", style="cyan")
+        table.add_column("Size", style="green", justify="right")
+        for name in sorted(plan.sizes, key=plan.sizes.get, reverse=True):
+            table.add_row(name, f"{plan.sizes[name] / (1024 * 1024):.2f} MB")
+        console.print(table)
+        if plan.hidden_imports:
+            console.print(f"Hidden imports: {', '.join(plan.hidden_imports)}")
+        console.print(
+            f"[bold green]Estimated size saved: {plan.saved_bytes / (1024 * 1024):.1f} MB[/bold green] "
+            f"(uncompressed, for modules the build would otherwise include)"
+        )
+        
+        if apply_to and config:
+            config.exclude_modules = sorted(set(config.exclude_modules) | set(plan.exclude_modules))
+            config.hidden_imports = list(dict.fromkeys(config.hidden_imports + plan.hidden_imports))
+            if apply_to.suffix == '.json':
+                config.save_json(apply_to)
+            else:
+                config.save_yaml(apply_to)
+            console.print(f"[green]✓ Updated {apply_to}[/green]")
+        
+        console.print(f"[cyan]Profile saved to {profile_path}[/cyan]")
+        if profile_path == default_path:
+            console.print(f"Build with it: p2e build {script} --use-trace")
+        else:
+            console.print(f"Build with it: p2e build {script} --trace-profile {profile_path}")
+        
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.option('--exe', 'exe_name', help='Only builds of this executable')
+@click.option('--since', type=click.FloatRange(min=0), help='Only builds of the last N days')
+@click.option('--limit', type=click.IntRange(min=1), default=5, show_default=True,
+              help='Slowest builds and size trend points to show')
+@click.option('--ledger', 'ledger_path', type=click.Path(dir_okay=False, path_type=Path),
+              help='Ledger database (default: ledger.sqlite3 in the cache root)')
+def stats(exe_name: Optional[str], since: Optional[float], limit: int, ledger_path: Optional[Path]):
+    """Show build statistics from the build ledger."""
+    from rich.table import Table
+    from rich import box
+    from p2e.core.ledger import BuildLedger
+    from p2e.core.timing import format_duration
+
+    try:
+        ledger = BuildLedger(ledger_path)
+        summary = ledger.stats(
+            exe_name=exe_name,
+            since=time.time() - since * 24 * 60 * 60 if since is not None else None,
+            slowest=limit,
+            trend_points=limit
+        )
+        if not summary.builds:
+            console.print(f"[yellow]No builds recorded in {ledger.path}[/yellow]")
+            return
+
+        table = Table(title="Build Statistics", box=box.ROUNDED)
+        table.add_column("Metric", style="cyan", no_wrap=True)
+        table.add_column("Value", style="green", justify="right")
+        table.add_row("Builds", str(summary.builds))
+        table.add_row("Success Rate", f"{summary.success_rate:.0%}")
+        table.add_row("Cache Hit Rate", f"{summary.cache_hit_rate:.0%}")
+        for label, value in (("Mean", summary.mean), ("p50", summary.p50), ("p95", summary.p95)):
+            table.add_row(f"{label} Duration", format_duration(value) if value is not None else "-")
+        console.print(table)
+
+        table = Table(title="Slowest Builds", box=box.ROUNDED)
+        table.add_column("Executable", style="cyan", no_wrap=True)
+        table.add_column("Finished")
+        table.add_column("Source")
+        table.add_column("Status")
+        table.add_column("Time", style="green", justify="right")
+        for entry in summary.slowest:
+            style = "green" if entry.success else "red"
+            table.add_row(
+                entry.exe_name,
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.finished_at)),
+                entry.source,
+                f"[{style}]{entry.status}[/{style}]",
+                format_duration(entry.duration)
+            )
+        console.print(table)
+
+        if summary.size_trends:
+            table = Table(title="Output Size Trend (oldest to newest)", box=box.ROUNDED)
+            table.add_column("Executable", style="cyan", no_wrap=True)
+            table.add_column("Sizes (MB)", style="green")
+            table.add_column("Change", justify="right")
+            for name, points in sorted(summary.size_trends.items()):
+                sizes = [size for _, size in points]
+                change = sizes[-1] - sizes[0]
+                table.add_row(
+                    name,
+                    " → ".join(f"{size / (1024 * 1024):.2f}" for size in sizes),
+                    f"{change / (1024 * 1024):+.2f} MB"
+                )
+            console.print(table)
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.command()
+@click.argument('artifact', type=click.Path(exists=True, path_type=Path))
+@click.option('-t', '--top', type=click.IntRange(min=1), default=20, show_default=True,
+              help='Number of contributors to show')
+@click.option('--entries', 'by_entry', is_flag=True, help='Rank individual files instead of packages')
+@click.option('--json', 'json_path', type=click.Path(dir_okay=False, path_type=Path),
+              help='Write the full breakdown as JSON')
+def analyze(artifact: Path, top: int, by_entry: bool, json_path: Optional[Path]):
+    """Break a built executable or onedir folder down by package."""
+    from p2e.core.analyzer import analyze_bundle
+
+    try:
+        report = analyze_bundle(artifact)
+        display_bundle(report, top=top, by_entry=by_entry)
+        if json_path:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(report.to_dict(), f, indent=2)
+            console.print(f"[cyan]Breakdown written to {json_path}[/cyan]")
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.command('profile-imports', context_settings={'ignore_unknown_options': True})
+@click.argument('script', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument('args', nargs=-1, type=click.UNPROCESSED)
+@click.option('--config', type=click.Path(exists=True, dir_okay=False, path_type=Path), help='Build configuration of the app')
+@click.option('-t', '--top', type=click.IntRange(min=1), default=15, show_default=True, help='Number of imports to show')
+@click.option('--tree', 'show_tree', is_flag=True, help='Show the cumulative import tree')
+@click.option('--timeout', type=click.FloatRange(min=0, min_open=True), default=60.0, show_default=True,
+              help='Stop the app after N seconds (for GUIs and servers)')
+@click.option('--apply', 'apply_to', type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help='Write the suggested configuration changes into a config file')
+def profile_imports(
+    script: Path,
+    args: tuple,
+    config: Optional[Path],
+    top: int,
+    show_tree: bool,
+    timeout: float,
+    apply_to: Optional[Path]
+):
+    """Time the imports of the frozen app and suggest faster settings.
+
+    Builds a profiling copy of the app with -X importtime and runs it once;
+    arguments after the script are passed to that run.
+    """
+    from p2e.core.config import BuildConfig
+    from p2e.core.importtime import apply_suggestions, profile_startup, suggest
+
+    try:
+        build_config = load_config(config) if config else BuildConfig(script_path=script)
+        build_config.script_path = script
+
+        with console.status("[cyan]Building a profiling copy of the app...") as status:
+            profile = profile_startup(
+                build_config,
+                args=args,
+                timeout=timeout,
+                log_callback=lambda message: status.update(f"[cyan]{message.strip()[:100]}")
+            )
+        if profile.returncode:
+            console.print(f"[yellow]Warning: the app exited with code {profile.returncode}[/yellow]")
+
+        display_import_times(profile, top, show_tree)
+        suggestions = suggest(profile, build_config)
+        display_suggestions(suggestions)
+
+        changes = [suggestion for suggestion in suggestions if suggestion.changes]
+        if apply_to and changes:
+            target = apply_suggestions(load_config(apply_to), changes)
+            if apply_to.suffix == '.json':
+                target.save_json(apply_to)
+            else:
+                target.save_yaml(apply_to)
+            console.print(f"[green]✓ Applied {len(changes)} suggestion(s) to {apply_to}[/green]")
+        elif changes:
+            console.print(f"Apply the configuration changes with: p2e profile-imports {script} --apply CONFIG")
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+@cli.command('bench-startup', context_settings={'ignore_unknown_options': True})
+@click.argument('executable', type=click.Path(exists=True, path_type=Path))
+@click.argument('args', nargs=-1, type=click.UNPROCESSED)
+@click.option('-n', '--runs', type=click.IntRange(min=1), default=10, show_default=True, help='Warm runs')
+@click.option('--cold-runs', type=click.IntRange(min=0), default=3, show_default=True,
+              help='Runs with the bundle evicted from the page cache (Linux; elsewhere only the first run is cold)')
+@click.option('--warmup', type=click.IntRange(min=0), default=1, show_default=True, help='Uncounted runs before the warm runs')
+@click.option('--timeout', type=click.FloatRange(min=0, min_open=True), default=60.0, show_default=True,
+              help='Seconds after which a run is killed')
+@click.option('--label', help='Tag stored with the results, e.g. a release')
+@click.option('--history', 'history_path', type=click.Path(dir_okay=False, path_type=Path),
+              help='Append the results to a JSON history and compare with the previous entry')
+def bench_startup_command(
+    executable: Path,
+    args: tuple,
+    runs: int,
+    cold_runs: int,
+    warmup: int,
+    timeout: float,
+    label: Optional[str],
+    history_path: Optional[Path]
+):
+    """Measure how quickly a built executable starts.
+
+    Arguments after the executable are passed to every run, e.g.
+    p2e bench-startup dist/MyApp -- --version
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from p2e.core.bench import append_history, bench_startup
+    from p2e.core.timing import format_duration
+
+    try:
+        with Progress(SpinnerColumn(), TextColumn("[cyan]{task.description}"), console=console.get(), transient=True) as progress:
+            task = progress.add_task("Launching...", total=None)
+            done = []
+
+            def on_run(run):
+                done.append(run)
+                progress.update(task, description=f"Run {len(done)}: {format_duration(run.wall)}")
+
+            report = bench_startup(
+                executable,
+                args=args,
+                runs=runs,
+                cold_runs=cold_runs,
+                warmup=warmup,
+                timeout=timeout,
+                label=label,
+                progress=on_run
+            )
+        display_startup(report)
+
+        if history_path:
+            previous = append_history(report, history_path)
+            console.print(f"[cyan]Results appended to {history_path}[/cyan]")
+            if previous:
+                display_startup_change(report, previous)
+
+    except Exception as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+
+def load_config(path: Path) -> 'BuildConfig':
+    """Load a JSON or YAML build configuration."""
+    from p2e.core.config import BuildConfig
+    if path.suffix == '.json':
+        return BuildConfig.from_json(path)
+    if path.suffix in ['.yaml', '.yml']:
+        return BuildConfig.from_yaml(path)
+    raise ValueError("Config file must be .json or .yaml")
+
+
+def open_ledger() -> Optional['BuildLedger']:
+    """Open the default build ledger, warning instead of failing."""
+    import sqlite3
+    from p2e.core.ledger import BuildLedger
+    try:
+        return BuildLedger()
+    except (OSError, sqlite3.Error, ValueError) as e:
+        console.print(f"[yellow]Warning: build ledger unavailable: {e}[/yellow]")
+        return None
+
+
+def record_build(enabled: bool, config: 'BuildConfig', result: 'BuildResult', log_file: Optional[Path]):
+    """Record a CLI build in the build ledger."""
+    import sqlite3
+    ledger = open_ledger() if enabled else None
+    if ledger is None:
+        return
+    try:
+        ledger.record(config, result, source="cli", log_path=log_file.resolve() if log_file else None)
+    except sqlite3.Error as e:
+        console.print(f"[yellow]Warning: could not record the build: {e}[/yellow]")
+
+
+def display_config(config: 'BuildConfig'):
     """Display build configuration in a nice table."""
+    from rich.table import Table
+    from rich import box
     table = Table(title="Build Configuration", box=box.ROUNDED)
     table.add_column("Setting", style="cyan", no_wrap=True)
     table.add_column("Value", style="green")
@@ -202,6 +994,18 @@ def display_config(config: BuildConfig):
     table.add_row("One File", "Yes" if config.one_file else "No")
     table.add_row("Console Mode", "Yes" if config.console_mode else "No")
     
+    if config.entry_points:
+        table.add_row("Entry Points", ", ".join(Path(script).stem for script in config.entry_points))
+    
+    if config.debug:
+        table.add_row("Bootloader Debug", "Yes")
+    
+    if config.variants:
+        table.add_row("Variants", ", ".join(variant.exe_name for variant in config.variant_configs()))
+    
+    if config.incremental:
+        table.add_row("Incremental", "Yes")
+    
     if config.icon_path:
         table.add_row("Icon", str(config.icon_path))
     
@@ -214,12 +1018,229 @@ def display_config(config: BuildConfig):
     if config.hidden_imports:
         table.add_row("Hidden Imports", ", ".join(config.hidden_imports))
     
+    if config.auto_hidden_imports:
+        table.add_row("Auto Hidden Imports", "Yes")
+    
+    if config.exclude_modules:
+        table.add_row("Excluded Modules", ", ".join(config.exclude_modules))
+    if config.python_options:
+        table.add_row("Python Options", ", ".join(config.python_options))
+    
+    if config.trace_profile:
+        table.add_row("Trace Profile", str(config.trace_profile))
+    
+    if config.python:
+        table.add_row("Python", config.python)
+    if config.requirements:
+        table.add_row("Requirements", str(config.requirements))
+    if config.wheelhouse:
+        table.add_row("Wheelhouse", str(config.wheelhouse))
+    
+    if config.use_cache:
+        table.add_row("Build Cache", str(config.cache_dir or "default"))
+    
+    console.print(table)
+
+
+def display_timings(result: 'BuildResult'):
+    """Display where the build spent its time."""
+    from rich.table import Table
+    from rich import box
+    from p2e.core.timing import format_duration, summarize
+    table = Table(title="Build Timings", box=box.ROUNDED)
+    table.add_column("Phase", style="cyan", no_wrap=True)
+    table.add_column("Time", style="green", justify="right")
+    table.add_column("Share", style="green", justify="right")
+    
+    for phase, seconds, share in summarize(result.phases):
+        table.add_row(phase.replace('_', ' ').capitalize(), format_duration(seconds), f"{share:.0%}")
+    for stage, seconds, share in summarize(result.stages):
+        table.add_row(f"  PyInstaller {stage}", format_duration(seconds), f"{share:.0%}")
+    
+    table.add_section()
+    table.add_row("Total", format_duration(result.duration), "")
+    if result.output_size is not None:
+        table.add_row("Output Size", f"{result.output_size / (1024 * 1024):.2f} MB", "")
+    if result.peak_rss is not None:
+        table.add_row("Peak Memory", f"{result.peak_rss / (1024 * 1024):.0f} MB", "")
+    elif not result.cache_hit:
+        table.add_row("Peak Memory", "unavailable", "")
+    
+    console.print(table)
+
+
+def display_bundle(report: 'BundleReport', top: int = 20, by_entry: bool = False):
+    """Display what an executable or distribution folder is made of."""
+    from rich.table import Table
+    from rich import box
+    from p2e.core.timing import format_duration
+    def megabytes(size: int) -> str:
+        return f"{size / (1024 * 1024):.2f}"
+
+    total = report.compressed or 1
+
+    table = Table(title="Bundle Contents", box=box.ROUNDED)
+    table.add_column("Type", style="cyan", no_wrap=True)
+    table.add_column("Files", justify="right")
+    table.add_column("Stored (MB)", style="green", justify="right")
+    table.add_column("Unpacked (MB)", justify="right")
+    table.add_column("Share", style="green", justify="right")
+    for group in report.kinds():
+        table.add_row(group.name.capitalize(), str(group.files), megabytes(group.compressed),
+                      megabytes(group.size), f"{group.compressed / total:.0%}")
+    table.add_section()
+    table.add_row("Total", str(len(report.entries)), megabytes(report.compressed), megabytes(report.size), "")
+    console.print(table)
+
+    if by_entry:
+        table = Table(title=f"Top {top} Files", box=box.ROUNDED)
+        table.add_column("File", style="cyan")
+        table.add_column("Type")
+        rows = [
+            (entry.name, entry.kind, entry.compressed, entry.size)
+            for entry in sorted(report.entries, key=lambda entry: -entry.compressed)[:top]
+        ]
+    else:
+        table = Table(title=f"Top {top} Contributors", box=box.ROUNDED)
+        table.add_column("Package / File", style="cyan")
+        table.add_column("Types")
+        rows = [(group.name, group.kind, group.compressed, group.size) for group in report.top(top)]
+    table.add_column("Stored (MB)", style="green", justify="right")
+    table.add_column("Unpacked (MB)", justify="right")
+    table.add_column("Share", style="green", justify="right")
+    for name, kind, compressed, size in rows:
+        table.add_row(name, kind, megabytes(compressed), megabytes(size), f"{compressed / total:.1%}")
+    console.print(table)
+
+    details = f"{report.layout}, {report.total_size / (1024 * 1024):.2f} MB on disk"
+    if report.python_library:
+        details += f", {report.python_library}"
+    console.print(f"[cyan]{report.path} ({details}); analyzed in {format_duration(report.duration)}[/cyan]")
+
+
+def display_startup(report: 'StartupReport'):
+    """Display startup benchmark percentiles."""
+    from rich.table import Table
+    from rich import box
+    from p2e.core.timing import format_duration
+    labels = {'wall': "Wall Time", 'first_output': "First Output", 'extraction': "Onefile Extraction"}
+    summary = report.summary()
+
+    table = Table(title=f"Startup Time ({report.layout})", box=box.ROUNDED)
+    table.add_column("Metric", style="cyan", no_wrap=True)
+    for phase in summary:
+        for stat in ("p50", "p95"):
+            table.add_column(f"{phase.capitalize()} {stat}", style="green", justify="right")
+    for metric, label in labels.items():
+        cells = [
+            format_duration(summary[phase][metric][stat]) if metric in summary[phase] else "-"
+            for phase in summary for stat in ("p50", "p95")
+        ]
+        if any(cell != "-" for cell in cells):
+            table.add_row(label, *cells)
+    console.print(table)
+
+    cold = sum(1 for run in report.runs if run.cold)
+    details = f"{cold} cold and {len(report.runs) - cold} warm run(s), {report.size / (1024 * 1024):.1f} MB"
+    if cold and not report.evicted:
+        details += "; page cache eviction unsupported, the cold run is simply the first one"
+    console.print(f"[cyan]{report.executable}: {details}[/cyan]")
+    if report.failures:
+        console.print(f"[yellow]Warning: {report.failures} run(s) exited with a non-zero status[/yellow]")
+
+
+def display_startup_change(report: 'StartupReport', previous: dict):
+    """Compare warm startup percentiles with an earlier history entry."""
+    from p2e.core.timing import format_duration
+    current = report.summary().get('warm', {})
+    before = previous.get('summary', {}).get('warm', {})
+    tag = previous.get('label') or time.strftime("%Y-%m-%d %H:%M", time.localtime(previous['created_at']))
+    for metric in ("wall", "first_output"):
+        if metric in current and metric in before:
+            old, new = before[metric]['p50'], current[metric]['p50']
+            change = (new - old) / old if old else 0.0
+            style = "red" if change > 0.05 else "green" if change < -0.05 else "white"
+            console.print(
+                f"Warm {metric.replace('_', ' ')} p50 vs {tag}: {format_duration(old)} → {format_duration(new)} "
+                f"[{style}]({change:+.1%})[/{style}]"
+            )
+
+
+def display_import_times(profile: 'ImportTimeProfile', top: int, show_tree: bool):
+    """Display the heaviest imports of a frozen app."""
+    from rich.table import Table
+    from rich.tree import Tree
+    from rich import box
+    from p2e.core.timing import format_duration
+    total = profile.total or 1.0
+    summary = f"Imports took {format_duration(profile.total)}"
+    if profile.wall is not None:
+        summary += f" of a {format_duration(profile.wall)} run"
+    if profile.extraction is not None:
+        summary += f"; onefile unpacking took {format_duration(profile.extraction)}"
+    console.print(f"[bold cyan]{summary}[/bold cyan]")
+
+    table = Table(title="Heaviest Imports", box=box.ROUNDED)
+    table.add_column("Module", style="cyan")
+    table.add_column("Imported By")
+    table.add_column("Self", justify="right")
+    table.add_column("Cumulative", style="green", justify="right")
+    table.add_column("Share", style="green", justify="right")
+    for node in profile.heaviest(top):
+        table.add_row(
+            node.name,
+            node.parent.name if node.parent else "(top level)",
+            format_duration(node.self_time),
+            format_duration(node.cumulative),
+            f"{node.cumulative / total:.0%}"
+        )
+    console.print(table)
+
+    if show_tree:
+        # Only imports worth at least 1% of the total, heavy ones highlighted
+        heavy = {id(node) for node in profile.heaviest(top)}
+        tree = Tree("[bold]Import tree[/bold]")
+
+        def add(branch, node):
+            style = "bold red" if id(node) in heavy else "white"
+            child = branch.add(f"[{style}]{node.name}[/{style}] {format_duration(node.cumulative)}")
+            for grandchild in sorted(node.children, key=lambda item: -item.cumulative):
+                if grandchild.cumulative >= total * 0.01:
+                    add(child, grandchild)
+
+        for root in sorted(profile.roots, key=lambda item: -item.cumulative):
+            if root.cumulative >= total * 0.01:
+                add(tree, root)
+        console.print(tree)
+
+
+def display_suggestions(suggestions: List['Suggestion']):
+    """Display suggested configuration and code changes."""
+    from rich.table import Table
+    from rich import box
+    from p2e.core.timing import format_duration
+    if not suggestions:
+        console.print("[green]No suggestions: no single import or setting dominates startup[/green]")
+        return
+    table = Table(title="Suggestions", box=box.ROUNDED)
+    table.add_column("Change", style="cyan")
+    table.add_column("Saves up to", style="green", justify="right")
+    table.add_column("Why")
+    for suggestion in suggestions:
+        if suggestion.kind == "exclude_module":
+            change = f"exclude_modules += {suggestion.target}"
+        elif suggestion.kind == "onedir":
+            change = "one_file: false"
+        else:
+            change = f"lazy import of {suggestion.target} (code)"
+        table.add_row(change, format_duration(suggestion.saving), suggestion.reason)
     console.print(table)
 
 
 @cli.command()
 def info():
     """Display information about P2E."""
+    from rich.panel import Panel
     
     info_text = f"""
 [bold cyan]P2E - Python to EXE Converter[/bold cyan]
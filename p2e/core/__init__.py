@@ -2,5 +2,7 @@
 
 from p2e.core.converter import PyConverter
 from p2e.core.config import BuildConfig
+from p2e.core.batch import BatchBuilder
+from p2e.core.result import BuildResult, BuildStatus
 
-__all__ = ["PyConverter", "BuildConfig"]
+__all__ = ["PyConverter", "BuildConfig", "BatchBuilder", "BuildResult", "BuildStatus"]
@@ -0,0 +1,383 @@
+"""
+Bundle size analysis for P2E.
+
+Reads the PyInstaller archives of a built executable or onedir distribution
+directly: the CArchive (PKG) appended to the bootloader, the PYZ archive of
+compiled modules inside it, and ``base_library.zip``. Files are memory
+mapped and only table-of-contents records are read, apart from the small
+PYZ entries whose uncompressed size is not recorded.
+"""
+
+import io
+import marshal
+import mmap
+import os
+import re
+import struct
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# CArchive cookie, written after the archive's table of contents
+COOKIE_MAGIC = b"MEI\014\013\012\013\016"
+COOKIE_FORMAT = "!8sIIII64s"
+COOKIE_SIZE = struct.calcsize(COOKIE_FORMAT)
+TOC_ENTRY_FORMAT = "!IIIIBc"
+TOC_ENTRY_SIZE = struct.calcsize(TOC_ENTRY_FORMAT)
+PYZ_MAGIC = b"PYZ\0"
+
+# Entry kinds, in the order they are reported
+KINDS = ("module", "script", "extension", "library", "data", "bootloader", "index")
+
+# Groups that are not a package
+BOOTLOADER = "(bootloader)"
+ARCHIVE_INDEX = "(archive index)"
+
+_EXTENSION = re.compile(r"\.(cpython|abi3|pypy)[^/]*\.so$|\.pyd$")
+_LIBRARY = re.compile(r"\.(so(\.\d+)*|dylib|dll)$", re.IGNORECASE)
+
+
+@dataclass
+class BundleEntry:
+    """A file stored in a bundle."""
+
+    name: str
+    kind: str
+    # Bytes taken in the artifact
+    compressed: int
+    # Bytes once extracted or loaded
+    size: int
+    # Top-level package, library or file the entry is attributed to
+    group: str
+
+
+@dataclass
+class SizeGroup:
+    """Entries attributed to one package, library or file."""
+
+    name: str
+    files: int = 0
+    compressed: int = 0
+    size: int = 0
+    kinds: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, entry: BundleEntry) -> None:
+        self.files += 1
+        self.compressed += entry.compressed
+        self.size += entry.size
+        self.kinds[entry.kind] = self.kinds.get(entry.kind, 0) + entry.compressed
+
+    @property
+    def kind(self) -> str:
+        """Kinds of the entries, largest first."""
+        return ", ".join(sorted(self.kinds, key=lambda kind: -self.kinds[kind]))
+
+
+@dataclass
+class BundleReport:
+    """Size breakdown of a built executable or distribution folder."""
+
+    path: Path
+    layout: str
+    total_size: int
+    entries: List[BundleEntry]
+    python_library: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def compressed(self) -> int:
+        return sum(entry.compressed for entry in self.entries)
+
+    @property
+    def size(self) -> int:
+        return sum(entry.size for entry in self.entries)
+
+    def groups(self) -> List[SizeGroup]:
+        """
+        Aggregate entries per package, library or file.
+
+        Returns:
+            Groups, largest in the artifact first
+        """
+        groups: Dict[str, SizeGroup] = {}
+        for entry in self.entries:
+            groups.setdefault(entry.group, SizeGroup(entry.group)).add(entry)
+        return sorted(groups.values(), key=lambda group: (-group.compressed, group.name))
+
+    def kinds(self) -> List[SizeGroup]:
+        """
+        Aggregate entries per kind.
+
+        Returns:
+            Groups named after the kinds in ``KINDS`` order
+        """
+        groups = {kind: SizeGroup(kind) for kind in KINDS}
+        for entry in self.entries:
+            groups[entry.kind].add(entry)
+        return [group for group in groups.values() if group.files]
+
+    def top(self, count: int = 20) -> List[SizeGroup]:
+        """Get the largest contributors."""
+        return self.groups()[:count]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report to a JSON-compatible dictionary."""
+        return {
+            'path': str(self.path),
+            'layout': self.layout,
+            'total_size': self.total_size,
+            'compressed': self.compressed,
+            'size': self.size,
+            'python_library': self.python_library,
+            'duration': self.duration,
+            'groups': [
+                {
+                    'name': group.name,
+                    'kinds': group.kind,
+                    'files': group.files,
+                    'compressed': group.compressed,
+                    'size': group.size,
+                }
+                for group in self.groups()
+            ],
+            'entries': [
+                {
+                    'name': entry.name,
+                    'kind': entry.kind,
+                    'group': entry.group,
+                    'compressed': entry.compressed,
+                    'size': entry.size,
+                }
+                for entry in self.entries
+            ],
+        }
+
+
+def analyze_bundle(path: Path) -> BundleReport:
+    """
+    Break a PyInstaller build down by package, library and data file.
+
+    Args:
+        path: Onefile executable, onedir distribution folder, or any
+            executable with an appended archive
+
+    Returns:
+        Size report
+
+    Raises:
+        ValueError: If no PyInstaller archive is found
+    """
+    path = Path(path)
+    started = time.perf_counter()
+    if path.is_dir():
+        entries, python_library = _analyze_folder(path)
+        layout = "onedir"
+        total = sum(entry.compressed for entry in entries)
+    elif path.is_file():
+        entries, python_library = _analyze_executable(path)
+        if entries is None:
+            raise ValueError(f"Not a PyInstaller executable: {path}")
+        layout = "onefile"
+        total = path.stat().st_size
+    else:
+        raise ValueError(f"Artifact not found: {path}")
+    return BundleReport(
+        path=path,
+        layout=layout,
+        total_size=total,
+        entries=entries,
+        python_library=python_library,
+        duration=time.perf_counter() - started
+    )
+
+
+def _analyze_executable(path: Path) -> Tuple[Optional[List[BundleEntry]], Optional[str]]:
+    """Read the CArchive of an executable; ``None`` entries if there is none."""
+    size = path.stat().st_size
+    if size < COOKIE_SIZE:
+        return None, None
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # The bootloader contains the magic constant too, so the last valid cookie wins
+        end = size
+        while True:
+            cookie = mm.rfind(COOKIE_MAGIC, 0, end)
+            if cookie < 0:
+                return None, None
+            parsed = _read_carchive(mm, cookie)
+            if parsed is not None:
+                return parsed
+            end = cookie + len(COOKIE_MAGIC) - 1
+
+
+def _read_carchive(mm: mmap.mmap, cookie: int) -> Optional[Tuple[List[BundleEntry], Optional[str]]]:
+    """Read the archive ending with the cookie at an offset, if it is valid."""
+    if cookie + COOKIE_SIZE > len(mm):
+        return None
+    _, length, toc_offset, toc_length, _, library = struct.unpack_from(COOKIE_FORMAT, mm, cookie)
+    end = cookie + COOKIE_SIZE
+    start = end - length
+    # PyInstaller always records the Python library name
+    if start < 0 or toc_offset + toc_length > length or not library.strip(b"\0"):
+        return None
+
+    view = memoryview(mm)
+    try:
+        entries: List[BundleEntry] = []
+        stored = 0
+        pos = start + toc_offset
+        while pos < start + toc_offset + toc_length:
+            entry_length, offset, data_length, size, compressed, typecode = struct.unpack_from(
+                TOC_ENTRY_FORMAT, mm, pos
+            )
+            if entry_length < TOC_ENTRY_SIZE or offset + data_length > length:
+                return None
+            name = bytes(view[pos + TOC_ENTRY_SIZE:pos + entry_length]).rstrip(b"\0").decode('utf-8')
+            pos += entry_length
+            stored += data_length
+            data = view[start + offset:start + offset + data_length]
+            entries.extend(_archive_entries(name, typecode.decode('ascii'), data, size, bool(compressed)))
+    except (struct.error, UnicodeDecodeError):
+        return None
+    finally:
+        view.release()
+
+    # Everything around the archive's entries: bootloader, trailing
+    # signatures or section headers, and the TOC with its cookie
+    entries.append(BundleEntry(BOOTLOADER, "bootloader", start + len(mm) - end, start + len(mm) - end, BOOTLOADER))
+    entries.append(BundleEntry(ARCHIVE_INDEX, "index", length - stored, length - stored, ARCHIVE_INDEX))
+    return entries, library.rstrip(b"\0").decode('utf-8', 'replace') or None
+
+
+def _archive_entries(name: str, typecode: str, data: memoryview, size: int, compressed: bool) -> List[BundleEntry]:
+    """Classify one CArchive entry, expanding embedded module archives."""
+    if typecode == "z" and not compressed and bytes(data[:4]) == PYZ_MAGIC:
+        return _pyz_entries(data)
+    if typecode == "Z" or (typecode == "x" and Path(name).name == "base_library.zip"):
+        payload = zlib.decompress(data) if compressed else bytes(data)
+        entries = _zip_entries(io.BytesIO(payload))
+        # A compressed zip is shared out by member size, so entries still add up to the artifact
+        ratio = len(data) / len(payload) if payload else 1.0
+        for entry in entries:
+            entry.compressed = round(entry.compressed * ratio)
+        index = len(data) - sum(entry.compressed for entry in entries)
+        entries.append(BundleEntry(name, "index", index, max(size - sum(entry.size for entry in entries), 0), ARCHIVE_INDEX))
+        return entries
+    if typecode in ("m", "M"):
+        return [BundleEntry(name, "module", len(data), size, _module_group(name))]
+    if typecode == "s":
+        return [BundleEntry(name, "script", len(data), size, name)]
+    if typecode in ("o", "d", "n"):
+        # Runtime options, dependencies and symlinks hold no file data
+        return [BundleEntry(name, "index", len(data), size, ARCHIVE_INDEX)] if len(data) else []
+    if typecode == "b":
+        return [BundleEntry(name, _binary_kind(name), len(data), size, _path_group(name))]
+    return [BundleEntry(name, "data", len(data), size, _path_group(name))]
+
+
+def _pyz_entries(data: memoryview) -> List[BundleEntry]:
+    """List the compiled modules of a PYZ archive."""
+    (toc_offset,) = struct.unpack_from("!i", data, 8)
+    toc = marshal.loads(data[toc_offset:])
+    items = toc.items() if isinstance(toc, dict) else toc
+
+    entries = []
+    for name, (_, offset, length) in items:
+        blob = data[offset:offset + length]
+        try:
+            size = len(zlib.decompress(blob))
+        except zlib.error:
+            # Encrypted archives (PyInstaller < 6) cannot be inflated
+            size = length
+        entries.append(BundleEntry(name, "module", length, size, _module_group(name)))
+    overhead = len(data) - sum(entry.compressed for entry in entries)
+    entries.append(BundleEntry("PYZ", "index", overhead, overhead, ARCHIVE_INDEX))
+    return entries
+
+
+def _zip_entries(source: Any) -> List[BundleEntry]:
+    """List the members of a zip of modules such as ``base_library.zip``."""
+    entries = []
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            module = info.filename.rsplit(".", 1)[0].replace("/", ".")
+            if module.endswith(".__init__"):
+                module = module[:-len(".__init__")]
+            entries.append(BundleEntry(info.filename, "module", info.compress_size, info.file_size, _module_group(module)))
+    return entries
+
+
+def _analyze_folder(folder: Path) -> Tuple[List[BundleEntry], Optional[str]]:
+    """Attribute every file of a onedir distribution."""
+    entries: List[BundleEntry] = []
+    python_library = None
+    contents = _contents_dir(folder)
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            file_path = Path(dirpath, filename)
+            # Symlinks point at files that are counted already
+            if file_path.is_symlink():
+                continue
+            if Path(dirpath) == folder:
+                found, library = _analyze_executable(file_path)
+                if found is not None:
+                    entries.extend(found)
+                    python_library = python_library or library
+                    continue
+            name = file_path.relative_to(contents if contents in file_path.parents else folder).as_posix()
+            entries.extend(_file_entries(file_path, name))
+    return entries, python_library
+
+
+def _contents_dir(folder: Path) -> Path:
+    """Find the folder holding the collected files (``_internal`` since PyInstaller 6)."""
+    for child in sorted(folder.iterdir()):
+        if child.is_dir() and not child.is_symlink() and (child / "base_library.zip").is_file():
+            return child
+    return folder
+
+
+def _file_entries(path: Path, name: str) -> List[BundleEntry]:
+    """Classify one file of a onedir distribution."""
+    size = path.stat().st_size
+    if name == "base_library.zip":
+        entries = _zip_entries(path)
+        index = size - sum(entry.compressed for entry in entries)
+        entries.append(BundleEntry(name, "index", index, index, ARCHIVE_INDEX))
+        return entries
+    if path.suffix in (".pyc", ".py"):
+        module = name.rsplit(".", 1)[0].replace("/", ".")
+        return [BundleEntry(name, "module", size, size, _module_group(module))]
+    if _LIBRARY.search(name) or _EXTENSION.search(name):
+        return [BundleEntry(name, _binary_kind(name), size, size, _path_group(name))]
+    return [BundleEntry(name, "data", size, size, _path_group(name))]
+
+
+def _binary_kind(name: str) -> str:
+    return "extension" if _EXTENSION.search(name) else "library"
+
+
+def _module_group(module: str) -> str:
+    return module.split(".")[0]
+
+
+def _path_group(name: str) -> str:
+    """Attribute a collected file to its top-level package or to itself."""
+    parts = name.replace("\\", "/").split("/")
+    # Standard library extension modules: python3.11/lib-dynload/_ssl.cpython-311-...so
+    if "lib-dynload" in parts[:-1]:
+        return parts[-1].split(".")[0]
+    if len(parts) == 1:
+        return _EXTENSION.sub("", parts[0]) if _EXTENSION.search(parts[0]) else parts[0]
+    top = parts[0]
+    # Vendored libraries and metadata belong to their package: numpy.libs, numpy-1.26.4.dist-info
+    if top.endswith(".libs"):
+        return top[:-len(".libs")]
+    if top.endswith((".dist-info", ".egg-info")):
+        return top.split("-")[0]
+    return top
@@ -0,0 +1,228 @@
+"""
+Retained build artifacts for P2E.
+"""
+
+import os
+import re
+import secrets
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from p2e.core.cache import default_cache_root
+
+# Default retention: one day, 10 GiB and 100 artifacts, whichever is hit first
+DEFAULT_MAX_AGE = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+DEFAULT_MAX_COUNT = 100
+
+_TOKEN = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+
+def archive_onedir(folder: Path, dest_dir: Optional[Path] = None) -> Path:
+    """
+    Get a zip archive of a onedir distribution.
+
+    An existing archive is reused unless the folder changed after it was
+    written, e.g. by a rebuild into the same output directory.
+
+    Args:
+        folder: Distribution folder
+        dest_dir: Directory for the archive; next to the folder by default
+
+    Returns:
+        Path of ``<folder name>.zip``
+    """
+    dest_dir = dest_dir or folder.parent
+    archive = dest_dir / f"{folder.name}.zip"
+    try:
+        fresh = archive.stat().st_mtime_ns >= _newest_mtime(folder)
+    except FileNotFoundError:
+        fresh = False
+    if not fresh:
+        # Build under a private name so concurrent readers never see a partial zip
+        staging = shutil.make_archive(
+            str(dest_dir / f".{folder.name}-{uuid.uuid4().hex}"),
+            "zip",
+            root_dir=folder.parent,
+            base_dir=folder.name
+        )
+        os.replace(staging, archive)
+    return archive
+
+
+def _newest_mtime(folder: Path) -> int:
+    """Get the latest modification time of a folder or anything in it."""
+    newest = folder.stat().st_mtime_ns
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for name in dirnames + filenames:
+            try:
+                newest = max(newest, os.lstat(os.path.join(dirpath, name)).st_mtime_ns)
+            except OSError:
+                pass
+    return newest
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A downloadable file kept in an artifact store."""
+
+    token: str
+    path: Path
+    size: int
+    created_at: float
+
+    @property
+    def name(self) -> str:
+        """File name offered to the downloader."""
+        return self.path.name
+
+
+class ArtifactStore:
+    """
+    Keep build outputs on disk for download, with a retention policy.
+
+    Each artifact lives in its own directory named by an unguessable token.
+    Artifacts older than ``max_age`` seconds are expired, and the oldest
+    are evicted once more than ``max_count`` artifacts or ``max_bytes``
+    bytes are stored.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_count: int = DEFAULT_MAX_COUNT
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            root: Store directory; defaults to ``artifacts`` in the cache root
+            max_age: Seconds an artifact is kept
+            max_bytes: Total size budget
+            max_count: Maximum number of artifacts
+        """
+        self.root = Path(root) if root else default_cache_root() / "artifacts"
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.max_count = max_count
+        self._lock = threading.Lock()
+
+    def add(self, path: Path, move: bool = False) -> Artifact:
+        """
+        Store a build output.
+
+        Onedir distributions (folders) are stored as a zip archive.
+
+        Args:
+            path: Executable or distribution folder
+            move: Move a file into the store instead of copying it
+
+        Returns:
+            The stored artifact
+        """
+        token = secrets.token_urlsafe(16)
+        staging = self.root / f".{token}"
+        staging.mkdir(parents=True)
+        try:
+            if path.is_dir():
+                stored = archive_onedir(path, staging)
+            elif move:
+                stored = Path(shutil.move(str(path), str(staging / path.name)))
+            else:
+                stored = Path(shutil.copy2(path, staging / path.name))
+            # Fresh mtime: retention counts from when the artifact was stored
+            os.utime(staging)
+            os.replace(staging, self.root / token)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        artifact = self._load(token)
+        self.prune(keep=token)
+        return artifact
+
+    def get(self, token: str) -> Optional[Artifact]:
+        """
+        Look up an artifact.
+
+        Args:
+            token: Artifact token
+
+        Returns:
+            The artifact, or None if it is unknown or expired
+        """
+        if not _TOKEN.match(token):
+            return None
+        artifact = self._load(token)
+        if artifact and self._expired(artifact, time.time()):
+            self._remove(token)
+            return None
+        return artifact
+
+    def artifacts(self) -> List[Artifact]:
+        """Get all stored artifacts, oldest first."""
+        if not self.root.is_dir():
+            return []
+        found = []
+        for entry in self.root.iterdir():
+            if entry.is_dir() and _TOKEN.match(entry.name):
+                artifact = self._load(entry.name)
+                if artifact:
+                    found.append(artifact)
+        return sorted(found, key=lambda artifact: artifact.created_at)
+
+    def prune(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Apply the retention policy.
+
+        Args:
+            keep: Token that must not be evicted for size or count
+
+        Returns:
+            Tokens of removed artifacts
+        """
+        with self._lock:
+            now = time.time()
+            artifacts = self.artifacts()
+            removed = [a.token for a in artifacts if self._expired(a, now) and a.token != keep]
+            remaining = [a for a in artifacts if a.token not in removed]
+            total = sum(a.size for a in remaining)
+            for artifact in list(remaining):
+                if len(remaining) <= self.max_count and total <= self.max_bytes:
+                    break
+                if artifact.token == keep:
+                    continue
+                remaining.remove(artifact)
+                total -= artifact.size
+                removed.append(artifact.token)
+            for token in removed:
+                self._remove(token)
+            return removed
+
+    def _expired(self, artifact: Artifact, now: float) -> bool:
+        return now - artifact.created_at > self.max_age
+
+    def _load(self, token: str) -> Optional[Artifact]:
+        folder = self.root / token
+        try:
+            files = [entry for entry in folder.iterdir() if entry.is_file()]
+            if len(files) != 1:
+                return None
+            return Artifact(
+                token=token,
+                path=files[0],
+                size=files[0].stat().st_size,
+                created_at=folder.stat().st_mtime
+            )
+        except OSError:
+            return None
+
+    def _remove(self, token: str) -> None:
+        shutil.rmtree(self.root / token, ignore_errors=True)
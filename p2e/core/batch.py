@@ -0,0 +1,313 @@
+"""
+Parallel batch builds for P2E.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+from p2e.core.config import BuildConfig
+from p2e.core.converter import PyConverter
+from p2e.core.ledger import BuildLedger
+from p2e.core.probe import resolve_python
+from p2e.core.result import BuildResult, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Manifest keys whose relative values are resolved against the manifest folder
+_MANIFEST_PATH_KEYS = (
+    "script_path", "output_dir", "icon_path", "cache_dir", "trace_profile", "requirements", "wheelhouse"
+)
+
+# Number of trailing log lines kept in each job result
+LOG_TAIL_LINES = 50
+
+
+@dataclass
+class BatchJob:
+    """A single build within a batch."""
+
+    index: int
+    config: BuildConfig
+    status: JobStatus = JobStatus.QUEUED
+    duration: float = 0.0
+    output_path: Optional[Path] = None
+    error: Optional[str] = None
+    log_tail: List[str] = field(default_factory=list)
+    log_file: Optional[Path] = None
+    result: Optional[BuildResult] = None
+
+    @property
+    def name(self) -> str:
+        """Display name of the job."""
+        return str(self.config.exe_name)
+
+
+@dataclass
+class BatchResult:
+    """Aggregated outcome of a batch run."""
+
+    jobs: List[BatchJob]
+    duration: float = 0.0
+
+    def _with_status(self, status: JobStatus) -> List[BatchJob]:
+        return [job for job in self.jobs if job.status == status]
+
+    @property
+    def succeeded(self) -> List[BatchJob]:
+        """Jobs that built successfully."""
+        return self._with_status(JobStatus.SUCCESS)
+
+    @property
+    def failed(self) -> List[BatchJob]:
+        """Jobs that failed."""
+        return self._with_status(JobStatus.FAILED)
+
+    @property
+    def skipped(self) -> List[BatchJob]:
+        """Jobs that never ran because the batch stopped early."""
+        return self._with_status(JobStatus.SKIPPED)
+
+    @property
+    def success(self) -> bool:
+        """Whether every job built successfully."""
+        return len(self.succeeded) == len(self.jobs)
+
+
+def load_manifest(path: Path) -> List[BuildConfig]:
+    """
+    Load build configurations from a batch manifest.
+
+    The manifest is a YAML or JSON file holding either a list of build
+    configurations or a mapping with a ``builds`` list and optional
+    ``defaults`` merged into every entry. Each entry uses the same schema
+    as a single build config file. Relative paths are resolved against the
+    manifest's folder.
+
+    Args:
+        path: Manifest file (.json, .yaml or .yml)
+
+    Returns:
+        List of build configurations
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix == '.json':
+            data = json.load(f)
+        elif path.suffix in ['.yaml', '.yml']:
+            data = yaml.safe_load(f)
+        else:
+            raise ValueError(f"Manifest must be .json or .yaml: {path}")
+
+    defaults: Dict[str, Any] = {}
+    if isinstance(data, dict):
+        defaults = data.get('defaults') or {}
+        entries = data.get('builds') or []
+    else:
+        entries = data or []
+
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Manifest contains no builds: {path}")
+
+    base_dir = path.resolve().parent
+    configs = []
+    for entry in entries:
+        merged = dict(defaults)
+        merged.update(entry)
+        for key in _MANIFEST_PATH_KEYS:
+            value = merged.get(key)
+            if value and not Path(value).is_absolute():
+                merged[key] = str(base_dir / value)
+        configs.append(BuildConfig.from_dict(merged))
+
+    check_unique_outputs(configs)
+    return configs
+
+
+def check_unique_outputs(configs: List[BuildConfig]) -> None:
+    """Ensure no two builds write the same executable."""
+    seen = set()
+    for config in configs:
+        target = (Path(str(config.output_dir)).resolve(), config.exe_name)
+        if target in seen:
+            raise ValueError(
+                f"Duplicate build output: {config.exe_name} in {config.output_dir}"
+            )
+        seen.add(target)
+
+
+def _run_job(config: BuildConfig, log_file: Optional[Path]) -> Dict[str, Any]:
+    """Build one configuration in a worker process."""
+    lines: List[str] = []
+    start = time.perf_counter()
+    handle = open(log_file, 'w', encoding='utf-8') if log_file else None
+
+    def log(message: str) -> None:
+        lines.append(message)
+        del lines[:-LOG_TAIL_LINES]
+        if handle:
+            handle.write(message + "\n")
+
+    result = None
+    try:
+        converter = PyConverter(config, log_callback=log)
+        result = converter.build(realtime_output=True, check_deps=False)
+        success = result.success
+        output_path = converter.get_output_path() if success else None
+        error = None if success else (result.error or "Build failed")
+    except Exception as e:
+        success, output_path, error = False, None, str(e)
+    finally:
+        if handle:
+            handle.close()
+
+    return {
+        'success': success,
+        'duration': time.perf_counter() - start,
+        'output_path': output_path,
+        'error': error,
+        'log_tail': lines,
+        'result': result,
+    }
+
+
+class BatchBuilder:
+    """Run many builds concurrently on a process pool."""
+
+    def __init__(
+        self,
+        configs: List[BuildConfig],
+        jobs: Optional[int] = None,
+        fail_fast: bool = False,
+        log_dir: Optional[Path] = None,
+        status_callback: Optional[Callable[[BatchJob], None]] = None,
+        ledger: Optional[BuildLedger] = None
+    ):
+        """
+        Initialize the batch builder.
+
+        Args:
+            configs: Build configurations to run
+            jobs: Maximum number of concurrent builds (defaults to CPU count)
+            fail_fast: Stop scheduling new builds after the first failure
+            log_dir: Optional folder receiving one full log file per build
+            status_callback: Optional callback invoked on each job status change
+            ledger: Optional ledger every finished build is recorded in
+        """
+        check_unique_outputs(configs)
+        self.jobs = [BatchJob(index=i, config=config) for i, config in enumerate(configs)]
+        self.max_workers = max(1, jobs or os.cpu_count() or 1)
+        self.fail_fast = fail_fast
+        self.log_dir = Path(log_dir) if log_dir else None
+        self.status_callback = status_callback
+        self.ledger = ledger
+
+    @classmethod
+    def from_manifest(cls, path: Path, **kwargs: Any) -> 'BatchBuilder':
+        """Create a batch builder from a manifest file."""
+        return cls(load_manifest(path), **kwargs)
+
+    def _set_status(self, job: BatchJob, status: JobStatus) -> None:
+        job.status = status
+        if self.status_callback:
+            self.status_callback(job)
+
+    def _record(self, job: BatchJob) -> None:
+        if not self.ledger:
+            return
+        try:
+            self.ledger.record(
+                job.config,
+                job.result,
+                source="batch",
+                log_path=job.log_file,
+                error=job.error
+            )
+        except sqlite3.Error as e:
+            logger.warning("Could not record %s in the build ledger: %s", job.name, e)
+
+    def _log_file(self, job: BatchJob) -> Optional[Path]:
+        if not self.log_dir:
+            return None
+        return self.log_dir / f"{job.index:03d}-{job.name}.log"
+
+    def run(self) -> BatchResult:
+        """
+        Run all builds.
+
+        PyInstaller is checked once per build interpreter up front rather
+        than once per build; jobs whose interpreter lacks it fail without
+        running.
+        At most ``jobs`` builds run at once. In fail-fast mode, builds that
+        are already running are allowed to finish but no new build starts
+        after the first failure; the remaining jobs are marked skipped.
+
+        Returns:
+            Aggregated batch result
+        """
+        start = time.perf_counter()
+        if self.log_dir:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+
+        # Probe (and if needed install) PyInstaller once per interpreter;
+        # jobs with requirements get it in their pooled environment
+        interpreters: Dict[str, List[BatchJob]] = {}
+        for job in self.jobs:
+            if not job.config.requirements:
+                python = resolve_python(str(job.config.python) if job.config.python else None)
+                interpreters.setdefault(python, []).append(job)
+        stop = False
+        for python, jobs in interpreters.items():
+            messages: List[str] = []
+            if PyConverter(jobs[0].config, log_callback=messages.append).ensure_pyinstaller():
+                continue
+            for job in jobs:
+                job.error = messages[-1] if messages else f"PyInstaller is not available for {python}"
+                self._set_status(job, JobStatus.FAILED)
+            stop = stop or self.fail_fast
+
+        pending = [job for job in self.jobs if job.status != JobStatus.FAILED]
+        running: Dict[Future, BatchJob] = {}
+
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(self.jobs))) as pool:
+            while pending or running:
+                while pending and not stop and len(running) < self.max_workers:
+                    job = pending.pop(0)
+                    job.log_file = self._log_file(job)
+                    running[pool.submit(_run_job, job.config, job.log_file)] = job
+                    self._set_status(job, JobStatus.RUNNING)
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        outcome = {'success': False, 'error': str(e)}
+                    job.duration = outcome.get('duration', 0.0)
+                    job.output_path = outcome.get('output_path')
+                    job.error = outcome.get('error')
+                    job.log_tail = outcome.get('log_tail', [])
+                    job.result = outcome.get('result')
+                    self._record(job)
+                    if outcome['success']:
+                        self._set_status(job, JobStatus.SUCCESS)
+                    else:
+                        self._set_status(job, JobStatus.FAILED)
+                        stop = stop or self.fail_fast
+
+        for job in pending:
+            self._set_status(job, JobStatus.SKIPPED)
+
+        return BatchResult(jobs=self.jobs, duration=time.perf_counter() - start)
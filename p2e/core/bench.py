@@ -0,0 +1,365 @@
+"""
+Executable startup benchmarks for P2E.
+
+An executable is launched repeatedly and timed from launch to exit and to
+its first byte of output. Onefile executables unpack themselves into a
+``_MEI*`` folder under the temporary directory on every start; each run
+gets a private temporary directory so the unpacking can be timed from the
+files it writes.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from p2e import __version__
+from p2e.core.ledger import percentile
+
+# Seconds between checks of a onefile executable's unpack folder
+EXTRACTION_POLL_INTERVAL = 0.002
+
+# Metrics summarized for cold and warm runs
+METRICS = ("wall", "first_output", "extraction")
+
+
+@dataclass
+class StartupRun:
+    """Timings of one launch, in seconds."""
+
+    cold: bool
+    wall: float
+    returncode: int
+    # None when the executable printed nothing
+    first_output: Optional[float] = None
+    # None unless the executable unpacked itself (onefile)
+    extraction: Optional[float] = None
+
+
+@dataclass
+class StartupReport:
+    """Startup benchmark of one executable."""
+
+    executable: str
+    args: List[str]
+    size: int
+    runs: List[StartupRun]
+    # Whether cold runs started with the executable evicted from the page cache
+    evicted: bool
+    label: Optional[str] = None
+    p2e_version: str = __version__
+    platform: str = field(default_factory=platform.platform)
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def layout(self) -> str:
+        return "onefile" if any(run.extraction is not None for run in self.runs) else "onedir"
+
+    @property
+    def failures(self) -> int:
+        return sum(1 for run in self.runs if run.returncode != 0)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Get percentiles per metric for cold and warm runs.
+
+        Returns:
+            ``{"cold"|"warm": {metric: {"min", "p50", "p95", "mean"}}}``;
+            metrics without samples are left out
+        """
+        summary: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for phase in ("cold", "warm"):
+            runs = [run for run in self.runs if run.cold == (phase == "cold")]
+            metrics = {}
+            for metric in METRICS:
+                values = sorted(getattr(run, metric) for run in runs if getattr(run, metric) is not None)
+                if values:
+                    metrics[metric] = {
+                        'min': values[0],
+                        'p50': percentile(values, 0.5),
+                        'p95': percentile(values, 0.95),
+                        'mean': sum(values) / len(values),
+                    }
+            if metrics:
+                summary[phase] = metrics
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report to a JSON-compatible dictionary."""
+        data = asdict(self)
+        data['layout'] = self.layout
+        data['summary'] = self.summary()
+        return data
+
+
+def find_executable(path: Path) -> Path:
+    """
+    Resolve the executable of a build output.
+
+    Args:
+        path: Executable, or onedir distribution folder
+
+    Returns:
+        The executable
+
+    Raises:
+        ValueError: If a folder has no executable named after it
+    """
+    path = Path(path)
+    if path.is_dir():
+        for name in (path.name, f"{path.name}.exe"):
+            if (path / name).is_file():
+                return path / name
+        raise ValueError(f"No executable named {path.name} in {path}")
+    return path
+
+
+def _bundle_files(executable: Path) -> List[Path]:
+    """Get the executable and, for onedir builds, every file next to it."""
+    files = [executable]
+    for child in executable.parent.iterdir():
+        if child.is_dir() and (child / "base_library.zip").is_file():
+            files.extend(path for path in child.rglob("*") if path.is_file() and not path.is_symlink())
+    return files
+
+
+def evict_from_page_cache(paths: Sequence[Path]) -> bool:
+    """
+    Ask the OS to drop cached pages of files, to simulate a cold start.
+
+    Args:
+        paths: Files to evict
+
+    Returns:
+        Whether eviction is supported on this platform
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+
+class _ExtractionWatch:
+    """Track the newest file a onefile executable unpacks into a folder."""
+
+    def __init__(self, folder: Path, started: float):
+        self.folder = folder
+        self.started = started
+        self.latest: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(EXTRACTION_POLL_INTERVAL):
+            for unpacked in self.folder.glob("_MEI*"):
+                for dirpath, _, filenames in os.walk(unpacked):
+                    for filename in filenames:
+                        try:
+                            modified = os.stat(os.path.join(dirpath, filename)).st_mtime
+                        except OSError:
+                            continue
+                        if self.latest is None or modified > self.latest:
+                            self.latest = modified
+
+    def stop(self) -> Optional[float]:
+        """Stop watching and get seconds from launch until the last file was written."""
+        self._stop.set()
+        self._thread.join()
+        return max(self.latest - self.started, 0.0) if self.latest is not None else None
+
+
+def _first_output(stream, started: float, found: List[float], sink: Optional[List[bytes]] = None) -> None:
+    """Drain a pipe, noting when its first byte arrived."""
+    fd = stream.fileno()
+    while True:
+        chunk = os.read(fd, 65536)
+        if not chunk:
+            break
+        if not found:
+            found.append(time.perf_counter() - started)
+        if sink is not None:
+            sink.append(chunk)
+
+
+def time_startup(
+    executable: Path,
+    args: Sequence[str] = (),
+    cold: bool = False,
+    timeout: float = 60.0,
+    stderr: Optional[List[bytes]] = None
+) -> StartupRun:
+    """
+    Launch an executable once and time its startup.
+
+    Args:
+        executable: Executable to run
+        args: Arguments, e.g. ``["--version"]``
+        cold: Mark the run as a cold start
+        timeout: Seconds after which the run is killed
+        stderr: List collecting the run's error output, kept even when
+            the run times out
+
+    Returns:
+        Timings of the run
+
+    Raises:
+        RuntimeError: If the executable does not exit in time
+    """
+    with tempfile.TemporaryDirectory(prefix="p2e-bench-") as temp:
+        env = dict(os.environ, TMPDIR=temp, TMP=temp, TEMP=temp)
+        first: List[float] = []
+        wall_clock = time.time()
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [str(executable), *args],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env
+        )
+        watch = _ExtractionWatch(Path(temp), wall_clock)
+        readers = [
+            threading.Thread(target=_first_output, args=(stream, started, first, sink), daemon=True)
+            for stream, sink in ((process.stdout, None), (process.stderr, stderr))
+        ]
+        for reader in readers:
+            reader.start()
+        try:
+            returncode = process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            raise RuntimeError(f"{executable} did not exit within {timeout:g}s")
+        finally:
+            wall = time.perf_counter() - started
+            extraction = watch.stop()
+            for reader in readers:
+                # Output pipes inherited by a leftover grandchild must not hang the benchmark
+                reader.join(timeout=timeout)
+            process.stdout.close()
+            process.stderr.close()
+    return StartupRun(
+        cold=cold,
+        wall=wall,
+        returncode=returncode,
+        first_output=min(first) if first else None,
+        extraction=min(extraction, wall) if extraction is not None else None
+    )
+
+
+def bench_startup(
+    executable: Path,
+    args: Sequence[str] = (),
+    runs: int = 10,
+    cold_runs: int = 3,
+    warmup: int = 1,
+    timeout: float = 60.0,
+    label: Optional[str] = None,
+    progress: Optional[Any] = None
+) -> StartupReport:
+    """
+    Benchmark how quickly an executable starts.
+
+    Cold runs start with the bundle's files evicted from the OS page cache
+    where the platform allows it (Linux); elsewhere only the first run
+    counts as cold. Warm runs follow ``warmup`` discarded launches.
+
+    Args:
+        executable: Executable or onedir distribution folder
+        args: Arguments for every launch, e.g. ``["--version"]``
+        runs: Number of warm runs
+        cold_runs: Number of cold runs
+        warmup: Launches before the warm runs that are not counted
+        timeout: Seconds after which a launch is killed
+        label: Free-form tag stored with the results, e.g. a release
+        progress: Optional callback receiving each finished run
+
+    Returns:
+        Benchmark report
+    """
+    executable = find_executable(executable).absolute()
+    files = _bundle_files(executable)
+    results: List[StartupRun] = []
+
+    evicted = evict_from_page_cache(files)
+    for index in range(cold_runs if evicted else min(cold_runs, 1)):
+        if index:
+            evict_from_page_cache(files)
+        results.append(time_startup(executable, args, cold=True, timeout=timeout))
+        if progress:
+            progress(results[-1])
+
+    for _ in range(warmup):
+        time_startup(executable, args, timeout=timeout)
+    for _ in range(runs):
+        results.append(time_startup(executable, args, timeout=timeout))
+        if progress:
+            progress(results[-1])
+
+    return StartupReport(
+        executable=str(executable),
+        args=list(args),
+        size=sum(path.stat().st_size for path in files),
+        runs=results,
+        evicted=evicted,
+        label=label
+    )
+
+
+def load_history(path: Path) -> List[Dict[str, Any]]:
+    """
+    Load benchmark results saved with ``append_history``.
+
+    Args:
+        path: JSON history file
+
+    Returns:
+        Saved reports, oldest first; empty if the file does not exist
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+    except FileNotFoundError:
+        return []
+    if not isinstance(history, list):
+        raise ValueError(f"Not a startup benchmark history: {path}")
+    return history
+
+
+def append_history(report: StartupReport, path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Append a report to a JSON history file.
+
+    Args:
+        report: Report to save
+        path: JSON history file, created if missing
+
+    Returns:
+        The latest earlier report for the same executable name, if any
+    """
+    path = Path(path)
+    history = load_history(path)
+    name = Path(report.executable).name
+    previous = next((entry for entry in reversed(history) if Path(entry['executable']).name == name), None)
+    history.append(report.to_dict())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temp, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+    os.replace(temp, path)
+    return previous
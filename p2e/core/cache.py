@@ -0,0 +1,546 @@
+"""
+Content-addressed build cache for P2E.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import platform
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from p2e.core.config import BuildConfig
+from p2e.core.probe import identify_modules, interpreter_identity, probe_pyinstaller
+from p2e.utils.locks import FileLock
+from p2e.utils.modules import resolve_local_module
+
+CACHE_DIR_ENV = "P2E_CACHE_DIR"
+
+# Bump when the key layout changes so stale entries are never matched
+CACHE_FORMAT_VERSION = 1
+
+# Config keys that do not influence the produced artifact. Input paths are
+# excluded as strings because their contents are hashed separately.
+NON_ARTIFACT_KEYS = (
+    "script_path",
+    "output_dir",
+    "icon_path",
+    "trace_profile",
+    "additional_files",
+    "additional_folders",
+    "entry_points",
+    "use_proxy",
+    "proxy_url",
+    "use_cache",
+    "cache_dir",
+    "requirements",
+    "python",
+    "wheelhouse",
+    "clean_build",
+    "incremental",
+)
+
+# Incremental work directories kept per executable name
+INCREMENTAL_KEEP = 3
+
+_CHUNK_SIZE = 1024 * 1024
+
+# pip treats "#" at the start of a line or after whitespace as a comment
+_REQUIREMENT_COMMENT = re.compile(r"(^|\s)#.*$")
+_REQUIREMENT_INCLUDE = re.compile(r"^(-r|-c|--requirement|--constraint)[\s=]+(?P<path>.+)$")
+
+
+def default_cache_root() -> Path:
+    """
+    Get the root directory for P2E caches.
+
+    Honours the ``P2E_CACHE_DIR`` environment variable, otherwise uses the
+    platform's user cache location.
+
+    Returns:
+        Cache root directory (not necessarily existing yet)
+    """
+    env_dir = os.environ.get(CACHE_DIR_ENV)
+    if env_dir:
+        return Path(env_dir)
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or str(Path.home() / "AppData" / "Local")
+        return Path(base) / "p2e" / "cache"
+    base = os.environ.get("XDG_CACHE_HOME") or str(Path.home() / ".cache")
+    return Path(base) / "p2e"
+
+
+def hash_file(path: Path) -> str:
+    """Compute the SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_tree(path: Path) -> str:
+    """Compute a digest over every file (relative path and contents) in a folder."""
+    digest = hashlib.sha256()
+    for file_path in sorted(p for p in path.rglob("*") if p.is_file()):
+        digest.update(file_path.relative_to(path).as_posix().encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(hash_file(file_path).encode('ascii'))
+    return digest.hexdigest()
+
+
+def hash_path(path: Path) -> str:
+    """Hash a file or folder, returning a marker for missing paths."""
+    if path.is_dir():
+        return hash_tree(path)
+    if path.is_file():
+        return hash_file(path)
+    return "missing"
+
+
+def hash_requirements(path: Path) -> str:
+    """
+    Hash a requirements file, ignoring comments, blank lines and whitespace.
+
+    Files included with ``-r``/``-c`` are hashed in place, so changing a
+    nested constraints file changes the digest too.
+
+    Args:
+        path: Requirements file
+
+    Returns:
+        Hex digest of the normalized requirements
+    """
+    digest = hashlib.sha256()
+    for line in _requirement_lines(Path(path), set()):
+        digest.update(line.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def _requirement_lines(path: Path, seen: Set[Path]) -> Iterator[str]:
+    """Yield the normalized lines of a requirements file and its includes."""
+    path = path.resolve()
+    if path in seen:
+        return
+    seen.add(path)
+    try:
+        text = path.read_text(encoding='utf-8')
+    except OSError:
+        yield f"missing {path.name}"
+        return
+
+    for line in text.replace("\\\n", "").splitlines():
+        line = " ".join(_REQUIREMENT_COMMENT.sub("", line).split())
+        if not line:
+            continue
+        yield line
+        include = _REQUIREMENT_INCLUDE.match(line)
+        if include:
+            yield from _requirement_lines(path.parent / include.group("path"), seen)
+
+
+def config_fingerprint(config: BuildConfig) -> Dict[str, Any]:
+    """
+    Get the canonical, artifact-relevant subset of a configuration.
+
+    Args:
+        config: Build configuration
+
+    Returns:
+        Dictionary of settings that affect the produced executable
+    """
+    data = config.to_dict()
+    for key in NON_ARTIFACT_KEYS:
+        data.pop(key, None)
+    return data
+
+
+def config_digest(config: BuildConfig) -> str:
+    """Get a stable digest of the artifact-relevant configuration."""
+    canonical = json.dumps(config_fingerprint(config), sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _parse_imports(source: bytes, filename: str) -> List[Tuple[str, int]]:
+    """Extract ``(module, level)`` pairs for every import in a source file."""
+    try:
+        tree = ast.parse(source, filename=filename)
+    except (SyntaxError, ValueError):
+        return []
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, 0) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            imports.append((module, node.level))
+            # "from pkg import submodule" may refer to a module file
+            for alias in node.names:
+                if alias.name != "*":
+                    name = f"{module}.{alias.name}" if module else alias.name
+                    imports.append((name, node.level))
+    return imports
+
+
+def module_closure(script_path: Path, python: Optional[str] = None) -> Dict[str, str]:
+    """
+    Compute the imported module closure of a script.
+
+    Local modules (next to the script) are followed recursively and
+    identified by content hash; everything else is identified by the
+    distribution version or location on disk the build interpreter
+    resolves it to.
+
+    Args:
+        script_path: Entry script
+        python: Interpreter building the script (defaults to ``sys.executable``)
+
+    Returns:
+        Mapping of module name to a content/version identifier
+    """
+    root = script_path.parent
+    closure: Dict[str, str] = {}
+    external: Set[str] = set()
+    seen: Set[Path] = set()
+    pending = [script_path]
+
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        source = current.read_bytes()
+        closure[current.relative_to(root).as_posix()] = hashlib.sha256(source).hexdigest()
+
+        for name, level in _parse_imports(source, str(current)):
+            if level:
+                base = current.parent
+                for _ in range(level - 1):
+                    base = base.parent
+            else:
+                base = root
+            local = resolve_local_module(name, base)
+            if local is not None and root in local.parents:
+                pending.append(local)
+            elif not level and name:
+                external.add(name.split(".")[0])
+
+    closure.update(identify_modules(external, python))
+    return closure
+
+
+def pooled_python(config: BuildConfig) -> Optional[str]:
+    """
+    Get the interpreter of the pooled environment a build with requirements uses.
+
+    Args:
+        config: Build configuration with requirements
+
+    Returns:
+        Interpreter path, or None if the environment was not created yet
+    """
+    # Imported here since the pool builds on this module
+    from p2e.core.venvs import EnvPool
+
+    pool = EnvPool(Path(config.cache_dir) / "venvs" if config.cache_dir else None)
+    env = pool.find(config.requirements, str(config.python) if config.python else None)
+    return str(env.python) if env else None
+
+
+def environment_fingerprint(config: Optional[BuildConfig] = None) -> Dict[str, Any]:
+    """
+    Describe the interpreter and tooling that produce the artifact.
+
+    Builds with requirements run in a pooled virtual environment, which is
+    identified by its base interpreter and the hash of the requirements,
+    plus the PyInstaller version installed in it once it exists: loose pins
+    resolve to whatever was current when the environment was created. A
+    missing environment is never created just to compute the fingerprint.
+
+    Args:
+        config: Build configuration (defaults to building with this interpreter)
+
+    Returns:
+        Dictionary identifying the build environment
+    """
+    python = str(config.python) if config and config.python else sys.executable
+    fingerprint: Dict[str, Any] = {
+        "python": interpreter_identity(python)["version"],
+        "executable": os.path.realpath(python),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+    if config and config.requirements:
+        fingerprint["requirements"] = hash_requirements(config.requirements)
+        env_python = pooled_python(config)
+        if env_python:
+            fingerprint["pyinstaller"] = probe_pyinstaller(env_python).version
+    else:
+        fingerprint["pyinstaller"] = probe_pyinstaller(python).version
+    return fingerprint
+
+
+def incremental_work_dir(config: BuildConfig) -> Path:
+    """
+    Get the persistent PyInstaller work directory for incremental builds.
+
+    The directory is keyed by executable name and a hash of the script
+    location, artifact-relevant configuration and build environment, so a
+    changed configuration or toolchain starts from a fresh analysis while
+    unchanged ones keep reusing PyInstaller's cached TOCs.
+
+    Args:
+        config: Build configuration
+
+    Returns:
+        Work directory (not necessarily existing yet)
+    """
+    root = Path(config.cache_dir) if config.cache_dir else default_cache_root()
+    inputs = {
+        "script": str(config.script_path.absolute()),
+        "config": config_fingerprint(config),
+        "environment": environment_fingerprint(config),
+    }
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode('utf-8'))
+    return root / "work" / f"{config.exe_name}-{digest.hexdigest()[:16]}"
+
+
+def prune_work_dirs(work_dir: Path, keep: int = INCREMENTAL_KEEP) -> List[Path]:
+    """
+    Remove the least recently used work directories of the same executable.
+
+    Args:
+        work_dir: Work directory currently in use (always kept)
+        keep: Number of directories to keep, including ``work_dir``
+
+    Returns:
+        Removed directories
+    """
+    prefix = work_dir.name.rsplit("-", 1)[0]
+    siblings = [
+        p for p in work_dir.parent.glob(f"{prefix}-*")
+        if p.is_dir() and p != work_dir and p.name.rsplit("-", 1)[0] == prefix
+    ]
+    siblings.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    removed = []
+    for stale in siblings[max(keep - 1, 0):]:
+        # Skip directories another build is using right now
+        try:
+            with FileLock(stale / ".lock", timeout=0):
+                shutil.rmtree(stale / "build", ignore_errors=True)
+        except TimeoutError:
+            continue
+        shutil.rmtree(stale, ignore_errors=True)
+        removed.append(stale)
+    return removed
+
+
+def artifact_path(config: BuildConfig) -> Path:
+    """
+    Get the build artifact produced for a configuration.
+
+    This is the executable for onefile builds and the distribution folder
+    for onedir builds.
+    """
+    if config.one_file:
+        name = f"{config.exe_name}.exe" if sys.platform == "win32" else config.exe_name
+        return config.output_dir / name
+    return config.output_dir / config.exe_name
+
+
+class BuildCache:
+    """Content-addressed store of previously built artifacts."""
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            root: Cache root directory (defaults to ``default_cache_root()``)
+        """
+        self.root = Path(root) if root else default_cache_root()
+        self.builds_dir = self.root / "builds"
+
+    def compute_key(self, config: BuildConfig) -> str:
+        """
+        Compute the cache key for a build.
+
+        The key covers the artifact-relevant configuration, the contents of
+        the script, icon, trace profile and every additional file or folder, the
+        imported module closure of the script and of every entry point and the
+        interpreter/PyInstaller versions (or the requirements of a pooled build
+        environment and, once it exists, its PyInstaller and package versions).
+
+        Args:
+            config: Build configuration
+
+        Returns:
+            Hex digest identifying the build inputs
+        """
+        # Imported packages are resolved where PyInstaller will find them
+        if config.requirements:
+            python = pooled_python(config) or (str(config.python) if config.python else None)
+        else:
+            python = str(config.python) if config.python else None
+        inputs: Dict[str, Any] = {
+            "format": CACHE_FORMAT_VERSION,
+            "config": config_fingerprint(config),
+            "script": hash_file(config.script_path),
+            "entry_points": [[Path(src).stem, module_closure(self._resolve(config, src), python)]
+                             for src in config.entry_points],
+            "icon": hash_path(config.icon_path) if config.icon_path else None,
+            "trace_profile": hash_path(config.trace_profile) if config.trace_profile else None,
+            "files": [[dst, hash_path(self._resolve(config, src))]
+                      for src, dst in config.additional_files],
+            "folders": [[dst, hash_path(self._resolve(config, src))]
+                        for src, dst in config.additional_folders],
+            "modules": module_closure(config.script_path, python),
+            "environment": environment_fingerprint(config),
+        }
+        canonical = json.dumps(inputs, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _resolve(config: BuildConfig, src: str) -> Path:
+        """Resolve a resource path the same way PyInstaller sees it."""
+        path = Path(src)
+        if not path.is_absolute():
+            path = config.script_path.parent / path
+        return path
+
+    def entry_dir(self, key: str) -> Path:
+        """Get the directory holding a cache entry."""
+        return self.builds_dir / key[:2] / key
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cache entry.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Entry metadata, or None on a cache miss
+        """
+        meta_file = self.entry_dir(key) / "meta.json"
+        if not meta_file.exists():
+            return None
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def restore(self, key: str, config: BuildConfig) -> Optional[Path]:
+        """
+        Restore a cached artifact into the configured output directory.
+
+        Args:
+            key: Cache key
+            config: Build configuration (determines the destination)
+
+        Returns:
+            Path of the restored artifact, or None on a cache miss
+        """
+        meta = self.lookup(key)
+        if meta is None:
+            return None
+
+        source = self.entry_dir(key) / meta["artifact"]
+        if not source.exists():
+            return None
+
+        target = artifact_path(config)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        _remove(target)
+        if source.is_dir():
+            shutil.copytree(source, target, symlinks=True)
+        else:
+            shutil.copy2(source, target)
+        return target
+
+    def store(self, key: str, config: BuildConfig) -> Optional[Path]:
+        """
+        Store a freshly built artifact in the cache.
+
+        The entry is assembled in a staging directory and moved into place
+        atomically, so concurrent readers never see a partial entry.
+
+        Args:
+            key: Cache key
+            config: Build configuration (determines the artifact location)
+
+        Returns:
+            Path of the cache entry, or None if there was nothing to store
+        """
+        source = artifact_path(config)
+        if not source.exists():
+            return None
+
+        entry = self.entry_dir(key)
+        if entry.exists():
+            return entry
+
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        staging = entry.parent / f".{key}.{os.getpid()}.tmp"
+        _remove(staging)
+        staging.mkdir()
+        try:
+            if source.is_dir():
+                shutil.copytree(source, staging / source.name, symlinks=True)
+            else:
+                shutil.copy2(source, staging / source.name)
+
+            meta = {
+                "key": key,
+                "artifact": source.name,
+                "exe_name": config.exe_name,
+                "one_file": config.one_file,
+                "created": time.time(),
+            }
+            with open(staging / "meta.json", 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=2)
+
+            try:
+                os.replace(staging, entry)
+            except OSError:
+                # Another process stored the same key first
+                if not entry.exists():
+                    raise
+        finally:
+            _remove(staging)
+        return entry
+
+    def entries(self) -> Iterable[Path]:
+        """Iterate over the directories of all cache entries."""
+        if not self.builds_dir.exists():
+            return []
+        return (p for p in self.builds_dir.glob("*/*") if p.is_dir())
+
+    def clear(self) -> int:
+        """
+        Remove every cache entry.
+
+        Returns:
+            Number of entries removed
+        """
+        removed = 0
+        for entry in list(self.entries()):
+            _remove(entry)
+            removed += 1
+        return removed
+
+
+def _remove(path: Path) -> None:
+    """Remove a file, symlink or folder if it exists."""
+    if path.is_symlink() or path.is_file():
+        path.unlink()
+    elif path.is_dir():
+        shutil.rmtree(path)
@@ -2,12 +2,55 @@
 Configuration management for P2E builds.
 """
 
+import dataclasses
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Tuple
 import json
 import yaml
 
+# Settings a variant may override: they only affect packaging (EXE/COLLECT),
+# so all variants of a build share one dependency analysis
+VARIANT_KEYS = (
+    "exe_name",
+    "one_file",
+    "console_mode",
+    "windowed",
+    "debug",
+    "strip_symbols",
+    "upx_compress",
+    "icon_path",
+    "python_options",
+)
+
+
+def parse_variant(text: str) -> Dict[str, Any]:
+    """
+    Parse a variant given as ``NAME:key=value,key=value``.
+
+    Values are read as YAML scalars, so ``one_file=false`` gives a bool.
+
+    Example:
+        parse_variant("debug:debug=true,strip_symbols=false")
+
+    Args:
+        text: Variant name and overrides
+
+    Returns:
+        Variant dictionary as stored in ``BuildConfig.variants``
+
+    Raises:
+        ValueError: If an override is not ``key=value``
+    """
+    name, _, overrides = text.partition(':')
+    variant: Dict[str, Any] = {'name': name.strip()}
+    for override in filter(None, overrides.split(',')):
+        key, sep, value = override.partition('=')
+        if not sep:
+            raise ValueError(f"Invalid variant override '{override}', should be 'key=value'")
+        variant[key.strip()] = yaml.safe_load(value)
+    return variant
+
 
 @dataclass
 class BuildConfig:
@@ -25,9 +68,15 @@ class BuildConfig:
     console_mode: bool = True
     windowed: bool = False
     clean_build: bool = True
+    incremental: bool = False
+    # Further scripts built into the same onedir distribution, sharing its
+    # libraries; each executable is named after its script
+    entry_points: List[str] = field(default_factory=list)
 
     # Advanced options
     icon_path: Optional[Path] = None
+    # Bootloader debug messages
+    debug: bool = False
     upx_compress: bool = False
     strip_symbols: bool = False
 
@@ -35,14 +84,40 @@ class BuildConfig:
     additional_files: List[Tuple[str, str]] = field(default_factory=list)
     additional_folders: List[Tuple[str, str]] = field(default_factory=list)
     hidden_imports: List[str] = field(default_factory=list)
+    # Add hidden imports found by scanning for dynamic imports
+    auto_hidden_imports: bool = False
+    exclude_modules: List[str] = field(default_factory=list)
+    # Profile recorded by "p2e trace"; excludes unused modules
+    trace_profile: Optional[Path] = None
 
     # Network settings
     use_proxy: bool = False
     proxy_url: Optional[str] = None
 
+    # Interpreter options of the frozen app, e.g. "u" or "X importtime"
+    python_options: List[str] = field(default_factory=list)
+
     # Advanced PyInstaller args
     extra_args: List[str] = field(default_factory=list)
 
+    # Variants built from one analysis, each a name plus overrides of
+    # VARIANT_KEYS, e.g. {"name": "onedir", "one_file": False}; the
+    # executable of a variant is named "<exe_name>-<name>" by default
+    variants: List[Dict[str, Any]] = field(default_factory=list)
+
+    # Build cache
+    use_cache: bool = False
+    cache_dir: Optional[Path] = None
+
+    # Build environment: interpreter running PyInstaller (default: the
+    # current one) and requirements installed into a pooled virtual
+    # environment created from it
+    python: Optional[str] = None
+    requirements: Optional[Path] = None
+    # Install PyInstaller and requirements offline from this wheelhouse
+    # (see p2e wheelhouse sync)
+    wheelhouse: Optional[Path] = None
+
     def __post_init__(self):
         """Validate and normalize configuration."""
         # Convert string paths to Path objects
@@ -52,6 +127,16 @@ class BuildConfig:
             self.output_dir = Path(self.output_dir)
         if self.icon_path and isinstance(self.icon_path, str):
             self.icon_path = Path(self.icon_path)
+        if self.cache_dir and isinstance(self.cache_dir, str):
+            self.cache_dir = Path(self.cache_dir)
+        # Resolved once against the working directory, so validation, the
+        # cache key and the build all read the same file
+        if self.trace_profile:
+            self.trace_profile = Path(self.trace_profile).absolute()
+        if self.requirements:
+            self.requirements = Path(self.requirements).absolute()
+        if self.wheelhouse:
+            self.wheelhouse = Path(self.wheelhouse).absolute()
 
         # Set defaults
         if not self.output_dir:
@@ -71,8 +156,66 @@ class BuildConfig:
             raise ValueError(f"Script must be a .py file: {self.script_path}")
         if self.icon_path and not self.icon_path.exists():
             raise ValueError(f"Icon file not found: {self.icon_path}")
+        if self.trace_profile and not self.trace_profile.exists():
+            raise ValueError(f"Trace profile not found: {self.trace_profile} (record one with p2e trace)")
+        if self.requirements and not self.requirements.is_file():
+            raise ValueError(f"Requirements file not found: {self.requirements}")
+        if self.entry_points:
+            self._validate_entry_points()
+        names = set()
+        for variant in self.variants:
+            name = variant.get('name')
+            if not name or name in names:
+                raise ValueError(f"Every variant needs a unique name: {variant}")
+            names.add(name)
+            unknown = set(variant) - set(VARIANT_KEYS) - {'name'}
+            if unknown:
+                raise ValueError(
+                    f"Variant {name} cannot override {', '.join(sorted(unknown))} "
+                    f"(allowed: {', '.join(VARIANT_KEYS)})"
+                )
+        variant_configs = self.variant_configs()
+        for config in variant_configs:
+            config.validate()
+        exe_names = [config.exe_name for config in variant_configs]
+        if len(set(exe_names)) != len(exe_names):
+            raise ValueError(f"Variants must produce distinct executable names: {', '.join(exe_names)}")
         return True
 
+    def _validate_entry_points(self) -> None:
+        """Check the entry points can share one onedir distribution."""
+        if self.one_file:
+            raise ValueError("Entry points need a onedir build (one_file: false)")
+        if self.variants:
+            raise ValueError("Entry points cannot be combined with variants")
+        names = {self.exe_name}
+        for entry in self.entry_points:
+            path = Path(entry)
+            if not path.is_absolute():
+                path = self.script_path.parent / path
+            if not path.is_file() or path.suffix != ".py":
+                raise ValueError(f"Entry point must be an existing .py file: {path}")
+            if path.stem in names:
+                raise ValueError(f"Entry point {entry} clashes with another executable named {path.stem}")
+            names.add(path.stem)
+
+    def variant_configs(self) -> List['BuildConfig']:
+        """
+        Get the configuration of every variant.
+
+        Returns:
+            One configuration per variant, in order; empty without variants
+        """
+        configs = []
+        for variant in self.variants:
+            overrides = {key: value for key, value in variant.items() if key != 'name'}
+            overrides.setdefault('exe_name', f"{self.exe_name}-{variant['name']}")
+            # A console variant of a windowed build needs its console back
+            if overrides.get('windowed') is False:
+                overrides.setdefault('console_mode', True)
+            configs.append(dataclasses.replace(self, variants=[], **overrides))
+        return configs
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary."""
         data = asdict(self)
@@ -102,6 +245,14 @@ class BuildConfig:
             data['output_dir'] = Path(data['output_dir'])
         if 'icon_path' in data and data['icon_path']:
             data['icon_path'] = Path(data['icon_path'])
+        if 'cache_dir' in data and data['cache_dir']:
+            data['cache_dir'] = Path(data['cache_dir'])
+        if 'trace_profile' in data and data['trace_profile']:
+            data['trace_profile'] = Path(data['trace_profile'])
+        if 'requirements' in data and data['requirements']:
+            data['requirements'] = Path(data['requirements'])
+        if 'wheelhouse' in data and data['wheelhouse']:
+            data['wheelhouse'] = Path(data['wheelhouse'])
         return cls(**data)
 
     @classmethod
@@ -2,26 +2,39 @@
 Core conversion logic for P2E.
 """
 
+import asyncio
+import locale
 import os
 import sys
 import subprocess
 import shutil
+import tempfile
+import time
+from contextlib import ExitStack, nullcontext
 from pathlib import Path
-from typing import Optional, Callable, List
-from enum import Enum
+from typing import Any, ContextManager, Dict, Generator, Optional, Callable, List, Tuple
 
+from p2e.core.cache import BuildCache, artifact_path, default_cache_root, incremental_work_dir, prune_work_dirs
 from p2e.core.config import BuildConfig
+from p2e.core.imports import ImportScanner
+from p2e.core.probe import PyInstallerInfo, invalidate_probe_cache, probe_pyinstaller
+from p2e.core.result import BuildResult, BuildStatus
+from p2e.core.spec import BuildSpec, SpecTarget, collapse_datas, spec_compatible
+from p2e.core.trace import TraceProfile
+from p2e.core.timing import RssMonitor, StageTimer
+from p2e.core.venvs import BuildEnv, EnvPool
+from p2e.core.wheelhouse import Wheelhouse
+from p2e.utils.locks import FileLock
 
 
-class BuildStatus(Enum):
-    """Build status enumeration."""
-    IDLE = "idle"
-    CHECKING_DEPS = "checking_dependencies"
-    INSTALLING_DEPS = "installing_dependencies"
-    BUILDING = "building"
-    CLEANING = "cleaning"
-    COMPLETE = "complete"
-    FAILED = "failed"
+# Maximum length of a single PyInstaller output line in async builds
+_STREAM_LIMIT = 1024 * 1024
+
+# Marks the end of an async build's log stream
+_END_OF_LOG = object()
+
+# Statuses whose duration is not reported as a build phase
+_UNTIMED_STATUSES = (BuildStatus.IDLE, BuildStatus.COMPLETE, BuildStatus.FAILED)
 
 
 class PyConverter:
@@ -37,24 +50,75 @@ class PyConverter:
         """
         self.config = config
         self.log_callback = log_callback or print
-        self.status = BuildStatus.IDLE
+        self.phase_times: Dict[str, float] = {}
+        self._status = BuildStatus.IDLE
+        self._status_since: Optional[float] = None
         self.process: Optional[subprocess.Popen] = None
+        self.cache_hit = False
+        self.work_dir: Optional[Path] = None
+        self.pyinstaller: Optional[PyInstallerInfo] = None
+        self.async_process: Optional[asyncio.subprocess.Process] = None
+        self.command: List[str] = []
+        self.spec_path: Optional[Path] = None
+        self.detected_imports: List[str] = []
+        self.traced_imports: List[str] = []
+        self.traced_excludes: List[str] = []
+        self.result: Optional[BuildResult] = None
+        self._cache: Optional[BuildCache] = None
+        # One cache key per build target
+        self._cache_keys: List[str] = []
+        self.stop_requested = False
+        self._stage_timer: Optional[StageTimer] = None
+        self._rss_monitor: Optional[RssMonitor] = None
+        # Interpreter running PyInstaller; a pooled environment's once acquired
+        self.python = str(config.python) if config.python else sys.executable
+        self.build_env: Optional[BuildEnv] = None
+        self._leases = ExitStack()
+
+    @property
+    def status(self) -> BuildStatus:
+        """Current build phase."""
+        return self._status
+
+    @status.setter
+    def status(self, value: BuildStatus) -> None:
+        # Charge the time spent in the previous phase before switching
+        now = time.perf_counter()
+        if self._status_since is not None and self._status not in _UNTIMED_STATUSES:
+            name = self._status.value
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + now - self._status_since
+        self._status = value
+        self._status_since = now
+
+    @property
+    def stage(self) -> Optional[str]:
+        """PyInstaller stage (Analysis, PYZ, ...) running now, if any."""
+        timer = self._stage_timer
+        return timer.current if timer else None
 
     def log(self, message: str) -> None:
         """Log a message."""
         if self.log_callback:
             self.log_callback(message)
 
+    def _on_output(self, line: str, pid: Optional[int]) -> None:
+        """Handle one line of PyInstaller output."""
+        if self._stage_timer:
+            self._stage_timer.feed(line)
+        if self._rss_monitor:
+            self._rss_monitor.sample(pid)
+        self.log(line)
+
     def check_pyinstaller(self) -> bool:
-        """Check if PyInstaller is installed."""
+        """
+        Check if PyInstaller is installed.
+
+        The probe is answered from package metadata and memoized per
+        interpreter, so repeated builds do not spawn pip.
+        """
         try:
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "show", "pyinstaller"],
-                capture_output=True,
-                text=True,
-                check=False
-            )
-            return result.returncode == 0
+            self.pyinstaller = probe_pyinstaller(self.python)
+            return self.pyinstaller.available
         except Exception as e:
             self.log(f"Error checking PyInstaller: {e}")
             return False
@@ -65,14 +129,17 @@ class PyConverter:
             self.status = BuildStatus.INSTALLING_DEPS
             self.log("Installing PyInstaller...")
 
-            cmd = [sys.executable, "-m", "pip", "install", "pyinstaller"]
+            cmd = [self.python, "-m", "pip", "install", "pyinstaller"]
 
-            if self.config.use_proxy and self.config.proxy_url:
+            if self.config.wheelhouse:
+                cmd.extend(self.wheelhouse_args())
+            elif self.config.use_proxy and self.config.proxy_url:
                 cmd.extend(["--proxy", self.config.proxy_url])
 
             result = subprocess.run(cmd, capture_output=True, text=True, check=False)
 
             if result.returncode == 0:
+                invalidate_probe_cache(self.python)
                 self.log("PyInstaller installed successfully")
                 return True
 
@@ -82,9 +149,241 @@ class PyConverter:
             self.log(f"Error installing PyInstaller: {e}")
             return False
 
+    def resolve_input(self, path) -> Path:
+        """Resolve an input path relative to the script directory."""
+        path = Path(path)
+        if not path.is_absolute():
+            path = self.config.script_path.parent / path
+        return path.absolute()
+
+    def detect_hidden_imports(self) -> List[str]:
+        """
+        Scan the script, the entry points and their local modules for dynamic imports.
+
+        Returns:
+            Detected hidden imports, also used by ``build_command()``
+        """
+        self.status = BuildStatus.SCANNING_IMPORTS
+        cache_path = Path(self.config.cache_dir) / "imports.sqlite3" if self.config.cache_dir else None
+        scanner = ImportScanner(cache_path)
+        self.detected_imports = []
+        for script in [self.config.script_path] + list(self.config.entry_points):
+            report = scanner.scan(self.resolve_input(script))
+            self.detected_imports = list(dict.fromkeys(self.detected_imports + report.hidden_imports))
+            self.log(
+                f"Scanned {report.files_scanned} file(s) for dynamic imports "
+                f"({report.cache_hits} cached) in {report.duration:.2f}s"
+            )
+            for location in report.unresolved:
+                self.log(f"Warning: dynamic import at {location} could not be resolved; add it to hidden_imports if needed")
+        if self.detected_imports:
+            self.log(f"Detected hidden imports: {', '.join(self.detected_imports)}")
+        return self.detected_imports
+
+    def apply_trace_profile(self) -> None:
+        """Exclude modules the traced run never imported and add its dynamic imports."""
+        self.status = BuildStatus.SCANNING_IMPORTS
+        profile = TraceProfile.load(self.config.trace_profile)
+        if profile.is_stale(self.resolve_input(self.config.script_path)):
+            self.log("Warning: the script changed since it was traced; consider running p2e trace again")
+        plan = profile.plan(keep=self.config.hidden_imports + self.detected_imports)
+        self.traced_excludes = plan.exclude_modules
+        self.traced_imports = plan.hidden_imports
+        self.log(
+            f"Trace profile: excluding {len(plan.exclude_modules)} unused module(s), "
+            f"adding {len(plan.hidden_imports)} traced hidden import(s)"
+        )
+
+    def prepare_work_dir(self) -> Path:
+        """
+        Create the private working directory for this build.
+
+        PyInstaller's work files are written here instead of the script
+        directory, so concurrent builds never share state. In
+        incremental mode the directory is persistent and keyed by the
+        configuration, so PyInstaller can reuse its cached analysis.
+
+        Returns:
+            Path to the working directory
+        """
+        if self.config.incremental:
+            self.work_dir = incremental_work_dir(self.config)
+            self.work_dir.mkdir(parents=True, exist_ok=True)
+            # Mark as recently used for pruning
+            os.utime(self.work_dir)
+            for stale in prune_work_dirs(self.work_dir):
+                self.log(f"Removed stale work dir: {stale}")
+        else:
+            self.work_dir = Path(tempfile.mkdtemp(prefix=f"p2e-{self.config.exe_name}-"))
+        return self.work_dir
+
+    def wheelhouse_args(self) -> List[str]:
+        """
+        Get the pip arguments installing offline from the configured wheelhouse.
+
+        Raises:
+            ValueError: If the wheelhouse does not match its manifest
+        """
+        wheelhouse = Wheelhouse(self.config.wheelhouse)
+        args = wheelhouse.install_args()
+        self.log(f"Installing offline from wheelhouse: {wheelhouse.root}")
+        return args
+
+    def prepare_environment(self) -> BuildEnv:
+        """
+        Acquire the pooled virtual environment with the build's requirements.
+
+        The environment is created on first use and reused afterwards; it
+        stays locked against eviction until the build ends.
+
+        Returns:
+            The environment PyInstaller runs in
+        """
+        self.status = BuildStatus.INSTALLING_DEPS
+        pool = EnvPool(
+            Path(self.config.cache_dir) / "venvs" if self.config.cache_dir else None,
+            log_callback=self.log
+        )
+        lease = pool.acquire(
+            requirements=self.config.requirements,
+            python=self.config.python,
+            proxy_url=self.config.proxy_url if self.config.use_proxy else None,
+            pip_args=self.wheelhouse_args() if self.config.wheelhouse else ()
+        )
+        self.build_env = self._leases.enter_context(lease)
+        self.python = str(self.build_env.python)
+        return self.build_env
+
+    def ensure_pyinstaller(self) -> bool:
+        """
+        Make sure PyInstaller is available, installing it if needed.
+
+        Returns:
+            True if PyInstaller is available
+        """
+        self.status = BuildStatus.CHECKING_DEPS
+        self.log("Checking PyInstaller installation...")
+
+        if not self.check_pyinstaller():
+            self.log("PyInstaller not found")
+            if not self.install_pyinstaller():
+                return False
+            self.check_pyinstaller()
+        elif self.pyinstaller and self.pyinstaller.version:
+            self.log(f"PyInstaller {self.pyinstaller.version} is installed")
+        else:
+            self.log("PyInstaller is installed")
+        return True
+
+    def build_targets(self) -> List[BuildConfig]:
+        """Get the configuration of every executable the build produces."""
+        return self.config.variant_configs() or [self.config]
+
+    def build_spec(self) -> BuildSpec:
+        """
+        Describe the build as a spec file.
+
+        Returns:
+            Spec with the configured, detected and traced settings and one
+            target per variant
+        """
+        # Absolute sources, since the spec file lives in the cache
+        files = [(self.resolve_input(src), dst) for src, dst in self.config.additional_files]
+        folders = [(str(self.resolve_input(src)), dst) for src, dst in self.config.additional_folders]
+        hidden_imports, excludes = self._module_lists()
+        return BuildSpec(
+            script=str(self.resolve_input(self.config.script_path)),
+            targets=[self._spec_target(config) for config in self.build_targets()],
+            datas=collapse_datas(files) + folders,
+            hidden_imports=hidden_imports,
+            excludes=excludes,
+            entry_points=[
+                (Path(script).stem, str(self.resolve_input(script))) for script in self.config.entry_points
+            ]
+        )
+
+    def _spec_target(self, config: BuildConfig) -> SpecTarget:
+        """Describe the executable of one configuration."""
+        icon = config.icon_path
+        return SpecTarget(
+            name=config.exe_name,
+            one_file=config.one_file,
+            console=config.console_mode and not config.windowed,
+            python_options=list(config.python_options),
+            icon=str(self.resolve_input(icon)) if icon and icon.exists() else None,
+            strip=config.strip_symbols,
+            upx=config.upx_compress,
+            debug=config.debug
+        )
+
+    def _module_lists(self) -> Tuple[List[str], List[str]]:
+        """Get hidden imports (configured, detected and traced) and excluded modules."""
+        hidden_imports = list(dict.fromkeys(
+            self.config.hidden_imports + self.detected_imports + self.traced_imports
+        ))
+        excludes = [
+            module for module in dict.fromkeys(self.config.exclude_modules + self.traced_excludes)
+            if module not in hidden_imports
+        ]
+        return hidden_imports, excludes
+
     def build_command(self) -> List[str]:
-        """Build PyInstaller command."""
-        cmd = [sys.executable, "-m", "PyInstaller"]
+        """
+        Build PyInstaller command.
+
+        The build settings go into a generated spec file (see
+        ``build_spec()``), so the command line only carries paths. Extra
+        arguments that PyInstaller rejects together with a spec file make
+        the command fall back to passing every setting as an argument.
+
+        Raises:
+            ValueError: If variants or entry points are combined with such
+                extra arguments
+        """
+        self.spec_path = None
+        if not spec_compatible(self.config.extra_args):
+            if self.config.variants or self.config.entry_points:
+                raise ValueError(
+                    "Build variants and entry points need a spec file; remove the extra PyInstaller options"
+                )
+            self.log("Extra arguments need PyInstaller's command-line options; not using a spec file")
+            return self.options_command()
+
+        root = Path(self.config.cache_dir) if self.config.cache_dir else default_cache_root()
+        self.spec_path = self.build_spec().write(root / "specs")
+
+        cmd = [self.python, "-m", "PyInstaller"]
+        # Incremental builds keep PyInstaller's cache on purpose
+        if self.config.clean_build and not self.config.incremental:
+            cmd.append("--clean")
+        # Never prompt before replacing a previous output folder
+        cmd.append("--noconfirm")
+        cmd.extend(["--distpath", str(Path(self.config.output_dir).absolute())])
+        if self.work_dir:
+            cmd.extend(["--workpath", str(self.work_dir / "build")])
+        cmd.extend(self.config.extra_args)
+        cmd.append(str(self.spec_path))
+        return cmd
+
+    def require_feature(self, feature: str) -> None:
+        """
+        Check the PyInstaller of the build interpreter supports an option.
+
+        Args:
+            feature: Command-line option without dashes, see ``FEATURE_VERSIONS``
+
+        Raises:
+            ValueError: If the installed PyInstaller is too old for it
+        """
+        # Memoized per interpreter, and the build may run in a pooled environment
+        info = probe_pyinstaller(self.python)
+        # An unknown version is left for PyInstaller itself to reject
+        if info.version and not info.supports(feature):
+            raise ValueError(f"PyInstaller {info.version} does not support --{feature}; upgrade PyInstaller")
+
+    def options_command(self) -> List[str]:
+        """Build a PyInstaller command passing every setting as an argument."""
+        cmd = [self.python, "-m", "PyInstaller"]
 
         # Basic options
         if self.config.one_file:
@@ -95,183 +394,459 @@ class PyConverter:
         if self.config.windowed or not self.config.console_mode:
             cmd.append("--windowed")
 
-        if self.config.clean_build:
+        # Incremental builds keep PyInstaller's cache on purpose
+        if self.config.clean_build and not self.config.incremental:
             cmd.append("--clean")
 
+        # Never prompt before replacing a previous output folder
+        cmd.append("--noconfirm")
+
         # Output settings
-        cmd.extend(["--distpath", str(self.config.output_dir)])
+        cmd.extend(["--distpath", str(Path(self.config.output_dir).absolute())])
         cmd.extend(["--name", self.config.exe_name])
 
+        # Private work directory
+        if self.work_dir:
+            cmd.extend(["--workpath", str(self.work_dir / "build")])
+            cmd.extend(["--specpath", str(self.work_dir)])
+
         # Icon
         if self.config.icon_path and self.config.icon_path.exists():
-            cmd.extend(["--icon", str(self.config.icon_path)])
+            cmd.extend(["--icon", str(self.resolve_input(self.config.icon_path))])
 
         # UPX compression
-        if self.config.upx_compress:
-            cmd.append("--upx-dir")
+        if not self.config.upx_compress:
+            cmd.append("--noupx")
 
         # Strip symbols
         if self.config.strip_symbols:
             cmd.append("--strip")
 
-        # Additional files
+        # Bootloader debug messages
+        if self.config.debug:
+            cmd.extend(["--debug", "bootloader"])
+
+        # Additional files (absolute, since the spec file lives in the work dir)
         for src, dst in self.config.additional_files:
-            cmd.extend(["--add-data", f"{src}{os.pathsep}{dst}"])
+            cmd.extend(["--add-data", f"{self.resolve_input(src)}{os.pathsep}{dst}"])
 
         # Additional folders
         for src, dst in self.config.additional_folders:
-            cmd.extend(["--add-data", f"{src}{os.pathsep}{dst}"])
+            cmd.extend(["--add-data", f"{self.resolve_input(src)}{os.pathsep}{dst}"])
 
-        # Hidden imports
-        for import_name in self.config.hidden_imports:
+        # Hidden imports, configured, detected and traced
+        hidden_imports, excludes = self._module_lists()
+        for import_name in hidden_imports:
             cmd.extend(["--hidden-import", import_name])
 
+        # Excluded modules, configured and traced
+        for module in excludes:
+            cmd.extend(["--exclude-module", module])
+
+        # Interpreter options of the frozen app
+        if self.config.python_options:
+            self.require_feature("python-option")
+        for option in self.config.python_options:
+            cmd.extend(["--python-option", option])
+
         # Extra arguments
         if self.config.extra_args:
             cmd.extend(self.config.extra_args)
 
         # Script file (must be last)
-        cmd.append(str(self.config.script_path))
+        cmd.append(str(self.resolve_input(self.config.script_path)))
 
         return cmd
 
-    def build(self, realtime_output: bool = True) -> bool:
+    def build(self, realtime_output: bool = True, check_deps: bool = True) -> BuildResult:
         """
         Build the executable.
 
         Args:
             realtime_output: Whether to show output in real-time
+            check_deps: Whether to check for (and install) PyInstaller first;
+                callers that already did so, like batch builds, can skip it
 
         Returns:
-            True if build succeeded, False otherwise
+            Build result with phase timings; evaluates as True if the
+            build succeeded
         """
         try:
-            # Validate configuration
-            self.config.validate()
+            result = self._begin(check_deps)
+            if result is None:
+                if self.stop_requested:
+                    raise RuntimeError("Build stopped")
+                with self._work_dir_lock():
+                    returncode = self._run_pyinstaller(self.command, realtime_output)
+                result = self._finish(returncode)
+        except Exception as e:
+            result = self._fail(e)
+        return result
 
-            # Check PyInstaller
-            self.status = BuildStatus.CHECKING_DEPS
-            self.log("Checking PyInstaller installation...")
+    def build_async(self, check_deps: bool = True) -> 'AsyncBuild':
+        """
+        Build the executable without blocking the event loop.
 
-            if not self.check_pyinstaller():
-                self.log("PyInstaller not found")
-                if not self.install_pyinstaller():
-                    self.status = BuildStatus.FAILED
-                    return False
-            else:
-                self.log("PyInstaller is installed")
+        Must be called while an asyncio event loop is running. The returned
+        handle is an async iterator over log lines and can be awaited for
+        the final result; cancelling the awaiting task terminates PyInstaller.
 
-            # Build command
-            self.status = BuildStatus.BUILDING
-            cmd = self.build_command()
+        Example:
+            build = converter.build_async()
+            async for line in build:
+                print(line)
+            result = await build
 
-            self.log(f"Building executable: {self.config.exe_name}")
-            self.log(f"Command: {' '.join(cmd)}")
+        Args:
+            check_deps: Whether to check for (and install) PyInstaller first
 
-            # Change to script directory
-            original_dir = Path.cwd()
-            script_dir = self.config.script_path.parent
-            os.chdir(script_dir)
+        Returns:
+            Handle for the running build
+        """
+        return AsyncBuild(self, check_deps)
 
-            try:
-                if realtime_output:
-                    # Run with real-time output
-                    with subprocess.Popen(
-                        cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        text=True,
-                        universal_newlines=True
-                    ) as process:
-                        self.process = process
-
-                        for line in iter(process.stdout.readline, ''):
-                            if line:
-                                self.log(line.rstrip())
-
-                        process.wait()
-                        returncode = process.returncode
-                else:
-                    # Run without real-time output
-                    result = subprocess.run(
-                        cmd,
-                        capture_output=True,
-                        text=True,
-                        check=False
-                    )
-                    self.log(result.stdout)
-                    if result.stderr:
-                        self.log(result.stderr)
-                    returncode = result.returncode
-
-                if returncode != 0:
-                    self.log(f"Build failed with return code {returncode}")
-                    self.status = BuildStatus.FAILED
-                    return False
+    def _begin(self, check_deps: bool) -> Optional[BuildResult]:
+        """
+        Run every step up to launching PyInstaller.
 
-            finally:
-                os.chdir(original_dir)
+        Returns:
+            The final result if the build already ended (failed check or
+            cache hit), otherwise None with ``self.command`` prepared
+        """
+        self.stop_requested = False
+        self.work_dir = None
+        self.cache_hit = False
+        self._cache = None
+        self._cache_keys = []
+        self.detected_imports = []
+        self.traced_imports = []
+        self.traced_excludes = []
+        self._stage_timer = None
+        self._rss_monitor = None
+        self.phase_times = {}
+        self._started = time.perf_counter()
+        self._started_at = time.time()
+        self.python = str(self.config.python) if self.config.python else sys.executable
+        self.build_env = None
+
+        # Validate configuration
+        self.config.validate()
+
+        # Check PyInstaller (pooled environments come with it)
+        if check_deps and not self.config.requirements and not self.ensure_pyinstaller():
+            return self._result(False, error="PyInstaller is not available")
+
+        # Restore from the build cache when no input changed
+        if self.config.use_cache:
+            self.status = BuildStatus.CHECKING_CACHE
+            self._cache = BuildCache(self.config.cache_dir)
+            targets = self.build_targets()
+            self._cache_keys = [self._cache.compute_key(config) for config in targets]
+            # Restore only when every variant is cached, since any miss rebuilds them all
+            if all(self._cache.lookup(key) for key in self._cache_keys):
+                restored = [self._cache.restore(key, config) for key, config in zip(self._cache_keys, targets)]
+                if all(restored):
+                    self.cache_hit = True
+                    self.log(f"✓ Build cache hit ({self._cache_keys[0][:12]})")
+                    for path in restored:
+                        self.log(f"✓ Executable restored: {path}")
+                    return self._result(True, **self._outputs())
+            self.log(f"Build cache miss ({self._cache_keys[0][:12]})")
+
+        if self.config.requirements:
+            self.prepare_environment()
+            if self._cache:
+                # Store under the key that covers the versions installed in the environment
+                self._cache_keys = [self._cache.compute_key(config) for config in self.build_targets()]
+
+        if self.config.auto_hidden_imports:
+            self.detect_hidden_imports()
+        if self.config.trace_profile:
+            self.apply_trace_profile()
+
+        # Build command
+        self.status = BuildStatus.BUILDING
+        self.prepare_work_dir()
+        self.command = self.build_command()
+
+        self.log(f"Building executable: {', '.join(config.exe_name for config in self.build_targets())}")
+        self.log(f"Command: {' '.join(self.command)}")
+        self._stage_timer = StageTimer()
+        self._rss_monitor = RssMonitor()
+        return None
+
+    def _work_dir_lock(self) -> ContextManager[Any]:
+        """Get the lock guarding this build's work directory."""
+        # Persistent work dirs are shared, so serialize builds using them
+        if self.config.incremental and self.work_dir:
+            self.log(f"Incremental build, reusing: {self.work_dir}")
+            return FileLock(self.work_dir / ".lock")
+        return nullcontext()
+
+    def _finish(self, returncode: int) -> BuildResult:
+        """
+        Run every step after PyInstaller exited.
 
-            # Clean up build artifacts
-            if self.config.clean_build:
-                self.cleanup_build_artifacts(script_dir)
+        Args:
+            returncode: PyInstaller's return code
+
+        Returns:
+            The final build result
+        """
+        if returncode != 0:
+            self.log(f"Build failed with return code {returncode}")
+            if self.config.clean_build and not self.config.incremental:
+                self.cleanup_build_artifacts()
+            return self._result(
+                False, returncode=returncode, error=f"PyInstaller exited with code {returncode}"
+            )
 
-            # Verify output
-            output_path = self.get_output_path()
-            if output_path and output_path.exists():
+        # Clean up build artifacts
+        if self.config.clean_build and not self.config.incremental:
+            self.cleanup_build_artifacts()
+        else:
+            self.log(f"Build artifacts kept in: {self.work_dir}")
+
+        # Verify output
+        self.status = BuildStatus.VERIFYING
+        output_paths = self.get_output_paths()
+        missing = [path for path in output_paths if not path.exists()]
+        if not missing:
+            for output_path in output_paths:
                 size_mb = output_path.stat().st_size / (1024 * 1024)
                 self.log(f"✓ Executable created: {output_path}")
                 self.log(f"✓ Size: {size_mb:.2f} MB")
-                self.status = BuildStatus.COMPLETE
-                return True
+            if self._cache and self._cache_keys:
+                try:
+                    for key, config in zip(self._cache_keys, self.build_targets()):
+                        self._cache.store(key, config)
+                    self.log(f"✓ Stored in build cache ({self._cache_keys[0][:12]})")
+                except Exception as e:
+                    self.log(f"Warning: Could not store build in cache: {e}")
+            return self._result(True, returncode=returncode, **self._outputs())
+
+        self.log(f"⚠ Warning: Expected output not found: {', '.join(str(path) for path in missing)}")
+        return self._result(False, returncode=returncode, error="Expected output not found")
+
+    def _fail(self, error: BaseException) -> BuildResult:
+        """Log an unexpected error and produce a failed result."""
+        self.log(f"✗ Build error: {error}")
+        if self.config.clean_build and not self.config.incremental and self.work_dir:
+            self.cleanup_build_artifacts()
+        return self._result(False, error=str(error) or type(error).__name__)
+
+    def _result(self, success: bool, **kwargs: Any) -> BuildResult:
+        """Record the final status, timings and result of the build."""
+        self.status = BuildStatus.COMPLETE if success else BuildStatus.FAILED
+        # Release the build environment for eviction
+        self._leases.close()
+        started = getattr(self, "_started", None)
+        stages = self._stage_timer.finish() if self._stage_timer else {}
+        peak_rss = self._rss_monitor.finish() if self._rss_monitor else None
+        self._stage_timer = None
+        self._rss_monitor = None
+        self.result = BuildResult(
+            success=success,
+            status=self.status,
+            exe_name=str(self.config.exe_name),
+            cache_hit=self.cache_hit,
+            duration=time.perf_counter() - started if started else 0.0,
+            phases=dict(self.phase_times),
+            stages=stages,
+            output_size=self.get_output_size() if success else None,
+            peak_rss=peak_rss,
+            started_at=getattr(self, "_started_at", None),
+            **kwargs
+        )
+        return self.result
+
+    def _run_pyinstaller(self, cmd: List[str], realtime_output: bool) -> int:
+        """
+        Run PyInstaller from the script directory.
 
-            self.log("⚠ Warning: Expected output not found")
-            self.status = BuildStatus.FAILED
-            return False
+        The subprocess gets its own working directory, so the process-wide
+        cwd is never changed.
+
+        Args:
+            cmd: PyInstaller command
+            realtime_output: Whether to log output line by line as it arrives
+
+        Returns:
+            PyInstaller's return code
+        """
+        script_dir = self.config.script_path.parent.absolute()
+
+        if realtime_output:
+            # Run with real-time output
+            with subprocess.Popen(
+                cmd,
+                cwd=script_dir,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                universal_newlines=True
+            ) as process:
+                self.process = process
+
+                for line in iter(process.stdout.readline, ''):
+                    if line:
+                        self._on_output(line.rstrip(), process.pid)
+
+                process.wait()
+                return process.returncode
+
+        # Run without real-time output
+        result = subprocess.run(
+            cmd,
+            cwd=script_dir,
+            capture_output=True,
+            text=True,
+            check=False
+        )
+        for line in result.stdout.splitlines():
+            if self._stage_timer:
+                self._stage_timer.feed(line)
+        self.log(result.stdout)
+        if result.stderr:
+            self.log(result.stderr)
+        return result.returncode
+
+    async def _run_pyinstaller_async(self, cmd: List[str]) -> int:
+        """
+        Run PyInstaller as an asyncio subprocess, logging lines as they arrive.
 
+        If the calling task is cancelled, PyInstaller is terminated (and
+        killed if it does not exit promptly) before the cancellation
+        propagates.
+
+        Args:
+            cmd: PyInstaller command
+
+        Returns:
+            PyInstaller's return code
+        """
+        script_dir = self.config.script_path.parent.absolute()
+        encoding = locale.getpreferredencoding(False)
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(script_dir),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=_STREAM_LIMIT
+        )
+        self.async_process = process
+        try:
+            assert process.stdout is not None
+            async for raw_line in process.stdout:
+                line = raw_line.decode(encoding, errors='replace').rstrip()
+                if line:
+                    self._on_output(line, process.pid)
+            return await process.wait()
+        except asyncio.CancelledError:
+            if process.returncode is None:
+                self.log("Stopping build process...")
+                process.terminate()
+                try:
+                    await asyncio.wait_for(process.wait(), timeout=5)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                self.log("Build process stopped")
+            raise
+        finally:
+            self.async_process = None
+
+    async def _build_async(self, check_deps: bool) -> BuildResult:
+        """Asynchronous counterpart of ``build()`` returning the full result."""
+        loop = asyncio.get_running_loop()
+        try:
+            # Validation, probing and cache hashing block, so run them off-loop
+            result = await loop.run_in_executor(None, self._begin, check_deps)
+            if result is not None:
+                return result
+
+            lock = self._work_dir_lock()
+            if isinstance(lock, FileLock):
+                # Polled on the loop: a lock taken in an executor thread
+                # after cancellation would never be released
+                await lock.acquire_async()
+            try:
+                returncode = await self._run_pyinstaller_async(self.command)
+            finally:
+                lock.__exit__(None, None, None)
+
+            return await loop.run_in_executor(None, self._finish, returncode)
+        except asyncio.CancelledError:
+            self.log("✗ Build cancelled")
+            if self.config.clean_build and not self.config.incremental and self.work_dir:
+                self.cleanup_build_artifacts()
+            self._result(False, error="Build cancelled")
+            raise
         except Exception as e:
-            self.log(f"✗ Build error: {e}")
-            self.status = BuildStatus.FAILED
-            return False
+            return self._fail(e)
+
+    def cleanup_build_artifacts(self, work_dir: Optional[Path] = None) -> None:
+        """
+        Clean up build artifacts.
+
+        Only the private working directory of this build is removed, so
+        artifacts of other builds running at the same time are left alone.
+
+        Args:
+            work_dir: Working directory to remove (defaults to this build's)
+        """
+        work_dir = work_dir or self.work_dir
+        if not work_dir:
+            return
 
-    def cleanup_build_artifacts(self, script_dir: Path) -> None:
-        """Clean up build artifacts."""
         self.status = BuildStatus.CLEANING
         self.log("Cleaning build artifacts...")
 
-        # Remove build directory
-        build_dir = script_dir / "build"
-        if build_dir.exists():
-            try:
-                shutil.rmtree(build_dir)
-                self.log(f"Removed: {build_dir}")
-            except Exception as e:
-                self.log(f"Warning: Could not remove build dir: {e}")
-
-        # Remove spec file
-        spec_file = script_dir / f"{self.config.exe_name}.spec"
-        if spec_file.exists():
+        if work_dir.exists():
             try:
-                spec_file.unlink()
-                self.log(f"Removed: {spec_file}")
+                shutil.rmtree(work_dir)
+                self.log(f"Removed: {work_dir}")
             except Exception as e:
-                self.log(f"Warning: Could not remove spec file: {e}")
+                self.log(f"Warning: Could not remove work dir: {e}")
 
     def get_output_path(self) -> Optional[Path]:
-        """Get the expected output path."""
-        if self.config.one_file:
-            # For Windows, add .exe extension
-            if sys.platform == "win32":
-                return self.config.output_dir / f"{self.config.exe_name}.exe"
-            return self.config.output_dir / self.config.exe_name
-
-        # For onedir builds, the executable is in a subfolder
-        if sys.platform == "win32":
-            return self.config.output_dir / self.config.exe_name / f"{self.config.exe_name}.exe"
-        return self.config.output_dir / self.config.exe_name / self.config.exe_name
+        """Get the expected output path (of the first variant, if any)."""
+        return self.get_output_paths()[0]
+
+    def get_output_paths(self) -> List[Path]:
+        """Get the expected path of every executable the build produces."""
+        suffix = ".exe" if sys.platform == "win32" else ""
+        paths = []
+        for config in self.build_targets():
+            if config.one_file:
+                paths.append(config.output_dir / f"{config.exe_name}{suffix}")
+                continue
+            # For onedir builds, the executables are in a subfolder
+            folder = config.output_dir / config.exe_name
+            paths.append(folder / f"{config.exe_name}{suffix}")
+            paths.extend(folder / f"{Path(script).stem}{suffix}" for script in config.entry_points)
+        return paths
+
+    def _outputs(self) -> Dict[str, Any]:
+        """Get the output fields of a successful result."""
+        paths = self.get_output_paths()
+        return {'output_path': paths[0], 'output_paths': paths}
+
+    def get_output_size(self) -> Optional[int]:
+        """Get the size in bytes of the executables or onedir distributions."""
+        sizes = []
+        for config in self.build_targets():
+            artifact = artifact_path(config)
+            if artifact.is_file():
+                sizes.append(artifact.stat().st_size)
+            elif artifact.is_dir():
+                sizes.append(sum(p.stat().st_size for p in artifact.rglob("*") if p.is_file()))
+        return sum(sizes) if sizes else None
 
     def stop(self) -> None:
         """Stop the build process."""
+        self.stop_requested = True
         if self.process and self.process.poll() is None:
             self.log("Stopping build process...")
             self.process.terminate()
@@ -280,3 +855,89 @@ class PyConverter:
             except subprocess.TimeoutExpired:
                 self.process.kill()
             self.log("Build process stopped")
+
+
+class AsyncBuild:
+    """
+    Handle for a build started with ``PyConverter.build_async()``.
+
+    Iterate with ``async for`` to receive log lines as they are produced and
+    ``await`` the handle for the ``BuildResult``. The build starts on first
+    use; lines are buffered, so the result can be awaited without reading
+    the log.
+    """
+
+    def __init__(self, converter: PyConverter, check_deps: bool = True):
+        """
+        Initialize the handle.
+
+        Args:
+            converter: Converter to run
+            check_deps: Whether to check for (and install) PyInstaller first
+        """
+        self.converter = converter
+        self.check_deps = check_deps
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> 'asyncio.Task':
+        """Start the build if needed and return the task running it."""
+        if self._task is None:
+            loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(loop))
+        return self._task
+
+    async def _run(self, loop: asyncio.AbstractEventLoop) -> BuildResult:
+        converter = self.converter
+        queue = self._queue
+        assert queue is not None
+        original = converter.log_callback
+
+        def tee(message: str) -> None:
+            if original:
+                original(message)
+            # Lines may come from executor threads, so always hop to the loop
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+
+        converter.log_callback = tee
+        try:
+            return await converter._build_async(self.check_deps)
+        finally:
+            converter.log_callback = original
+            loop.call_soon_threadsafe(queue.put_nowait, _END_OF_LOG)
+
+    def __aiter__(self) -> 'AsyncBuild':
+        return self
+
+    async def __anext__(self) -> str:
+        self.start()
+        assert self._queue is not None
+        try:
+            line = await self._queue.get()
+        except asyncio.CancelledError:
+            self.cancel()
+            raise
+        if line is _END_OF_LOG:
+            # Leave the marker in place for any further iteration
+            self._queue.put_nowait(_END_OF_LOG)
+            raise StopAsyncIteration
+        return line
+
+    def __await__(self) -> Generator[Any, None, BuildResult]:
+        return self.start().__await__()
+
+    async def result(self) -> BuildResult:
+        """Wait for the build to finish and return its result."""
+        return await self.start()
+
+    def cancel(self) -> bool:
+        """
+        Cancel the build, terminating PyInstaller if it is running.
+
+        Returns:
+            True if a running build was cancelled
+        """
+        if self._task is None or self._task.done():
+            return False
+        return self._task.cancel()
@@ -0,0 +1,559 @@
+"""
+Static import scanning for P2E.
+
+PyInstaller follows ``import`` statements but cannot see modules that are
+imported by name at runtime. The scanner parses the entry script and every
+local module it reaches, and proposes hidden imports for:
+
+- ``importlib.import_module("pkg.mod")`` and ``__import__("pkg.mod")`` with
+  string literals (relative names resolved against ``package=``)
+- plugin packages whose submodules are imported by a computed name, e.g.
+  ``import_module(f"app.plugins.{name}")`` or ``"app.plugins." + name``
+- packages enumerated with ``pkgutil.iter_modules(pkg.__path__)`` or
+  ``pkgutil.walk_packages(...)``
+
+Scan results are cached per file by content hash, and files are parsed on a
+process pool when many of them changed.
+"""
+
+import ast
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from p2e.core.cache import default_cache_root
+from p2e.utils.modules import resolve_local_module
+
+# Bump when the per-file result layout changes so stale entries are ignored
+SCANNER_VERSION = 1
+
+# Below this many uncached files, parsing in-process beats starting a pool
+PARALLEL_THRESHOLD = 64
+
+# Files kept in the scan cache; the oldest entries are dropped first
+MAX_CACHE_ENTRIES = 50_000
+
+_IMPORT_FUNCTIONS = ("import_module", "__import__")
+_PKGUTIL_FUNCTIONS = ("iter_modules", "walk_packages")
+
+# A module reference: (dotted name, relative level)
+ModuleRef = Tuple[str, int]
+
+
+@dataclass
+class FileScan:
+    """Imports found in one source file."""
+
+    # Static imports, including "from pkg import name" candidates
+    imports: List[ModuleRef] = field(default_factory=list)
+    # Modules imported by a literal name at runtime
+    dynamic: List[ModuleRef] = field(default_factory=list)
+    # Packages whose submodules are imported by a computed name
+    plugins: List[ModuleRef] = field(default_factory=list)
+    # Line numbers of dynamic imports whose target could not be determined
+    unresolved: List[int] = field(default_factory=list)
+
+    def to_json(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dict."""
+        return {
+            'imports': self.imports,
+            'dynamic': self.dynamic,
+            'plugins': self.plugins,
+            'unresolved': self.unresolved,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'FileScan':
+        """Load from a dict created by ``to_json``."""
+        return cls(
+            imports=[tuple(ref) for ref in data['imports']],
+            dynamic=[tuple(ref) for ref in data['dynamic']],
+            plugins=[tuple(ref) for ref in data['plugins']],
+            unresolved=list(data['unresolved']),
+        )
+
+
+@dataclass
+class ImportReport:
+    """Outcome of scanning a project."""
+
+    hidden_imports: List[str]
+    plugin_packages: List[str]
+    # "path:line" of dynamic imports that need a manual look
+    unresolved: List[str]
+    files_scanned: int
+    cache_hits: int
+    duration: float
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    """Get ``a.b.c`` from a Name/Attribute chain."""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        return None
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _literal_prefix(node: ast.AST) -> Tuple[Optional[str], bool]:
+    """
+    Get the constant leading part of a string expression.
+
+    Returns:
+        ``(prefix, complete)``; complete is True for a plain literal
+    """
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value, True
+    if isinstance(node, ast.JoinedStr):
+        prefix = ""
+        for part in node.values:
+            if not (isinstance(part, ast.Constant) and isinstance(part.value, str)):
+                break
+            prefix += part.value
+        return prefix, False
+    if isinstance(node, ast.BinOp) and isinstance(node.left, ast.Constant) and isinstance(node.left.value, str):
+        if isinstance(node.op, ast.Add):
+            return node.left.value, False
+        if isinstance(node.op, ast.Mod):
+            return node.left.value.split("%", 1)[0], False
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        return _literal_prefix(node.left)[0], False
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "format"
+        and isinstance(node.func.value, ast.Constant)
+        and isinstance(node.func.value.value, str)
+    ):
+        return node.func.value.value.split("{", 1)[0], False
+    return None, False
+
+
+def _call_argument(node: ast.Call, position: int, keyword: str) -> Optional[ast.AST]:
+    if len(node.args) > position:
+        return node.args[position]
+    for kw in node.keywords:
+        if kw.arg == keyword:
+            return kw.value
+    return None
+
+
+def _split_relative(name: str) -> ModuleRef:
+    """Split ``..mod`` into ``("mod", 2)``."""
+    stripped = name.lstrip(".")
+    return stripped, len(name) - len(stripped)
+
+
+def scan_source(source: bytes, filename: str = "<unknown>") -> FileScan:
+    """
+    Find static and dynamic imports in Python source.
+
+    Args:
+        source: Source code
+        filename: Name used in syntax errors
+
+    Returns:
+        Imports found; empty for files that do not parse
+    """
+    scan = FileScan()
+    try:
+        tree = ast.parse(source, filename=filename)
+    except (SyntaxError, ValueError):
+        return scan
+
+    # Local names bound by imports, for resolving "pkg.__path__"
+    aliases: Dict[str, ModuleRef] = {}
+    calls = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                scan.imports.append((alias.name, 0))
+                if alias.asname:
+                    aliases[alias.asname] = (alias.name, 0)
+                else:
+                    top = alias.name.split(".")[0]
+                    aliases[top] = (top, 0)
+        elif isinstance(node, ast.ImportFrom):
+            module = node.module or ""
+            scan.imports.append((module, node.level))
+            for alias in node.names:
+                if alias.name == "*":
+                    continue
+                name = f"{module}.{alias.name}" if module else alias.name
+                scan.imports.append((name, node.level))
+                aliases[alias.asname or alias.name] = (name, node.level)
+        elif isinstance(node, ast.Call):
+            calls.append(node)
+
+    for node in calls:
+        function = node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, "id", None)
+        if function in _IMPORT_FUNCTIONS:
+            _scan_import_call(node, function, scan)
+        elif function in _PKGUTIL_FUNCTIONS and isinstance(node.func, ast.Attribute):
+            _scan_pkgutil_call(node, aliases, scan)
+    return scan
+
+
+def _scan_import_call(node: ast.Call, function: str, scan: FileScan) -> None:
+    """Record an ``import_module``/``__import__`` call."""
+    target = _call_argument(node, 0, "name")
+    prefix, complete = _literal_prefix(target) if target is not None else (None, False)
+    if prefix is None:
+        scan.unresolved.append(node.lineno)
+        return
+
+    package = _call_argument(node, 1, "package") if function == "import_module" else None
+    if prefix.startswith(".") and package is not None:
+        # Relative to a literal package, or to the calling module's package
+        package_name, _ = _literal_prefix(package)
+        if isinstance(package, ast.Constant) and package_name:
+            prefix = package_name + prefix
+        elif not (isinstance(package, ast.Name) and package.id in ("__package__", "__name__")):
+            scan.unresolved.append(node.lineno)
+            return
+    name, level = _split_relative(prefix)
+
+    if complete:
+        scan.dynamic.append((name, level))
+    elif "." in name:
+        # "app.plugins." + x or f"app.plugins.mod_{x}": everything under app.plugins
+        scan.plugins.append((name.rsplit(".", 1)[0], level))
+    elif level:
+        # "." + x: a submodule of the calling module's package
+        scan.plugins.append(("", level))
+    else:
+        scan.unresolved.append(node.lineno)
+
+
+def _scan_pkgutil_call(node: ast.Call, aliases: Dict[str, ModuleRef], scan: FileScan) -> None:
+    """Record a ``pkgutil.iter_modules``/``walk_packages`` call."""
+    path = _call_argument(node, 0, "path")
+    if path is None:
+        return
+    if isinstance(path, ast.Attribute) and path.attr == "__path__":
+        dotted = _dotted_name(path.value)
+        if dotted:
+            head, _, rest = dotted.partition(".")
+            name, level = aliases.get(head, (head, 0))
+            scan.plugins.append((f"{name}.{rest}" if rest else name, level))
+            return
+    elif isinstance(path, ast.Name) and path.id == "__path__":
+        scan.plugins.append(("", 1))
+        return
+    elif any(isinstance(n, ast.Name) and n.id == "__file__" for n in ast.walk(path)):
+        # e.g. pkgutil.iter_modules([os.path.dirname(__file__)])
+        scan.plugins.append(("", 1))
+        return
+    scan.unresolved.append(node.lineno)
+
+
+def _scan_file(source: bytes, filename: str) -> Dict[str, Any]:
+    """Process pool entry point."""
+    return scan_source(source, filename).to_json()
+
+
+class ImportScanner:
+    """
+    Scan a project for imports PyInstaller cannot see.
+
+    Per-file results are cached in SQLite by content hash, so rescanning a
+    project only parses files that changed.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None, workers: Optional[int] = None):
+        """
+        Initialize the scanner.
+
+        Args:
+            cache_path: Cache database; defaults to ``imports.sqlite3`` in
+                the cache root
+            workers: Processes used to parse uncached files (defaults to the
+                CPU count; 1 parses in-process)
+        """
+        self.cache_path = Path(cache_path) if cache_path else default_cache_root() / "imports.sqlite3"
+        self.workers = max(1, workers or os.cpu_count() or 1)
+
+    @staticmethod
+    def _version() -> str:
+        # Parsing depends on the interpreter's grammar
+        return f"{SCANNER_VERSION}-py{sys.version_info[0]}.{sys.version_info[1]}"
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the cache, or return None if it is unusable."""
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(self.cache_path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS scans "
+                "(digest TEXT PRIMARY KEY, data TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            return db
+        except (OSError, sqlite3.Error):
+            return None
+
+    def _lookup(self, db: Optional[sqlite3.Connection], digests: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        if db is None:
+            return found
+        # Stay below SQLite's bound parameter limit
+        for i in range(0, len(digests), 500):
+            chunk = digests[i:i + 500]
+            rows = db.execute(
+                f"SELECT digest, data FROM scans WHERE digest IN ({', '.join('?' * len(chunk))})",
+                chunk
+            )
+            found.update(rows)
+        return found
+
+    def _store(self, db: Optional[sqlite3.Connection], entries: List[Tuple[str, str]]) -> None:
+        if db is None or not entries:
+            return
+        now = time.time()
+        try:
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO scans (digest, data, created) VALUES (?, ?, ?)",
+                    [(digest, data, now) for digest, data in entries]
+                )
+                excess = db.execute("SELECT COUNT(*) FROM scans").fetchone()[0] - MAX_CACHE_ENTRIES
+                if excess > 0:
+                    db.execute(
+                        "DELETE FROM scans WHERE digest IN "
+                        "(SELECT digest FROM scans ORDER BY created LIMIT ?)",
+                        (excess,)
+                    )
+        except sqlite3.Error:
+            # The cache only saves time; failing to fill it is not an error
+            pass
+
+    def scan_files(self, paths: Iterable[Path], pool: Optional[Executor] = None) -> Tuple[Dict[Path, FileScan], int]:
+        """
+        Scan source files, using cached results where possible.
+
+        Args:
+            paths: Files to scan
+            pool: Executor for parsing uncached files; parsed in-process if None
+
+        Returns:
+            ``(results, cache_hits)``
+        """
+        sources: List[Tuple[Path, str, bytes]] = []
+        for path in paths:
+            try:
+                source = path.read_bytes()
+            except OSError:
+                continue
+            digest = hashlib.sha256(source).hexdigest()
+            sources.append((path, f"{self._version()}:{digest}", source))
+
+        db = self._connect()
+        try:
+            try:
+                cached = self._lookup(db, [key for _, key, _ in sources])
+            except sqlite3.Error:
+                cached = {}
+            results: Dict[Path, FileScan] = {}
+            misses = []
+            for path, key, source in sources:
+                if key in cached:
+                    results[path] = FileScan.from_json(json.loads(cached[key]))
+                else:
+                    misses.append((path, key, source))
+
+            if pool is not None and len(misses) >= PARALLEL_THRESHOLD:
+                scanned = pool.map(
+                    _scan_file,
+                    [source for _, _, source in misses],
+                    [str(path) for path, _, _ in misses],
+                    chunksize=max(1, len(misses) // (self.workers * 4))
+                )
+            else:
+                scanned = (_scan_file(source, str(path)) for path, _, source in misses)
+
+            entries = []
+            for (path, key, _), data in zip(misses, scanned):
+                results[path] = FileScan.from_json(data)
+                entries.append((key, json.dumps(data, separators=(",", ":"))))
+            self._store(db, entries)
+        finally:
+            if db is not None:
+                db.close()
+        return results, len(results) - len(misses)
+
+    def scan(self, script_path: Path) -> ImportReport:
+        """
+        Scan an entry script and every local module it reaches.
+
+        Local modules are those under the script's folder. Files are scanned
+        in waves: each wave parses every newly reached file, in parallel
+        when enough of them are not cached.
+
+        Args:
+            script_path: Entry script
+
+        Returns:
+            Proposed hidden imports and dynamic imports needing attention
+        """
+        start = time.perf_counter()
+        script_path = Path(script_path).absolute()
+        root = script_path.parent
+        seen: Set[Path] = set()
+        frontier = [script_path]
+        static: Set[str] = set()
+        proposed: Set[str] = set()
+        plugins: Set[str] = set()
+        unresolved: List[str] = []
+        cache_hits = 0
+        pool: Optional[ProcessPoolExecutor] = None
+        resolved: Dict[str, List[Path]] = {}
+
+        def local_files(name: str) -> List[Path]:
+            """Local files run by importing ``name``: its packages and itself."""
+            if name not in resolved:
+                files = []
+                parts = name.split(".")
+                for i in range(1, len(parts) + 1):
+                    local = resolve_local_module(".".join(parts[:i]), root)
+                    if local is None:
+                        break
+                    files.append(local)
+                resolved[name] = files
+            return resolved[name]
+
+        try:
+            while frontier:
+                seen.update(frontier)
+                if pool is None and self.workers > 1 and len(frontier) >= PARALLEL_THRESHOLD:
+                    pool = ProcessPoolExecutor(max_workers=self.workers)
+                results, hits = self.scan_files(frontier, pool)
+                cache_hits += hits
+
+                reached: Set[Path] = set()
+                for path, scan in results.items():
+                    module = _module_name(path, root, script_path)
+                    package = module if path.name == "__init__.py" else module.rpartition(".")[0]
+
+                    for ref in scan.imports:
+                        name = _absolute(ref, package)
+                        if name:
+                            static.add(name)
+                            reached.update(local_files(name))
+
+                    for ref in scan.dynamic:
+                        name = _absolute(ref, package)
+                        if name:
+                            proposed.add(name)
+                            reached.update(local_files(name))
+
+                    for ref in scan.plugins:
+                        name = _absolute(ref, package)
+                        if not name:
+                            continue
+                        plugins.add(name)
+                        for submodule in _submodules(name, root):
+                            proposed.add(submodule)
+                            reached.update(local_files(submodule))
+
+                    relative = path.relative_to(root).as_posix() if path != script_path else script_path.name
+                    unresolved.extend(f"{relative}:{line}" for line in scan.unresolved)
+
+                frontier = sorted(reached - seen)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return ImportReport(
+            hidden_imports=sorted(proposed - static),
+            plugin_packages=sorted(plugins),
+            unresolved=sorted(unresolved),
+            files_scanned=len(seen),
+            cache_hits=cache_hits,
+            duration=time.perf_counter() - start
+        )
+
+
+def _module_name(path: Path, root: Path, script_path: Path) -> str:
+    """Get the importable name of a local file."""
+    if path == script_path:
+        return "__main__"
+    parts = list(path.relative_to(root).with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _absolute(ref: ModuleRef, package: str) -> Optional[str]:
+    """Resolve a possibly relative module reference."""
+    name, level = ref
+    if not level:
+        return name
+    parts = package.split(".") if package else []
+    if level - 1 > len(parts):
+        return None
+    base = parts[:len(parts) - (level - 1)]
+    return ".".join(base + ([name] if name else [])) or None
+
+
+def _submodules(package: str, root: Path) -> List[str]:
+    """
+    List the submodules of a package without importing it.
+
+    Returns:
+        Submodule names; just the package itself if its folder cannot be found
+    """
+    init_file = resolve_local_module(package, root)
+    if init_file is not None and init_file.name == "__init__.py":
+        folder: Optional[Path] = init_file.parent
+    else:
+        folder = _installed_package_dir(package)
+    if folder is None:
+        return [package]
+
+    found = []
+    for entry in sorted(folder.iterdir()):
+        if entry.suffix == ".py" and entry.stem != "__init__" and entry.stem.isidentifier():
+            found.append(f"{package}.{entry.stem}")
+        elif entry.is_dir() and (entry / "__init__.py").is_file() and entry.name.isidentifier():
+            found.append(f"{package}.{entry.name}")
+    return found
+
+
+def _installed_package_dir(package: str) -> Optional[Path]:
+    """Find an installed package's folder, importing nothing but its top-level spec."""
+    top, _, rest = package.partition(".")
+    try:
+        spec = importlib.util.find_spec(top)
+    except (ImportError, ValueError):
+        return None
+    for location in (spec.submodule_search_locations or []) if spec else []:
+        candidate = Path(location).joinpath(*rest.split(".")) if rest else Path(location)
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+def scan_imports(script_path: Path, cache_path: Optional[Path] = None, workers: Optional[int] = None) -> ImportReport:
+    """
+    Propose hidden imports for a script.
+
+    Args:
+        script_path: Entry script
+        cache_path: Scan cache file (defaults to the cache root)
+        workers: Processes used to parse uncached files
+
+    Returns:
+        Scan report
+    """
+    return ImportScanner(cache_path, workers).scan(script_path)
@@ -0,0 +1,358 @@
+"""
+Import-time profiling of frozen applications for P2E.
+
+The application is built once more with the interpreter option
+``-X importtime`` (PyInstaller's ``--python-option``), since a frozen app
+ignores ``PYTHONPROFILEIMPORTTIME``. Running that build prints an import
+timing line per module to stderr, which is parsed into a cumulative import
+tree and turned into suggestions for the build configuration.
+"""
+
+import ast
+import dataclasses
+import importlib.util
+import re
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from p2e.core.bench import time_startup
+from p2e.utils.modules import resolve_local_module
+from p2e.core.config import BuildConfig
+from p2e.core.converter import PyConverter
+from p2e.core.imports import _absolute, _installed_package_dir
+
+IMPORTTIME_OPTION = "X importtime"
+
+# Imports made by the app that take longer than this are lazy-import candidates
+LAZY_IMPORT_SECONDS = 0.02
+# Optional imports of libraries that take longer than this are exclusion candidates
+EXCLUDE_SECONDS = 0.01
+# Onefile unpacking worth switching to onedir: this long and this share of startup
+ONEDIR_SECONDS = 0.2
+ONEDIR_SHARE = 0.25
+
+# "import time:       337 |        950 |   _frozen_importlib_external"
+_LINE = re.compile(r"^import time:\s+(?P<self>\d+)\s+\|\s+(?P<cumulative>\d+)\s+\|(?P<indent>\s*)(?P<name>\S+)\s*$")
+
+
+@dataclass
+class ImportNode:
+    """One module import with the imports it triggered, timed in seconds."""
+
+    name: str
+    self_time: float
+    cumulative: float
+    depth: int
+    children: List['ImportNode'] = field(default_factory=list)
+    parent: Optional['ImportNode'] = field(default=None, repr=False, compare=False)
+
+    def walk(self) -> Iterable['ImportNode']:
+        """Yield this node and all of its descendants, depth first."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+@dataclass
+class Suggestion:
+    """A proposed change, with the startup time it is expected to save."""
+
+    kind: str
+    target: str
+    reason: str
+    saving: float
+    # BuildConfig fields to update; empty for code changes
+    changes: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class ImportTimeProfile:
+    """Import timings of one run of a frozen application."""
+
+    roots: List[ImportNode]
+    wall: Optional[float] = None
+    extraction: Optional[float] = None
+    returncode: Optional[int] = None
+
+    @property
+    def total(self) -> float:
+        """Seconds spent importing."""
+        return sum(node.cumulative for node in self.roots)
+
+    def nodes(self) -> List[ImportNode]:
+        """All imports, depth first."""
+        return [node for root in self.roots for node in root.walk()]
+
+    def heaviest(self, count: int = 15) -> List[ImportNode]:
+        """Get the imports with the highest cumulative time."""
+        return sorted(self.nodes(), key=lambda node: -node.cumulative)[:count]
+
+    def packages(self) -> Dict[str, float]:
+        """Get the self time per top-level package, largest first."""
+        totals: Dict[str, float] = {}
+        for node in self.nodes():
+            top = node.name.split(".")[0]
+            totals[top] = totals.get(top, 0.0) + node.self_time
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def parse_importtime(output: str) -> List[ImportNode]:
+    """
+    Parse ``-X importtime`` output into an import tree.
+
+    Python reports an import after the imports it triggered, indented two
+    spaces per nesting level, so children are collected until their parent
+    appears.
+
+    Args:
+        output: Error output of the run; other lines are ignored
+
+    Returns:
+        Top-level imports in the order they finished
+    """
+    pending: Dict[int, List[ImportNode]] = {}
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        depth = max(len(match.group("indent")) - 1, 0) // 2
+        node = ImportNode(
+            name=match.group("name"),
+            self_time=int(match.group("self")) / 1e6,
+            cumulative=int(match.group("cumulative")) / 1e6,
+            depth=depth
+        )
+        node.children = pending.pop(depth + 1, [])
+        for child in node.children:
+            child.parent = node
+        pending.setdefault(depth, []).append(node)
+
+    # A run cut short leaves imports whose parent never finished
+    roots = pending.pop(0, [])
+    for depth in sorted(pending):
+        roots.extend(pending[depth])
+    return roots
+
+
+def profile_startup(
+    config: BuildConfig,
+    args: Iterable[str] = (),
+    timeout: float = 60.0,
+    log_callback: Optional[Callable[[str], None]] = None
+) -> ImportTimeProfile:
+    """
+    Build a profiling variant of an app, run it once and time its imports.
+
+    The variant is built into a temporary folder with the same settings
+    (so onefile unpacking is measured too) and removed afterwards. A run
+    that does not exit within ``timeout`` (e.g. a GUI) is stopped and the
+    imports up to then are kept.
+
+    Args:
+        config: Build configuration of the app
+        args: Arguments for the run
+        timeout: Seconds after which the run is stopped
+        log_callback: Optional callback for build output
+
+    Returns:
+        Import timings of the run
+
+    Raises:
+        RuntimeError: If the profiling build fails
+    """
+    log = log_callback or (lambda message: None)
+    with tempfile.TemporaryDirectory(prefix="p2e-importtime-") as temp:
+        variant = dataclasses.replace(
+            config,
+            output_dir=Path(temp),
+            exe_name=f"{config.exe_name}-importtime",
+            python_options=list(config.python_options) + [IMPORTTIME_OPTION],
+            use_cache=False
+        )
+        converter = PyConverter(variant, log_callback=log)
+        result = converter.build(realtime_output=True)
+        if not result:
+            raise RuntimeError(f"Profiling build failed: {result.error or 'see the build output'}")
+
+        log("Running the profiling build...")
+        stderr: List[bytes] = []
+        try:
+            run = time_startup(converter.get_output_path(), list(args), timeout=timeout, stderr=stderr)
+            wall, extraction, returncode = run.wall, run.extraction, run.returncode
+        except RuntimeError:
+            log(f"Stopped the app after {timeout:g}s")
+            wall = extraction = returncode = None
+
+    output = b"".join(stderr).decode('utf-8', 'replace')
+    roots = parse_importtime(output)
+    if not roots:
+        raise RuntimeError("The app reported no import timings")
+    return ImportTimeProfile(roots=roots, wall=wall, extraction=extraction, returncode=returncode)
+
+
+def suggest(profile: ImportTimeProfile, config: BuildConfig) -> List[Suggestion]:
+    """
+    Turn measured import times into configuration and code suggestions.
+
+    - ``exclude_module``: a library imports a slow module inside
+      ``try/except ImportError``, so it copes without it
+    - ``lazy_import``: a slow module imported by the app's own code at
+      startup; deferring the import into the function that needs it
+      removes it from the startup path
+    - ``onedir``: a onefile build spends a large share of its startup
+      unpacking itself
+
+    Args:
+        profile: Measured import times
+        config: Build configuration the profile was taken with
+
+    Returns:
+        Suggestions, largest expected saving first
+    """
+    base_dir = config.script_path.parent
+    script_imports = _imported_names(config.script_path)
+    suggestions: List[Suggestion] = []
+    guarded_cache: Dict[str, Set[str]] = {}
+
+    for node in profile.nodes():
+        parent = node.parent
+        importer = parent.name if parent else None
+        local = resolve_local_module(node.name, base_dir) is not None
+        by_app = (
+            parent is None and node.name.split(".")[0] in script_imports
+        ) or (
+            parent is not None and resolve_local_module(parent.name, base_dir) is not None
+        )
+
+        if by_app and node.cumulative >= LAZY_IMPORT_SECONDS:
+            suggestions.append(Suggestion(
+                kind="lazy_import",
+                target=node.name,
+                reason=f"imported at startup by {importer or config.script_path.name}; "
+                       f"import it inside the code that uses it",
+                saving=node.cumulative
+            ))
+        elif parent is not None and not local and not by_app and node.cumulative >= EXCLUDE_SECONDS:
+            if importer not in guarded_cache:
+                guarded_cache[importer] = _guarded_imports(importer, base_dir)
+            if node.name in guarded_cache[importer] and node.name not in config.hidden_imports:
+                suggestions.append(Suggestion(
+                    kind="exclude_module",
+                    target=node.name,
+                    reason=f"optional import of {importer} (inside try/except ImportError); "
+                           f"check the app still works without it",
+                    saving=node.cumulative,
+                    changes={'exclude_modules': [node.name]}
+                ))
+
+    if config.one_file and profile.extraction is not None and profile.wall:
+        if profile.extraction >= ONEDIR_SECONDS and profile.extraction / profile.wall >= ONEDIR_SHARE:
+            suggestions.append(Suggestion(
+                kind="onedir",
+                target=config.exe_name,
+                reason=f"unpacking the onefile build takes {profile.extraction / profile.wall:.0%} of startup",
+                saving=profile.extraction,
+                changes={'one_file': False}
+            ))
+
+    return sorted(suggestions, key=lambda suggestion: -suggestion.saving)
+
+
+def apply_suggestions(config: BuildConfig, suggestions: Iterable[Suggestion]) -> BuildConfig:
+    """
+    Apply the configuration changes of suggestions.
+
+    Args:
+        config: Configuration to start from (not modified)
+        suggestions: Suggestions to apply; code suggestions are skipped
+
+    Returns:
+        Updated copy of the configuration
+    """
+    updated = dataclasses.replace(config, exclude_modules=list(config.exclude_modules))
+    for suggestion in suggestions:
+        for key, value in suggestion.changes.items():
+            if key == 'exclude_modules':
+                updated.exclude_modules = list(dict.fromkeys(updated.exclude_modules + value))
+            else:
+                setattr(updated, key, value)
+    return updated
+
+
+def _imported_names(path: Path) -> Set[str]:
+    """Get the top-level names a source file imports absolutely."""
+    try:
+        tree = ast.parse(path.read_text(encoding='utf-8'), filename=str(path))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return set()
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split(".")[0])
+    return names
+
+
+def _module_source(name: str, base_dir: Path) -> Optional[Path]:
+    """Find a module's source file without importing it."""
+    local = resolve_local_module(name, base_dir)
+    if local is not None:
+        return local
+    package, _, leaf = name.rpartition(".")
+    if package:
+        folder = _installed_package_dir(package)
+        candidates = [folder / f"{leaf}.py", folder / leaf / "__init__.py"] if folder else []
+    else:
+        try:
+            spec = importlib.util.find_spec(name)
+        except (ImportError, ValueError):
+            spec = None
+        candidates = [Path(spec.origin)] if spec and spec.origin and spec.origin.endswith(".py") else []
+    return next((path for path in candidates if path.is_file()), None)
+
+
+def _guarded_imports(module: str, base_dir: Path) -> Set[str]:
+    """
+    Get the modules a module imports inside ``try/except ImportError``.
+
+    Imports whose handler imports a fallback (``_decimal`` falling back to
+    ``_pydecimal``) are left out: excluding them saves nothing.
+    """
+    source = _module_source(module, base_dir)
+    if source is None:
+        return set()
+    try:
+        tree = ast.parse(source.read_text(encoding='utf-8'), filename=str(source))
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return set()
+
+    package = module if source.name == "__init__.py" else module.rpartition(".")[0]
+    guarded: Set[str] = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Try) or not any(_catches_import_error(handler) for handler in node.handlers):
+            continue
+        if any(isinstance(child, (ast.Import, ast.ImportFrom)) for handler in node.handlers for child in ast.walk(handler)):
+            continue
+        for statement in node.body:
+            for child in ast.walk(statement):
+                if isinstance(child, ast.Import):
+                    guarded.update(alias.name for alias in child.names)
+                elif isinstance(child, ast.ImportFrom):
+                    base = _absolute((child.module or "", child.level), package)
+                    if base:
+                        guarded.add(base)
+                        guarded.update(f"{base}.{alias.name}" for alias in child.names)
+    return guarded
+
+
+def _catches_import_error(handler: ast.ExceptHandler) -> bool:
+    if handler.type is None:
+        return True
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    return any(
+        isinstance(kind, ast.Name) and kind.id in ("ImportError", "ModuleNotFoundError", "Exception")
+        for kind in types
+    )
@@ -0,0 +1,374 @@
+"""
+Persistent build ledger for P2E.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from p2e.core.cache import config_digest, default_cache_root
+from p2e.core.config import BuildConfig
+from p2e.core.result import BuildResult
+
+# Bumped whenever the schema changes
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    exe_name TEXT NOT NULL,
+    script_path TEXT,
+    config_hash TEXT NOT NULL,
+    source TEXT NOT NULL,
+    owner TEXT,
+    success INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    returncode INTEGER,
+    duration REAL,
+    cache_hit INTEGER NOT NULL DEFAULT 0,
+    output_path TEXT,
+    output_size INTEGER,
+    peak_rss INTEGER,
+    phases TEXT,
+    stages TEXT,
+    log_path TEXT,
+    error TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_builds_exe ON builds (exe_name, id);
+CREATE INDEX IF NOT EXISTS idx_builds_owner ON builds (owner, id);
+CREATE INDEX IF NOT EXISTS idx_builds_finished ON builds (finished_at);
+CREATE INDEX IF NOT EXISTS idx_builds_duration ON builds (duration);
+CREATE INDEX IF NOT EXISTS idx_builds_config ON builds (config_hash);
+"""
+
+_COLUMNS = (
+    "id", "started_at", "finished_at", "exe_name", "script_path", "config_hash",
+    "source", "owner", "success", "status", "returncode", "duration", "cache_hit",
+    "output_path", "output_size", "peak_rss", "phases", "stages", "log_path",
+    "error", "metadata",
+)
+
+
+@dataclass
+class LedgerEntry:
+    """One recorded build."""
+
+    id: int
+    started_at: float
+    finished_at: float
+    exe_name: str
+    config_hash: str
+    source: str
+    success: bool
+    status: str
+    script_path: Optional[str] = None
+    owner: Optional[str] = None
+    returncode: Optional[int] = None
+    duration: Optional[float] = None
+    cache_hit: bool = False
+    output_path: Optional[str] = None
+    output_size: Optional[int] = None
+    peak_rss: Optional[int] = None
+    phases: Dict[str, float] = field(default_factory=dict)
+    stages: Dict[str, float] = field(default_factory=dict)
+    log_path: Optional[str] = None
+    error: Optional[str] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> 'LedgerEntry':
+        """Create an entry from a ``builds`` row."""
+        data = dict(zip(_COLUMNS, row))
+        for key in ("phases", "stages", "metadata"):
+            data[key] = json.loads(data[key]) if data[key] else {}
+        data["success"] = bool(data["success"])
+        data["cache_hit"] = bool(data["cache_hit"])
+        return cls(**data)
+
+
+@dataclass
+class LedgerStats:
+    """Aggregate statistics over recorded builds."""
+
+    builds: int
+    succeeded: int
+    cache_hits: int
+    p50: Optional[float]
+    p95: Optional[float]
+    mean: Optional[float]
+    slowest: List[LedgerEntry]
+    # Per executable: (finished_at, output_size) of the most recent successful builds
+    size_trends: Dict[str, List[Tuple[float, int]]]
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        """Share of builds that succeeded."""
+        return self.succeeded / self.builds if self.builds else None
+
+    @property
+    def cache_hit_rate(self) -> Optional[float]:
+        """Share of builds restored from the build cache."""
+        return self.cache_hits / self.builds if self.builds else None
+
+
+def percentile(values: List[float], share: float) -> Optional[float]:
+    """
+    Get a percentile by linear interpolation.
+
+    Args:
+        values: Values sorted in ascending order
+        share: Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        The interpolated value, or None for no values
+    """
+    if not values:
+        return None
+    position = (len(values) - 1) * share
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class BuildLedger:
+    """
+    Record builds in an SQLite database.
+
+    The database is opened in WAL mode, so the CLI, the web app and the
+    build server can record and query concurrently. Queries page through
+    indexed columns rather than loading the history into memory.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        """
+        Open (and create if needed) a ledger.
+
+        Args:
+            path: Database file; defaults to ``ledger.sqlite3`` in the cache root
+        """
+        self.path = Path(path) if path else default_cache_root() / "ledger.sqlite3"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with closing(self._connect()) as db, db:
+            db.execute("PRAGMA journal_mode=WAL")
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise ValueError(f"Ledger {self.path} was written by a newer version of P2E")
+            db.executescript(_SCHEMA)
+            db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def record(
+        self,
+        config: BuildConfig,
+        result: Optional[BuildResult] = None,
+        source: str = "api",
+        owner: Optional[str] = None,
+        log_path: Optional[Path] = None,
+        status: Optional[str] = None,
+        error: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        finished_at: Optional[float] = None
+    ) -> int:
+        """
+        Record a finished build.
+
+        Args:
+            config: Build configuration
+            result: Build result; None for builds that never ran
+            source: What ran the build (cli, web, server, batch, api)
+            owner: User or session that requested it
+            log_path: Where the build log is kept
+            status: Final status; defaults to the result's status
+            error: Error message; defaults to the result's error
+            metadata: Extra JSON-serializable data for the caller
+            finished_at: End time; defaults to now
+
+        Returns:
+            Id of the new entry
+        """
+        # BuildResult is falsy for failed builds, so test for None explicitly
+        ran = result is not None
+        finished_at = finished_at or time.time()
+        started_at = (result.started_at if ran else None) or finished_at
+        output_path = result.output_path if ran else None
+        values = {
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "exe_name": str(config.exe_name),
+            "script_path": str(config.script_path),
+            "config_hash": config_digest(config),
+            "source": source,
+            "owner": owner,
+            "success": int(ran and result.success),
+            "status": status or (result.status.value if ran else "failed"),
+            "returncode": result.returncode if ran else None,
+            "duration": result.duration if ran else None,
+            "cache_hit": int(ran and result.cache_hit),
+            "output_path": str(output_path) if output_path else None,
+            "output_size": result.output_size if ran else None,
+            "peak_rss": result.peak_rss if ran else None,
+            "phases": json.dumps(result.phases) if ran else None,
+            "stages": json.dumps(result.stages) if ran else None,
+            "log_path": str(log_path) if log_path else None,
+            "error": error or (result.error if ran else None),
+            "metadata": json.dumps(metadata, default=str) if metadata else None,
+        }
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" * len(values))
+        with self._lock, closing(self._connect()) as db, db:
+            cursor = db.execute(
+                f"INSERT INTO builds ({columns}) VALUES ({placeholders})",
+                tuple(values.values())
+            )
+            return cursor.lastrowid
+
+    @staticmethod
+    def _filters(
+        exe_name: Optional[str] = None,
+        success: Optional[bool] = None,
+        owner: Optional[str] = None,
+        since: Optional[float] = None
+    ) -> Tuple[str, List[Any]]:
+        clauses, params = [], []
+        if exe_name is not None:
+            clauses.append("exe_name = ?")
+            params.append(exe_name)
+        if success is not None:
+            clauses.append("success = ?")
+            params.append(int(success))
+        if owner is not None:
+            clauses.append("owner = ?")
+            params.append(owner)
+        if since is not None:
+            clauses.append("finished_at >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def count(
+        self,
+        exe_name: Optional[str] = None,
+        success: Optional[bool] = None,
+        owner: Optional[str] = None,
+        since: Optional[float] = None
+    ) -> int:
+        """Count recorded builds matching the filters."""
+        where, params = self._filters(exe_name, success, owner, since)
+        with closing(self._connect()) as db:
+            return db.execute(f"SELECT COUNT(*) FROM builds{where}", params).fetchone()[0]
+
+    def page(
+        self,
+        offset: int = 0,
+        limit: int = 50,
+        exe_name: Optional[str] = None,
+        success: Optional[bool] = None,
+        owner: Optional[str] = None
+    ) -> List[LedgerEntry]:
+        """
+        Get recorded builds, newest first.
+
+        Args:
+            offset: Number of matching builds to skip
+            limit: Maximum number of builds
+            exe_name: Only builds of this executable
+            success: Only successful (True) or failed (False) builds
+            owner: Only builds of this owner
+
+        Returns:
+            Matching entries
+        """
+        where, params = self._filters(exe_name, success, owner)
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM builds{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                params + [limit, max(offset, 0)]
+            ).fetchall()
+        return [LedgerEntry.from_row(row) for row in rows]
+
+    def get(self, entry_id: int) -> Optional[LedgerEntry]:
+        """Look up one entry by id."""
+        with closing(self._connect()) as db:
+            row = db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM builds WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return LedgerEntry.from_row(row) if row else None
+
+    def exe_names(self) -> List[str]:
+        """Get the names of all recorded executables."""
+        with closing(self._connect()) as db:
+            rows = db.execute("SELECT DISTINCT exe_name FROM builds ORDER BY exe_name").fetchall()
+        return [row[0] for row in rows]
+
+    def stats(
+        self,
+        exe_name: Optional[str] = None,
+        since: Optional[float] = None,
+        slowest: int = 5,
+        trend_points: int = 10
+    ) -> LedgerStats:
+        """
+        Compute aggregate statistics.
+
+        Args:
+            exe_name: Only builds of this executable
+            since: Only builds finished at or after this time
+            slowest: Number of slowest builds to return
+            trend_points: Number of recent sizes per executable
+
+        Returns:
+            Statistics over the matching builds
+        """
+        where, params = self._filters(exe_name, since=since)
+        with closing(self._connect()) as db:
+            builds, succeeded, cache_hits, mean = db.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(success), 0), COALESCE(SUM(cache_hit), 0), AVG(duration) "
+                f"FROM builds{where}",
+                params
+            ).fetchone()
+            durations = [row[0] for row in db.execute(
+                f"SELECT duration FROM builds{where}{' AND' if where else ' WHERE'} duration IS NOT NULL "
+                f"ORDER BY duration",
+                params
+            )]
+            slow_rows = db.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM builds{where}{' AND' if where else ' WHERE'} "
+                f"duration IS NOT NULL ORDER BY duration DESC LIMIT ?",
+                params + [slowest]
+            ).fetchall()
+
+            size_trends: Dict[str, List[Tuple[float, int]]] = {}
+            names = [exe_name] if exe_name else [row[0] for row in db.execute(
+                f"SELECT DISTINCT exe_name FROM builds{where}", params
+            )]
+            for name in names:
+                trend_where, trend_params = self._filters(name, success=True, since=since)
+                rows = db.execute(
+                    f"SELECT finished_at, output_size FROM builds{trend_where} "
+                    f"AND output_size IS NOT NULL ORDER BY id DESC LIMIT ?",
+                    trend_params + [trend_points]
+                ).fetchall()
+                if rows:
+                    size_trends[name] = [(row[0], row[1]) for row in reversed(rows)]
+
+        return LedgerStats(
+            builds=builds,
+            succeeded=succeeded,
+            cache_hits=cache_hits,
+            p50=percentile(durations, 0.50),
+            p95=percentile(durations, 0.95),
+            mean=mean,
+            slowest=[LedgerEntry.from_row(row) for row in slow_rows],
+            size_trends=size_trends
+        )
@@ -0,0 +1,406 @@
+"""
+PyInstaller availability and version probing for P2E.
+"""
+
+import json
+import os
+import platform
+import shutil
+import site
+import subprocess
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+# Command-line features and the PyInstaller version that introduced them
+FEATURE_VERSIONS: Tuple[Tuple[str, Tuple[int, ...]], ...] = (
+    ("onefile", (5, 0)),
+    ("add-data", (5, 0)),
+    ("hidden-import", (5, 0)),
+    ("exclude-module", (5, 0)),
+    ("workpath", (5, 0)),
+    ("specpath", (5, 0)),
+    ("strip", (5, 0)),
+    ("upx", (5, 0)),
+    ("splash", (5, 0)),
+    ("contents-directory", (6, 0)),
+    ("python-option", (6, 0)),
+    ("optimize", (6, 6)),
+)
+
+# Run by foreign interpreters to report the same information
+_PROBE_SCRIPT = """
+import json, site, sys
+try:
+    from importlib import metadata
+    version = metadata.version("pyinstaller")
+except Exception:
+    version = None
+dirs = list(getattr(site, "getsitepackages", lambda: [])())
+dirs.append(site.getusersitepackages())
+print(json.dumps({"version": version, "site_dirs": dirs}))
+"""
+
+# Run by foreign interpreters to describe themselves
+_IDENTITY_SCRIPT = """
+import json, platform, sys
+print(json.dumps({
+    "version": sys.version,
+    "cache_tag": sys.implementation.cache_tag,
+    "machine": platform.machine(),
+    "base_prefix": sys.base_prefix,
+}))
+"""
+
+# Run by foreign interpreters to identify the modules given as arguments
+_MODULES_SCRIPT = """
+import importlib.util, json, os, site, sys
+try:
+    from importlib import metadata
+    dists = list(metadata.distributions())
+except Exception:
+    dists = []
+versions = {}
+for dist in dists:
+    name = dist.metadata["Name"]
+    if name:
+        top_level = dist.read_text("top_level.txt")
+        for top in (top_level.split() if top_level else [name.replace("-", "_")]):
+            versions.setdefault(top, name + "==" + dist.version)
+stdlib = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+modules = {}
+for top in sys.argv[1:]:
+    if top in stdlib:
+        continue
+    if top in versions:
+        modules[top] = versions[top]
+        continue
+    try:
+        spec = importlib.util.find_spec(top)
+    except (ImportError, ValueError):
+        spec = None
+    if spec is None:
+        modules[top] = "missing"
+    elif spec.origin and os.path.isfile(spec.origin):
+        stat = os.stat(spec.origin)
+        modules[top] = "%s:%d:%d" % (spec.origin, stat.st_size, stat.st_mtime_ns)
+    else:
+        modules[top] = "builtin"
+dirs = list(getattr(site, "getsitepackages", lambda: [])())
+dirs.append(site.getusersitepackages())
+print(json.dumps({"modules": modules, "site_dirs": dirs}))
+"""
+
+_lock = threading.Lock()
+_cache: Dict[str, Tuple[Tuple[Tuple[str, int], ...], List[str], 'PyInstallerInfo']] = {}
+_identities: Dict[Tuple[str, int], Dict[str, str]] = {}
+_modules: Dict[Tuple[str, Tuple[str, ...]], Tuple[Tuple[Tuple[str, int], ...], List[str], Dict[str, str]]] = {}
+
+
+@dataclass(frozen=True)
+class PyInstallerInfo:
+    """Result of probing an interpreter for PyInstaller."""
+
+    python: str
+    available: bool
+    version: Optional[str] = None
+    features: FrozenSet[str] = field(default_factory=frozenset)
+
+    def supports(self, feature: str) -> bool:
+        """Check whether the installed PyInstaller supports a feature."""
+        return feature in self.features
+
+
+def parse_version(version: str) -> Tuple[int, ...]:
+    """Parse the leading numeric components of a version string."""
+    parts = []
+    for part in version.split("."):
+        digits = ""
+        for char in part:
+            if not char.isdigit():
+                break
+            digits += char
+        if not digits:
+            break
+        parts.append(int(digits))
+    return tuple(parts)
+
+
+def features_for(version: Optional[str]) -> FrozenSet[str]:
+    """Get the feature set supported by a PyInstaller version."""
+    if not version:
+        return frozenset()
+    parsed = parse_version(version)
+    return frozenset(name for name, since in FEATURE_VERSIONS if parsed >= since)
+
+
+def _site_signature(site_dirs: List[str]) -> Tuple[Tuple[str, int], ...]:
+    """Snapshot the modification times of site-packages folders."""
+    signature = []
+    for path in site_dirs:
+        try:
+            signature.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            signature.append((path, 0))
+    return tuple(signature)
+
+
+def _current_site_dirs() -> List[str]:
+    """Get the site-packages folders of the running interpreter."""
+    dirs = list(getattr(site, "getsitepackages", lambda: [])())
+    dirs.append(site.getusersitepackages())
+    return dirs
+
+
+def _probe_current() -> Tuple[Optional[str], List[str]]:
+    """Look up PyInstaller's metadata in this process."""
+    import importlib
+
+    importlib.invalidate_caches()
+    try:
+        from importlib import metadata
+        version: Optional[str] = metadata.version("pyinstaller")
+    except Exception:
+        version = None
+    return version, _current_site_dirs()
+
+
+def _probe_foreign(python: str) -> Tuple[Optional[str], List[str]]:
+    """Ask another interpreter for PyInstaller's metadata."""
+    try:
+        result = subprocess.run(
+            [python, "-c", _PROBE_SCRIPT],
+            capture_output=True,
+            text=True,
+            check=False
+        )
+        data = json.loads(result.stdout)
+        return data.get("version"), list(data.get("site_dirs", []))
+    except (OSError, ValueError):
+        return None, []
+
+
+def _distribution_versions() -> Dict[str, str]:
+    """Map top-level import names to ``dist==version`` strings."""
+    try:
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        return {}
+
+    versions: Dict[str, str] = {}
+    for dist in metadata.distributions():
+        name = dist.metadata["Name"]
+        if not name:
+            continue
+        top_level = dist.read_text("top_level.txt")
+        names = top_level.split() if top_level else [name.replace("-", "_")]
+        for top in names:
+            versions.setdefault(top, f"{name}=={dist.version}")
+    return versions
+
+
+def _identify_current(names: Sequence[str]) -> Tuple[Dict[str, str], List[str]]:
+    """Identify installed modules in this process."""
+    import importlib
+    import importlib.util
+
+    importlib.invalidate_caches()
+    stdlib = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+    versions = _distribution_versions()
+    modules: Dict[str, str] = {}
+    for top in names:
+        if top in stdlib:
+            continue
+        if top in versions:
+            modules[top] = versions[top]
+            continue
+        try:
+            spec = importlib.util.find_spec(top)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None:
+            modules[top] = "missing"
+        elif spec.origin and os.path.isfile(spec.origin):
+            stat = os.stat(spec.origin)
+            modules[top] = f"{spec.origin}:{stat.st_size}:{stat.st_mtime_ns}"
+        else:
+            modules[top] = "builtin"
+    return modules, _current_site_dirs()
+
+
+def _identify_foreign(python: str, names: Sequence[str]) -> Tuple[Dict[str, str], List[str]]:
+    """Ask another interpreter to identify its installed modules."""
+    try:
+        result = subprocess.run(
+            [python, "-c", _MODULES_SCRIPT, *names],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        data = json.loads(result.stdout)
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        raise RuntimeError(f"Could not run Python interpreter {python}: {e}") from e
+    return dict(data.get("modules", {})), list(data.get("site_dirs", []))
+
+
+def resolve_python(python: Optional[str] = None) -> str:
+    """
+    Get the absolute path of an interpreter given as a path or a command.
+
+    Args:
+        python: Interpreter path or command name like ``python3`` (defaults
+            to ``sys.executable``)
+
+    Returns:
+        Absolute path; a command not found on PATH is returned unchanged
+    """
+    if not python:
+        return os.path.abspath(sys.executable)
+    if os.sep in python or (os.altsep and os.altsep in python):
+        return os.path.abspath(python)
+    found = shutil.which(python)
+    return os.path.abspath(found) if found else python
+
+
+def probe_pyinstaller(python: Optional[str] = None) -> PyInstallerInfo:
+    """
+    Probe an interpreter for PyInstaller.
+
+    The running interpreter is probed in-process via package metadata; other
+    interpreters are asked once through a tiny subprocess. Results are
+    cached per interpreter path and reused until one of its site-packages
+    folders changes (e.g. a package was installed or removed).
+
+    Args:
+        python: Interpreter path or command (defaults to ``sys.executable``)
+
+    Returns:
+        PyInstaller availability, version and supported features
+    """
+    python = resolve_python(python)
+
+    with _lock:
+        cached = _cache.get(python)
+        if cached:
+            signature, site_dirs, info = cached
+            if _site_signature(site_dirs) == signature:
+                return info
+
+        if python == os.path.abspath(sys.executable):
+            version, site_dirs = _probe_current()
+        else:
+            version, site_dirs = _probe_foreign(python)
+
+        info = PyInstallerInfo(
+            python=python,
+            available=version is not None,
+            version=version,
+            features=features_for(version),
+        )
+        _cache[python] = (_site_signature(site_dirs), site_dirs, info)
+        return info
+
+
+def identify_modules(names: Iterable[str], python: Optional[str] = None) -> Dict[str, str]:
+    """
+    Identify top-level modules as the build interpreter would import them.
+
+    Modules of an installed distribution are identified by its version,
+    other importable modules by the size and modification time of their
+    file. Standard library modules are left out. Like PyInstaller probes,
+    results are memoized per interpreter until one of its site-packages
+    folders changes.
+
+    Args:
+        names: Top-level module names
+        python: Interpreter path or command (defaults to ``sys.executable``)
+
+    Returns:
+        Mapping of module name to ``dist==version``, ``origin:size:mtime``,
+        ``builtin`` or ``missing``
+
+    Raises:
+        RuntimeError: If a foreign interpreter cannot be run
+    """
+    python = resolve_python(python)
+    key = (python, tuple(sorted(set(names))))
+
+    with _lock:
+        cached = _modules.get(key)
+        if cached:
+            signature, site_dirs, modules = cached
+            if _site_signature(site_dirs) == signature:
+                return dict(modules)
+
+        if python == os.path.abspath(sys.executable):
+            modules, site_dirs = _identify_current(key[1])
+        else:
+            modules, site_dirs = _identify_foreign(python, key[1])
+        _modules[key] = (_site_signature(site_dirs), site_dirs, modules)
+        return dict(modules)
+
+
+def invalidate_probe_cache(python: Optional[str] = None) -> None:
+    """
+    Forget cached probe results.
+
+    Args:
+        python: Interpreter to forget (defaults to all interpreters)
+    """
+    with _lock:
+        if python is None:
+            _cache.clear()
+            _modules.clear()
+        else:
+            python = resolve_python(python)
+            _cache.pop(python, None)
+            for key in [key for key in _modules if key[0] == python]:
+                del _modules[key]
+
+
+def interpreter_identity(python: Optional[str] = None) -> Dict[str, str]:
+    """
+    Describe an interpreter well enough to tell incompatible ones apart.
+
+    Foreign interpreters are asked through a subprocess once; the answer is
+    memoized until the interpreter binary changes.
+
+    Args:
+        python: Interpreter path or command (defaults to ``sys.executable``)
+
+    Returns:
+        Version, implementation tag, machine and installation prefix
+
+    Raises:
+        RuntimeError: If the interpreter cannot be run
+    """
+    python = resolve_python(python)
+    if python == os.path.abspath(sys.executable):
+        return {
+            "version": sys.version,
+            "cache_tag": sys.implementation.cache_tag,
+            "machine": platform.machine(),
+            "base_prefix": sys.base_prefix,
+        }
+
+    try:
+        signature = (os.path.realpath(python), os.stat(python).st_mtime_ns)
+    except OSError as e:
+        raise RuntimeError(f"Python interpreter not found: {python}") from e
+    with _lock:
+        identity = _identities.get(signature)
+    if identity is None:
+        try:
+            result = subprocess.run(
+                [python, "-c", _IDENTITY_SCRIPT],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            identity = json.loads(result.stdout)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            raise RuntimeError(f"Could not run Python interpreter {python}: {e}") from e
+        with _lock:
+            _identities[signature] = identity
+    return identity
@@ -0,0 +1,91 @@
+"""
+Build status and result types for P2E.
+"""
+
+import json
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+class BuildStatus(Enum):
+    """Build status enumeration."""
+    IDLE = "idle"
+    CHECKING_DEPS = "checking_dependencies"
+    INSTALLING_DEPS = "installing_dependencies"
+    CHECKING_CACHE = "checking_cache"
+    SCANNING_IMPORTS = "scanning_imports"
+    BUILDING = "building"
+    CLEANING = "cleaning"
+    VERIFYING = "verifying"
+    COMPLETE = "complete"
+    FAILED = "failed"
+
+
+class JobStatus(Enum):
+    """Queued build job status enumeration."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    CANCELLED = "cancelled"
+
+
+@dataclass
+class BuildResult:
+    """
+    Outcome of a single build.
+
+    Evaluates as true when the build succeeded, so it can be used wherever
+    a plain success flag was expected.
+    """
+
+    success: bool
+    status: BuildStatus
+    exe_name: str
+    output_path: Optional[Path] = None
+    # Executable of every variant, output_path first
+    output_paths: List[Path] = field(default_factory=list)
+    returncode: Optional[int] = None
+    cache_hit: bool = False
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    # Wall-clock seconds per BuildStatus phase, keyed by status value
+    phases: Dict[str, float] = field(default_factory=dict)
+    # Seconds per PyInstaller stage (Analysis, PYZ, PKG, EXE, COLLECT)
+    stages: Dict[str, float] = field(default_factory=dict)
+    # Size of the executable (onefile) or distribution folder (onedir)
+    output_size: Optional[int] = None
+    # Peak resident memory of the PyInstaller process, if measurable
+    peak_rss: Optional[int] = None
+    started_at: Optional[float] = None
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a JSON-compatible dictionary."""
+        return {
+            'success': self.success,
+            'status': self.status.value,
+            'exe_name': self.exe_name,
+            'output_path': str(self.output_path) if self.output_path else None,
+            'output_paths': [str(path) for path in self.output_paths],
+            'returncode': self.returncode,
+            'cache_hit': self.cache_hit,
+            'duration': self.duration,
+            'error': self.error,
+            'phases': dict(self.phases),
+            'stages': dict(self.stages),
+            'output_size': self.output_size,
+            'peak_rss': self.peak_rss,
+            'started_at': self.started_at,
+        }
+
+    def save_json(self, path: Path) -> None:
+        """Save the result as a JSON report."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,489 @@
+"""
+Background build scheduling for long-lived P2E processes.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from p2e.core.config import BuildConfig
+from p2e.core.converter import PyConverter
+from p2e.core.ledger import BuildLedger
+from p2e.core.result import BuildResult, JobStatus
+from p2e.utils.logstore import LogStore
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs kept in memory for status queries
+DEFAULT_HISTORY_SIZE = 200
+
+# Owner of jobs submitted without one
+DEFAULT_OWNER = "default"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class QuotaExceededError(QueueFullError):
+    """Raised when an owner submits more builds than its quota allows."""
+
+
+@dataclass
+class BuildJob:
+    """A build submitted to a scheduler."""
+
+    id: str
+    config: BuildConfig
+    owner: str = DEFAULT_OWNER
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[BuildResult] = None
+    error: Optional[str] = None
+    logs: LogStore = field(default_factory=LogStore, repr=False)
+    keep_log: bool = False
+    on_finish: Optional[Callable[['BuildJob'], None]] = field(default=None, repr=False)
+    # Free-form data for the submitter, e.g. where the artifact was stored
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    converter: Optional[PyConverter] = field(default=None, repr=False)
+    _changed: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def done(self) -> bool:
+        """Whether the job reached a final state."""
+        return self.status in (JobStatus.SUCCESS, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    @property
+    def output_path(self) -> Optional[Path]:
+        """Built executable, once the job succeeded."""
+        return self.result.output_path if self.result else None
+
+    def append_log(self, message: str) -> None:
+        """Record a log line and wake up log followers."""
+        with self._changed:
+            # Late messages, e.g. from a cancelling thread, are dropped
+            if not self.logs.closed:
+                self.logs.append(message)
+            self._changed.notify_all()
+
+    def close_logs(self) -> None:
+        """Flush the log to disk once the job ended."""
+        with self._changed:
+            self.logs.close()
+
+    def set_status(self, status: JobStatus) -> None:
+        """Change the job status and wake up followers."""
+        with self._changed:
+            self.status = status
+            self._changed.notify_all()
+
+    def read_logs(
+        self,
+        offset: int = 0,
+        wait: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """
+        Read log lines from an offset.
+
+        Args:
+            offset: Index of the first line to return
+            wait: Seconds to wait for new lines if none are available yet
+            limit: Maximum number of lines to return
+
+        Returns:
+            Lines from ``offset`` on (possibly empty)
+        """
+        with self._changed:
+            if wait and offset >= len(self.logs) and not self.done:
+                self._changed.wait(wait)
+        return self.logs.read(offset, limit)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summarize the job for JSON APIs."""
+        return {
+            'id': self.id,
+            'owner': self.owner,
+            'exe_name': self.config.exe_name,
+            'status': self.status.value,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'duration': self.result.duration if self.result else None,
+            'cache_hit': self.result.cache_hit if self.result else False,
+            'output_path': str(self.output_path) if self.output_path else None,
+            'error': self.error,
+            'log_lines': len(self.logs),
+        }
+
+
+class BuildScheduler:
+    """
+    Run builds on a bounded pool of background worker threads.
+
+    Builds run in-process, so interpreter startup and warm caches (such as
+    the PyInstaller probe) are shared by every build.
+
+    Every job belongs to an owner (a user or session). Queued jobs are kept
+    in one FIFO queue per owner and workers take from the owners in turn,
+    so one owner submitting many builds does not starve the others. Owners
+    can be limited in how many of their builds run at once and how many
+    they may have queued.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 100,
+        history_size: int = DEFAULT_HISTORY_SIZE,
+        max_running_per_owner: Optional[int] = None,
+        max_queued_per_owner: Optional[int] = None,
+        ledger: Optional[BuildLedger] = None,
+        source: str = "scheduler"
+    ):
+        """
+        Initialize the scheduler and start its workers.
+
+        Args:
+            workers: Number of builds running at once
+            queue_size: Maximum number of queued (not yet running) builds
+            history_size: Number of finished jobs kept for status queries
+            max_running_per_owner: Builds one owner may run at once
+                (unlimited if None)
+            max_queued_per_owner: Builds one owner may have queued
+                (unlimited if None)
+            ledger: Ledger every finished job is recorded in
+            source: Source recorded in the ledger, e.g. ``web``
+        """
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.history_size = history_size
+        self.max_running_per_owner = max_running_per_owner
+        self.max_queued_per_owner = max_queued_per_owner
+        self.ledger = ledger
+        self.source = source
+        self._jobs: Dict[str, BuildJob] = {}
+        self._queues: Dict[str, Deque[BuildJob]] = {}
+        # Owners with queued jobs, in the order they get their next turn
+        self._turns: Deque[str] = deque()
+        self._running: Dict[str, int] = {}
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"p2e-build-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(
+        self,
+        config: BuildConfig,
+        owner: str = DEFAULT_OWNER,
+        logs: Optional[LogStore] = None,
+        on_finish: Optional[Callable[[BuildJob], None]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> BuildJob:
+        """
+        Queue a build.
+
+        Args:
+            config: Build configuration
+            owner: User or session the build is accounted to
+            logs: Log store to append the build log to; the caller keeps
+                ownership, so its file is left in place when the job is
+                forgotten. A temporary log is used otherwise.
+            on_finish: Called on the worker thread once the job ended
+                (including when it was cancelled while queued)
+            metadata: Initial job metadata, visible to ``on_finish`` even if
+                the job finishes before ``submit`` returns
+
+        Returns:
+            The queued job
+
+        Raises:
+            QuotaExceededError: If the owner has too many queued builds
+            QueueFullError: If the queue is at capacity
+        """
+        with self._lock:
+            if self._stopping:
+                raise QueueFullError("Scheduler is shutting down")
+            if self._queued_count() >= self.queue_size:
+                raise QueueFullError("Build queue is full, try again later")
+            owner_queue = self._queues.get(owner)
+            if (
+                self.max_queued_per_owner is not None
+                and owner_queue is not None
+                and self._waiting(owner_queue) >= self.max_queued_per_owner
+            ):
+                raise QuotaExceededError(
+                    f"At most {self.max_queued_per_owner} queued build(s) per user"
+                )
+
+            job = BuildJob(
+                id=uuid.uuid4().hex,
+                config=config,
+                owner=owner,
+                logs=logs if logs is not None else LogStore(),
+                keep_log=logs is not None,
+                on_finish=on_finish,
+                metadata=dict(metadata or {})
+            )
+            self._jobs[job.id] = job
+            if owner_queue is None:
+                owner_queue = self._queues[owner] = deque()
+                self._turns.append(owner)
+            owner_queue.append(job)
+            self._work.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[BuildJob]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner: Optional[str] = None) -> List[BuildJob]:
+        """
+        Get known jobs, oldest first.
+
+        Args:
+            owner: Only jobs of this owner
+
+        Returns:
+            Matching jobs
+        """
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if owner is None or job.owner == owner]
+        return sorted(jobs, key=lambda job: job.submitted_at)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        Get how many queued builds will start before a job.
+
+        The dispatch order is simulated with the owners taking turns, so the
+        position accounts for fair scheduling; quota limits that may delay
+        an owner are not predicted.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            0 for the next build to start, None if the job is not queued
+        """
+        with self._lock:
+            queues = {owner: list(jobs) for owner, jobs in self._queues.items()}
+            turns = list(self._turns)
+        position = 0
+        while turns:
+            owner = turns.pop(0)
+            job = queues[owner].pop(0)
+            if job.id == job_id:
+                return position
+            if job.status != JobStatus.CANCELLED:
+                position += 1
+            if queues[owner]:
+                turns.append(owner)
+        return None
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        Args:
+            job_id: Job id
+
+        Returns:
+            True if the job was cancelled
+        """
+        with self._lock:
+            # Checked together with _run attaching the converter, so a
+            # job is either stopped here or never started there
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return False
+            job.error = "Cancelled"
+            job.set_status(JobStatus.CANCELLED)
+            converter = job.converter
+        if converter:
+            converter.stop()
+        return True
+
+    def queued(self, owner: Optional[str] = None) -> int:
+        """
+        Number of jobs waiting for a worker.
+
+        Args:
+            owner: Only count jobs of this owner
+        """
+        with self._lock:
+            if owner is not None:
+                return self._waiting(self._queues.get(owner, ()))
+            return self._queued_count()
+
+    def running(self, owner: Optional[str] = None) -> int:
+        """
+        Number of jobs being built.
+
+        Args:
+            owner: Only count jobs of this owner
+        """
+        with self._lock:
+            if owner is not None:
+                return self._running.get(owner, 0)
+            return sum(self._running.values())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the workers after the queued jobs.
+
+        Args:
+            wait: Whether to wait for the workers to exit
+        """
+        with self._lock:
+            self._stopping = True
+            self._work.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+            with self._lock:
+                for job in self._jobs.values():
+                    if not job.keep_log:
+                        job.logs.discard()
+
+    def _queued_count(self) -> int:
+        return sum(self._waiting(jobs) for jobs in self._queues.values())
+
+    @staticmethod
+    def _waiting(jobs: Deque[BuildJob]) -> int:
+        """Count queued jobs, leaving out cancelled ones still awaiting removal."""
+        return sum(1 for job in jobs if job.status != JobStatus.CANCELLED)
+
+    def _next_job(self) -> Optional[BuildJob]:
+        """
+        Take the next job in round-robin order, honouring running quotas.
+
+        Must be called with the lock held.
+        """
+        for _ in range(len(self._turns)):
+            owner = self._turns.popleft()
+            limit = self.max_running_per_owner
+            if limit is not None and self._running.get(owner, 0) >= limit:
+                # Owner at its quota keeps its place for the next round
+                self._turns.append(owner)
+                continue
+            owner_queue = self._queues[owner]
+            job = owner_queue.popleft()
+            if owner_queue:
+                self._turns.append(owner)
+            else:
+                del self._queues[owner]
+            return job
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._work:
+                job = self._next_job()
+                while job is None:
+                    if self._stopping and not self._queues:
+                        return
+                    self._work.wait()
+                    job = self._next_job()
+                self._running[job.owner] = self._running.get(job.owner, 0) + 1
+            try:
+                self._run(job)
+            finally:
+                job.close_logs()
+                with self._work:
+                    self._running[job.owner] -= 1
+                    if not self._running[job.owner]:
+                        del self._running[job.owner]
+                    # A quota slot opened up for this owner
+                    self._work.notify_all()
+                self._finish(job)
+                self._record(job)
+                try:
+                    self._prune()
+                except Exception:
+                    # Housekeeping must not take the worker down
+                    logger.exception("Could not prune finished builds")
+
+    def _run(self, job: BuildJob) -> None:
+        if job.status == JobStatus.CANCELLED:
+            job.finished_at = time.time()
+            return
+
+        job.started_at = time.time()
+        converter = PyConverter(job.config, log_callback=job.append_log)
+        with self._lock:
+            # A cancel between dequeueing and here had no converter to stop
+            if job.status == JobStatus.CANCELLED:
+                job.finished_at = time.time()
+                return
+            job.converter = converter
+            job.set_status(JobStatus.RUNNING)
+        try:
+            job.result = job.converter.build(realtime_output=True)
+        except Exception as e:
+            job.error = str(e)
+        job.finished_at = time.time()
+
+        if job.status == JobStatus.CANCELLED:
+            return
+        if job.result and job.result.success:
+            job.set_status(JobStatus.SUCCESS)
+        else:
+            job.error = job.error or (job.result.error if job.result else "Build failed")
+            job.set_status(JobStatus.FAILED)
+        job.converter = None
+
+    @staticmethod
+    def _finish(job: BuildJob) -> None:
+        """Run the job's completion callback."""
+        if job.on_finish is None:
+            return
+        try:
+            job.on_finish(job)
+        except Exception as e:
+            job.error = job.error or f"Completion callback failed: {e}"
+
+    def _record(self, job: BuildJob) -> None:
+        """Record the finished job in the ledger."""
+        if self.ledger is None:
+            return
+        try:
+            self.ledger.record(
+                job.config,
+                job.result,
+                source=self.source,
+                owner=job.owner,
+                log_path=job.logs.path if job.keep_log else None,
+                status=job.status.value,
+                error=job.error,
+                metadata=job.metadata,
+                finished_at=job.finished_at
+            )
+        except Exception as e:
+            # Bookkeeping must never fail a build
+            logger.warning("Could not record build %s in the ledger: %s", job.id, e)
+            job.metadata.setdefault('ledger_error', str(e))
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond the history size."""
+        with self._lock:
+            finished = sorted(
+                (job for job in self._jobs.values() if job.done),
+                key=lambda job: job.finished_at or 0
+            )
+            for job in finished[:max(len(finished) - self.history_size, 0)]:
+                del self._jobs[job.id]
+                if not job.keep_log:
+                    job.logs.discard()
@@ -0,0 +1,341 @@
+"""
+PyInstaller spec file generation for P2E.
+
+Builds pass PyInstaller a generated ``.spec`` file instead of one
+``--add-data``/``--hidden-import`` argument per entry, so the command line
+stays short however many data files an app ships. Files that make up a
+whole folder are collapsed into one glob. Spec files are stored in a folder
+named by the hash of their content and reused while the configuration is
+unchanged; the file itself is named after the executable, since PyInstaller
+names its work folder after the spec.
+
+One spec can package several targets (build variants) from a single
+Analysis, so the dependency analysis runs once for all of them, and a
+onedir target can hold several entry points sharing one set of libraries.
+"""
+
+import glob
+import hashlib
+import os
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from p2e import __version__
+
+# PyInstaller options still accepted together with a spec file
+SPEC_BUILD_OPTIONS = ("--distpath", "--workpath", "-y", "--noconfirm", "--upx-dir", "--clean", "--log-level")
+
+# Spec files kept per executable name
+SPEC_KEEP = 5
+
+_HEADER = """\
+# -*- mode: python ; coding: utf-8 -*-
+# Generated by P2E {version} from the build configuration.
+
+a = Analysis(
+    {scripts},
+    pathex=[],
+    binaries=[],
+    datas={datas},
+    hiddenimports={hidden_imports},
+    hookspath=[],
+    hooksconfig={{}},
+    runtime_hooks=[],
+    excludes={excludes},
+    noarchive=False,
+)
+pyz = PYZ(a.pure)
+"""
+
+_ONEFILE = """
+exe{suffix} = EXE(
+    pyz,
+    a.scripts,
+    a.binaries,
+    a.datas,
+    {options},
+    name={name!r},
+    debug={debug},
+    bootloader_ignore_signals=False,
+    strip={strip},
+    upx={upx},
+    upx_exclude=[],
+    runtime_tmpdir=None,
+    console={console},
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,{icon}
+)
+"""
+
+# Entry points share the analysis; each executable runs PyInstaller's runtime
+# hooks followed by its own script
+_ENTRIES = """
+import os
+
+entry_scripts = [os.path.normcase(path) for path in {scripts!r}]
+runtime_hooks = [toc for toc in a.scripts if os.path.normcase(toc[1]) not in entry_scripts]
+
+
+def entry(script):
+    return runtime_hooks + [toc for toc in a.scripts if os.path.normcase(toc[1]) == os.path.normcase(script)]
+"""
+
+_ONEDIR_EXE = """
+{exe} = EXE(
+    pyz,
+    {toc},
+    {options},
+    exclude_binaries=True,
+    name={name!r},
+    debug={debug},
+    bootloader_ignore_signals=False,
+    strip={strip},
+    upx={upx},
+    console={console},
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,{icon}
+)
+"""
+
+_COLLECT = """coll{suffix} = COLLECT(
+    {exes},
+    a.binaries,
+    a.datas,
+    strip={strip},
+    upx={upx},
+    upx_exclude=[],
+    name={name!r},
+)
+"""
+
+# Windowed macOS apps are wrapped in an .app bundle, as PyInstaller does
+_BUNDLE = """app{suffix} = BUNDLE(
+    {target},
+    name={bundle!r},
+    icon={icon!r},
+    bundle_identifier=None,
+)
+"""
+
+
+@dataclass
+class SpecTarget:
+    """One executable packaged from the analysis of a spec file."""
+
+    name: str
+    one_file: bool = True
+    console: bool = True
+    python_options: List[str] = field(default_factory=list)
+    icon: Optional[str] = None
+    strip: bool = False
+    upx: bool = False
+    # Bootloader debug messages
+    debug: bool = False
+
+    def render(self, suffix: str = "", entries: Sequence[Tuple[str, str]] = ()) -> str:
+        """
+        Render the EXE (and COLLECT/BUNDLE) sections of this target.
+
+        Args:
+            suffix: Suffix of the variable names, unique per target
+            entries: ``(name, script)`` of every executable of a onedir
+                target with entry points; empty for a single executable
+        """
+        values = {
+            'suffix': suffix,
+            'exe': f"exe{suffix}",
+            'toc': "a.scripts",
+            'options': repr([(option, None, 'OPTION') for option in self.python_options]),
+            'name': self.name,
+            'debug': self.debug,
+            'strip': self.strip,
+            'upx': self.upx,
+            'console': self.console,
+            'icon': f"\n    icon={[self.icon]!r}," if self.icon else "",
+        }
+        if self.one_file:
+            text = _ONEFILE.format(**values)
+        elif entries:
+            exes = [f"exe{suffix}_{index}" for index in range(len(entries))]
+            text = "".join(
+                _ONEDIR_EXE.format(**dict(values, exe=exe, toc=f"entry({script!r})", name=name))
+                for exe, (name, script) in zip(exes, entries)
+            )
+            text += _COLLECT.format(**dict(values, exes=",\n    ".join(exes)))
+        else:
+            text = _ONEDIR_EXE.format(**values) + _COLLECT.format(**dict(values, exes=values['exe']))
+        if sys.platform == "darwin" and not self.console:
+            text += _BUNDLE.format(
+                suffix=suffix,
+                target=f"exe{suffix}" if self.one_file else f"coll{suffix}",
+                bundle=f"{self.name}.app",
+                icon=self.icon
+            )
+        return text
+
+
+@dataclass
+class BuildSpec:
+    """Everything a generated spec file tells PyInstaller."""
+
+    script: str
+    # Executables packaged from the shared analysis, at least one
+    targets: List[SpecTarget]
+    # (source file, folder or glob, destination folder)
+    datas: List[Tuple[str, str]] = field(default_factory=list)
+    hidden_imports: List[str] = field(default_factory=list)
+    excludes: List[str] = field(default_factory=list)
+    # (executable name, script) of further entry points of a single onedir target
+    entry_points: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def name(self) -> str:
+        """Name of the spec file, after the first target."""
+        return self.targets[0].name
+
+    def render(self) -> str:
+        """Render the spec file."""
+        scripts = [self.script] + [script for _, script in self.entry_points]
+        text = _HEADER.format(
+            version=__version__,
+            scripts=_format_list(scripts) if self.entry_points else repr(scripts),
+            datas=_format_list(self.datas),
+            hidden_imports=_format_list(self.hidden_imports),
+            excludes=_format_list(self.excludes)
+        )
+        if self.entry_points:
+            if len(self.targets) != 1 or self.targets[0].one_file:
+                raise ValueError("Entry points need a single onedir target")
+            target = self.targets[0]
+            text += _ENTRIES.format(scripts=scripts)
+            return text + target.render(entries=[(target.name, self.script)] + self.entry_points)
+        for index, target in enumerate(self.targets):
+            text += target.render(f"_{index}" if len(self.targets) > 1 else "")
+        return text
+
+    def write(self, folder: Path) -> Path:
+        """
+        Write the spec file into a folder, reusing an identical one.
+
+        The file goes into a folder named by the hash of its content, so an
+        unchanged configuration finds its spec already in place, and is
+        named after the executable, so PyInstaller keeps using the same
+        work folder (and its cached analysis) when the configuration changes.
+
+        Args:
+            folder: Spec folder
+
+        Returns:
+            Path of the spec file
+        """
+        text = self.render()
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        path = Path(folder) / digest[:16] / f"{self.name}.spec"
+        if path.exists():
+            # Mark as recently used for pruning
+            os.utime(path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            temp.write_text(text, encoding='utf-8')
+            os.replace(temp, path)
+            prune_specs(path)
+        return path
+
+
+def _format_list(items: Sequence) -> str:
+    """Format a list with one item per line."""
+    if not items:
+        return "[]"
+    return "[\n" + "".join(f"        {item!r},\n" for item in items) + "    ]"
+
+
+def collapse_datas(files: Sequence[Tuple[Path, str]]) -> List[Tuple[str, str]]:
+    """
+    Express data files as ``datas`` entries, one glob per complete folder.
+
+    Files going to the same destination that are all of a folder's
+    entries become a single ``folder/*`` glob; anything else (subfolders,
+    unlisted or hidden files next to them) keeps one entry per file.
+
+    Args:
+        files: Absolute source files with their destination folders
+
+    Returns:
+        ``(source or glob, destination)`` pairs
+    """
+    groups: Dict[Tuple[Path, str], List[Path]] = {}
+    for source, destination in files:
+        groups.setdefault((source.parent, destination), []).append(source)
+
+    datas: List[Tuple[str, str]] = []
+    for (parent, destination), sources in groups.items():
+        if len(sources) > 1 and _is_whole_folder(parent, sources):
+            datas.append((os.path.join(glob.escape(str(parent)), "*"), destination))
+        else:
+            datas.extend((str(source), destination) for source in sources)
+    return datas
+
+
+def _is_whole_folder(folder: Path, sources: Sequence[Path]) -> bool:
+    """Check the files are exactly what ``folder/*`` matches, and all files."""
+    names = {source.name for source in sources}
+    # "*" skips hidden entries, so hidden files cannot be part of a glob
+    if any(name.startswith(".") for name in names):
+        return False
+    try:
+        entries = [entry for entry in os.scandir(folder) if not entry.name.startswith(".")]
+    except OSError:
+        return False
+    return (
+        len(entries) == len(names)
+        and all(entry.name in names and entry.is_file() for entry in entries)
+    )
+
+
+def prune_specs(spec_path: Path, keep: int = SPEC_KEEP) -> List[Path]:
+    """
+    Remove the least recently used spec files of the same executable, with their folders.
+
+    Args:
+        spec_path: Spec file in use (always kept)
+        keep: Number of spec files to keep, including ``spec_path``
+
+    Returns:
+        Removed spec files
+    """
+    siblings = [
+        path for path in spec_path.parent.parent.glob(f"*/{glob.escape(spec_path.name)}")
+        if path != spec_path
+    ]
+    siblings.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+    removed = []
+    for stale in siblings[max(keep - 1, 0):]:
+        try:
+            stale.unlink()
+        except OSError:
+            continue
+        removed.append(stale)
+        try:
+            # Only empty once no other executable's spec shares the content
+            stale.parent.rmdir()
+        except OSError:
+            pass
+    return removed
+
+
+def spec_compatible(args: Sequence[str]) -> bool:
+    """Check extra PyInstaller arguments can be combined with a spec file."""
+    return all(
+        arg.split("=", 1)[0] in SPEC_BUILD_OPTIONS
+        for arg in args
+        if arg.startswith("-")
+    )
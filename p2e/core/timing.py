@@ -0,0 +1,154 @@
+"""
+Build timing and resource instrumentation for P2E.
+"""
+
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+# PyInstaller build stages, in the order they run
+PYINSTALLER_STAGES = ("Analysis", "PYZ", "PKG", "EXE", "COLLECT")
+
+# "1234 INFO: message" - PyInstaller prefixes log lines with milliseconds since start
+_LOG_LINE = re.compile(r"^\s*(?P<ms>\d+)\s+(?:DEBUG|INFO|WARNING|ERROR|CRITICAL):\s+(?P<msg>.*)$")
+_STAGE_START = re.compile(r"^checking (?P<stage>" + "|".join(PYINSTALLER_STAGES) + r")\b")
+_BUILD_DONE = re.compile(r"^Build complete!")
+
+# Minimum seconds between two RSS samples of the same process
+RSS_SAMPLE_INTERVAL = 0.25
+
+
+class StageTimer:
+    """
+    Derive PyInstaller stage durations from its log output.
+
+    A stage starts at its ``checking <Stage>`` line and ends where the next
+    stage starts, at ``Build complete!`` or when output ends. PyInstaller's
+    own millisecond timestamps are used when its output carries them,
+    wall-clock arrival time otherwise; the clock is chosen once, by the
+    first timed line, so durations never mix the two.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self._current: Optional[Tuple[str, float]] = None
+        self._origin = time.perf_counter()
+        # Whether PyInstaller's timestamps are the clock, once known
+        self._log_clock: Optional[bool] = None
+        self._latest = 0.0
+
+    def _now(self) -> float:
+        """Current time on the chosen clock."""
+        if self._log_clock:
+            # Untimestamped output came no earlier than the last timestamp
+            return self._latest
+        return time.perf_counter() - self._origin
+
+    def _timestamp(self, line: str) -> Tuple[float, str]:
+        match = _LOG_LINE.match(line)
+        message = match.group("msg") if match else line.strip()
+        if self._log_clock is None and (match or _STAGE_START.match(message) or _BUILD_DONE.match(message)):
+            self._log_clock = match is not None
+        if match and self._log_clock:
+            self._latest = max(self._latest, int(match.group("ms")) / 1000.0)
+        return self._now(), message
+
+    def _close(self, now: float) -> None:
+        if self._current:
+            stage, started = self._current
+            self.stages[stage] = self.stages.get(stage, 0.0) + max(now - started, 0.0)
+            self._current = None
+
+    @property
+    def current(self) -> Optional[str]:
+        """Name of the stage running now, if any."""
+        return self._current[0] if self._current else None
+
+    def feed(self, line: str) -> None:
+        """Process one line of PyInstaller output."""
+        now, message = self._timestamp(line)
+        match = _STAGE_START.match(message)
+        if match:
+            self._close(now)
+            self._current = (match.group("stage"), now)
+        elif _BUILD_DONE.match(message):
+            self._close(now)
+
+    def finish(self) -> Dict[str, float]:
+        """Close the running stage and return all stage durations."""
+        if self._current:
+            # No end marker, fall back to the latest time on the same clock
+            stage, started = self._current
+            self._close(max(started, self._now()))
+        return dict(self.stages)
+
+
+def _read_vm_hwm(pid: int) -> Optional[int]:
+    """Read a process's peak resident set size from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status", 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class RssMonitor:
+    """
+    Track the peak resident memory of a child process.
+
+    The peak is read per process from /proc, so it is only available on
+    Linux. Process-wide counters such as ``RUSAGE_CHILDREN`` are not used:
+    with builds running concurrently in threads they would report the
+    largest peak of any build so far.
+    """
+
+    def __init__(self) -> None:
+        self.peak: Optional[int] = None
+        self._last_sample = 0.0
+
+    def sample(self, pid: Optional[int], force: bool = False) -> None:
+        """
+        Sample a running child, rate-limited to ``RSS_SAMPLE_INTERVAL``.
+
+        Args:
+            pid: Child process id
+            force: Sample even if the last sample was recent
+        """
+        now = time.monotonic()
+        if pid is None or (not force and now - self._last_sample < RSS_SAMPLE_INTERVAL):
+            return
+        self._last_sample = now
+        rss = _read_vm_hwm(pid)
+        if rss is not None and (self.peak is None or rss > self.peak):
+            self.peak = rss
+
+    def finish(self) -> Optional[int]:
+        """Get the peak RSS once the child exited, or None if it could not be measured."""
+        return self.peak
+
+
+def format_duration(seconds: float) -> str:
+    """Format seconds for display."""
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    if seconds < 60:
+        return f"{seconds:.2f} s"
+    minutes, secs = divmod(seconds, 60)
+    return f"{int(minutes)}m {secs:.0f}s"
+
+
+def summarize(durations: Dict[str, float]) -> List[Tuple[str, float, float]]:
+    """
+    Get ``(name, seconds, share)`` rows for a set of durations.
+
+    Args:
+        durations: Mapping of name to seconds
+
+    Returns:
+        Rows in insertion order with each entry's share of the total
+    """
+    total = sum(durations.values()) or 1.0
+    return [(name, seconds, seconds / total) for name, seconds in durations.items()]
@@ -0,0 +1,406 @@
+"""
+Runtime import tracing for P2E.
+
+A traced run records every module the application actually imports. The
+profile is then used to exclude unused packages from the bundle and to add
+modules imported by name as hidden imports. Exclusions are only as good as
+the traced run: code paths it did not exercise may import modules that are
+excluded, so trace with a representative workload (e.g. the test suite).
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+from p2e.core.cache import default_cache_root, hash_file
+from p2e.core.imports import ImportScanner, _absolute, _installed_package_dir
+
+# Large or rarely needed packages that PyInstaller often pulls in through
+# optional imports; excluded when the traced run never imported them
+OPTIONAL_PACKAGES = (
+    "tkinter", "_tkinter", "unittest", "test", "pydoc", "pydoc_data", "doctest",
+    "lib2to3", "idlelib", "turtle", "turtledemo", "distutils", "setuptools",
+    "pkg_resources", "pip", "IPython", "matplotlib", "numpy", "scipy", "pandas",
+    "PIL", "pytest", "_pytest",
+)
+
+# Imported by test runners rather than the application
+TEST_RUNNER_MODULES = ("pytest", "_pytest", "pluggy", "iniconfig", "py", "sitecustomize")
+
+# Seconds between snapshots of the imported modules in a traced process
+SNAPSHOT_INTERVAL = 1.0
+
+# Installed into the traced interpreter as sitecustomize; writes one JSON
+# file per process with the imported modules
+_BOOTSTRAP = '''
+import atexit, importlib, importlib.util, json, os, sys, threading
+from importlib.machinery import PathFinder
+
+def _p2e_trace():
+    out_dir = os.environ.get("P2E_TRACE_DIR")
+    if not out_dir:
+        return
+    here = os.path.dirname(os.path.abspath(__file__))
+    dynamic = set()
+    import_module = importlib.import_module
+
+    def traced_import_module(name, package=None):
+        module = import_module(name, package)
+        dynamic.add(module.__name__)
+        return module
+
+    importlib.import_module = traced_import_module
+    lock = threading.Lock()
+
+    def dump():
+        with lock:
+            items = [(name, module) for name, module in list(sys.modules.items()) if module is not None]
+            files = {}
+            for name, module in items:
+                path = getattr(module, "__file__", None)
+                if isinstance(path, str) and path.endswith(".py"):
+                    files[name] = path
+            path = os.path.join(out_dir, "%d.json" % os.getpid())
+            with open(path + ".tmp", "w") as f:
+                json.dump({"modules": sorted(name for name, _ in items), "dynamic": sorted(dynamic), "files": files}, f)
+            os.replace(path + ".tmp", path)
+
+    atexit.register(dump)
+    try:
+        import signal
+        # Turn termination (e.g. a trace timeout) into a normal exit
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    except (ImportError, ValueError, OSError, AttributeError):
+        pass
+
+    interval = float(os.environ.get("P2E_TRACE_INTERVAL") or 0)
+    if interval:
+        # Periodic snapshots survive a hard kill
+        def snapshot():
+            while True:
+                threading.Event().wait(interval)
+                dump()
+        threading.Thread(target=snapshot, daemon=True).start()
+
+    # Chain to the environment's own sitecustomize, if any
+    paths = [p for p in sys.path if os.path.abspath(p or ".") != here]
+    spec = PathFinder.find_spec("sitecustomize", paths)
+    if spec is not None and spec.loader is not None:
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+_p2e_trace()
+del _p2e_trace
+'''
+
+
+@dataclass
+class TracePlan:
+    """Bundle changes derived from a trace profile."""
+
+    exclude_modules: List[str]
+    hidden_imports: List[str]
+    # On-disk size of each excluded module, when measured
+    sizes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def saved_bytes(self) -> int:
+        """Estimated uncompressed size removed from the bundle."""
+        return sum(self.sizes.values())
+
+
+@dataclass
+class TraceProfile:
+    """Modules imported during a traced run."""
+
+    script_path: str
+    script_digest: str
+    command: List[str]
+    python: str
+    returncode: Optional[int]
+    modules: List[str]
+    # Modules imported with importlib.import_module
+    dynamic: List[str]
+    # Source file of every traced pure-Python module
+    files: Dict[str, str] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+
+    def save(self, path: Path) -> None:
+        """Save the profile as JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path) -> 'TraceProfile':
+        """Load a profile saved with ``save``."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(**json.load(f))
+
+    def is_stale(self, script_path: Path) -> bool:
+        """Whether the script changed since it was traced."""
+        return not Path(script_path).is_file() or hash_file(Path(script_path)) != self.script_digest
+
+    def plan(
+        self,
+        keep: Iterable[str] = (),
+        sizes: bool = False,
+        scanner: Optional[ImportScanner] = None
+    ) -> TracePlan:
+        """
+        Derive exclusions and hidden imports.
+
+        Candidates are the packages from ``OPTIONAL_PACKAGES`` and the
+        subpackages of every third-party package the run imported. Of those,
+        the ones the run never imported but that traced code imports
+        statically (so PyInstaller would bundle them) are excluded.
+
+        Args:
+            keep: Modules never to exclude (e.g. configured hidden imports)
+            sizes: Measure the on-disk size of each excluded module
+            scanner: Scanner used to parse the traced sources
+
+        Returns:
+            The plan
+        """
+        used = _with_ancestors(list(self.modules) + list(keep))
+        referenced = _with_ancestors(self.static_imports(scanner))
+
+        excluded: List[str] = []
+        for top in OPTIONAL_PACKAGES:
+            if top in referenced and top not in used and _module_location(top) is not None:
+                excluded.append(top)
+        for top in sorted({name.split(".")[0] for name in self.modules}):
+            folder = _installed_package_dir(top)
+            # The standard library is small and relied on by PyInstaller's runtime hooks
+            if folder is not None and not _in_stdlib(folder):
+                excluded.extend(
+                    name for name in _unused_subpackages(top, folder, used) if name in referenced
+                )
+
+        excluded_set = set(excluded)
+        hidden = [
+            name for name in self.dynamic
+            if name.split(".")[0] not in TEST_RUNNER_MODULES
+            and not any(prefix in excluded_set for prefix in _ancestors(name))
+        ]
+        plan = TracePlan(exclude_modules=sorted(excluded), hidden_imports=sorted(hidden))
+        if sizes:
+            plan.sizes = {name: _module_size(name) for name in plan.exclude_modules}
+        return plan
+
+    def static_imports(self, scanner: Optional[ImportScanner] = None) -> Set[str]:
+        """
+        Get every module imported statically by the traced sources.
+
+        This approximates what PyInstaller's analysis would bundle.
+
+        Args:
+            scanner: Scanner whose per-file cache is used
+
+        Returns:
+            Absolute module names
+        """
+        scanner = scanner or ImportScanner()
+        names = {Path(path): name for name, path in self.files.items()}
+        results, _ = scanner.scan_files([path for path in names if path.is_file()])
+        imported: Set[str] = set()
+        for path, scan in results.items():
+            module = names[path]
+            package = module if path.name == "__init__.py" else module.rpartition(".")[0]
+            for ref in scan.imports + scan.dynamic:
+                name = _absolute(ref, package)
+                if name:
+                    imported.add(name)
+        return imported
+
+
+def _ancestors(name: str) -> List[str]:
+    """Get ``a``, ``a.b`` and ``a.b.c`` for ``a.b.c``."""
+    parts = name.split(".")
+    return [".".join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+def _with_ancestors(names: Iterable[str]) -> Set[str]:
+    """Get every name together with all of its parent packages."""
+    found: Set[str] = set()
+    for name in names:
+        found.update(_ancestors(name))
+    return found
+
+
+def _in_stdlib(path: Path) -> bool:
+    """Whether a path belongs to the standard library (not site-packages)."""
+    paths = sysconfig.get_paths()
+    resolved = path.resolve()
+    for key in ("purelib", "platlib"):
+        if Path(paths[key]).resolve() in resolved.parents:
+            return False
+    stdlib = Path(paths["stdlib"]).resolve()
+    return stdlib == resolved or stdlib in resolved.parents
+
+
+def _unused_subpackages(package: str, folder: Path, used: Set[str]) -> List[str]:
+    """Find subpackages of a used package that were never imported."""
+    unused = []
+    try:
+        entries = sorted(folder.iterdir())
+    except OSError:
+        return unused
+    for entry in entries:
+        if not (entry.is_dir() and entry.name.isidentifier() and (entry / "__init__.py").is_file()):
+            continue
+        name = f"{package}.{entry.name}"
+        if name in used:
+            unused.extend(_unused_subpackages(name, entry, used))
+        else:
+            unused.append(name)
+    return unused
+
+
+def _module_location(name: str) -> Optional[Path]:
+    """Find a module's package folder or file without importing it."""
+    folder = _installed_package_dir(name)
+    if folder is not None:
+        return folder
+    if "." in name:
+        return None
+    import importlib.util
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is not None and spec.origin and os.path.isfile(spec.origin):
+        return Path(spec.origin)
+    return None
+
+
+def _module_size(name: str) -> int:
+    """Get the on-disk size of a module or package."""
+    location = _module_location(name)
+    if location is None:
+        return 0
+    if location.is_file():
+        return location.stat().st_size
+    total = 0
+    for dirpath, _, filenames in os.walk(location):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+def default_profile_path(script_path: Path) -> Path:
+    """
+    Get where the trace profile of a script is kept by default.
+
+    Args:
+        script_path: Entry script
+
+    Returns:
+        Profile path under ``traces`` in the cache root
+    """
+    script_path = Path(script_path).absolute()
+    digest = hashlib.sha256(str(script_path).encode('utf-8')).hexdigest()[:16]
+    return default_cache_root() / "traces" / f"{script_path.stem}-{digest}.json"
+
+
+def trace_imports(
+    script_path: Path,
+    args: Sequence[str] = (),
+    command: Optional[Sequence[str]] = None,
+    timeout: Optional[float] = None,
+    log_callback: Optional[Callable[[str], None]] = None
+) -> TraceProfile:
+    """
+    Run a script (or a command exercising it) and record its imports.
+
+    Every Python process started with this interpreter's environment is
+    traced, so test runners that spawn workers are covered. Modules of
+    the test runner itself are not counted when a command is given.
+
+    Args:
+        script_path: Entry script the profile belongs to
+        args: Arguments for the script
+        command: Command to run instead of the script, e.g.
+            ``["python", "-m", "pytest", "tests"]``; run from the script's
+            folder
+        timeout: Seconds after which the run is terminated (its imports
+            so far are kept), e.g. for GUI or server applications
+        log_callback: Optional callback for progress messages
+
+    Returns:
+        Profile of the run
+    """
+    log = log_callback or (lambda message: None)
+    script_path = Path(script_path).absolute()
+    cmd = list(command) if command else [sys.executable, str(script_path), *args]
+
+    work_dir = Path(tempfile.mkdtemp(prefix="p2e-trace-"))
+    try:
+        bootstrap_dir = work_dir / "bootstrap"
+        out_dir = work_dir / "out"
+        bootstrap_dir.mkdir()
+        out_dir.mkdir()
+        (bootstrap_dir / "sitecustomize.py").write_text(_BOOTSTRAP, encoding='utf-8')
+
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(bootstrap_dir), env.get("PYTHONPATH")]))
+        env["P2E_TRACE_DIR"] = str(out_dir)
+        if timeout:
+            env["P2E_TRACE_INTERVAL"] = str(SNAPSHOT_INTERVAL)
+
+        log(f"Tracing: {' '.join(cmd)}")
+        with subprocess.Popen(cmd, cwd=script_path.parent, env=env) as process:
+            try:
+                returncode: Optional[int] = process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                log(f"Stopping traced run after {timeout:g}s")
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    process.wait()
+                returncode = None
+
+        modules: Set[str] = set()
+        dynamic: Set[str] = set()
+        files: Dict[str, str] = {}
+        dumps = sorted(out_dir.glob("*.json"))
+        for dump in dumps:
+            with open(dump, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            modules.update(data["modules"])
+            dynamic.update(data["dynamic"])
+            files.update(data["files"])
+        if not dumps:
+            raise RuntimeError("No imports were recorded; is the command a Python program?")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    ignored = TEST_RUNNER_MODULES if command else ("sitecustomize",)
+    modules = {name for name in modules if name.split(".")[0] not in ignored and name != "__main__"}
+    log(f"Recorded {len(modules)} imported module(s) from {len(dumps)} process(es)")
+    return TraceProfile(
+        script_path=str(script_path),
+        script_digest=hash_file(script_path),
+        command=cmd,
+        python=sys.version,
+        returncode=returncode,
+        modules=sorted(modules),
+        dynamic=sorted(dynamic & modules),
+        files={name: path for name, path in sorted(files.items()) if name in modules}
+    )
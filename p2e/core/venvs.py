@@ -0,0 +1,386 @@
+"""
+Pooled build virtual environments for P2E.
+
+Builds that declare requirements run PyInstaller in a virtual environment
+with those requirements installed. Environments are keyed by the base
+interpreter and the hash of the requirements, created once and reused by
+every later build with the same key; the pool is kept within a disk budget
+by removing the least recently used environments.
+
+Every environment has a lock file next to it. Builds hold it shared while
+they use the environment; creating or removing it takes it exclusively, so
+an environment is never deleted under a running build.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence
+
+from p2e.core.cache import default_cache_root, hash_requirements
+from p2e.core.probe import interpreter_identity, invalidate_probe_cache, resolve_python
+from p2e.utils.locks import FileLock
+
+# Bump when the environment layout changes so old environments are not reused
+POOL_FORMAT_VERSION = 1
+
+# Disk budget of the pool
+DEFAULT_POOL_BYTES = 5 * 1024 ** 3
+
+# Written once an environment is complete; its mtime records the last use
+MARKER_NAME = "p2e-env.json"
+
+
+@dataclass
+class BuildEnv:
+    """A ready virtual environment of the pool."""
+
+    key: str
+    path: Path
+    base_python: str
+    requirements: Optional[str]
+    size: int
+    created_at: float
+    last_used: float
+    # Whether this acquisition had to create the environment
+    created: bool = False
+
+    @property
+    def python(self) -> Path:
+        """Interpreter of the environment."""
+        return env_python(self.path)
+
+
+def env_python(path: Path) -> Path:
+    """Get the interpreter inside a virtual environment folder."""
+    if sys.platform == "win32":
+        return Path(path) / "Scripts" / "python.exe"
+    return Path(path) / "bin" / "python"
+
+
+def env_key(requirements: Optional[Path] = None, python: Optional[str] = None) -> str:
+    """
+    Compute the pool key of an environment.
+
+    Args:
+        requirements: Requirements file installed into the environment
+        python: Base interpreter (defaults to ``sys.executable``)
+
+    Returns:
+        Hex digest identifying the environment
+    """
+    inputs = {
+        "format": POOL_FORMAT_VERSION,
+        "interpreter": interpreter_identity(python),
+        "requirements": hash_requirements(requirements) if requirements else None,
+    }
+    canonical = json.dumps(inputs, sort_keys=True)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def run_logged(
+    cmd: List[str],
+    action: str,
+    log: Callable[[str], None],
+    cwd: Optional[Path] = None
+) -> None:
+    """
+    Run a pip or venv command, logging its output line by line.
+
+    Args:
+        cmd: Command to run
+        action: What the command does, for the error message
+        log: Callback receiving each output line
+        cwd: Working directory
+
+    Raises:
+        RuntimeError: If the command fails, with the end of its output
+    """
+    output: List[str] = []
+    with subprocess.Popen(
+        cmd,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors='replace'
+    ) as process:
+        for line in iter(process.stdout.readline, ''):
+            output.append(line.rstrip())
+            log(output[-1])
+        process.wait()
+    if process.returncode != 0:
+        tail = "\n".join(output[-5:])
+        raise RuntimeError(f"{action} failed with code {process.returncode}: {tail}")
+
+
+def _tree_size(path: Path) -> int:
+    """Sum the sizes of the files in a folder, without following links."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, filename)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class EnvPool:
+    """Pool of build virtual environments under the cache directory."""
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        max_bytes: int = DEFAULT_POOL_BYTES,
+        log_callback: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            root: Pool directory (defaults to ``venvs`` in the cache root)
+            max_bytes: Disk budget enforced after creating an environment
+            log_callback: Optional callback for progress and pip output
+        """
+        self.root = Path(root) if root else default_cache_root() / "venvs"
+        self.max_bytes = max_bytes
+        self.log_callback = log_callback
+
+    def log(self, message: str) -> None:
+        """Log a message."""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def env_dir(self, key: str) -> Path:
+        """Get the folder of an environment."""
+        return self.root / key[:16]
+
+    def _lock(self, key: str, shared: bool = False, timeout: Optional[float] = None) -> FileLock:
+        # Kept outside the environment folder, which is deleted on eviction
+        return FileLock(self.root / f"{key[:16]}.lock", timeout=timeout, shared=shared)
+
+    def load(self, key: str) -> Optional[BuildEnv]:
+        """
+        Look up a ready environment.
+
+        Args:
+            key: Pool key
+
+        Returns:
+            The environment, or None if it does not exist or is incomplete
+        """
+        path = self.env_dir(key)
+        marker = path / MARKER_NAME
+        try:
+            with open(marker, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            last_used = marker.stat().st_mtime
+        except (OSError, ValueError):
+            return None
+        if data.get('key') != key or not env_python(path).exists():
+            return None
+        return BuildEnv(
+            key=key,
+            path=path,
+            base_python=data['base_python'],
+            requirements=data.get('requirements'),
+            size=data.get('size', 0),
+            created_at=data.get('created_at', last_used),
+            last_used=last_used
+        )
+
+    def find(self, requirements: Optional[Path] = None, python: Optional[str] = None) -> Optional[BuildEnv]:
+        """
+        Look up the ready environment for requirements without creating it.
+
+        Args:
+            requirements: Requirements file installed into the environment
+            python: Base interpreter (defaults to ``sys.executable``)
+
+        Returns:
+            The environment, or None if it was not created yet
+        """
+        return self.load(env_key(requirements, resolve_python(python)))
+
+    @contextmanager
+    def acquire(
+        self,
+        requirements: Optional[Path] = None,
+        python: Optional[str] = None,
+        proxy_url: Optional[str] = None,
+        pip_args: Sequence[str] = ()
+    ) -> Iterator[BuildEnv]:
+        """
+        Get an environment for a build, creating it on first use.
+
+        The environment stays locked against eviction until the context
+        exits. Concurrent first uses of one key create it only once.
+
+        Example:
+            with pool.acquire(Path("requirements.txt")) as env:
+                subprocess.run([str(env.python), "-m", "PyInstaller", ...])
+
+        Args:
+            requirements: Requirements file to install
+            python: Base interpreter (defaults to ``sys.executable``)
+            proxy_url: Proxy for pip
+            pip_args: Extra ``pip install`` arguments, e.g. a wheelhouse's
+                ``--no-index --find-links``
+
+        Yields:
+            The ready environment
+
+        Raises:
+            RuntimeError: If creating the environment fails
+        """
+        python = resolve_python(python)
+        key = env_key(requirements, python)
+        created = False
+        while True:
+            lock = self._lock(key, shared=True)
+            lock.acquire()
+            env = self.load(key)
+            if env is not None:
+                break
+            lock.release()
+            with self._lock(key):
+                # Another build may have created it while we waited
+                if self.load(key) is None:
+                    self._create(key, requirements, python, proxy_url, pip_args)
+                    created = True
+
+        try:
+            os.utime(env.path / MARKER_NAME)
+            env.created = created
+            if created:
+                self.prune()
+            else:
+                self.log(f"Reusing build environment {key[:12]}")
+            yield env
+        finally:
+            lock.release()
+
+    def _create(
+        self,
+        key: str,
+        requirements: Optional[Path],
+        python: str,
+        proxy_url: Optional[str],
+        pip_args: Sequence[str] = ()
+    ) -> None:
+        """Create an environment, replacing an incomplete one. Caller holds its lock."""
+        path = self.env_dir(key)
+        if path.exists():
+            shutil.rmtree(path)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        started = time.perf_counter()
+        self.log(f"Creating build environment {key[:12]} from {python}...")
+        try:
+            self._run([python, "-m", "venv", str(path)], "Creating the virtual environment")
+            cmd = [str(env_python(path)), "-m", "pip", "install", "--disable-pip-version-check"]
+            if proxy_url:
+                cmd.extend(["--proxy", proxy_url])
+            cmd.extend(pip_args)
+            if requirements:
+                cmd.extend(["-r", str(Path(requirements).absolute())])
+            cmd.append("pyinstaller")
+            self._run(cmd, "Installing requirements", cwd=Path(requirements).parent if requirements else None)
+        except BaseException:
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        invalidate_probe_cache(str(env_python(path)))
+
+        marker = {
+            'key': key,
+            'base_python': python,
+            'requirements': str(Path(requirements).absolute()) if requirements else None,
+            'size': _tree_size(path),
+            'created_at': time.time(),
+        }
+        temp = path / f".{MARKER_NAME}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(marker, f, indent=2)
+        os.replace(temp, path / MARKER_NAME)
+        self.log(f"Build environment ready in {time.perf_counter() - started:.1f}s")
+
+    def _run(self, cmd: List[str], action: str, cwd: Optional[Path] = None) -> None:
+        """Run a setup command, logging its output line by line."""
+        run_logged(cmd, action, self.log, cwd=cwd)
+
+    def environments(self) -> List[BuildEnv]:
+        """Get the ready environments, most recently used first."""
+        envs = []
+        for marker in self.root.glob(f"*/{MARKER_NAME}"):
+            try:
+                key = json.loads(marker.read_text(encoding='utf-8'))['key']
+            except (OSError, ValueError, KeyError):
+                continue
+            env = self.load(key)
+            if env is not None:
+                envs.append(env)
+        return sorted(envs, key=lambda env: -env.last_used)
+
+    def remove(self, key: str) -> bool:
+        """
+        Remove an environment unless a build is using it.
+
+        Args:
+            key: Pool key
+
+        Returns:
+            True if the environment was removed
+        """
+        try:
+            lock = self._lock(key, timeout=0)
+            lock.acquire()
+        except TimeoutError:
+            return False
+        try:
+            path = self.env_dir(key)
+            # Drop the marker first so a half-deleted environment is never used
+            try:
+                (path / MARKER_NAME).unlink()
+            except FileNotFoundError:
+                pass
+            shutil.rmtree(path, ignore_errors=True)
+            return True
+        finally:
+            lock.release()
+
+    def prune(self, max_bytes: Optional[int] = None) -> List[BuildEnv]:
+        """
+        Remove the least recently used environments over the disk budget.
+
+        Environments in use are skipped.
+
+        Args:
+            max_bytes: Budget (defaults to the pool's)
+
+        Returns:
+            Removed environments
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        envs = self.environments()
+        total = sum(env.size for env in envs)
+        removed = []
+        for env in reversed(envs):
+            if total <= budget:
+                break
+            if self.remove(env.key):
+                total -= env.size
+                removed.append(env)
+                self.log(f"Removed build environment {env.key[:12]} ({env.size / (1024 * 1024):.0f} MB)")
+        return removed
+
+    def clear(self) -> List[BuildEnv]:
+        """Remove every environment not in use."""
+        return self.prune(max_bytes=-1)
@@ -0,0 +1,227 @@
+"""
+Local wheelhouse for offline dependency installs in P2E.
+
+``p2e wheelhouse sync`` fills a folder with wheels once, built or downloaded
+by pip or copied from other folders (e.g. removable media on air-gapped
+hosts), and records their SHA-256 digests in a manifest. Builds then
+install PyInstaller and requirements with ``--no-index --find-links``
+against the folder, after checking it still matches the manifest.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from p2e.core.cache import default_cache_root, hash_file
+from p2e.core.venvs import run_logged
+from p2e.utils.locks import FileLock
+
+MANIFEST_NAME = "manifest.json"
+
+# Bump when the manifest layout changes
+MANIFEST_FORMAT_VERSION = 1
+
+# Files pip can install from a --find-links folder
+PACKAGE_SUFFIXES = (".whl", ".tar.gz", ".zip", ".tar.bz2")
+
+# Digests of files already verified in this process, by (path, size, mtime)
+_verified: Dict[Tuple[str, int, int], str] = {}
+
+
+@dataclass
+class WheelFile:
+    """One package file of the wheelhouse manifest."""
+
+    name: str
+    sha256: str
+    size: int
+
+
+def default_wheelhouse() -> Path:
+    """Get the default wheelhouse folder in the cache root."""
+    return default_cache_root() / "wheelhouse"
+
+
+def _is_package(path: Path) -> bool:
+    return path.is_file() and path.name.endswith(PACKAGE_SUFFIXES)
+
+
+def _digest(path: Path) -> str:
+    """Hash a file, reusing the digest while its size and mtime are unchanged."""
+    stat = path.stat()
+    signature = (str(path), stat.st_size, stat.st_mtime_ns)
+    digest = _verified.get(signature)
+    if digest is None:
+        digest = hash_file(path)
+        _verified[signature] = digest
+    return digest
+
+
+class Wheelhouse:
+    """Folder of package files with a hash-verified manifest."""
+
+    def __init__(self, root: Optional[Path] = None, log_callback: Optional[Callable[[str], None]] = None):
+        """
+        Initialize the wheelhouse.
+
+        Args:
+            root: Wheelhouse folder (defaults to ``wheelhouse`` in the cache root)
+            log_callback: Optional callback for progress and pip output
+        """
+        self.root = Path(root) if root else default_wheelhouse()
+        self.log_callback = log_callback
+
+    def log(self, message: str) -> None:
+        """Log a message."""
+        if self.log_callback:
+            self.log_callback(message)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    def packages(self) -> List[Path]:
+        """Get the package files in the folder, sorted by name."""
+        if not self.root.is_dir():
+            return []
+        return sorted(path for path in self.root.iterdir() if _is_package(path))
+
+    def manifest(self) -> Dict[str, WheelFile]:
+        """
+        Load the manifest.
+
+        Returns:
+            Recorded files by name; empty if the wheelhouse was never synced
+        """
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        return {
+            name: WheelFile(name=name, sha256=entry['sha256'], size=entry['size'])
+            for name, entry in data.get('files', {}).items()
+        }
+
+    def sync(
+        self,
+        requirements: Iterable[Path] = (),
+        packages: Iterable[str] = (),
+        sources: Iterable[Path] = (),
+        python: Optional[str] = None,
+        proxy_url: Optional[str] = None,
+        download: bool = True
+    ) -> List[str]:
+        """
+        Add package files and rewrite the manifest.
+
+        pip builds or downloads wheels of PyInstaller, the requirements and
+        the packages, including their dependencies, for ``python``; files
+        already present are not fetched again. Package files in ``sources``
+        are copied in as they are.
+
+        Args:
+            requirements: Requirements files to fetch
+            packages: Extra requirement specifiers, e.g. ``"numpy==2.1.0"``
+            sources: Folders to copy package files from
+            python: Interpreter the wheels must suit (defaults to ``sys.executable``)
+            proxy_url: Proxy for pip
+            download: Fetch with pip; when False only ``sources`` are copied
+
+        Returns:
+            Names of the files that were added
+
+        Raises:
+            RuntimeError: If pip fails
+            ValueError: If a source folder does not exist
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with FileLock(self.root / ".lock"):
+            before = {path.name for path in self.packages()}
+
+            for source in sources:
+                source = Path(source)
+                if not source.is_dir():
+                    raise ValueError(f"Wheel folder not found: {source}")
+                for path in sorted(source.iterdir()):
+                    if _is_package(path) and not (self.root / path.name).exists():
+                        shutil.copy2(path, self.root / path.name)
+                        self.log(f"Copied {path.name}")
+
+            if download:
+                cmd = [
+                    python or sys.executable, "-m", "pip", "wheel",
+                    "--disable-pip-version-check", "--wheel-dir", str(self.root),
+                    # Files already in the wheelhouse satisfy requirements without a download
+                    "--find-links", str(self.root)
+                ]
+                if proxy_url:
+                    cmd.extend(["--proxy", proxy_url])
+                for path in requirements:
+                    cmd.extend(["-r", str(Path(path).absolute())])
+                cmd.extend(packages)
+                cmd.append("pyinstaller")
+                run_logged(cmd, "Fetching wheels", self.log)
+
+            self._write_manifest()
+            return sorted(path.name for path in self.packages() if path.name not in before)
+
+    def _write_manifest(self) -> None:
+        """Record every package file with its digest."""
+        files = {
+            path.name: {'sha256': _digest(path), 'size': path.stat().st_size}
+            for path in self.packages()
+        }
+        data = {'format': MANIFEST_FORMAT_VERSION, 'updated_at': time.time(), 'files': files}
+        temp = self.root / f".{MANIFEST_NAME}.{os.getpid()}.tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp, self.manifest_path)
+
+    def verify(self) -> List[str]:
+        """
+        Check the folder against the manifest.
+
+        Files unknown to the manifest count as problems too, since pip
+        would install from them.
+
+        Returns:
+            Descriptions of missing, modified and unlisted files; empty if
+            the wheelhouse is intact
+        """
+        manifest = self.manifest()
+        if not manifest:
+            return [f"No wheelhouse manifest in {self.root} (run p2e wheelhouse sync)"]
+
+        problems = []
+        present = {path.name: path for path in self.packages()}
+        for name, entry in manifest.items():
+            path = present.get(name)
+            if path is None:
+                problems.append(f"missing {name}")
+            elif path.stat().st_size != entry.size or _digest(path) != entry.sha256:
+                problems.append(f"modified {name}")
+        problems.extend(f"unlisted {name}" for name in sorted(set(present) - set(manifest)))
+        return problems
+
+    def install_args(self) -> List[str]:
+        """
+        Get the ``pip install`` arguments installing from the wheelhouse only.
+
+        Returns:
+            ``--no-index --find-links`` arguments
+
+        Raises:
+            ValueError: If the wheelhouse does not match its manifest
+        """
+        problems = self.verify()
+        if problems:
+            shown = ", ".join(problems[:5])
+            more = f" and {len(problems) - 5} more" if len(problems) > 5 else ""
+            raise ValueError(f"Wheelhouse {self.root} failed verification: {shown}{more}")
+        return ["--no-index", "--find-links", str(self.root.absolute())]
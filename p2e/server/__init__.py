@@ -0,0 +1,6 @@
+"""Local build server for P2E."""
+
+from p2e.server.app import create_server
+from p2e.server.artifacts import create_artifact_server
+
+__all__ = ["create_server", "create_artifact_server"]
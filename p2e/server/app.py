@@ -0,0 +1,375 @@
+"""
+HTTP/JSON build server for P2E.
+
+Endpoints:
+    GET    /health                  Server status and queue depth
+    GET    /builds                  List known jobs (?owner=USER for one user's)
+    POST   /builds                  Submit a build (JSON body, BuildConfig schema);
+                                    the X-P2E-User header names the user for
+                                    fair scheduling and quotas
+    GET    /builds/<id>             Job status
+    DELETE /builds/<id>             Cancel a queued or running job
+    GET    /builds/<id>/logs        Log lines as JSON (?offset=N&limit=N), or
+                                    a chunked text stream with ?follow=1
+    GET    /builds/<id>/artifact    Download the built executable (onedir
+                                    builds are served as a zip archive made
+                                    when the build finished; 202 while it is
+                                    being made); supports ``Range`` requests
+"""
+
+import json
+import re
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from p2e import __version__
+from p2e.core.artifacts import ArtifactStore
+from p2e.core.config import BuildConfig
+from p2e.core.ledger import BuildLedger
+from p2e.core.scheduler import (
+    DEFAULT_OWNER,
+    BuildJob,
+    BuildScheduler,
+    QueueFullError,
+    QuotaExceededError,
+)
+from p2e.server.files import send_file
+
+# Largest accepted request body
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# Most log lines returned by one JSON page or stream chunk
+MAX_LOG_LINES = 5000
+
+# Request header naming the user a build is accounted to
+OWNER_HEADER = "X-P2E-User"
+
+# Seconds a log follower waits for new lines before re-checking the job
+FOLLOW_POLL_SECONDS = 1.0
+
+_JOB_ROUTE = re.compile(r"^/builds/(?P<job_id>[0-9a-f]{32})(?P<action>/logs|/artifact)?$")
+
+
+class BuildServer(ThreadingHTTPServer):
+    """Threaded HTTP server owning a build scheduler."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        scheduler: BuildScheduler,
+        quiet: bool = True,
+        artifacts: Optional[ArtifactStore] = None
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            address: ``(host, port)`` to bind
+            scheduler: Scheduler executing submitted builds
+            quiet: Suppress per-request access logging
+            artifacts: Store keeping the zip archives of onedir builds;
+                defaults to the one in the cache directory
+        """
+        super().__init__(address, BuildRequestHandler)
+        self.scheduler = scheduler
+        self.quiet = quiet
+        self.artifacts = artifacts or ArtifactStore()
+
+    def archive_output(self, job: BuildJob) -> None:
+        """
+        Zip a finished onedir build into the artifact store.
+
+        Runs on the scheduler's worker thread as the job's completion
+        callback, so downloads never wait for the archive and nothing is
+        written next to the build output.
+        """
+        output_path = job.output_path
+        # Builds with variants serve the first one
+        target = (job.config.variant_configs() or [job.config])[0]
+        if target.one_file or output_path is None or not output_path.exists():
+            return
+        try:
+            job.metadata['archive'] = self.artifacts.add(output_path.parent).token
+        except Exception as e:
+            job.metadata['archive_error'] = str(e)
+
+    def server_close(self) -> None:
+        """Close the socket and stop the scheduler's workers."""
+        super().server_close()
+        self.scheduler.shutdown(wait=False)
+
+
+class BuildRequestHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the build API."""
+
+    server: BuildServer
+    protocol_version = "HTTP/1.1"
+    server_version = f"p2e/{__version__}"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    # Response helpers
+
+    def send_json(
+        self,
+        data: Any,
+        status: HTTPStatus = HTTPStatus.OK,
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Send a JSON response."""
+        body = json.dumps(data, default=str).encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: HTTPStatus, message: str) -> None:
+        """Send a JSON error response."""
+        self.send_json({'error': message}, status)
+
+    def write_chunk(self, data: bytes) -> None:
+        """Write one chunk of a chunked response."""
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def read_json(self) -> Optional[Dict[str, Any]]:
+        """Read the JSON request body, replying with an error if it is invalid."""
+        raw_length = self.headers.get("Content-Length") or "0"
+        try:
+            length = int(raw_length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, f"Invalid Content-Length: {raw_length!r}")
+            return None
+        if length > MAX_REQUEST_BYTES:
+            self.send_error_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+            return None
+        try:
+            data = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+            return None
+        if not isinstance(data, dict):
+            self.send_error_json(HTTPStatus.BAD_REQUEST, "Expected a JSON object")
+            return None
+        return data
+
+    def job_json(self, job: BuildJob) -> Dict[str, Any]:
+        """Summarize a job, including its place in the queue."""
+        data = job.to_dict()
+        data['queue_position'] = self.server.scheduler.position(job.id)
+        return data
+
+    def find_job(self, job_id: str) -> Optional[BuildJob]:
+        """Look up a job, replying 404 if it does not exist."""
+        job = self.server.scheduler.get(job_id)
+        if job is None:
+            self.send_error_json(HTTPStatus.NOT_FOUND, f"Unknown build: {job_id}")
+        return job
+
+    def query_int(self, query: Dict[str, List[str]], name: str, default: int) -> Optional[int]:
+        """Read a non-negative integer query parameter, replying 400 if it is invalid."""
+        raw = query.get(name, [str(default)])[0]
+        try:
+            value = int(raw)
+        except ValueError:
+            value = -1
+        if value < 0:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, f"Invalid {name}: {raw!r}")
+            return None
+        return value
+
+    # Routing
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == "/health":
+            scheduler = self.server.scheduler
+            self.send_json({
+                'status': 'ok',
+                'version': __version__,
+                'workers': scheduler.workers,
+                'running': scheduler.running(),
+                'queued': scheduler.queued(),
+            })
+            return
+        if url.path == "/builds":
+            owner = query.get("owner", [None])[0]
+            self.send_json([self.job_json(job) for job in self.server.scheduler.jobs(owner)])
+            return
+
+        match = _JOB_ROUTE.match(url.path)
+        if not match:
+            self.send_error_json(HTTPStatus.NOT_FOUND, f"Unknown path: {url.path}")
+            return
+        job = self.find_job(match.group("job_id"))
+        if job is None:
+            return
+
+        action = match.group("action")
+        if action == "/logs":
+            offset = self.query_int(query, "offset", 0)
+            if offset is None:
+                return
+            if query.get("follow", ["0"])[0] in ("1", "true"):
+                self.stream_logs(job, offset)
+            else:
+                limit = self.query_int(query, "limit", MAX_LOG_LINES)
+                if limit is None:
+                    return
+                lines = job.read_logs(offset, limit=min(limit, MAX_LOG_LINES))
+                self.send_json({
+                    'offset': offset + len(lines),
+                    'lines': lines,
+                    'done': job.done,
+                })
+        elif action == "/artifact":
+            self.send_artifact(job)
+        else:
+            self.send_json(self.job_json(job))
+
+    def do_POST(self) -> None:
+        if urlparse(self.path).path != "/builds":
+            self.send_error_json(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+            return
+
+        data = self.read_json()
+        if data is None:
+            return
+        try:
+            config = BuildConfig.from_dict(data)
+            config.validate()
+        except (TypeError, ValueError) as e:
+            self.send_error_json(HTTPStatus.BAD_REQUEST, f"Invalid config: {e}")
+            return
+
+        owner = self.headers.get(OWNER_HEADER) or DEFAULT_OWNER
+        try:
+            job = self.server.scheduler.submit(config, owner=owner, on_finish=self.server.archive_output)
+        except QuotaExceededError as e:
+            self.send_error_json(HTTPStatus.TOO_MANY_REQUESTS, str(e))
+            return
+        except QueueFullError as e:
+            self.send_error_json(HTTPStatus.SERVICE_UNAVAILABLE, str(e))
+            return
+        self.send_json(self.job_json(job), HTTPStatus.ACCEPTED)
+
+    def do_DELETE(self) -> None:
+        match = _JOB_ROUTE.match(urlparse(self.path).path)
+        if not match or match.group("action"):
+            self.send_error_json(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+            return
+        job = self.find_job(match.group("job_id"))
+        if job is None:
+            return
+        if not self.server.scheduler.cancel(job.id):
+            self.send_error_json(HTTPStatus.CONFLICT, f"Build already {job.status.value}")
+            return
+        self.send_json(self.job_json(job))
+
+    # Streaming
+
+    def stream_logs(self, job: BuildJob, offset: int) -> None:
+        """Stream log lines as chunked text until the job finishes."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            while True:
+                done = job.done
+                lines = job.read_logs(offset, wait=FOLLOW_POLL_SECONDS, limit=MAX_LOG_LINES)
+                if lines:
+                    offset += len(lines)
+                    self.write_chunk(("\n".join(lines) + "\n").encode('utf-8'))
+                elif done:
+                    break
+            self.write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away, the build keeps running
+            pass
+
+    def send_artifact(self, job: BuildJob) -> None:
+        """Stream the built executable (or a zip of the onedir folder)."""
+        output_path = job.output_path
+        if not job.done or output_path is None or not output_path.exists():
+            self.send_error_json(HTTPStatus.CONFLICT, f"No artifact, build is {job.status.value}")
+            return
+
+        # Builds with variants serve the first one
+        target = (job.config.variant_configs() or [job.config])[0]
+        artifact = output_path
+        if not target.one_file:
+            if 'archive_error' in job.metadata:
+                self.send_error_json(
+                    HTTPStatus.INTERNAL_SERVER_ERROR, f"Archiving failed: {job.metadata['archive_error']}"
+                )
+                return
+            if 'archive' not in job.metadata:
+                # The completion callback is still zipping the folder
+                self.send_json({'status': "archiving"}, HTTPStatus.ACCEPTED, headers={"Retry-After": "1"})
+                return
+            stored = self.server.artifacts.get(job.metadata['archive'])
+            if stored is None:
+                self.send_error_json(HTTPStatus.GONE, "Archive expired")
+                return
+            artifact = stored.path
+        try:
+            send_file(self, artifact, artifact.name)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the download
+            pass
+
+
+def create_server(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    workers: int = 2,
+    queue_size: int = 100,
+    quiet: bool = True,
+    max_running_per_user: Optional[int] = None,
+    max_queued_per_user: Optional[int] = None,
+    ledger: Optional[BuildLedger] = None,
+    artifacts: Optional[ArtifactStore] = None
+) -> BuildServer:
+    """
+    Create a build server with its own scheduler.
+
+    Submitted configs refer to paths on the server machine, so bind to
+    localhost unless the network is trusted.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        workers: Number of builds running at once
+        queue_size: Maximum number of queued builds
+        quiet: Suppress per-request access logging
+        max_running_per_user: Builds one user may run at once
+        max_queued_per_user: Builds one user may have queued
+        ledger: Ledger every finished build is recorded in
+        artifacts: Store for the zip archives of onedir builds
+
+    Returns:
+        Server ready for ``serve_forever()``
+    """
+    scheduler = BuildScheduler(
+        workers=workers,
+        queue_size=queue_size,
+        max_running_per_owner=max_running_per_user,
+        max_queued_per_owner=max_queued_per_user,
+        ledger=ledger,
+        source="server"
+    )
+    return BuildServer((host, port), scheduler, quiet=quiet, artifacts=artifacts)
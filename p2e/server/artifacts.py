@@ -0,0 +1,148 @@
+"""
+Artifact download server for P2E.
+
+Endpoints:
+    GET/HEAD /artifacts/<token>/<name>    Download a stored artifact;
+                                          supports ``Range`` requests
+"""
+
+import ipaddress
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Tuple
+from urllib.parse import quote, unquote, urlparse, urlsplit
+
+from p2e import __version__
+from p2e.core.artifacts import Artifact, ArtifactStore
+from p2e.server.files import send_file
+
+
+class ArtifactServer(ThreadingHTTPServer):
+    """Threaded HTTP server streaming files from an artifact store."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        store: ArtifactStore,
+        base_url: Optional[str] = None,
+        quiet: bool = True
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            address: ``(host, port)`` to bind
+            store: Store to serve from
+            base_url: URL clients reach the server at; derived from the
+                bound address, or from the host a client used to reach
+                the app linking to it, if not given
+            quiet: Suppress per-request access logging
+        """
+        super().__init__(address, ArtifactRequestHandler)
+        self.store = store
+        self.quiet = quiet
+        self.public_url = base_url.rstrip("/") if base_url else None
+        host, port = self.server_address[:2]
+        self.base_url = self.public_url or f"http://{host}:{port}"
+
+    def url_for(self, artifact: Artifact, request_host: Optional[str] = None) -> str:
+        """
+        Get the download URL of an artifact.
+
+        Args:
+            artifact: Stored artifact
+            request_host: ``Host`` header of the page the link is shown on;
+                without a configured base URL, remote clients are sent to
+                that host on this server's port
+
+        Returns:
+            Download URL
+
+        Raises:
+            RuntimeError: If a remote client cannot reach the server, which
+                is bound to a loopback address and has no base URL
+        """
+        base_url = self.base_url
+        hostname = urlsplit(f"//{request_host}").hostname if request_host else None
+        if self.public_url is None and hostname and not _is_loopback(hostname):
+            if _is_loopback(self.server_address[0]):
+                raise RuntimeError(
+                    f"Downloads are served on {self.base_url}, which is only reachable from this "
+                    "machine; set P2E_ARTIFACT_URL (and P2E_ARTIFACT_HOST) to an address clients can reach"
+                )
+            host = f"[{hostname}]" if ":" in hostname else hostname
+            base_url = f"http://{host}:{self.server_address[1]}"
+        return f"{base_url}/artifacts/{artifact.token}/{quote(artifact.name)}"
+
+    def start(self) -> threading.Thread:
+        """Serve on a daemon thread."""
+        thread = threading.Thread(target=self.serve_forever, name="p2e-artifacts", daemon=True)
+        thread.start()
+        return thread
+
+
+def _is_loopback(host: str) -> bool:
+    """Check whether a host name or address refers to this machine only."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+class ArtifactRequestHandler(BaseHTTPRequestHandler):
+    """Request handler serving artifact downloads."""
+
+    server: ArtifactServer
+    protocol_version = "HTTP/1.1"
+    server_version = f"p2e/{__version__}"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        parts = urlparse(self.path).path.strip("/").split("/")
+        artifact = None
+        if len(parts) == 3 and parts[0] == "artifacts":
+            artifact = self.server.store.get(parts[1])
+        if artifact is None or unquote(parts[2]) != artifact.name:
+            self.send_error(HTTPStatus.NOT_FOUND, "Artifact not found or expired")
+            return
+        try:
+            send_file(self, artifact.path, artifact.name)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the download
+            pass
+
+    do_HEAD = do_GET
+
+
+def create_artifact_server(
+    store: ArtifactStore,
+    host: str = "127.0.0.1",
+    port: int = 8766,
+    base_url: Optional[str] = None,
+    quiet: bool = True
+) -> ArtifactServer:
+    """
+    Create a server for downloading artifacts.
+
+    Download URLs contain an unguessable token, but anyone who obtains one
+    can fetch the file until it expires.
+
+    Args:
+        store: Store to serve from
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        base_url: Public URL of the server, e.g. behind a reverse proxy
+        quiet: Suppress per-request access logging
+
+    Returns:
+        Server ready for ``start()`` or ``serve_forever()``
+    """
+    return ArtifactServer((host, port), store, base_url=base_url, quiet=quiet)
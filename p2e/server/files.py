@@ -0,0 +1,94 @@
+"""
+Streaming file responses for the P2E servers.
+"""
+
+import os
+import re
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Optional, Tuple
+
+_RANGE = re.compile(r"^bytes=(?P<start>\d*)-(?P<end>\d*)$")
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range ``Range`` header.
+
+    Args:
+        header: Header value, e.g. ``bytes=0-1023``, ``bytes=1024-`` or
+            ``bytes=-512``
+        size: File size
+
+    Returns:
+        Inclusive ``(start, end)`` byte positions, or None to send the whole
+        file (no header, or a form that is not supported such as several
+        ranges)
+
+    Raises:
+        ValueError: If the range cannot be satisfied
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match or (not match.group("start") and not match.group("end")):
+        return None
+    if not match.group("start"):
+        # Suffix range: the last N bytes
+        length = int(match.group("end"))
+        if length == 0 or size == 0:
+            raise ValueError(f"Unsatisfiable range: {header}")
+        return max(size - length, 0), size - 1
+    start = int(match.group("start"))
+    end = int(match.group("end")) if match.group("end") else size - 1
+    if start >= size or end < start:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, min(end, size - 1)
+
+
+def send_file(
+    handler: BaseHTTPRequestHandler,
+    path: Path,
+    filename: Optional[str] = None,
+    content_type: str = "application/octet-stream"
+) -> None:
+    """
+    Send a file as the response, honouring ``Range`` requests.
+
+    The body is written with ``socket.sendfile``, so memory use does not
+    depend on the file size. ``HEAD`` requests get the headers only.
+
+    Args:
+        handler: Request being answered
+        path: File to send
+        filename: Download name for ``Content-Disposition``
+        content_type: MIME type
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        try:
+            byte_range = parse_range(handler.headers.get("Range"), size)
+        except ValueError:
+            handler.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            handler.send_header("Content-Range", f"bytes */{size}")
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        start, end = byte_range or (0, size - 1)
+        length = max(end - start + 1, 0)
+        handler.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(length))
+        handler.send_header("Accept-Ranges", "bytes")
+        if byte_range:
+            handler.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        if filename:
+            handler.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        handler.end_headers()
+
+        if handler.command == "HEAD" or length == 0:
+            return
+        # socket.sendfile falls back to plain sends where the OS call is unavailable
+        handler.connection.sendfile(f, offset=start, count=length)
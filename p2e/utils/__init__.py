@@ -1,6 +1,13 @@
 """Utility functions for P2E."""
 
+from p2e.utils.locks import FileLock
 from p2e.utils.logger import setup_logger
+from p2e.utils.logsink import ThrottledLogSink
+from p2e.utils.logstore import LogStore
+from p2e.utils.modules import resolve_local_module
 from p2e.utils.validators import validate_python_file, validate_icon_file
 
-__all__ = ["setup_logger", "validate_python_file", "validate_icon_file"]
+__all__ = [
+    "FileLock", "LogStore", "ThrottledLogSink", "resolve_local_module", "setup_logger",
+    "validate_python_file", "validate_icon_file"
+]
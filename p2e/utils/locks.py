@@ -0,0 +1,121 @@
+"""Inter-process file locking utilities for P2E."""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Lock backed by a lock file.
+
+    Works across processes and across threads of one process, since every
+    acquisition opens its own handle on the lock file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.1,
+        shared: bool = False
+    ):
+        """
+        Initialize the lock.
+
+        Args:
+            path: Lock file path (created if missing)
+            timeout: Seconds to wait for the lock (None = wait forever)
+            poll_interval: Seconds between acquisition attempts
+            shared: Take a shared (reader) lock, held together with other
+                shared locks but never with an exclusive one. Windows has
+                no shared file locks, so the lock stays exclusive there.
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.shared = shared
+        self._fd: Optional[int] = None
+
+    def _try_lock(self, fd: int) -> bool:
+        try:
+            if sys.platform == "win32":
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, (fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self) -> None:
+        """
+        Acquire the lock, waiting until it is free.
+
+        Raises:
+            TimeoutError: If the lock could not be acquired within the timeout
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self._try_lock(fd):
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise TimeoutError(f"Timed out waiting for lock: {self.path}")
+            time.sleep(self.poll_interval)
+        self._fd = fd
+
+    async def acquire_async(self) -> None:
+        """
+        Acquire the lock without blocking the event loop.
+
+        The lock is polled on the loop rather than waited for in a thread,
+        so a caller cancelled while waiting never ends up holding it.
+
+        Raises:
+            TimeoutError: If the lock could not be acquired within the timeout
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        try:
+            while not self._try_lock(fd):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for lock: {self.path}")
+                await asyncio.sleep(self.poll_interval)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._fd is None:
+            return
+        try:
+            if sys.platform == "win32":
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        """Whether this instance currently holds the lock."""
+        return self._fd is not None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
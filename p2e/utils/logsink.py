@@ -0,0 +1,121 @@
+"""Throttled log rendering for P2E."""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+# Default UI refresh rate: at most 10 renders per second
+DEFAULT_FLUSH_INTERVAL = 0.1
+# Render early once this many lines are pending
+DEFAULT_MAX_BATCH = 1000
+
+
+class ThrottledLogSink:
+    """
+    Coalesce log lines and render them in batches.
+
+    Every line is handed to ``persist`` as it arrives, but ``render`` is
+    only called with the pending lines once ``interval`` seconds passed
+    since the previous render or ``max_batch`` lines are pending. Rendering
+    happens on the thread that writes the line that triggers it, so UI
+    toolkits that must be driven from one thread (such as Streamlit) keep
+    working; call ``flush()`` or ``close()`` when output ends to render the
+    remainder. With ``background`` set, a timer thread also renders lines
+    still pending once the interval has passed, so the last lines before a
+    pause in the output do not wait for the next write.
+
+    The sink is callable, so it can be passed as a ``log_callback``.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[List[str]], None],
+        persist: Optional[Callable[[str], None]] = None,
+        interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        clock: Callable[[], float] = time.monotonic,
+        background: bool = False
+    ):
+        """
+        Initialize the sink.
+
+        Args:
+            render: Called with each batch of new lines
+            persist: Called with every line immediately, e.g. to store it
+            interval: Minimum seconds between two renders
+            max_batch: Number of pending lines that forces a render
+            clock: Monotonic time source
+            background: Whether pending lines may be rendered from a
+                timer thread when no further line arrives
+        """
+        self.render = render
+        self.persist = persist
+        self.interval = interval
+        self.max_batch = max(1, max_batch)
+        self.clock = clock
+        self.background = background
+        self.lines_written = 0
+        self.renders = 0
+        self._pending: List[str] = []
+        self._last_render: Optional[float] = None
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+
+    def write(self, message: str) -> None:
+        """
+        Record a log line, rendering pending lines if a flush is due.
+
+        Args:
+            message: Log line
+        """
+        if self.persist:
+            self.persist(message)
+        with self._lock:
+            self._pending.append(message)
+            self.lines_written += 1
+            due = (
+                self._last_render is None
+                or len(self._pending) >= self.max_batch
+                or self.clock() - self._last_render >= self.interval
+            )
+            if not due and self.background and self._timer is None:
+                delay = max(self.interval - (self.clock() - self._last_render), 0)
+                self._timer = threading.Timer(delay, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    __call__ = write
+
+    def flush(self) -> None:
+        """Render all pending lines now."""
+        # Renders are serialized so batches reach the UI in order
+        with self._render_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._last_render = self.clock()
+            if batch:
+                self.renders += 1
+                self.render(batch)
+
+    def _timed_flush(self) -> None:
+        """Render the lines still pending when the timer fires."""
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def close(self) -> None:
+        """Stop the flush timer and render the remaining lines."""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+    def __enter__(self) -> 'ThrottledLogSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
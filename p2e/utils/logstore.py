@@ -0,0 +1,306 @@
+"""Bounded-memory log storage for P2E."""
+
+import bisect
+import os
+import re
+import struct
+import tempfile
+import threading
+import zlib
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+# Lines kept in memory for the live tail
+DEFAULT_TAIL_SIZE = 1000
+# Lines per compressed block on disk
+DEFAULT_BLOCK_LINES = 1000
+# Suffix of spilled log files
+LOG_SUFFIX = ".log.z"
+
+# Block header: compressed payload length, number of lines
+_BLOCK_HEADER = struct.Struct("!II")
+
+
+class LogStore:
+    """
+    Capture log lines with a fixed memory footprint.
+
+    The last ``tail_size`` lines stay in an in-memory ring buffer for live
+    views. All lines are spilled to a file as a sequence of independently
+    zlib-compressed blocks of ``block_lines`` lines, each preceded by a
+    small header. An index of ``(first line, offset, length)`` per block is
+    kept in memory, so any page of the log is read by decompressing only
+    the blocks it spans. A closed log file can be reopened with ``open()``,
+    which rebuilds the index from the block headers.
+
+    The store is callable, so it can be passed as a ``log_callback``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        tail_size: int = DEFAULT_TAIL_SIZE,
+        block_lines: int = DEFAULT_BLOCK_LINES
+    ):
+        """
+        Create a new, empty log.
+
+        Args:
+            path: File to spill the log to; a temporary file if not given
+            tail_size: Number of recent lines kept in memory
+            block_lines: Number of lines per compressed block
+        """
+        if path is None:
+            fd, name = tempfile.mkstemp(prefix="p2e-", suffix=LOG_SUFFIX)
+            os.close(fd)
+            path = Path(name)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.block_lines = max(1, block_lines)
+        self._tail: deque = deque(maxlen=max(1, tail_size))
+        self._pending: List[str] = []
+        self._index: List[Tuple[int, int, int]] = []
+        self._first_lines: List[int] = []
+        self._line_count = 0
+        self._spilled = 0
+        self._size = 0
+        self._file: Optional[BinaryIO] = open(self.path, 'wb')
+        self._lock = threading.RLock()
+
+    @classmethod
+    def open(cls, path: Path, tail_size: int = DEFAULT_TAIL_SIZE) -> 'LogStore':
+        """
+        Open a closed log file for reading.
+
+        Args:
+            path: Log file written by a previous store
+            tail_size: Number of recent lines to load into the tail
+
+        Returns:
+            Read-only store
+
+        Raises:
+            ValueError: If the file is not a valid log
+        """
+        store = cls.__new__(cls)
+        store.path = Path(path)
+        store.block_lines = DEFAULT_BLOCK_LINES
+        store._tail = deque(maxlen=max(1, tail_size))
+        store._pending = []
+        store._index = []
+        store._first_lines = []
+        store._line_count = 0
+        store._spilled = 0
+        store._size = 0
+        store._file = None
+        store._lock = threading.RLock()
+
+        with open(store.path, 'rb') as f:
+            while True:
+                header = f.read(_BLOCK_HEADER.size)
+                if not header:
+                    break
+                if len(header) < _BLOCK_HEADER.size:
+                    raise ValueError(f"Truncated log file: {store.path}")
+                length, count = _BLOCK_HEADER.unpack(header)
+                store._add_block(store._size + _BLOCK_HEADER.size, length, count)
+                f.seek(length, os.SEEK_CUR)
+        if store._size != store.path.stat().st_size:
+            raise ValueError(f"Truncated log file: {store.path}")
+        store._line_count = store._spilled
+
+        start = max(0, len(store) - store._tail.maxlen)
+        store._tail.extend(store.read(start))
+        return store
+
+    def __len__(self) -> int:
+        return self._line_count
+
+    @property
+    def closed(self) -> bool:
+        """Whether no more lines can be appended."""
+        return self._file is None
+
+    def append(self, line: str) -> None:
+        """
+        Append a log line.
+
+        Args:
+            line: Log line; embedded newlines are kept as separate lines
+        """
+        with self._lock:
+            if self._file is None:
+                raise ValueError("Log store is closed")
+            for part in line.split("\n"):
+                self._tail.append(part)
+                self._pending.append(part)
+                self._line_count += 1
+                if len(self._pending) >= self.block_lines:
+                    self._spill()
+
+    __call__ = append
+
+    def tail(self, count: Optional[int] = None) -> List[str]:
+        """
+        Get the most recent lines from memory.
+
+        Args:
+            count: Number of lines; the whole ring buffer if not given
+
+        Returns:
+            Up to ``count`` lines, oldest first
+        """
+        with self._lock:
+            lines = list(self._tail)
+        return lines if count is None else lines[max(0, len(lines) - count):]
+
+    def read(self, start: int = 0, count: Optional[int] = None) -> List[str]:
+        """
+        Read a range of lines.
+
+        Args:
+            start: Index of the first line
+            count: Maximum number of lines; all remaining lines if not given
+
+        Returns:
+            Lines ``start`` to ``start + count``
+        """
+        with self._lock:
+            end = self._line_count if count is None else min(self._line_count, start + count)
+            start = max(0, start)
+            if start >= end:
+                return []
+            lines: List[str] = []
+            spilled = self._spilled
+            if start < spilled:
+                block = bisect.bisect_right(self._first_lines, start) - 1
+                with open(self.path, 'rb') as f:
+                    while block < len(self._index) and self._index[block][0] < end:
+                        first, offset, length = self._index[block]
+                        block_lines = self._read_block(f, offset, length)
+                        lines.extend(block_lines[max(0, start - first):end - first])
+                        block += 1
+            if end > spilled:
+                lines.extend(self._pending[max(0, start - spilled):end - spilled])
+            return lines
+
+    def page(self, number: int, size: int = 100) -> List[str]:
+        """
+        Read one page of lines.
+
+        Args:
+            number: Zero-based page number
+            size: Lines per page
+
+        Returns:
+            Lines of the page (empty past the end)
+        """
+        return self.read(number * size, size)
+
+    def pages(self, size: int = 100) -> int:
+        """Number of pages of ``size`` lines."""
+        return (len(self) + size - 1) // size
+
+    def grep(
+        self,
+        pattern: Union[str, 're.Pattern'],
+        ignore_case: bool = False,
+        limit: Optional[int] = None
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Search the whole log, one block in memory at a time.
+
+        Args:
+            pattern: Regular expression
+            ignore_case: Whether to match case-insensitively
+            limit: Maximum number of matches
+
+        Yields:
+            ``(line number, line)`` of every matching line
+        """
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        found = 0
+        line_number = 0
+        while line_number < len(self):
+            chunk = self.read(line_number, self.block_lines)
+            if not chunk:
+                break
+            for i, line in enumerate(chunk):
+                if pattern.search(line):
+                    yield line_number + i, line
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+            line_number += len(chunk)
+
+    def close(self) -> None:
+        """Spill the remaining lines and close the file."""
+        with self._lock:
+            if self._file is None:
+                return
+            self._spill()
+            self._file.close()
+            self._file = None
+
+    def discard(self) -> None:
+        """Close the store and delete its file."""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> 'LogStore':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _spill(self) -> None:
+        """Compress the pending lines into a new block on disk."""
+        if not self._pending:
+            return
+        payload = zlib.compress("\n".join(self._pending).encode('utf-8'))
+        self._file.write(_BLOCK_HEADER.pack(len(payload), len(self._pending)))
+        self._file.write(payload)
+        self._file.flush()
+        self._add_block(self._size + _BLOCK_HEADER.size, len(payload), len(self._pending))
+        self._pending = []
+
+    def _add_block(self, offset: int, length: int, count: int) -> None:
+        """Record a block in the index."""
+        self._index.append((self._spilled, offset, length))
+        self._first_lines.append(self._spilled)
+        self._spilled += count
+        self._size = offset + length
+
+    @staticmethod
+    def _read_block(f: BinaryIO, offset: int, length: int) -> List[str]:
+        f.seek(offset)
+        return zlib.decompress(f.read(length)).decode('utf-8').split("\n")
+
+
+def prune_logs(directory: Path, keep: int) -> List[Path]:
+    """
+    Delete all but the most recently modified log files in a directory.
+
+    Args:
+        directory: Directory holding ``*.log.z`` files
+        keep: Number of files to keep
+
+    Returns:
+        Deleted files
+    """
+    if not directory.is_dir():
+        return []
+    logs = sorted(directory.glob(f"*{LOG_SUFFIX}"), key=lambda p: p.stat().st_mtime, reverse=True)
+    removed = []
+    for path in logs[max(keep, 0):]:
+        try:
+            path.unlink()
+            removed.append(path)
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,29 @@
+"""Local module resolution utilities for P2E."""
+
+from pathlib import Path
+from typing import Optional
+
+
+def resolve_local_module(name: str, base_dir: Path) -> Optional[Path]:
+    """
+    Resolve a dotted module name to a local source file.
+
+    Args:
+        name: Dotted module name; empty for the package at ``base_dir``
+        base_dir: Folder the module is looked up in
+
+    Returns:
+        The module's ``.py`` file or its package's ``__init__.py``, or None
+        if the module is not a local source file
+    """
+    if not name:
+        init_file = base_dir / "__init__.py"
+        return init_file if init_file.is_file() else None
+    parts = name.split(".")
+    module_file = base_dir.joinpath(*parts).with_suffix(".py")
+    if module_file.is_file():
+        return module_file
+    package_init = base_dir.joinpath(*parts) / "__init__.py"
+    if package_init.is_file():
+        return package_init
+    return None
@@ -0,0 +1,182 @@
+"""Upload handling utilities for P2E."""
+
+import shutil
+import stat
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, List, Optional
+
+# Bytes copied per read when writing uploads to disk
+CHUNK_SIZE = 1024 * 1024
+
+# Limits for uploaded project archives
+MAX_PROJECT_FILES = 10000
+MAX_PROJECT_BYTES = 2 * 1024 * 1024 * 1024
+
+# Entry points tried, in order, when a project does not name one
+ENTRY_SCRIPT_NAMES = ("__main__.py", "main.py", "app.py")
+
+
+def safe_filename(name: str) -> str:
+    """
+    Reduce an uploaded file name to a plain file name.
+
+    Args:
+        name: Name reported by the browser
+
+    Returns:
+        The last path component
+
+    Raises:
+        ValueError: If nothing usable is left
+    """
+    filename = PurePosixPath(name.replace("\\", "/")).name
+    if filename in ("", ".", ".."):
+        raise ValueError(f"Invalid file name: {name!r}")
+    return filename
+
+
+def save_upload(
+    upload: BinaryIO,
+    dest_dir: Path,
+    name: Optional[str] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Path:
+    """
+    Write an uploaded file to disk in chunks.
+
+    The upload is copied block by block instead of materialized with
+    ``getvalue()``, so no second full copy of it is made in memory.
+
+    Args:
+        upload: File-like object, e.g. a Streamlit ``UploadedFile``
+        dest_dir: Directory to write to
+        name: File name; defaults to the upload's ``name``
+        chunk_size: Bytes per read
+
+    Returns:
+        Path of the written file
+    """
+    path = dest_dir / safe_filename(name or getattr(upload, "name", ""))
+    upload.seek(0)
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(upload, f, chunk_size)
+    return path
+
+
+def _member_path(dest_dir: Path, member: zipfile.ZipInfo) -> Optional[Path]:
+    """Resolve where an archive member goes, rejecting paths outside ``dest_dir``."""
+    parts = [part for part in PurePosixPath(member.filename.replace("\\", "/")).parts if part not in ("", ".")]
+    if not parts:
+        return None
+    if ".." in parts or parts[0].endswith(":") or member.filename.startswith("/"):
+        raise ValueError(f"Unsafe path in archive: {member.filename}")
+    return dest_dir.joinpath(*parts)
+
+
+def _is_symlink(member: zipfile.ZipInfo) -> bool:
+    return stat.S_ISLNK(member.external_attr >> 16)
+
+
+def list_scripts(archive: BinaryIO) -> List[str]:
+    """
+    List the Python scripts in a project archive without extracting it.
+
+    Args:
+        archive: Zip file object
+
+    Returns:
+        Archive paths of ``.py`` files, shallowest first
+
+    Raises:
+        ValueError: If the upload is not a zip archive
+    """
+    archive.seek(0)
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            names = [
+                info.filename for info in zf.infolist()
+                if not info.is_dir() and info.filename.endswith(".py")
+            ]
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a zip archive: {e}")
+    return sorted(names, key=lambda name: (name.count("/"), name))
+
+
+def default_entry_script(scripts: List[str]) -> Optional[str]:
+    """
+    Pick the most likely entry point of a project.
+
+    Args:
+        scripts: Archive paths as returned by ``list_scripts``
+
+    Returns:
+        The shallowest ``__main__.py``/``main.py``/``app.py``, else the only
+        top-level script, else None
+    """
+    for candidate in ENTRY_SCRIPT_NAMES:
+        for script in scripts:
+            if PurePosixPath(script).name == candidate:
+                return script
+    top_level = [script for script in scripts if script.count("/") == scripts[0].count("/")] if scripts else []
+    return top_level[0] if len(top_level) == 1 else None
+
+
+def extract_project(
+    archive: BinaryIO,
+    dest_dir: Path,
+    max_files: int = MAX_PROJECT_FILES,
+    max_bytes: int = MAX_PROJECT_BYTES,
+    chunk_size: int = CHUNK_SIZE
+) -> List[Path]:
+    """
+    Extract a project archive member by member.
+
+    Each member is streamed to disk in chunks, so memory use does not depend
+    on member sizes. Paths escaping ``dest_dir`` are rejected and symlinks
+    are skipped; the file count and the number of bytes actually written
+    are capped to guard against archive bombs.
+
+    Args:
+        archive: Zip file object
+        dest_dir: Directory to extract into
+        max_files: Maximum number of files
+        max_bytes: Maximum total uncompressed size
+        chunk_size: Bytes per read
+
+    Returns:
+        Extracted files
+
+    Raises:
+        ValueError: If the archive is invalid, unsafe or too large
+    """
+    archive.seek(0)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    extracted: List[Path] = []
+    written = 0
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            for member in zf.infolist():
+                path = _member_path(dest_dir, member)
+                if path is None or _is_symlink(member):
+                    continue
+                if member.is_dir():
+                    path.mkdir(parents=True, exist_ok=True)
+                    continue
+                if len(extracted) >= max_files:
+                    raise ValueError(f"Archive has more than {max_files} files")
+
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with zf.open(member) as src, open(path, 'wb') as dst:
+                    while True:
+                        chunk = src.read(chunk_size)
+                        if not chunk:
+                            break
+                        written += len(chunk)
+                        if written > max_bytes:
+                            raise ValueError(f"Archive expands to more than {max_bytes} bytes")
+                        dst.write(chunk)
+                extracted.append(path)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Not a zip archive: {e}")
+    return extracted
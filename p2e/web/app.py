@@ -3,17 +3,52 @@ Modern Streamlit web interface for P2E.
 """
 
 import datetime
+import os
 import re
+import uuid
 import streamlit as st
 import tempfile
 import shutil
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
+from p2e.core.artifacts import DEFAULT_MAX_AGE, ArtifactStore
 from p2e.core.config import BuildConfig
-from p2e.core.converter import PyConverter
+from p2e.core.cache import default_cache_root
+from p2e.core.ledger import BuildLedger, LedgerEntry
+from p2e.core.result import BuildStatus, JobStatus
+from p2e.core.scheduler import BuildJob, BuildScheduler, QueueFullError, QuotaExceededError
+from p2e.server.artifacts import ArtifactServer, create_artifact_server
+from p2e.utils.logstore import LOG_SUFFIX, LogStore, prune_logs
+from p2e.utils.uploads import default_entry_script, extract_project, list_scripts, save_upload
 from p2e import __version__
 
+# Build logs kept on disk for the history tab
+MAX_STORED_LOGS = 200
+# Lines per page when browsing a stored log
+LOG_PAGE_SIZE = 200
+# Log lines shown for a running build
+LOG_TAIL_LINES = 20
+# Builds of this session shown on the build tab
+MAX_SESSION_JOBS = 5
+# Builds per page on the history tab
+HISTORY_PAGE_SIZE = 20
+# Seconds between progress refreshes
+POLL_SECONDS = 1.0
+
+# Progress bar position per build phase and PyInstaller stage
+PHASE_PROGRESS = {
+    BuildStatus.IDLE: 5,
+    BuildStatus.CHECKING_DEPS: 10,
+    BuildStatus.INSTALLING_DEPS: 15,
+    BuildStatus.CHECKING_CACHE: 20,
+    BuildStatus.SCANNING_IMPORTS: 25,
+    BuildStatus.BUILDING: 30,
+    BuildStatus.CLEANING: 90,
+    BuildStatus.VERIFYING: 95,
+}
+STAGE_PROGRESS = {"Analysis": 40, "PYZ": 60, "PKG": 70, "EXE": 85, "COLLECT": 90}
+
 
 def create_app():
     """Create and configure the Streamlit app."""
@@ -63,8 +98,8 @@ def create_app():
     """, unsafe_allow_html=True)
     
     # Initialize session state
-    if 'build_history' not in st.session_state:
-        st.session_state.build_history = []
+    if 'web_jobs' not in st.session_state:
+        st.session_state.web_jobs = []
     
     # Header
     st.title("🐍 P2E - Python to EXE Converter")
@@ -81,7 +116,8 @@ def create_app():
         if config_file:
             try:
                 with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix=config_file.name) as tmp:
-                    tmp.write(config_file.getvalue())
+                    config_file.seek(0)
+                    shutil.copyfileobj(config_file, tmp)
                     tmp_path = Path(tmp.name)
                 
                 if config_file.name.endswith('.json'):
@@ -132,23 +168,61 @@ def build_tab():
     with col1:
         st.subheader("📁 Source")
         
-        # Main script upload
-        main_script = st.file_uploader(
-            "Main Python Script",
-            type=['py'],
-            key="main_script",
-            help="The main .py file to convert"
+        source_type = st.radio(
+            "Source",
+            ["Single script", "Project (.zip)"],
+            horizontal=True,
+            label_visibility="collapsed"
         )
         
-        if main_script:
-            st.success(f"✓ Loaded: {main_script.name}")
+        main_script = None
+        project_zip = None
+        entry_script = None
+        if source_type == "Single script":
+            # Main script upload
+            main_script = st.file_uploader(
+                "Main Python Script",
+                type=['py'],
+                key="main_script",
+                help="The main .py file to convert"
+            )
+            
+            if main_script:
+                st.success(f"✓ Loaded: {main_script.name}")
+        else:
+            # Whole project upload, extracted into the build workspace
+            project_zip = st.file_uploader(
+                "Project Archive",
+                type=['zip'],
+                key="project_zip",
+                help="A zip of your project; its modules are importable by the entry script"
+            )
+            
+            if project_zip:
+                try:
+                    scripts = list_scripts(project_zip)
+                except ValueError as e:
+                    st.error(f"❌ {e}")
+                    scripts = None
+                if scripts:
+                    default = default_entry_script(scripts)
+                    entry_script = st.selectbox(
+                        "Entry Script",
+                        scripts,
+                        index=scripts.index(default) if default else 0,
+                        help="The script to convert"
+                    )
+                elif scripts is not None:
+                    st.error("❌ The archive contains no Python scripts")
+        
+        script_name = Path(entry_script).name if entry_script else (main_script.name if main_script else None)
         
         # Output settings
         st.subheader("🎯 Output Settings")
         
         exe_name = st.text_input(
             "Executable Name",
-            value=main_script.name.replace('.py', '') if main_script else "MyApp",
+            value=script_name.replace('.py', '') if script_name else "MyApp",
             help="Name for the output executable"
         )
         
@@ -185,6 +259,11 @@ def build_tab():
             placeholder="numpy\npandas\nrequests",
             help="Modules that PyInstaller might miss"
         )
+        auto_hidden_imports = st.checkbox(
+            "Detect dynamic imports",
+            value=False,
+            help="Scan the code for importlib/__import__ calls and plugin packages and add them as hidden imports"
+        )
         
         # Proxy settings
         st.subheader("🌐 Network")
@@ -197,11 +276,13 @@ def build_tab():
     
     # Build button
     if st.button("🚀 BUILD EXECUTABLE", type="primary"):
-        if not main_script:
+        if not main_script and not entry_script:
             st.error("❌ Please upload a Python script first!")
         else:
             build_executable(
                 main_script=main_script,
+                project_zip=project_zip,
+                entry_script=entry_script,
                 exe_name=exe_name,
                 one_file=one_file,
                 console_mode=console_mode,
@@ -209,22 +290,35 @@ def build_tab():
                 icon_file=icon_file,
                 additional_files=additional_files or [],
                 hidden_imports_text=hidden_imports_text,
+                auto_hidden_imports=auto_hidden_imports,
                 use_proxy=use_proxy,
                 proxy_url=proxy_url
             )
+    
+    # Builds run on the shared pool; their progress is polled here
+    show_builds()
 
 
 def advanced_tab():
     """Advanced options tab."""
     st.header("Advanced Options")
     
-    st.info("🚧 Advanced features coming soon!")
+    st.info("💻 These options are available from the `p2e` command line and in batch manifests.")
+    
+    st.subheader("Command-Line Features")
+    st.markdown("""
+    - ⚙️ Generated spec files, reused while the configuration is unchanged
+    - 🧬 Build variants from one analysis (`--variant`)
+    - 🧩 Multi-entry suites sharing one distribution (`--entry-point`)
+    - 📦 Pooled build environments (`--requirements`, `--python`)
+    - 📴 Offline installs from a wheelhouse (`--wheelhouse`, `p2e wheelhouse`)
+    - ✂️ Trimming bundles with import tracing (`p2e trace`, `--use-trace`)
+    - ⚡ Incremental and cached builds (`--incremental`, `--cache`)
+    - 🔧 Custom PyInstaller arguments (`extra_args` in a config file)
+    """)
     
     st.subheader("Planned Features")
     st.markdown("""
-    - ✨ Custom PyInstaller arguments
-    - ✨ Multiple script bundling
-    - ✨ Virtual environment integration
     - ✨ Build templates
     - ✨ Automated testing
     - ✨ Code signing support
@@ -232,18 +326,126 @@ def advanced_tab():
 
 
 def history_tab():
-    """Build history tab."""
+    """Build history tab, paged from the build ledger."""
     st.header("Build History")
+    ledger = get_ledger()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        exe_name = st.selectbox("Executable", ["All"] + ledger.exe_names(), key="history_exe")
+    with col2:
+        outcome = st.selectbox("Status", ["All", "Succeeded", "Failed"], key="history_status")
+    with col3:
+        mine = st.checkbox("Only my builds", value=True, key="history_mine")
+    filters = {
+        'exe_name': None if exe_name == "All" else exe_name,
+        'success': {"Succeeded": True, "Failed": False}.get(outcome),
+        'owner': session_owner() if mine else None,
+    }
     
-    if not st.session_state.build_history:
+    total = ledger.count(**filters)
+    if not total:
         st.info("No builds yet. Create your first build in the Build tab!")
-    else:
-        for i, build in enumerate(reversed(st.session_state.build_history)):
-            with st.expander(f"{build['name']} - {build['timestamp']}"):
-                st.write(f"**Status:** {build['status']}")
-                st.write(f"**Output:** {build.get('output', 'N/A')}")
-                if build.get('logs'):
-                    st.code(build['logs'][-10:], language='text')
+        return
+    
+    pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    page = st.number_input(f"Page (of {pages}, {total} builds)", min_value=1, max_value=pages, value=1,
+                           key="history_page")
+    for entry in ledger.page(offset=(int(page) - 1) * HISTORY_PAGE_SIZE, limit=HISTORY_PAGE_SIZE, **filters):
+        show_history_entry(entry)
+
+
+def show_history_entry(entry: LedgerEntry):
+    """Show one recorded build on the history tab."""
+    finished = datetime.datetime.fromtimestamp(entry.finished_at).strftime('%Y-%m-%d %H:%M:%S')
+    with st.expander(f"{entry.exe_name} - {finished}"):
+        st.write(f"**Status:** {'Success' if entry.success else entry.status.capitalize()}")
+        if entry.duration is not None:
+            st.write(f"**Duration:** {entry.duration:.1f} s" + (" (cached)" if entry.cache_hit else ""))
+        if entry.output_size is not None:
+            st.write(f"**Size:** {entry.output_size / (1024 * 1024):.2f} MB")
+        if entry.error and not entry.success:
+            st.write(f"**Error:** {entry.error}")
+        if entry.metadata.get('artifact'):
+            show_download(get_artifact_server(), entry.metadata['artifact'])
+        if entry.log_path:
+            show_build_log(Path(entry.log_path), key=f"log_{entry.id}")
+
+
+@st.cache_resource
+def get_ledger() -> BuildLedger:
+    """Open the build ledger shared by all sessions."""
+    path = os.environ.get("P2E_LEDGER")
+    return BuildLedger(Path(path) if path else None)
+
+
+@st.cache_resource
+def get_artifact_server() -> ArtifactServer:
+    """Start the artifact download server shared by all sessions."""
+    store = ArtifactStore(max_age=float(os.environ.get("P2E_ARTIFACT_TTL", DEFAULT_MAX_AGE)))
+    server = create_artifact_server(
+        store,
+        host=os.environ.get("P2E_ARTIFACT_HOST", "127.0.0.1"),
+        port=int(os.environ.get("P2E_ARTIFACT_PORT", "8766")),
+        base_url=os.environ.get("P2E_ARTIFACT_URL")
+    )
+    server.start()
+    return server
+
+
+def show_download(server: ArtifactServer, token: str):
+    """Link to a retained artifact, or note that it expired."""
+    artifact = server.store.get(token)
+    if artifact is None:
+        st.caption("Download expired")
+        return
+    expires = datetime.datetime.fromtimestamp(artifact.created_at + server.store.max_age)
+    # The link must work from the browser, which may be on another machine
+    context = getattr(st, "context", None)
+    request_host = context.headers.get("Host") if context is not None else None
+    try:
+        url = server.url_for(artifact, request_host=request_host)
+    except RuntimeError as e:
+        st.error(f"❌ {e}")
+        return
+    st.link_button(
+        f"⬇️ Download {artifact.name} ({artifact.size / (1024 * 1024):.1f} MB)",
+        url
+    )
+    st.caption(f"Available until {expires.strftime('%Y-%m-%d %H:%M')}")
+
+
+def show_build_log(log_path: Path, key: str):
+    """Page or search through a stored build log without loading it whole."""
+    if not log_path.exists():
+        st.caption("Log no longer available")
+        return
+    try:
+        store = LogStore.open(log_path, tail_size=LOG_PAGE_SIZE)
+    except ValueError as e:
+        st.caption(f"Log unreadable: {e}")
+        return
+    
+    query = st.text_input("Search log", key=f"{key}_grep", placeholder="regular expression")
+    if query:
+        try:
+            matches = list(store.grep(query, ignore_case=True, limit=LOG_PAGE_SIZE))
+        except re.error as e:
+            st.warning(f"Invalid pattern: {e}")
+            return
+        st.caption(f"{len(matches)} matching line(s)" + (" (first shown)" if len(matches) == LOG_PAGE_SIZE else ""))
+        st.code("\n".join(f"{n + 1}: {line}" for n, line in matches), language='text')
+        return
+    
+    pages = max(store.pages(LOG_PAGE_SIZE), 1)
+    page = st.number_input(
+        f"Page (of {pages}, {len(store)} lines)",
+        min_value=1,
+        max_value=pages,
+        value=pages,
+        key=f"{key}_page"
+    )
+    st.code("\n".join(store.page(int(page) - 1, LOG_PAGE_SIZE)), language='text')
 
 
 def build_executable(
@@ -256,136 +458,190 @@ def build_executable(
     additional_files: List,
     hidden_imports_text: str,
     use_proxy: bool,
-    proxy_url: str
+    proxy_url: str,
+    auto_hidden_imports: bool = False,
+    project_zip=None,
+    entry_script: Optional[str] = None
 ):
-    """Execute the build process."""
+    """Prepare the build workspace and queue the build on the shared pool."""
     
-    status_placeholder = st.empty()
-    progress_bar = st.progress(0)
-    log_placeholder = st.empty()
+    # The workspace outlives this script run; it is removed when the build finishes
+    temp_path = Path(tempfile.mkdtemp(prefix="p2e-web-"))
     
-    logs = []
-    
-    def log(message: str):
-        logs.append(message)
-        with log_placeholder.container():
-            st.code("\n".join(logs[-20:]), language='text')
+    # Keep only a short tail in memory; the full log is spilled to disk
+    log_dir = default_cache_root() / "logs"
+    prune_logs(log_dir, keep=MAX_STORED_LOGS - 1)
+    logs = LogStore(log_dir / f"{uuid.uuid4().hex}{LOG_SUFFIX}", tail_size=LOG_TAIL_LINES)
+    log = logs.append
     
     try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # Save main script
-            status_placeholder.info("📝 Preparing build environment...")
-            progress_bar.progress(10)
-            
-            script_path = temp_path / main_script.name
-            with open(script_path, 'wb') as f:
-                f.write(main_script.getvalue())
-            log(f"✓ Saved main script: {main_script.name}")
+        with st.spinner("📝 Preparing build environment..."):
+            # Uploads are streamed to disk in chunks rather than copied whole
+            if project_zip is not None:
+                project_dir = temp_path / "project"
+                extracted = extract_project(project_zip, project_dir)
+                script_path = project_dir.joinpath(*entry_script.split('/'))
+                log(f"✓ Extracted project: {len(extracted)} file(s)")
+                log(f"✓ Entry script: {entry_script}")
+            else:
+                script_path = save_upload(main_script, temp_path)
+                log(f"✓ Saved main script: {main_script.name}")
             
             # Save icon if provided
             icon_path = None
             if icon_file:
-                icon_path = temp_path / icon_file.name
-                with open(icon_path, 'wb') as f:
-                    f.write(icon_file.getvalue())
+                icon_path = save_upload(icon_file, temp_path)
                 log(f"✓ Saved icon: {icon_file.name}")
             
             # Save additional files
             add_files_list = []
             for add_file in additional_files:
-                file_path = temp_path / add_file.name
-                with open(file_path, 'wb') as f:
-                    f.write(add_file.getvalue())
-                add_files_list.append((str(file_path), add_file.name))
+                file_path = save_upload(add_file, temp_path)
+                add_files_list.append((str(file_path), file_path.name))
                 log(f"✓ Saved additional file: {add_file.name}")
-            
-            # Parse hidden imports with validation
-            hidden_imports = []
-            for line in hidden_imports_text.split('\n'):
-                module = line.strip()
-                if module and re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z_][a-zA-Z0-9_]*)*$', module):
-                    hidden_imports.append(module)
-                elif module:
-                    log(f"⚠ Warning: Invalid module name '{module}', skipping")
-            
-            progress_bar.progress(30)
-            
-            # Create build config
-            config = BuildConfig(
-                script_path=script_path,
-                output_dir=temp_path / "dist",
-                exe_name=exe_name,
-                one_file=one_file,
-                console_mode=console_mode,
-                clean_build=clean_build,
-                icon_path=icon_path,
-                additional_files=add_files_list,
-                hidden_imports=hidden_imports,
-                use_proxy=use_proxy,
-                proxy_url=proxy_url if use_proxy else None
-            )
-            
-            log(f"✓ Configuration created")
-            log(f"  - Executable: {exe_name}")
-            log(f"  - Mode: {'Single File' if one_file else 'Directory'}")
-            log(f"  - Console: {'Yes' if console_mode else 'No'}")
-            
-            # Create converter
-            status_placeholder.info("🔨 Building executable...")
-            progress_bar.progress(50)
-            
-            converter = PyConverter(config, log_callback=log)
-            
-            # Build
-            success = converter.build(realtime_output=True)
-            
-            progress_bar.progress(90)
-            
-            if success:
-                status_placeholder.success("✅ Build completed successfully!")
-                progress_bar.progress(100)
-                
-                # Get output file
-                output_path = converter.get_output_path()
-                
-                if output_path and output_path.exists():
-                    # Offer download
-                    with open(output_path, 'rb') as f:
-                        st.download_button(
-                            label=f"⬇️ Download {output_path.name}",
-                            data=f,
-                            file_name=output_path.name,
-                            mime="application/octet-stream"
-                        )
-                    
-                    # Add to history
-                    st.session_state.build_history.append({
-                        'name': exe_name,
-                        'timestamp': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        'status': 'Success',
-                        'output': str(output_path.name),
-                        'logs': logs
-                    })
-                else:
-                    st.warning("⚠️ Build succeeded but output file not found")
-            else:
-                status_placeholder.error("❌ Build failed!")
-                progress_bar.progress(0)
-                
-                # Add to history
-                st.session_state.build_history.append({
-                    'name': exe_name,
-                    'timestamp': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    'status': 'Failed',
-                    'logs': logs
-                })
+        
+        # Parse hidden imports with validation
+        hidden_imports = []
+        for line in hidden_imports_text.split('\n'):
+            module = line.strip()
+            if module and re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z_][a-zA-Z0-9_]*)*$', module):
+                hidden_imports.append(module)
+            elif module:
+                log(f"⚠ Warning: Invalid module name '{module}', skipping")
+        
+        # Create build config
+        config = BuildConfig(
+            script_path=script_path,
+            output_dir=temp_path / "dist",
+            exe_name=exe_name,
+            one_file=one_file,
+            console_mode=console_mode,
+            clean_build=clean_build,
+            icon_path=icon_path,
+            additional_files=add_files_list,
+            hidden_imports=hidden_imports,
+            auto_hidden_imports=auto_hidden_imports,
+            use_proxy=use_proxy,
+            proxy_url=proxy_url if use_proxy else None
+        )
+        
+        log(f"✓ Configuration created")
+        log(f"  - Executable: {exe_name}")
+        log(f"  - Mode: {'Single File' if one_file else 'Directory'}")
+        log(f"  - Console: {'Yes' if console_mode else 'No'}")
+        
+        # Queue the build; the page stays responsive while it runs
+        store = get_artifact_server().store
+        job = get_scheduler().submit(
+            config,
+            owner=session_owner(),
+            logs=logs,
+            on_finish=lambda job: finish_web_build(job, store),
+            metadata={'workspace': str(temp_path)}
+        )
+        st.session_state.web_jobs.insert(0, job.id)
+        del st.session_state.web_jobs[MAX_SESSION_JOBS:]
     
+    except QuotaExceededError as e:
+        st.warning(f"⏳ {e}. Wait for one of your builds to finish.")
+        discard_workspace(temp_path, logs)
+    except QueueFullError as e:
+        st.error(f"❌ {e}")
+        discard_workspace(temp_path, logs)
     except Exception as e:
-        status_placeholder.error(f"❌ Error: {e}")
-        log(f"✗ Error: {e}")
-        progress_bar.progress(0)
+        st.error(f"❌ Error: {e}")
+        discard_workspace(temp_path, logs)
+
+
+def discard_workspace(workspace: Path, logs: LogStore):
+    """Remove a build workspace whose build was never queued."""
+    logs.discard()
+    shutil.rmtree(workspace, ignore_errors=True)
+
+
+def finish_web_build(job: BuildJob, store: ArtifactStore):
+    """
+    Move a finished build's output to the artifact store.
+    
+    Runs on the scheduler's worker thread, whether or not any session is
+    still watching the build.
+    """
+    try:
+        output_path = job.output_path
+        if job.status == JobStatus.SUCCESS and output_path and output_path.exists():
+            # Builds with variants keep the first one
+            target = (job.config.variant_configs() or [job.config])[0]
+            artifact = store.add(output_path if target.one_file else output_path.parent, move=True)
+            job.metadata['artifact'] = artifact.token
+            job.metadata['output'] = artifact.name
+    finally:
+        workspace = job.metadata.get('workspace')
+        if workspace:
+            shutil.rmtree(workspace, ignore_errors=True)
+        job.metadata['finished'] = True
+
+
+@st.cache_resource
+def get_scheduler() -> BuildScheduler:
+    """Start the build worker pool shared by all sessions."""
+    return BuildScheduler(
+        workers=int(os.environ.get("P2E_WEB_WORKERS", "2")),
+        queue_size=int(os.environ.get("P2E_WEB_QUEUE_SIZE", "50")),
+        max_running_per_owner=int(os.environ.get("P2E_WEB_MAX_RUNNING_PER_USER", "1")),
+        max_queued_per_owner=int(os.environ.get("P2E_WEB_MAX_QUEUED_PER_USER", "3")),
+        ledger=get_ledger(),
+        source="web"
+    )
+
+
+def session_owner() -> str:
+    """Identify the current user for fair scheduling and quotas."""
+    if 'owner' not in st.session_state:
+        st.session_state.owner = uuid.uuid4().hex
+    return st.session_state.owner
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def show_builds():
+    """Poll the session's builds and show their progress."""
+    scheduler = get_scheduler()
+    for job_id in list(st.session_state.web_jobs):
+        job = scheduler.get(job_id)
+        if job is None:
+            st.session_state.web_jobs.remove(job_id)
+            continue
+        with st.container(border=True):
+            show_build(scheduler, job)
+
+
+def show_build(scheduler: BuildScheduler, job: BuildJob):
+    """Show one build's status, progress and log tail."""
+    st.markdown(f"**{job.config.exe_name}**")
+    
+    if job.status == JobStatus.QUEUED:
+        position = scheduler.position(job.id)
+        ahead = f"{position} build(s) ahead of you" if position else "next in line"
+        st.info(f"⏳ Queued: {ahead}")
+        st.progress(0)
+    elif job.status == JobStatus.RUNNING or (job.done and not job.metadata.get('finished')):
+        converter = job.converter
+        phase = converter.status if converter else None
+        stage = converter.stage if converter else None
+        label = f"PyInstaller {stage}" if stage else (phase.value.replace('_', ' ') if phase else "finishing")
+        st.info(f"🔨 Building: {label}...")
+        st.progress(STAGE_PROGRESS.get(stage) or PHASE_PROGRESS.get(phase, 95))
+    elif job.status == JobStatus.SUCCESS:
+        st.success("✅ Build completed successfully!")
+        if job.metadata.get('artifact'):
+            show_download(get_artifact_server(), job.metadata['artifact'])
+        else:
+            st.warning("⚠️ Build succeeded but output file not found")
+    else:
+        st.error(f"❌ Build {job.status.value}: {job.error or 'see log'}")
+    
+    if not job.done and st.button("Cancel", key=f"cancel_{job.id}"):
+        scheduler.cancel(job.id)
+    st.code("\n".join(job.logs.tail(LOG_TAIL_LINES)), language='text')
 
 
 if __name__ == '__main__':
@@ -40,7 +40,7 @@ setup(
         "pyinstaller>=5.0.0",
     ],
     extras_require={
-        "web": ["streamlit>=1.20.0"],
+        "web": ["streamlit>=1.37.0"],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=3.0.0",
@@ -0,0 +1,61 @@
+"""Shared fixtures for P2E tests."""
+
+from pathlib import Path
+
+import pytest
+
+from p2e.core.converter import PyConverter
+
+# Stand-in for PyInstaller: writes the requested executable (--name or every
+# EXE of the spec file, onedir EXEs in their COLLECT's folder) into --distpath
+FAKE_PYINSTALLER = '''
+import argparse, os, pathlib, re, sys
+parser = argparse.ArgumentParser()
+parser.add_argument("--distpath")
+parser.add_argument("--workpath")
+parser.add_argument("--specpath")
+parser.add_argument("--name")
+args, rest = parser.parse_known_args()
+targets = [(args.name, "")]
+if rest and rest[-1].endswith(".spec"):
+    targets, pending = [], []
+    for kind, body in re.findall(r"= (EXE|COLLECT)\\((.*?)\\n\\)", pathlib.Path(rest[-1]).read_text(), re.S):
+        name = re.search(r"name='([^']+)'", body).group(1)
+        if kind == "COLLECT":
+            targets.extend((exe, name) for exe in pending)
+            pending = []
+        elif "exclude_binaries=True" in body:
+            pending.append(name)
+        else:
+            targets.append((name, ""))
+    args.name = targets[0][0]
+if args.name == "slow":
+    import time
+    print("started", flush=True)
+    time.sleep(30)
+print("100 INFO: checking Analysis")
+pathlib.Path(args.workpath).mkdir(parents=True, exist_ok=True)
+if args.specpath:
+    pathlib.Path(args.specpath, args.name + ".spec").write_text("spec")
+for name, collect in targets:
+    folder = pathlib.Path(args.distpath, collect)
+    folder.mkdir(parents=True, exist_ok=True)
+    folder.joinpath(name + (".exe" if sys.platform == "win32" else "")).write_text(os.getcwd())
+print("400 INFO: checking EXE")
+print("fake build done")
+print("500 INFO: Build complete! The results are available in: " + args.distpath)
+'''
+
+
+@pytest.fixture
+def fake_project(tmp_path: Path, monkeypatch) -> Path:
+    """Create a script next to a fake PyInstaller package."""
+    monkeypatch.setattr(PyConverter, "check_pyinstaller", lambda self: True)
+    monkeypatch.setenv("P2E_CACHE_DIR", str(tmp_path / "p2e-cache"))
+    package = tmp_path / "PyInstaller"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "__main__.py").write_text(FAKE_PYINSTALLER)
+    script = tmp_path / "app.py"
+    script.write_text("print('hello')")
+    return script
@@ -0,0 +1,120 @@
+"""Tests for the bundle size analyzer."""
+
+import marshal
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from p2e.core.analyzer import ARCHIVE_INDEX, BOOTLOADER, COOKIE_MAGIC, analyze_bundle
+
+# Like a real bootloader, the stand-in contains the cookie magic constant
+BOOTLOADER_BYTES = b"\x7fELF" + b"\0" * 60 + COOKIE_MAGIC + b"\0" * 100
+
+
+def pyz_archive(modules):
+    """Build a PYZ archive of zlib-compressed module entries."""
+    data = bytearray(b"PYZ\0" + b"\0" * 4 + b"\0" * 4)
+    toc = []
+    for name, code in modules.items():
+        blob = zlib.compress(code)
+        toc.append((name, (0, len(data), len(blob))))
+        data += blob
+    struct.pack_into("!i", data, 8, len(data))
+    return bytes(data + marshal.dumps(toc))
+
+
+def write_executable(path, entries, trailer=b""):
+    """Write a bootloader with an appended CArchive of (name, typecode, data, compress) entries."""
+    package = bytearray()
+    toc = bytearray()
+    for name, typecode, data, compress in entries:
+        stored = zlib.compress(data) if compress else data
+        encoded = name.encode() + b"\0" * (16 - len(name) % 16)
+        toc += struct.pack("!IIIIBc", 18 + len(encoded), len(package), len(stored), len(data), int(compress),
+                           typecode.encode()) + encoded
+        package += stored
+    toc_offset = len(package)
+    package += toc
+    cookie = struct.pack("!8sIIII64s", COOKIE_MAGIC, len(package) + 88, toc_offset, len(toc), 311,
+                         b"libpython3.11.so.1.0")
+    path.write_bytes(BOOTLOADER_BYTES + package + cookie + trailer)
+
+
+def test_analyze_onefile(tmp_path):
+    """Test a onefile executable is attributed by package down to the byte."""
+    library = bytes(range(256)) * 400
+    executable = tmp_path / "app"
+    write_executable(executable, [
+        ("pyiboot01_bootstrap", "s", b"print('boot')" * 10, True),
+        ("app", "s", b"print('app')", True),
+        ("libpython3.11.so.1.0", "b", library, True),
+        ("numpy/core/_umath.cpython-311-x86_64-linux-gnu.so", "b", b"\1" * 5000, True),
+        ("numpy.libs/libopenblas.so.0", "b", b"\2" * 3000, False),
+        ("python3.11/lib-dynload/_json.cpython-311-x86_64-linux-gnu.so", "b", b"\3" * 700, True),
+        ("assets/logo.png", "x", b"\4" * 900, False),
+        ("PYZ.pyz", "z", pyz_archive({
+            "numpy": b"a" * 1000,
+            "numpy.linalg": b"b" * 2000,
+            "json.decoder": b"c" * 300,
+        }), False),
+    ], trailer=b"\0" * 64)
+
+    report = analyze_bundle(executable)
+
+    assert report.layout == "onefile"
+    assert report.python_library == "libpython3.11.so.1.0"
+    assert report.compressed == report.total_size == executable.stat().st_size
+    groups = {group.name: group for group in report.groups()}
+    assert groups["numpy"].files == 4
+    assert groups["numpy"].kinds.keys() == {"library", "extension", "module"}
+    assert groups["numpy"].size == 5000 + 3000 + 1000 + 2000
+    assert groups["json"].kinds.keys() == {"module"}
+    assert groups["_json"].kind == "extension"
+    assert groups["assets"].kind == "data"
+    assert groups["libpython3.11.so.1.0"].size == len(library)
+    assert groups[BOOTLOADER].compressed == len(BOOTLOADER_BYTES) + 64
+    assert ARCHIVE_INDEX in groups
+    assert report.top(1)[0].name in ("libpython3.11.so.1.0", "numpy")
+
+
+def test_analyze_onedir(tmp_path):
+    """Test a onedir distribution is analyzed file by file, with its executable's archive."""
+    folder = tmp_path / "dist" / "app"
+    contents = folder / "_internal"
+    (contents / "numpy" / "core").mkdir(parents=True)
+    (contents / "numpy-1.26.4.dist-info").mkdir()
+    write_executable(folder / "app", [
+        ("app", "s", b"print('app')", True),
+        ("PYZ.pyz", "z", pyz_archive({"requests": b"r" * 400}), False),
+    ])
+    with zipfile.ZipFile(contents / "base_library.zip", "w") as archive:
+        archive.writestr("encodings/__init__.pyc", b"e" * 600)
+        archive.writestr("collections/abc.pyc", b"c" * 200)
+    (contents / "libpython3.11.so.1.0").write_bytes(b"\0" * 4096)
+    (contents / "numpy" / "core" / "_umath.cpython-311-x86_64-linux-gnu.so").write_bytes(b"\0" * 2048)
+    (contents / "numpy" / "core" / "_methods.pyc").write_bytes(b"\0" * 100)
+    (contents / "numpy-1.26.4.dist-info" / "METADATA").write_bytes(b"\0" * 50)
+
+    report = analyze_bundle(folder)
+
+    assert report.layout == "onedir"
+    groups = {group.name: group for group in report.groups()}
+    assert groups["numpy"].files == 3
+    assert groups["numpy"].kind == "extension, module, data"
+    assert groups["encodings"].size == 600
+    assert groups["collections"].files == 1
+    assert groups["requests"].size == 400
+    assert groups["app"].kind == "script"
+    assert groups["libpython3.11.so.1.0"].compressed == 4096
+    assert report.compressed == sum(path.stat().st_size for path in folder.rglob("*") if path.is_file())
+
+
+def test_analyze_rejects_plain_files(tmp_path):
+    """Test files without a PyInstaller archive are rejected."""
+    plain = tmp_path / "plain.bin"
+    plain.write_bytes(COOKIE_MAGIC + b"\0" * 200)
+
+    with pytest.raises(ValueError, match="Not a PyInstaller executable"):
+        analyze_bundle(plain)
@@ -0,0 +1,176 @@
+"""Tests for artifact retention and download serving."""
+
+import os
+import time
+import urllib.error
+import urllib.request
+import zipfile
+
+import pytest
+
+from p2e.core.artifacts import ArtifactStore, archive_onedir
+from p2e.server.artifacts import create_artifact_server
+from p2e.server.files import parse_range
+
+
+def make_file(path, size):
+    """Write a file of ``size`` bytes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(i % 251 for i in range(size)))
+    return path
+
+
+def age(store, artifact, seconds):
+    """Pretend an artifact was stored ``seconds`` ago."""
+    stamp = time.time() - seconds
+    os.utime(store.root / artifact.token, (stamp, stamp))
+
+
+def test_add_file_and_onedir(tmp_path):
+    """Test files are stored as-is and folders as zip archives."""
+    store = ArtifactStore(tmp_path / "store")
+    exe = make_file(tmp_path / "dist" / "app", 1000)
+    folder = tmp_path / "dist" / "tool"
+    make_file(folder / "tool", 10)
+    make_file(folder / "_internal" / "lib.so", 20)
+
+    copied = store.add(exe)
+    zipped = store.add(folder, move=True)
+
+    assert exe.exists()
+    assert copied.size == 1000 and copied.name == "app"
+    assert zipped.name == "tool.zip"
+    with zipfile.ZipFile(zipped.path) as zf:
+        assert "tool/_internal/lib.so" in zf.namelist()
+    assert store.get(copied.token) == copied
+    assert store.get("../../etc") is None
+
+
+def test_onedir_archive_follows_rebuilds(tmp_path):
+    """Test the cached zip of a onedir folder is rebuilt once the folder changes."""
+    folder = tmp_path / "dist" / "tool"
+    make_file(folder / "tool", 10)
+
+    archive = archive_onedir(folder)
+    assert archive_onedir(folder) == archive
+    stamp = time.time() - 60
+    os.utime(archive, (stamp, stamp))
+    make_file(folder / "_internal" / "new.so", 20)
+
+    with zipfile.ZipFile(archive_onedir(folder)) as zf:
+        assert "tool/_internal/new.so" in zf.namelist()
+
+
+def test_retention_by_age_count_and_size(tmp_path):
+    """Test expired and excess artifacts are evicted oldest first."""
+    store = ArtifactStore(tmp_path / "store", max_age=60, max_count=2, max_bytes=250)
+    first = store.add(make_file(tmp_path / "a", 100))
+    age(store, first, 120)
+
+    assert store.get(first.token) is None
+
+    second = store.add(make_file(tmp_path / "b", 100))
+    age(store, second, 30)
+    third = store.add(make_file(tmp_path / "c", 100))
+    age(store, third, 20)
+    fourth = store.add(make_file(tmp_path / "d", 100))
+
+    assert [a.token for a in store.artifacts()] == [third.token, fourth.token]
+
+    big = store.add(make_file(tmp_path / "e", 200))
+    assert [a.token for a in store.artifacts()] == [big.token]
+
+
+def test_parse_range():
+    """Test the supported Range header forms."""
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+
+
+@pytest.fixture
+def artifact_server(tmp_path):
+    """Serve an artifact store on a free port."""
+    server = create_artifact_server(ArtifactStore(tmp_path / "store"), port=0)
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(url, **headers):
+    """Fetch a URL, returning status, headers and body."""
+    request = urllib.request.Request(url, headers=headers, method=headers.pop("method", "GET"))
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_download_with_ranges(tmp_path, artifact_server):
+    """Test full, partial and invalid range downloads."""
+    data = make_file(tmp_path / "app", 3 * 1024 * 1024 + 7).read_bytes()
+    artifact = artifact_server.store.add(tmp_path / "app")
+    url = artifact_server.url_for(artifact)
+
+    status, headers, body = fetch(url)
+    assert status == 200 and body == data
+    assert headers["Accept-Ranges"] == "bytes"
+
+    status, headers, body = fetch(url, Range="bytes=1048576-1048585")
+    assert status == 206 and body == data[1048576:1048586]
+    assert headers["Content-Range"] == f"bytes 1048576-1048585/{len(data)}"
+
+    status, _, body = fetch(url, Range="bytes=-7")
+    assert status == 206 and body == data[-7:]
+
+    status, headers, _ = fetch(url, Range=f"bytes={len(data)}-")
+    assert status == 416 and headers["Content-Range"] == f"bytes */{len(data)}"
+
+    status, headers, body = fetch(url, method="HEAD")
+    assert status == 200 and body == b"" and int(headers["Content-Length"]) == len(data)
+
+
+def test_unknown_artifact_is_404(tmp_path, artifact_server):
+    """Test wrong tokens and names are not served."""
+    artifact = artifact_server.store.add(make_file(tmp_path / "app", 10))
+    base = f"{artifact_server.base_url}/artifacts"
+
+    assert fetch(f"{base}/{'x' * 22}/app")[0] == 404
+    assert fetch(f"{base}/{artifact.token}/other")[0] == 404
+    assert fetch(f"{base}/{artifact.token}/app")[0] == 200
+
+
+def test_download_url_follows_request_host(tmp_path):
+    """Test links shown to remote clients use an address they can reach."""
+    store = ArtifactStore(tmp_path / "store")
+    artifact = store.add(make_file(tmp_path / "app", 10))
+
+    local = create_artifact_server(store, port=0)
+    try:
+        assert local.url_for(artifact, request_host="localhost:8501").startswith(local.base_url)
+        with pytest.raises(RuntimeError, match="P2E_ARTIFACT_URL"):
+            local.url_for(artifact, request_host="builds.example.com:8501")
+    finally:
+        local.server_close()
+
+    public = create_artifact_server(store, host="0.0.0.0", port=0)
+    try:
+        port = public.server_address[1]
+        url = public.url_for(artifact, request_host="builds.example.com:8501")
+        assert url.startswith(f"http://builds.example.com:{port}/artifacts/{artifact.token}/")
+    finally:
+        public.server_close()
+
+    proxied = create_artifact_server(store, port=0, base_url="https://example.com/dl/")
+    try:
+        url = proxied.url_for(artifact, request_host="builds.example.com")
+        assert url.startswith("https://example.com/dl/artifacts/")
+    finally:
+        proxied.server_close()
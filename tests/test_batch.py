@@ -0,0 +1,122 @@
+"""Tests for batch builds."""
+
+import json
+import sys
+
+import pytest
+
+from p2e.core.batch import BatchBuilder, JobStatus, load_manifest
+from p2e.core.config import BuildConfig
+from p2e.core.converter import PyConverter
+
+
+def test_load_manifest_applies_defaults(tmp_path):
+    """Test defaults are merged and relative paths resolved."""
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text(
+        "defaults:\n"
+        "  output_dir: out\n"
+        "  one_file: false\n"
+        "  requirements: requirements.txt\n"
+        "  wheelhouse: wheels\n"
+        "builds:\n"
+        "  - script_path: tools/a.py\n"
+        "  - script_path: tools/b.py\n"
+        "    one_file: true\n"
+    )
+
+    configs = load_manifest(manifest)
+
+    assert [c.exe_name for c in configs] == ["a", "b"]
+    assert configs[0].script_path == tmp_path / "tools" / "a.py"
+    assert configs[0].output_dir == tmp_path / "out"
+    assert configs[0].requirements == tmp_path / "requirements.txt"
+    assert configs[0].wheelhouse == tmp_path / "wheels"
+    assert configs[0].one_file is False
+    assert configs[1].one_file is True
+
+
+def test_load_manifest_json_list(tmp_path):
+    """Test a plain JSON list of configs."""
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps([{"script_path": "a.py", "exe_name": "First"}]))
+
+    configs = load_manifest(manifest)
+
+    assert configs[0].exe_name == "First"
+
+
+def test_duplicate_outputs_rejected(tmp_path):
+    """Test two builds cannot write the same executable."""
+    configs = [
+        BuildConfig(script_path=tmp_path / "a" / "app.py", output_dir=tmp_path / "dist"),
+        BuildConfig(script_path=tmp_path / "b" / "app.py", output_dir=tmp_path / "dist"),
+    ]
+
+    with pytest.raises(ValueError, match="Duplicate build output"):
+        BatchBuilder(configs)
+
+
+def test_keep_going_runs_every_job(tmp_path, monkeypatch):
+    """Test keep-going mode reports every failure."""
+    monkeypatch.setattr(PyConverter, "ensure_pyinstaller", lambda self: True)
+    configs = [BuildConfig(script_path=tmp_path / f"missing{i}.py") for i in range(3)]
+
+    result = BatchBuilder(configs, jobs=2).run()
+
+    assert [job.status for job in result.jobs] == [JobStatus.FAILED] * 3
+    assert "Script file not found" in result.jobs[0].error
+    assert result.jobs[0].error == result.jobs[0].result.error
+    assert not result.success
+
+
+def test_fail_fast_skips_remaining_jobs(tmp_path, monkeypatch):
+    """Test fail-fast mode stops scheduling after a failure."""
+    monkeypatch.setattr(PyConverter, "ensure_pyinstaller", lambda self: True)
+    configs = [BuildConfig(script_path=tmp_path / f"missing{i}.py") for i in range(3)]
+    seen = []
+
+    result = BatchBuilder(
+        configs, jobs=1, fail_fast=True, status_callback=lambda job: seen.append(job.status)
+    ).run()
+
+    assert result.jobs[0].status == JobStatus.FAILED
+    assert len(result.skipped) == 2
+    assert seen[:2] == [JobStatus.RUNNING, JobStatus.FAILED]
+
+
+def test_pyinstaller_checked_once(tmp_path, monkeypatch):
+    """Test the dependency check runs once per batch, not once per job."""
+    calls = []
+    monkeypatch.setattr(PyConverter, "ensure_pyinstaller", lambda self: calls.append(1) or False)
+    configs = [BuildConfig(script_path=tmp_path / f"app{i}.py") for i in range(3)]
+
+    result = BatchBuilder(configs, jobs=2).run()
+
+    assert len(calls) == 1
+    assert len(result.failed) == 3
+
+
+def test_pyinstaller_checked_per_interpreter(tmp_path, monkeypatch):
+    """Test only the jobs of an interpreter without PyInstaller fail the check."""
+    checked = []
+
+    def ensure(self):
+        checked.append(self.python)
+        return self.python == sys.executable
+
+    monkeypatch.setattr(PyConverter, "ensure_pyinstaller", ensure)
+    other = str(tmp_path / "other" / "python")
+    configs = [
+        BuildConfig(script_path=tmp_path / "missing0.py"),
+        BuildConfig(script_path=tmp_path / "missing1.py", python=other),
+        BuildConfig(script_path=tmp_path / "missing2.py", python=sys.executable),
+    ]
+
+    result = BatchBuilder(configs, jobs=2).run()
+
+    assert sorted(checked) == sorted([sys.executable, other])
+    assert result.jobs[1].error == f"PyInstaller is not available for {other}"
+    # The other jobs ran and failed in their own build
+    assert "Script file not found" in result.jobs[0].error
+    assert "Script file not found" in result.jobs[2].error
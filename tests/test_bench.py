@@ -0,0 +1,85 @@
+"""Tests for executable startup benchmarks."""
+
+import sys
+import textwrap
+
+import pytest
+
+from p2e.core.bench import append_history, bench_startup, find_executable, load_history
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="fake executables are shebang scripts")
+
+# Stand-in for a onefile executable: unpacks into $TMPDIR/_MEI*, then prints
+FAKE_ONEFILE = f"""#!{sys.executable}
+import os, sys, tempfile, time
+folder = tempfile.mkdtemp(prefix="_MEI")
+with open(os.path.join(folder, "libpython.so"), "wb") as f:
+    f.write(b"\\0" * 100000)
+time.sleep(0.05)
+print("ready", sys.argv[1:])
+time.sleep(0.05)
+"""
+
+
+def make_executable(path, source):
+    path.write_text(textwrap.dedent(source))
+    path.chmod(0o755)
+    return path
+
+
+def test_bench_onefile(tmp_path):
+    """Test cold and warm runs are timed, including onefile extraction."""
+    executable = make_executable(tmp_path / "app", FAKE_ONEFILE)
+    finished = []
+
+    report = bench_startup(executable, args=["--version"], runs=3, cold_runs=2, warmup=1, progress=finished.append)
+
+    assert len(finished) == len(report.runs) == 3 + (2 if report.evicted else 1)
+    assert report.layout == "onefile"
+    assert report.failures == 0
+    for run in report.runs:
+        assert 0 <= run.extraction < run.first_output <= run.wall
+        assert run.first_output >= 0.05
+    summary = report.summary()
+    assert set(summary) == {"cold", "warm"}
+    assert set(summary["warm"]) == {"wall", "first_output", "extraction"}
+    assert summary["warm"]["wall"]["p50"] <= summary["warm"]["wall"]["p95"]
+
+
+def test_bench_onedir_folder(tmp_path):
+    """Test a onedir folder resolves to its executable and has no extraction."""
+    folder = tmp_path / "app"
+    (folder / "_internal").mkdir(parents=True)
+    (folder / "_internal" / "base_library.zip").write_bytes(b"")
+    make_executable(folder / "app", f"#!{sys.executable}\nimport sys\nsys.exit(3)\n")
+
+    report = bench_startup(folder, runs=2, cold_runs=1, warmup=0)
+
+    assert find_executable(folder) == folder / "app"
+    assert report.layout == "onedir"
+    assert report.failures == len(report.runs)
+    assert all(run.first_output is None and run.extraction is None for run in report.runs)
+
+
+def test_bench_timeout(tmp_path):
+    """Test a hanging executable is killed."""
+    executable = make_executable(tmp_path / "app", f"#!{sys.executable}\nimport time\ntime.sleep(30)\n")
+
+    with pytest.raises(RuntimeError, match="did not exit"):
+        bench_startup(executable, runs=1, cold_runs=0, warmup=0, timeout=0.5)
+
+
+def test_history_appends(tmp_path):
+    """Test results accumulate in a JSON history."""
+    executable = make_executable(tmp_path / "app", f"#!{sys.executable}\nprint('hi')\n")
+    history = tmp_path / "history" / "startup.json"
+
+    first = bench_startup(executable, runs=1, cold_runs=0, warmup=0, label="v1")
+    second = bench_startup(executable, runs=1, cold_runs=0, warmup=0, label="v2")
+
+    assert append_history(first, history) is None
+    previous = append_history(second, history)
+    assert previous["label"] == "v1"
+    entries = load_history(history)
+    assert [entry["label"] for entry in entries] == ["v1", "v2"]
+    assert entries[1]["summary"]["warm"]["wall"]["p50"] > 0
@@ -0,0 +1,223 @@
+"""Tests for the build cache."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from p2e.core.cache import (
+    BuildCache,
+    artifact_path,
+    incremental_work_dir,
+    module_closure,
+    prune_work_dirs,
+)
+from p2e.core.config import BuildConfig
+from p2e.core.venvs import MARKER_NAME, env_key
+
+
+def make_config(tmp_path, **kwargs):
+    """Create a config for a small script."""
+    script = tmp_path / "app.py"
+    if not script.exists():
+        script.write_text("import helper\nprint(helper.VALUE)")
+        (tmp_path / "helper.py").write_text("VALUE = 1")
+    return BuildConfig(script_path=script, **kwargs)
+
+
+def test_cache_key_is_stable(tmp_path):
+    """Test identical inputs produce identical keys."""
+    cache = BuildCache(tmp_path / "cache")
+
+    assert cache.compute_key(make_config(tmp_path)) == cache.compute_key(make_config(tmp_path))
+
+
+def test_cache_key_ignores_output_dir(tmp_path):
+    """Test the output location does not affect the key."""
+    cache = BuildCache(tmp_path / "cache")
+
+    key_a = cache.compute_key(make_config(tmp_path, output_dir=tmp_path / "a"))
+    key_b = cache.compute_key(make_config(tmp_path, output_dir=tmp_path / "b"))
+
+    assert key_a == key_b
+
+
+def test_cache_key_tracks_inputs(tmp_path):
+    """Test config, local imports and data files change the key."""
+    cache = BuildCache(tmp_path / "cache")
+    data = tmp_path / "data.txt"
+    data.write_text("one")
+    config = make_config(tmp_path, additional_files=[(str(data), "data.txt")])
+    key = cache.compute_key(config)
+
+    assert cache.compute_key(make_config(tmp_path, one_file=False)) != key
+
+    data.write_text("two")
+    assert cache.compute_key(config) != key
+
+    key = cache.compute_key(config)
+    (tmp_path / "helper.py").write_text("VALUE = 2")
+    assert cache.compute_key(config) != key
+
+
+def test_cache_key_tracks_requirements(tmp_path):
+    """Test the requirements of a pooled build environment change the key."""
+    cache = BuildCache(tmp_path / "cache")
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("six==1.16.0\n")
+    config = make_config(tmp_path, requirements=requirements)
+    key = cache.compute_key(config)
+
+    assert cache.compute_key(make_config(tmp_path)) != key
+    requirements.write_text("# pinned\nsix==1.16.0\n")
+    assert cache.compute_key(config) == key
+    requirements.write_text("six==1.17.0\n")
+    assert cache.compute_key(config) != key
+
+
+def install_fake_dist(site_packages, version, name="fakedist"):
+    """Install metadata of a fake distribution into a site-packages folder."""
+    for stale in site_packages.glob(f"{name}-*.dist-info"):
+        for path in stale.iterdir():
+            path.unlink()
+        stale.rmdir()
+    info = site_packages / f"{name}-{version}.dist-info"
+    info.mkdir()
+    (info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n")
+    (info / "top_level.txt").write_text(f"{name}\n")
+
+
+def make_venv(path):
+    """Create a bare virtual environment, returning its interpreter and site-packages."""
+    subprocess.run([sys.executable, "-m", "venv", "--without-pip", str(path)], check=True)
+    python = path / ("Scripts/python.exe" if sys.platform == "win32" else "bin/python")
+    site_packages = Path(subprocess.run(
+        [str(python), "-c", "import sysconfig; print(sysconfig.get_paths()['purelib'])"],
+        capture_output=True, text=True, check=True
+    ).stdout.strip())
+    return python, site_packages
+
+
+def test_cache_key_tracks_packages_of_build_interpreter(tmp_path):
+    """Test installed packages are looked up in the configured interpreter."""
+    python, site_packages = make_venv(tmp_path / "venv")
+    install_fake_dist(site_packages, "1.0")
+    script = tmp_path / "app.py"
+    script.write_text("import fakedist")
+    config = BuildConfig(script_path=script, python=python)
+    cache = BuildCache(tmp_path / "cache")
+
+    key = cache.compute_key(config)
+    assert module_closure(script, str(python))["fakedist"] == "fakedist==1.0"
+    # This interpreter does not have the package at all
+    assert module_closure(script)["fakedist"] == "missing"
+
+    install_fake_dist(site_packages, "2.0")
+    assert cache.compute_key(config) != key
+
+
+def test_cache_key_tracks_pooled_environment(tmp_path):
+    """Test the toolchain installed in an existing pooled environment changes the key."""
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("six\n")
+    config = make_config(tmp_path, requirements=requirements, cache_dir=tmp_path / "cache")
+    cache = BuildCache(tmp_path / "cache")
+    key = cache.compute_key(config)
+
+    # Create the environment the pool would use for these requirements
+    path = tmp_path / "cache" / "venvs" / env_key(requirements)[:16]
+    _, site_packages = make_venv(path)
+    install_fake_dist(site_packages, "6.0.0", name="pyinstaller")
+    (path / MARKER_NAME).write_text(json.dumps({'key': env_key(requirements), 'base_python': sys.executable}))
+    with_env = cache.compute_key(config)
+    assert with_env != key
+
+    # A loose pin later resolving to a newer PyInstaller is a different toolchain
+    install_fake_dist(site_packages, "6.1.0", name="pyinstaller")
+    assert cache.compute_key(config) != with_env
+
+
+def test_module_closure_follows_local_imports(tmp_path):
+    """Test local modules are followed and third-party ones recorded."""
+    script = tmp_path / "app.py"
+    script.write_text("import helper\nimport json\nimport not_installed_module_xyz")
+    (tmp_path / "helper.py").write_text("from pkg import sub")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "sub.py").write_text("X = 1")
+
+    closure = module_closure(script)
+
+    assert {"app.py", "helper.py", "pkg/__init__.py", "pkg/sub.py"} <= set(closure)
+    assert closure["not_installed_module_xyz"] == "missing"
+    assert "json" not in closure
+
+
+def test_store_and_restore_onefile(tmp_path):
+    """Test a stored artifact is restored into a new output dir."""
+    cache = BuildCache(tmp_path / "cache")
+    config = make_config(tmp_path, output_dir=tmp_path / "dist")
+    built = artifact_path(config)
+    built.parent.mkdir()
+    built.write_bytes(b"binary")
+    key = cache.compute_key(config)
+
+    assert cache.restore(key, config) is None
+    cache.store(key, config)
+
+    other = make_config(tmp_path, output_dir=tmp_path / "other")
+    restored = cache.restore(key, other)
+
+    assert restored == artifact_path(other)
+    assert restored.read_bytes() == b"binary"
+
+
+def test_store_and_restore_onedir(tmp_path):
+    """Test onedir distributions are restored as whole folders."""
+    cache = BuildCache(tmp_path / "cache")
+    config = make_config(tmp_path, output_dir=tmp_path / "dist", one_file=False)
+    dist = artifact_path(config)
+    (dist / "_internal").mkdir(parents=True)
+    (dist / "app").write_bytes(b"exe")
+    (dist / "_internal" / "lib.so").write_bytes(b"lib")
+    key = cache.compute_key(config)
+    cache.store(key, config)
+
+    other = make_config(tmp_path, output_dir=tmp_path / "other", one_file=False)
+    restored = cache.restore(key, other)
+
+    assert (restored / "_internal" / "lib.so").read_bytes() == b"lib"
+    assert cache.clear() == 1
+    assert cache.restore(key, other) is None
+
+
+def test_incremental_work_dir_keyed_by_config(tmp_path):
+    """Test the work dir is stable per config and changes with it."""
+    config = make_config(tmp_path, cache_dir=tmp_path / "cache")
+    work_dir = incremental_work_dir(config)
+
+    assert work_dir == incremental_work_dir(make_config(tmp_path, cache_dir=tmp_path / "cache"))
+    assert work_dir.name.startswith("app-")
+    assert work_dir != incremental_work_dir(
+        make_config(tmp_path, cache_dir=tmp_path / "cache", one_file=False)
+    )
+
+
+def test_prune_work_dirs_keeps_recent(tmp_path):
+    """Test stale work dirs of the same executable are pruned."""
+    work = tmp_path / "work"
+    dirs = []
+    for i in range(5):
+        path = work / f"app-{i:016x}"
+        path.mkdir(parents=True)
+        os.utime(path, (i, i))
+        dirs.append(path)
+    other = work / "other-0000000000000000"
+    other.mkdir()
+
+    removed = prune_work_dirs(dirs[0], keep=3)
+
+    assert sorted(removed) == dirs[1:3]
+    assert dirs[0].exists() and dirs[3].exists() and dirs[4].exists()
+    assert other.exists()
@@ -0,0 +1,76 @@
+"""Tests for the start-up cost of the CLI."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import p2e
+
+# Modules "p2e --version" must not load
+HEAVY_MODULES = ("p2e.core.converter", "p2e.core.config", "yaml", "asyncio", "rich.console", "rich.table")
+
+# Importing the CLI (on top of Click) may take at most as long as importing
+# Click itself; relative, so it holds on slow machines too
+IMPORT_BUDGET = 1.0
+
+RUN_VERSION = """
+import sys
+sys.argv = ["p2e", "--version"]
+from p2e.cli.app import cli
+try:
+    cli()
+except SystemExit:
+    pass
+print(" ".join(sorted(sys.modules)), file=sys.stderr)
+"""
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    """Run code in a fresh interpreter that imports this checkout of p2e."""
+    env = dict(os.environ, PYTHONPATH=str(Path(p2e.__file__).parents[1]))
+    return subprocess.run(
+        [sys.executable, *options, "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+
+
+def import_times(stderr: str) -> dict:
+    """Parse cumulative microseconds per module from -X importtime output."""
+    times = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_version_skips_heavy_imports():
+    """Test p2e --version prints the version without loading the build machinery."""
+    result = run_python(RUN_VERSION)
+
+    assert p2e.__version__ in result.stdout
+    loaded = set(result.stderr.split())
+    assert not loaded & set(HEAVY_MODULES)
+
+
+def test_version_import_time_budget():
+    """Test importing the CLI stays within its budget relative to Click."""
+    ratios = []
+    for _ in range(3):
+        times = import_times(run_python("import click\nimport p2e.cli.app", "-X", "importtime").stderr)
+        ratios.append(times["p2e.cli"] / times["click"])
+    assert min(ratios) < IMPORT_BUDGET, f"p2e.cli imports in {min(ratios):.1f}x Click's import time"
+
+
+def test_lazy_package_attributes():
+    """Test the package exposes PyConverter and BuildConfig on first access."""
+    result = run_python(
+        "import sys, p2e\n"
+        "assert 'p2e.core.converter' not in sys.modules\n"
+        "from p2e import PyConverter, BuildConfig\n"
+        "from p2e.core import BatchBuilder\n"
+        "print(PyConverter.__module__, BuildConfig.__module__, 'BuildConfig' in dir(p2e))"
+    )
+
+    assert result.stdout.split() == ["p2e.core.converter", "p2e.core.config", "True"]
@@ -7,7 +7,7 @@ from pathlib import Path
 import pytest
 import yaml
 
-from p2e.core.config import BuildConfig
+from p2e.core.config import BuildConfig, parse_variant
 
 
 def test_build_config_defaults(tmp_path):
@@ -145,3 +145,75 @@ def test_build_config_windowed_mode(tmp_path):
     # windowed=True should set console_mode=False
     assert config.windowed is True
     assert config.console_mode is False
+
+
+def test_build_config_variants(tmp_path):
+    """Test variants override packaging settings and get their own names."""
+    script = tmp_path / "tool.py"
+    script.write_text("print('hello')")
+
+    config = BuildConfig(
+        script_path=script,
+        windowed=True,
+        variants=[
+            {"name": "gui"},
+            parse_variant("cli:windowed=false,one_file=false"),
+            parse_variant("debug:debug=true,exe_name=tool-dbg"),
+        ]
+    )
+
+    assert config.validate()
+    gui, cli, debug = config.variant_configs()
+    assert (gui.exe_name, gui.console_mode) == ("tool-gui", False)
+    assert (cli.exe_name, cli.one_file, cli.console_mode) == ("tool-cli", False, True)
+    assert (debug.exe_name, debug.debug) == ("tool-dbg", True)
+    assert all(variant.variants == [] for variant in (gui, cli, debug))
+
+    with pytest.raises(ValueError, match="cannot override hidden_imports"):
+        BuildConfig(script_path=script, variants=[{"name": "x", "hidden_imports": ["csv"]}]).validate()
+    with pytest.raises(ValueError, match="unique name"):
+        BuildConfig(script_path=script, variants=[{"name": "x"}, {"name": "x"}]).validate()
+    with pytest.raises(ValueError, match="key=value"):
+        parse_variant("x:one_file")
+
+
+def test_build_config_entry_points(tmp_path):
+    """Test entry points need a onedir build and distinct executable names."""
+    script = tmp_path / "suite.py"
+    script.write_text("print('hello')")
+    (tmp_path / "tools").mkdir()
+    (tmp_path / "tools" / "convert.py").write_text("print('convert')")
+    (tmp_path / "suite2.py").write_text("print('again')")
+
+    config = BuildConfig(script_path=script, one_file=False, entry_points=["tools/convert.py"])
+    assert config.validate()
+
+    with pytest.raises(ValueError, match="onedir"):
+        BuildConfig(script_path=script, entry_points=["tools/convert.py"]).validate()
+    with pytest.raises(ValueError, match="clashes"):
+        BuildConfig(script_path=script, one_file=False, exe_name="convert",
+                    entry_points=["tools/convert.py"]).validate()
+    with pytest.raises(ValueError, match="existing .py file"):
+        BuildConfig(script_path=script, one_file=False, entry_points=["missing.py"]).validate()
+
+
+def test_build_config_resolves_environment_paths(tmp_path, monkeypatch):
+    """Test relative requirements, wheelhouse and trace profile paths are resolved once against the cwd."""
+    (tmp_path / "sub").mkdir()
+    script = tmp_path / "sub" / "app.py"
+    script.write_text("print('hello')")
+    (tmp_path / "sub" / "req.txt").write_text("six\n")
+    (tmp_path / "sub" / "profile.json").write_text("{}")
+    monkeypatch.chdir(tmp_path)
+
+    config = BuildConfig(
+        script_path=Path("sub/app.py"),
+        requirements="sub/req.txt",
+        wheelhouse="wheels",
+        trace_profile="sub/profile.json"
+    )
+
+    assert config.requirements == tmp_path / "sub" / "req.txt"
+    assert config.wheelhouse == tmp_path / "wheels"
+    assert config.trace_profile == tmp_path / "sub" / "profile.json"
+    assert config.validate()
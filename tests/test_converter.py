@@ -0,0 +1,334 @@
+"""Tests for PyConverter."""
+
+import asyncio
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from p2e.core.cache import incremental_work_dir
+from p2e.core.config import BuildConfig
+from p2e.core.converter import BuildStatus, PyConverter
+from p2e.core.probe import PyInstallerInfo, features_for
+from p2e.core.spec import BuildSpec, SpecTarget, prune_specs
+from p2e.utils.locks import FileLock
+
+
+def test_build_command_uses_private_work_dir(tmp_path):
+    """Test the work path points at the build's own directory."""
+    script = tmp_path / "app.py"
+    script.write_text("print('hello')")
+    (tmp_path / "data.txt").write_text("data")
+    config = BuildConfig(
+        script_path=script,
+        additional_files=[("data.txt", "data.txt")],
+        cache_dir=tmp_path / "cache",
+        extra_args=["--add-binary", "lib.so:."]
+    )
+    converter = PyConverter(config, log_callback=lambda _: None)
+
+    work_dir = converter.prepare_work_dir()
+    cmd = converter.build_command()
+    converter.cleanup_build_artifacts()
+
+    # --add-binary is not allowed with a spec file, so every option is an argument
+    assert converter.spec_path is None
+    assert cmd[cmd.index("--workpath") + 1] == str(work_dir / "build")
+    assert cmd[cmd.index("--specpath") + 1] == str(work_dir)
+    assert cmd[cmd.index("--add-data") + 1].startswith(str(tmp_path / "data.txt"))
+    assert cmd[-1] == str(script.absolute())
+    assert not work_dir.exists()
+
+
+def test_options_are_checked_against_pyinstaller_version(tmp_path, monkeypatch):
+    """Test options the installed PyInstaller lacks are rejected before building."""
+    script = tmp_path / "app.py"
+    script.write_text("print('hello')")
+    config = BuildConfig(script_path=script, python_options=["u"], extra_args=["--add-binary", "lib.so:."])
+    version = "5.13.2"
+    monkeypatch.setattr(
+        "p2e.core.converter.probe_pyinstaller",
+        lambda python=None: PyInstallerInfo(str(python), True, version, features_for(version))
+    )
+
+    with pytest.raises(ValueError, match="--python-option"):
+        PyConverter(config, log_callback=lambda _: None).build_command()
+
+    version = "6.3.0"
+    cmd = PyConverter(config, log_callback=lambda _: None).build_command()
+    assert cmd[cmd.index("--python-option") + 1] == "u"
+
+
+def test_build_command_uses_spec_file(tmp_path):
+    """Test settings go into a cached spec file instead of the command line."""
+    script = tmp_path / "app.py"
+    script.write_text("print('hello')")
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    files = []
+    for index in range(3000):
+        (assets / f"{index}.png").write_bytes(b"")
+        files.append((f"assets/{index}.png", "assets"))
+    config = BuildConfig(
+        script_path=script,
+        additional_files=files + [("app.py", ".")],
+        hidden_imports=["csv"],
+        python_options=["u"],
+        cache_dir=tmp_path / "cache",
+        extra_args=["--log-level=WARN"]
+    )
+    converter = PyConverter(config, log_callback=lambda _: None)
+
+    cmd = converter.build_command()
+    spec = converter.build_spec()
+
+    assert cmd[-1] == str(converter.spec_path)
+    assert "--add-data" not in cmd and "--log-level=WARN" in cmd
+    assert converter.spec_path.parent.parent == tmp_path / "cache" / "specs"
+    assert converter.spec_path.name == "app.spec"
+    assert spec.datas == [(str(assets / "*"), "assets"), (str(script.absolute()), ".")]
+    text = converter.spec_path.read_text()
+    assert "hiddenimports=[\n        'csv',\n    ]" in text
+    assert "[('u', None, 'OPTION')]" in text
+    compile(text, str(converter.spec_path), "exec")
+
+    # An unchanged configuration reuses the spec; a changed one gets its
+    # own, under the same name so PyInstaller's work folder stays the same
+    assert PyConverter(config, log_callback=lambda _: None).build_command()[-1] == cmd[-1]
+    (assets / "extra.txt").write_text("not configured")
+    changed = PyConverter(config, log_callback=lambda _: None)
+    changed.build_command()
+    assert changed.spec_path != converter.spec_path
+    assert changed.spec_path.name == converter.spec_path.name
+
+
+def test_spec_files_are_pruned_per_executable(tmp_path):
+    """Test only the most recent spec files of an executable are kept."""
+    paths = []
+    for index in range(3):
+        path = BuildSpec(script=f"app{index}.py", targets=[SpecTarget(name="app")]).write(tmp_path)
+        os.utime(path, (index, index))
+        paths.append(path)
+    other = BuildSpec(script="tool.py", targets=[SpecTarget(name="tool")]).write(tmp_path)
+
+    assert prune_specs(paths[-1], keep=2) == [paths[0]]
+    assert [path.exists() for path in paths] == [False, True, True]
+    assert not paths[0].parent.exists()
+    assert other.exists()
+
+
+def test_variants_share_one_analysis(tmp_path, fake_project):
+    """Test variants are packaged from one spec file in a single build."""
+    config = BuildConfig(
+        script_path=fake_project,
+        output_dir=tmp_path / "dist",
+        use_cache=True,
+        variants=[{"name": "onefile"}, {"name": "onedir", "one_file": False, "debug": True}]
+    )
+    converter = PyConverter(config, log_callback=lambda _: None)
+
+    result = converter.build()
+
+    assert result.success
+    text = converter.spec_path.read_text()
+    assert text.count("Analysis(") == 1 and text.count("EXE(") == 2
+    assert "coll_1 = COLLECT(" in text and "debug=True" in text
+    onefile, onedir = result.output_paths
+    assert (onefile.parent, onefile.stem) == (tmp_path / "dist", "app-onefile") and onefile.is_file()
+    assert (onedir.parent, onedir.stem) == (tmp_path / "dist" / "app-onedir", "app-onedir") and onedir.is_file()
+    assert result.output_path == onefile
+
+    # Every variant was cached, so the next build restores them all
+    for path in result.output_paths:
+        path.unlink()
+    again = PyConverter(config, log_callback=lambda _: None).build()
+    assert again.cache_hit and all(path.is_file() for path in again.output_paths)
+
+
+def test_entry_points_share_one_distribution(tmp_path, fake_project):
+    """Test entry points become executables of one onedir distribution."""
+    (tmp_path / "convert.py").write_text("import json\nprint('convert')")
+    (tmp_path / "report.py").write_text("print('report')")
+    config = BuildConfig(
+        script_path=fake_project,
+        output_dir=tmp_path / "dist",
+        one_file=False,
+        exe_name="suite",
+        use_cache=True,
+        entry_points=["convert.py", str(tmp_path / "report.py")]
+    )
+    converter = PyConverter(config, log_callback=lambda _: None)
+
+    result = converter.build()
+
+    assert result.success
+    text = converter.spec_path.read_text()
+    assert text.count("Analysis(") == 1 and text.count("EXE(") == 3 and text.count("COLLECT(") == 1
+    assert f"entry({str(tmp_path / 'convert.py')!r})" in text
+    folder = tmp_path / "dist" / "suite"
+    assert [(path.parent, path.stem) for path in result.output_paths] == [
+        (folder, "suite"), (folder, "convert"), (folder, "report")
+    ]
+    assert all(path.is_file() for path in result.output_paths)
+
+    # Changing an entry point's script invalidates the cached distribution
+    cache = converter._cache
+    key = cache.compute_key(config)
+    (tmp_path / "report.py").write_text("print('report v2')")
+    assert cache.compute_key(config) != key
+
+
+def test_build_does_not_change_cwd(tmp_path, fake_project):
+    """Test the build runs in the script directory without os.chdir."""
+    script = fake_project
+    cwd = os.getcwd()
+
+    converter = PyConverter(BuildConfig(script_path=script), log_callback=lambda _: None)
+
+    assert converter.build()
+    assert os.getcwd() == cwd
+    assert converter.get_output_path().read_text() == str(tmp_path)
+    assert not converter.work_dir.exists()
+
+
+def test_build_again_after_stop(tmp_path, fake_project):
+    """Test a converter that was stopped can run later builds."""
+    converter = PyConverter(BuildConfig(script_path=fake_project), log_callback=lambda _: None)
+    converter.stop()
+
+    assert converter.build()
+    assert converter.build()
+
+
+def test_concurrent_builds_in_threads(tmp_path, fake_project):
+    """Test several converters can build at once in one process."""
+    script = fake_project
+    converters = [
+        PyConverter(BuildConfig(script_path=script, exe_name=f"app{i}"), log_callback=lambda _: None)
+        for i in range(4)
+    ]
+    results = {}
+
+    def run(converter):
+        results[converter.config.exe_name] = converter.build()
+
+    threads = [threading.Thread(target=run, args=(c,)) for c in converters]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(results.values()) and len(results) == 4
+    assert len({c.work_dir for c in converters}) == 4
+    assert all(c.get_output_path().exists() for c in converters)
+    assert not (tmp_path / "build").exists()
+
+
+def test_incremental_build_reuses_work_dir(tmp_path, fake_project):
+    """Test incremental builds keep one persistent work dir per config."""
+    script = fake_project
+    config = BuildConfig(script_path=script, incremental=True, cache_dir=tmp_path / "cache")
+
+    first = PyConverter(config, log_callback=lambda _: None)
+    assert first.build()
+    assert "--clean" not in first.build_command()
+
+    second = PyConverter(config, log_callback=lambda _: None)
+    assert second.build()
+
+    assert first.work_dir == second.work_dir
+    assert (second.work_dir / "build").exists()
+    assert second.work_dir.parent == tmp_path / "cache" / "work"
+
+
+def test_build_async_streams_logs(tmp_path, fake_project):
+    """Test the async build yields log lines and returns a result."""
+    script = fake_project
+    converter = PyConverter(BuildConfig(script_path=script), log_callback=lambda _: None)
+
+    async def run():
+        build = converter.build_async()
+        lines = [line async for line in build]
+        return lines, await build
+
+    lines, result = asyncio.run(run())
+
+    assert "fake build done" in lines
+    assert result.success and result
+    assert result.output_path == converter.get_output_path()
+    assert result.status == BuildStatus.COMPLETE
+
+
+def test_build_async_cancellation_stops_process(tmp_path, fake_project):
+    """Test cancelling the awaiting task terminates PyInstaller."""
+    script = fake_project
+    converter = PyConverter(
+        BuildConfig(script_path=script, exe_name="slow"), log_callback=lambda _: None
+    )
+
+    async def run():
+        build = converter.build_async()
+        async for line in build:
+            if line == "started":
+                break
+        task = asyncio.ensure_future(build.result())
+        await asyncio.sleep(0)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(asyncio.wait_for(run(), timeout=20)) is True
+    assert converter.status == BuildStatus.FAILED
+    assert converter.async_process is None
+    assert not converter.work_dir.exists()
+
+
+def test_build_async_cancelled_while_waiting_for_work_dir(tmp_path, fake_project):
+    """Test a build cancelled while its work dir is locked never takes the lock."""
+    config = BuildConfig(script_path=fake_project, incremental=True, cache_dir=tmp_path / "cache")
+    lock_path = incremental_work_dir(config) / ".lock"
+    holder = FileLock(lock_path)
+    holder.acquire()
+    converter = PyConverter(config, log_callback=lambda _: None)
+
+    async def run():
+        task = asyncio.ensure_future(converter.build_async().result())
+        while converter.status != BuildStatus.BUILDING:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(run(), timeout=20))
+    holder.release()
+
+    # Nothing acquires the lock behind our back once it is free
+    time.sleep(0.3)
+    lock = FileLock(lock_path, timeout=1)
+    lock.acquire()
+    lock.release()
+    assert converter.status == BuildStatus.FAILED
+
+
+def test_build_result_records_timings(tmp_path, fake_project):
+    """Test the build result carries phase timings and output details."""
+    config = BuildConfig(script_path=fake_project, output_dir=tmp_path / "dist")
+    result = PyConverter(config).build()
+
+    assert result.success
+    assert result.status == BuildStatus.COMPLETE
+    assert {"building", "cleaning", "verifying"} <= set(result.phases)
+    assert result.stages == pytest.approx({"Analysis": 0.3, "EXE": 0.1})
+    assert result.output_size == result.output_path.stat().st_size
+
+    report = tmp_path / "report.json"
+    result.save_json(report)
+    data = json.loads(report.read_text())
+    assert data["status"] == "complete"
+    assert data["phases"] == result.phases
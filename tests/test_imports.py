@@ -0,0 +1,118 @@
+"""Tests for the static import scanner."""
+
+from p2e.core import imports as imports_module
+from p2e.core.config import BuildConfig
+from p2e.core.converter import PyConverter
+from p2e.core.imports import ImportScanner, scan_source
+from p2e.utils.modules import resolve_local_module
+
+
+def test_scan_source_dynamic_patterns():
+    """Test literal, relative, computed and pkgutil imports are found."""
+    scan = scan_source(b'''
+import importlib, pkgutil
+import app.plugins as plugins
+from importlib import import_module
+import_module("app.extra")
+importlib.import_module(".helpers", package="app")
+__import__("json")
+import_module(f"app.handlers.{name}")
+import_module("app.codecs." + name)
+import_module("." + name, __package__)
+for info in pkgutil.iter_modules(plugins.__path__):
+    pass
+import_module(name)
+''')
+
+    assert ("app.plugins", 0) in scan.imports
+    assert scan.dynamic == [("app.extra", 0), ("app.helpers", 0), ("json", 0)]
+    assert scan.plugins == [("app.handlers", 0), ("app.codecs", 0), ("", 1), ("app.plugins", 0)]
+    assert scan.unresolved == [13]
+
+
+def test_scan_source_ignores_syntax_errors():
+    """Test unparsable files yield an empty scan."""
+    scan = scan_source(b"def broken(:\n")
+    assert not scan.imports and not scan.dynamic
+
+
+def make_project(root, plugins=3):
+    """Create a project loading plugins by name."""
+    package = root / "app"
+    (package / "plugins").mkdir(parents=True)
+    (package / "__init__.py").write_text('"""App."""\n')
+    (package / "plugins" / "__init__.py").write_text('"""Plugins."""\n')
+    for i in range(plugins):
+        (package / "plugins" / f"p{i}.py").write_text(f"import importlib\nimportlib.import_module('app.dep{i}')\n")
+        (package / f"dep{i}.py").write_text(f"VALUE = {i}\n")
+    (package / "loader.py").write_text(
+        "import importlib\n"
+        "def load(name):\n"
+        "    return importlib.import_module(f'app.plugins.{name}')\n"
+    )
+    script = root / "main.py"
+    script.write_text("import json\nfrom app import loader\n__import__('json')\n")
+    return script
+
+
+def test_scan_follows_plugins_and_caches(tmp_path):
+    """Test plugin submodules are proposed and followed, and rescans hit the cache."""
+    script = make_project(tmp_path / "project")
+    scanner = ImportScanner(tmp_path / "imports.sqlite3", workers=1)
+
+    report = scanner.scan(script)
+
+    assert report.hidden_imports == [
+        "app.dep0", "app.dep1", "app.dep2", "app.plugins.p0", "app.plugins.p1", "app.plugins.p2"
+    ]
+    assert report.plugin_packages == ["app.plugins"]
+    assert report.cache_hits == 0
+    assert report.files_scanned == 10
+
+    again = scanner.scan(script)
+    assert again.hidden_imports == report.hidden_imports
+    assert again.cache_hits == again.files_scanned
+
+
+def test_parallel_scan_matches_serial(tmp_path, monkeypatch):
+    """Test parsing on a process pool gives the same result."""
+    monkeypatch.setattr(imports_module, "PARALLEL_THRESHOLD", 4)
+    script = make_project(tmp_path / "project", plugins=8)
+
+    serial = ImportScanner(tmp_path / "serial.sqlite3", workers=1).scan(script)
+    parallel = ImportScanner(tmp_path / "parallel.sqlite3", workers=2).scan(script)
+
+    assert parallel.hidden_imports == serial.hidden_imports
+    assert parallel.files_scanned == serial.files_scanned
+
+
+def test_converter_adds_detected_imports(tmp_path, fake_project):
+    """Test auto hidden imports reach the PyInstaller command."""
+    fake_project.write_text("import importlib\nimportlib.import_module('sqlite3')\n")
+    config = BuildConfig(
+        script_path=fake_project,
+        hidden_imports=["sqlite3", "csv"],
+        auto_hidden_imports=True,
+        cache_dir=tmp_path / "cache"
+    )
+    converter = PyConverter(config, log_callback=lambda message: None)
+
+    result = converter.build()
+
+    assert result.success
+    assert converter.detected_imports == ["sqlite3"]
+    assert converter.build_spec().hidden_imports == ["sqlite3", "csv"]
+    assert "scanning_imports" in result.phases
+
+
+def test_resolve_local_module(tmp_path):
+    """Test dotted names resolve to local modules and packages only."""
+    (tmp_path / "app" / "plugins").mkdir(parents=True)
+    (tmp_path / "app" / "__init__.py").write_text("")
+    (tmp_path / "app" / "plugins" / "__init__.py").write_text("")
+    (tmp_path / "app" / "util.py").write_text("")
+
+    assert resolve_local_module("app.util", tmp_path) == tmp_path / "app" / "util.py"
+    assert resolve_local_module("app.plugins", tmp_path) == tmp_path / "app" / "plugins" / "__init__.py"
+    assert resolve_local_module("", tmp_path / "app") == tmp_path / "app" / "__init__.py"
+    assert resolve_local_module("json", tmp_path) is None
@@ -0,0 +1,81 @@
+"""Tests for import-time profiling of frozen apps."""
+
+from p2e.core.config import BuildConfig
+from p2e.core.converter import PyConverter
+from p2e.core.importtime import ImportTimeProfile, apply_suggestions, parse_importtime, suggest
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       214 |        214 |   _io
+import time:       464 |        678 | _frozen_importlib_external
+hello from the app
+import time:      8000 |       8000 |       _bz2
+import time:      4000 |      12000 |     bz2
+import time:      1000 |      13000 |   shutil
+import time:     25000 |      38000 | heavy
+import time:     15000 |      15000 |     _decimal
+import time:      1000 |      16000 |   decimal
+import time:       500 |      16500 | mylib
+"""
+
+
+def test_parse_importtime_builds_tree():
+    """Test nesting follows the indentation of the timing lines."""
+    roots = parse_importtime(IMPORTTIME_OUTPUT)
+
+    assert [root.name for root in roots] == ["_frozen_importlib_external", "heavy", "mylib"]
+    heavy = roots[1]
+    assert heavy.cumulative == 0.038
+    assert heavy.children[0].name == "shutil"
+    assert heavy.children[0].children[0].name == "bz2"
+    assert heavy.children[0].children[0].parent is heavy.children[0]
+
+    profile = ImportTimeProfile(roots=roots)
+    assert profile.heaviest(2)[0].name == "heavy"
+    assert abs(profile.total - (0.000678 + 0.038 + 0.0165)) < 1e-9
+    assert profile.packages()["heavy"] == 0.025
+
+
+def test_parse_importtime_keeps_unfinished_imports():
+    """Test imports of a run stopped mid-import are kept as roots."""
+    roots = parse_importtime("import time:       300 |        300 |     _bz2\n")
+
+    assert [root.name for root in roots] == ["_bz2"]
+
+
+def test_suggestions(tmp_path):
+    """Test lazy imports, optional imports and onedir are suggested from timings."""
+    script = tmp_path / "app.py"
+    script.write_text("import heavy\nimport mylib\n")
+    (tmp_path / "mylib.py").write_text("import decimal\n")
+    config = BuildConfig(script_path=script, one_file=True, exclude_modules=["tkinter"])
+    profile = ImportTimeProfile(roots=parse_importtime(IMPORTTIME_OUTPUT), wall=1.0, extraction=0.6)
+
+    suggestions = suggest(profile, config)
+
+    by_target = {suggestion.target: suggestion for suggestion in suggestions}
+    assert suggestions[0].kind == "onedir"
+    assert by_target["heavy"].kind == "lazy_import"
+    assert not by_target["heavy"].changes
+    # shutil imports bz2 inside try/except ImportError and copes without it
+    assert by_target["bz2"].kind == "exclude_module"
+    # decimal falls back to _pydecimal, so excluding _decimal saves nothing
+    assert "_decimal" not in by_target
+    assert "mylib" not in by_target
+
+    updated = apply_suggestions(config, suggestions)
+    assert updated.one_file is False
+    assert updated.exclude_modules == ["tkinter", "bz2"]
+    assert config.exclude_modules == ["tkinter"]
+
+
+def test_python_options_reach_pyinstaller(tmp_path):
+    """Test interpreter options are passed to the frozen app."""
+    script = tmp_path / "app.py"
+    script.write_text("print('hi')\n")
+    config = BuildConfig(script_path=script, python_options=["u", "X importtime"], cache_dir=tmp_path / "cache")
+    converter = PyConverter(config)
+
+    converter.build_command()
+
+    assert "[('u', None, 'OPTION'), ('X importtime', None, 'OPTION')]" in converter.spec_path.read_text()
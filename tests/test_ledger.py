@@ -0,0 +1,95 @@
+"""Tests for the persistent build ledger."""
+
+import sqlite3
+
+import pytest
+
+from p2e.core.config import BuildConfig
+from p2e.core.ledger import BuildLedger, percentile
+from p2e.core.result import BuildResult, BuildStatus
+
+
+def config(tmp_path, name="app"):
+    """Create a config for an executable named ``name``."""
+    script = tmp_path / "app.py"
+    script.write_text("print('hi')")
+    return BuildConfig(script_path=script, exe_name=name)
+
+
+def result(success=True, duration=1.0, size=None, cache_hit=False, started_at=100.0):
+    """Create a build result."""
+    return BuildResult(
+        success=success,
+        status=BuildStatus.COMPLETE if success else BuildStatus.FAILED,
+        exe_name="app",
+        duration=duration,
+        output_size=size,
+        cache_hit=cache_hit,
+        phases={"building": duration},
+        started_at=started_at
+    )
+
+
+def test_record_and_page(tmp_path):
+    """Test entries round-trip and page newest first with filters."""
+    ledger = BuildLedger(tmp_path / "ledger.sqlite3")
+    first = ledger.record(config(tmp_path), result(size=2048), source="cli", log_path=tmp_path / "a.log.z")
+    ledger.record(config(tmp_path, "other"), result(success=False), owner="alice", metadata={"artifact": "tok"})
+    ledger.record(config(tmp_path), None, owner="alice", status="cancelled", error="Cancelled")
+
+    entries = ledger.page(limit=2)
+    assert [entry.exe_name for entry in entries] == ["app", "other"]
+    assert entries[0].status == "cancelled" and entries[0].error == "Cancelled"
+    assert entries[1].metadata == {"artifact": "tok"} and not entries[1].success
+
+    oldest = ledger.get(first)
+    assert oldest.success and oldest.output_size == 2048 and oldest.source == "cli"
+    assert oldest.phases == {"building": 1.0} and oldest.started_at == 100.0
+    assert oldest.log_path == str(tmp_path / "a.log.z")
+    assert oldest.config_hash == ledger.page(offset=2)[0].config_hash
+
+    assert ledger.count() == 3
+    assert ledger.count(owner="alice") == 2
+    assert ledger.count(exe_name="app", success=True) == 1
+    assert [entry.id for entry in ledger.page(offset=1, owner="alice")] == [2]
+    assert ledger.exe_names() == ["app", "other"]
+
+
+def test_stats(tmp_path):
+    """Test percentiles, rates, slowest builds and size trends."""
+    ledger = BuildLedger(tmp_path / "ledger.sqlite3")
+    for duration, size in [(1.0, 100), (2.0, 200), (3.0, 150), (10.0, None)]:
+        ledger.record(config(tmp_path), result(duration=duration, size=size, cache_hit=duration == 1.0))
+    ledger.record(config(tmp_path, "other"), result(success=False, duration=4.0))
+
+    stats = ledger.stats(slowest=2)
+    assert stats.builds == 5 and stats.succeeded == 4
+    assert stats.success_rate == pytest.approx(0.8)
+    assert stats.cache_hit_rate == pytest.approx(0.2)
+    assert stats.p50 == 3.0
+    assert stats.p95 == pytest.approx(4.0 + 6.0 * 0.8)
+    assert [entry.duration for entry in stats.slowest] == [10.0, 4.0]
+    assert [size for _, size in stats.size_trends["app"]] == [100, 200, 150]
+    assert "other" not in stats.size_trends
+
+    assert ledger.stats(exe_name="other").builds == 1
+    assert ledger.stats(since=2 ** 40).builds == 0
+    assert ledger.stats(since=2 ** 40).success_rate is None
+
+
+def test_percentile():
+    """Test interpolated percentiles."""
+    assert percentile([], 0.5) is None
+    assert percentile([5.0], 0.95) == 5.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.5
+
+
+def test_newer_schema_rejected(tmp_path):
+    """Test a ledger written by a newer version is not modified."""
+    path = tmp_path / "ledger.sqlite3"
+    BuildLedger(path)
+    with sqlite3.connect(path) as db:
+        db.execute("PRAGMA user_version=99")
+
+    with pytest.raises(ValueError):
+        BuildLedger(path)
@@ -0,0 +1,93 @@
+"""Tests for throttled log rendering."""
+
+import threading
+import time
+
+from p2e.utils.logsink import ThrottledLogSink
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lines_are_coalesced_between_frames():
+    """Test lines within one interval are rendered as one batch."""
+    clock = FakeClock()
+    batches, persisted = [], []
+    sink = ThrottledLogSink(batches.append, persist=persisted.append, interval=0.1, clock=clock)
+
+    sink("first")
+    for i in range(50):
+        sink(f"line {i}")
+    clock.now += 0.25
+    sink("last")
+
+    assert batches == [["first"], [f"line {i}" for i in range(50)] + ["last"]]
+    assert len(persisted) == 52
+
+
+def test_max_batch_forces_render():
+    """Test a full batch is rendered without waiting for the interval."""
+    clock = FakeClock()
+    batches = []
+    sink = ThrottledLogSink(batches.append, interval=10, max_batch=3, clock=clock)
+
+    for i in range(7):
+        sink.write(str(i))
+
+    assert batches == [["0"], ["1", "2", "3"], ["4", "5", "6"]]
+
+
+def test_close_renders_remaining_lines():
+    """Test pending lines are rendered when the sink closes."""
+    clock = FakeClock()
+    batches = []
+    with ThrottledLogSink(batches.append, interval=10, clock=clock) as sink:
+        sink("a")
+        sink("b")
+        sink("c")
+
+    assert batches == [["a"], ["b", "c"]]
+    assert sink.lines_written == 3
+    assert sink.renders == 2
+
+
+def test_concurrent_writers_keep_every_line():
+    """Test lines written from several threads are all rendered once."""
+    rendered = []
+    sink = ThrottledLogSink(rendered.extend, interval=0.001, max_batch=7)
+
+    def write(prefix):
+        for i in range(500):
+            sink(f"{prefix}{i}")
+
+    threads = [threading.Thread(target=write, args=(p,)) for p in "abcd"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    sink.close()
+
+    assert sorted(rendered) == sorted(f"{p}{i}" for p in "abcd" for i in range(500))
+
+
+def test_background_timer_renders_pending_lines():
+    """Test lines pending when output pauses are rendered without another write."""
+    batches = []
+    sink = ThrottledLogSink(batches.append, interval=0.05, background=True)
+
+    sink("first")
+    sink("second")
+    sink("third")
+    deadline = time.monotonic() + 5
+    while len(batches) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sink.close()
+
+    assert batches == [["first"], ["second", "third"]]
@@ -0,0 +1,87 @@
+"""Tests for the bounded log store."""
+
+import os
+
+import pytest
+
+from p2e.utils.logstore import LogStore, prune_logs
+
+
+def test_tail_is_bounded_and_full_log_is_kept(tmp_path):
+    """Test the memory tail is capped while every line is readable."""
+    with LogStore(tmp_path / "build.log.z", tail_size=10, block_lines=100) as store:
+        for i in range(1050):
+            store(f"line {i}")
+
+        assert len(store) == 1050
+        assert store.tail() == [f"line {i}" for i in range(1040, 1050)]
+        assert store.tail(2) == ["line 1048", "line 1049"]
+        assert len(store._pending) == 50
+
+        assert store.read(95, 10) == [f"line {i}" for i in range(95, 105)]
+        assert store.read(1045) == [f"line {i}" for i in range(1045, 1050)]
+        assert store.read(2000) == []
+
+
+def test_reopen_rebuilds_index(tmp_path):
+    """Test a closed log can be paged and searched without the writer."""
+    path = tmp_path / "build.log.z"
+    with LogStore(path, block_lines=7) as store:
+        for i in range(100):
+            store(f"{i} INFO: {'ERROR here' if i % 25 == 0 else 'fine'}")
+
+    reopened = LogStore.open(path, tail_size=3)
+
+    assert len(reopened) == 100
+    assert reopened.closed
+    assert reopened.tail() == [f"{i} INFO: fine" for i in (97, 98, 99)]
+    assert reopened.page(3, size=10) == [f"{i} INFO: fine" for i in range(30, 40)]
+    assert reopened.pages(size=10) == 10
+    assert [n for n, _ in reopened.grep("error", ignore_case=True)] == [0, 25, 50, 75]
+    assert len(list(reopened.grep("ERROR", limit=2))) == 2
+
+
+def test_multiline_messages_are_split(tmp_path):
+    """Test one message with newlines is stored as several lines."""
+    with LogStore(tmp_path / "a.log.z") as store:
+        store("one\ntwo")
+
+    assert LogStore.open(tmp_path / "a.log.z").read() == ["one", "two"]
+
+
+def test_closed_store_rejects_writes_and_discard_removes_file(tmp_path):
+    """Test closing and discarding a store."""
+    store = LogStore()
+    store("x")
+    store.close()
+
+    with pytest.raises(ValueError):
+        store("y")
+    assert store.read() == ["x"]
+
+    store.discard()
+    assert not store.path.exists()
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    """Test a partially written log is detected on open."""
+    path = tmp_path / "bad.log.z"
+    with LogStore(path) as store:
+        store("hello")
+    path.write_bytes(path.read_bytes()[:-2])
+
+    with pytest.raises(ValueError):
+        LogStore.open(path)
+
+
+def test_prune_logs_keeps_newest(tmp_path):
+    """Test only the most recent log files are kept."""
+    for i in range(4):
+        path = tmp_path / f"{i}.log.z"
+        path.write_bytes(b"")
+        os.utime(path, (i, i))
+
+    removed = prune_logs(tmp_path, keep=2)
+
+    assert sorted(p.name for p in removed) == ["0.log.z", "1.log.z"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2.log.z", "3.log.z"]
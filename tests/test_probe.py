@@ -0,0 +1,83 @@
+"""Tests for the PyInstaller probe."""
+
+import os
+import sys
+
+from p2e.core import probe
+from p2e.core.probe import features_for, interpreter_identity, parse_version, probe_pyinstaller, resolve_python
+
+
+def test_parse_version():
+    """Test version strings with suffixes are parsed."""
+    assert parse_version("6.3.0") == (6, 3, 0)
+    assert parse_version("6.0.0rc1") == (6, 0, 0)
+    assert parse_version("5.13.2.dev0") == (5, 13, 2)
+
+
+def test_features_for_version():
+    """Test features depend on the PyInstaller version."""
+    assert "contents-directory" in features_for("6.1.0")
+    assert "contents-directory" not in features_for("5.13.2")
+    assert features_for(None) == frozenset()
+
+
+def test_probe_is_memoized(monkeypatch):
+    """Test the probe only looks up metadata again when site-packages change."""
+    calls = []
+
+    def fake_probe():
+        calls.append(1)
+        return "6.6.0", []
+
+    monkeypatch.setattr(probe, "_probe_current", fake_probe)
+    probe.invalidate_probe_cache()
+
+    first = probe_pyinstaller(sys.executable)
+    second = probe_pyinstaller(sys.executable)
+
+    assert first is second
+    assert first.available and first.version == "6.6.0"
+    assert first.supports("optimize")
+    assert len(calls) == 1
+
+    probe.invalidate_probe_cache(sys.executable)
+    probe_pyinstaller(sys.executable)
+    assert len(calls) == 2
+    probe.invalidate_probe_cache()
+
+
+def test_probe_invalidated_by_site_change(tmp_path, monkeypatch):
+    """Test a change to a site-packages folder triggers a new lookup."""
+    site_dir = tmp_path / "site-packages"
+    site_dir.mkdir()
+    calls = []
+
+    def fake_probe():
+        calls.append(1)
+        return None, [str(site_dir)]
+
+    monkeypatch.setattr(probe, "_probe_current", fake_probe)
+    probe.invalidate_probe_cache()
+
+    assert probe_pyinstaller().available is False
+    probe_pyinstaller()
+    assert len(calls) == 1
+
+    (site_dir / "pyinstaller-6.0.0.dist-info").mkdir()
+    stat = site_dir.stat()
+    os.utime(site_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    probe_pyinstaller()
+    assert len(calls) == 2
+    probe.invalidate_probe_cache()
+
+
+def test_interpreter_given_as_command(tmp_path, monkeypatch):
+    """Test a command name is looked up on PATH instead of in the cwd."""
+    monkeypatch.chdir(tmp_path)
+    name = os.path.basename(sys.executable)
+    monkeypatch.setenv("PATH", os.path.dirname(sys.executable))
+
+    assert resolve_python(name) == os.path.abspath(sys.executable)
+    assert resolve_python("./python") == str(tmp_path / "python")
+    assert resolve_python("no-such-python") == "no-such-python"
+    assert interpreter_identity(name)["cache_tag"] == sys.implementation.cache_tag
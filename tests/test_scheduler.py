@@ -0,0 +1,159 @@
+"""Tests for fair scheduling and quotas in the build scheduler."""
+
+import threading
+import time
+
+import pytest
+
+from p2e.core import scheduler as scheduler_module
+from p2e.core.config import BuildConfig
+from p2e.core.ledger import BuildLedger
+from p2e.core.result import BuildResult, BuildStatus, JobStatus
+from p2e.core.scheduler import BuildScheduler, QueueFullError, QuotaExceededError
+
+
+class FakeConverter:
+    """Converter whose builds finish when the test releases them."""
+
+    started = []
+    release = {}
+
+    def __init__(self, config, log_callback=None):
+        self.config = config
+        self.log_callback = log_callback
+
+    def build(self, realtime_output=True):
+        name = self.config.exe_name
+        FakeConverter.started.append(name)
+        FakeConverter.release.setdefault(name, threading.Event()).wait(10)
+        return BuildResult(success=True, status=BuildStatus.COMPLETE, exe_name=name)
+
+    def stop(self):
+        FakeConverter.release.setdefault(self.config.exe_name, threading.Event()).set()
+
+
+@pytest.fixture
+def fake_converter(monkeypatch):
+    """Replace real builds with controllable fakes."""
+    FakeConverter.started = []
+    FakeConverter.release = {}
+    monkeypatch.setattr(scheduler_module, "PyConverter", FakeConverter)
+    yield FakeConverter
+    for event in FakeConverter.release.values():
+        event.set()
+
+
+def config(tmp_path, name):
+    """Create a config for a job named ``name``."""
+    script = tmp_path / "app.py"
+    script.write_text("print('hi')")
+    return BuildConfig(script_path=script, exe_name=name)
+
+
+def wait_until(predicate, timeout=10):
+    """Wait for a condition to hold."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def finish(name):
+    """Let the fake build ``name`` complete."""
+    FakeConverter.release.setdefault(name, threading.Event()).set()
+
+
+def test_owners_take_turns(tmp_path, fake_converter):
+    """Test a user with many queued builds does not starve others."""
+    scheduler = BuildScheduler(workers=1)
+    blocker = scheduler.submit(config(tmp_path, "blocker"), owner="c")
+    wait_until(lambda: blocker.status == JobStatus.RUNNING)
+
+    for i in range(3):
+        scheduler.submit(config(tmp_path, f"a{i}"), owner="alice")
+    bob = scheduler.submit(config(tmp_path, "b0"), owner="bob")
+
+    assert scheduler.position(bob.id) == 1
+    assert scheduler.queued() == 4 and scheduler.queued("alice") == 3
+
+    for name in ["blocker", "a0", "b0", "a1", "a2"]:
+        finish(name)
+    wait_until(lambda: len(fake_converter.started) == 5 and scheduler.queued() == 0)
+    scheduler.shutdown()
+
+    assert fake_converter.started == ["blocker", "a0", "b0", "a1", "a2"]
+
+
+def test_running_quota_per_owner(tmp_path, fake_converter):
+    """Test one owner cannot occupy every worker."""
+    scheduler = BuildScheduler(workers=2, max_running_per_owner=1)
+    first = scheduler.submit(config(tmp_path, "a0"), owner="alice")
+    second = scheduler.submit(config(tmp_path, "a1"), owner="alice")
+    other = scheduler.submit(config(tmp_path, "b0"), owner="bob")
+
+    wait_until(lambda: other.status == JobStatus.RUNNING)
+    assert first.status == JobStatus.RUNNING
+    assert second.status == JobStatus.QUEUED
+    assert scheduler.running("alice") == 1
+
+    finish("a0")
+    wait_until(lambda: second.status == JobStatus.RUNNING)
+    for name in ["a1", "b0"]:
+        finish(name)
+    scheduler.shutdown()
+    assert [job.status for job in (first, second, other)] == [JobStatus.SUCCESS] * 3
+
+
+def test_queued_quota_and_capacity(tmp_path, fake_converter):
+    """Test per-owner and global queue limits."""
+    scheduler = BuildScheduler(workers=1, queue_size=3, max_queued_per_owner=2)
+    running = scheduler.submit(config(tmp_path, "run"), owner="alice")
+    wait_until(lambda: running.status == JobStatus.RUNNING)
+    scheduler.submit(config(tmp_path, "a1"), owner="alice")
+    scheduler.submit(config(tmp_path, "a2"), owner="alice")
+
+    with pytest.raises(QuotaExceededError):
+        scheduler.submit(config(tmp_path, "a3"), owner="alice")
+    scheduler.submit(config(tmp_path, "b1"), owner="bob")
+    with pytest.raises(QueueFullError):
+        scheduler.submit(config(tmp_path, "b2"), owner="bob")
+
+    for name in ["run", "a1", "a2", "b1"]:
+        finish(name)
+    scheduler.shutdown()
+
+
+def test_on_finish_runs_for_cancelled_jobs(tmp_path, fake_converter):
+    """Test the completion callback runs for built and cancelled jobs."""
+    finished = []
+    scheduler = BuildScheduler(workers=1)
+    running = scheduler.submit(config(tmp_path, "run"), on_finish=finished.append)
+    wait_until(lambda: running.status == JobStatus.RUNNING)
+    queued = scheduler.submit(config(tmp_path, "next"), on_finish=finished.append)
+
+    assert scheduler.cancel(queued.id)
+    assert scheduler.position(queued.id) == 0
+    finish("run")
+    scheduler.shutdown()
+
+    assert finished == [running, queued]
+    assert queued.status == JobStatus.CANCELLED
+    assert "next" not in fake_converter.started
+
+
+def test_finished_jobs_recorded_in_ledger(tmp_path, fake_converter):
+    """Test jobs are recorded with their owner and callback metadata."""
+    ledger = BuildLedger(tmp_path / "ledger.sqlite3")
+
+    def on_finish(job):
+        job.metadata['artifact'] = "token"
+
+    scheduler = BuildScheduler(workers=1, ledger=ledger, source="web")
+    job = scheduler.submit(config(tmp_path, "app"), owner="alice", on_finish=on_finish)
+    finish("app")
+    scheduler.shutdown()
+
+    [entry] = ledger.page()
+    assert entry.success and entry.source == "web" and entry.owner == "alice"
+    assert entry.metadata == {'artifact': "token"}
+    assert entry.finished_at == job.finished_at
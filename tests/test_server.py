@@ -0,0 +1,238 @@
+"""Tests for the build scheduler and HTTP server."""
+
+import http.client
+import io
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import zipfile
+
+import pytest
+
+from p2e.core.artifacts import ArtifactStore
+from p2e.core.config import BuildConfig
+from p2e.core.result import JobStatus
+from p2e.core.scheduler import BuildScheduler, QueueFullError
+from p2e.server import create_server
+
+
+def wait_for(job, timeout=10.0):
+    """Wait until a job finishes."""
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return job
+
+
+def test_scheduler_runs_builds(fake_project):
+    """Test submitted builds run in the background."""
+    scheduler = BuildScheduler(workers=2)
+    jobs = [
+        scheduler.submit(BuildConfig(script_path=fake_project, exe_name=f"app{i}"))
+        for i in range(3)
+    ]
+
+    for job in jobs:
+        wait_for(job)
+
+    assert [job.status for job in jobs] == [JobStatus.SUCCESS] * 3
+    assert "fake build done" in jobs[0].read_logs()
+    assert jobs[0].output_path.exists()
+
+    scheduler.shutdown()
+    assert not jobs[0].logs.path.exists()
+
+
+def test_submit_metadata_reaches_on_finish(fake_project):
+    """Test metadata given at submission is already set when the job finishes."""
+    seen = []
+    scheduler = BuildScheduler(workers=1)
+    job = scheduler.submit(
+        BuildConfig(script_path=fake_project),
+        on_finish=lambda job: seen.append(job.metadata.get('workspace')),
+        metadata={'workspace': "/tmp/ws"}
+    )
+    wait_for(job)
+    scheduler.shutdown()
+    assert seen == ["/tmp/ws"]
+
+
+def test_scheduler_queue_is_bounded(fake_project):
+    """Test submissions beyond the queue size are rejected."""
+    scheduler = BuildScheduler(workers=1, queue_size=1)
+    running = scheduler.submit(BuildConfig(script_path=fake_project, exe_name="slow"))
+    while running.status != JobStatus.RUNNING:
+        time.sleep(0.01)
+    queued = scheduler.submit(BuildConfig(script_path=fake_project, exe_name="next"))
+
+    with pytest.raises(QueueFullError):
+        scheduler.submit(BuildConfig(script_path=fake_project, exe_name="overflow"))
+
+    assert scheduler.cancel(queued.id)
+    # The cancelled job no longer holds its queue slot
+    replacement = scheduler.submit(BuildConfig(script_path=fake_project, exe_name="again"))
+    assert scheduler.queued() == 1
+
+    assert scheduler.cancel(replacement.id)
+    assert scheduler.cancel(running.id)
+    wait_for(running)
+    scheduler.shutdown()
+    assert running.status == JobStatus.CANCELLED
+    assert queued.status == JobStatus.CANCELLED
+
+
+def test_cancel_before_converter_attached(fake_project, monkeypatch):
+    """Test a job cancelled while its worker is starting up is never built."""
+    built = []
+
+    class CancellingConverter:
+        def __init__(self, config, log_callback=None):
+            # Cancel lands after dequeueing, before the converter is attached
+            scheduler.cancel(scheduler.jobs()[0].id)
+
+        def build(self, realtime_output=False):
+            built.append(True)
+
+    monkeypatch.setattr("p2e.core.scheduler.PyConverter", CancellingConverter)
+    scheduler = BuildScheduler(workers=1)
+    job = wait_for(scheduler.submit(BuildConfig(script_path=fake_project)))
+    scheduler.shutdown()
+
+    assert job.status == JobStatus.CANCELLED
+    assert job.converter is None
+    assert not built
+
+
+def test_worker_survives_ledger_errors(fake_project):
+    """Test a failing ledger is logged without stopping the worker."""
+    class BrokenLedger:
+        def record(self, *args, **kwargs):
+            raise OSError("disk full")
+
+    scheduler = BuildScheduler(workers=1, ledger=BrokenLedger())
+    first = wait_for(scheduler.submit(BuildConfig(script_path=fake_project, exe_name="one")))
+    second = wait_for(scheduler.submit(BuildConfig(script_path=fake_project, exe_name="two")))
+    scheduler.shutdown()
+
+    assert first.metadata['ledger_error'] == "disk full"
+    assert second.status == JobStatus.SUCCESS
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Run a build server on a free port."""
+    server = create_server(port=0, workers=1, artifacts=ArtifactStore(tmp_path / "artifacts"))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def request(url, data=None, method=None):
+    """Send a request and decode the JSON response."""
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, method=method)
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.status, json.loads(response.read())
+
+
+def test_server_build_lifecycle(server, fake_project):
+    """Test submitting a build, following logs and downloading the artifact."""
+    status, job = request(f"{server}/builds", {"script_path": str(fake_project)})
+    assert status == 202
+
+    with urllib.request.urlopen(f"{server}/builds/{job['id']}/logs?follow=1", timeout=10) as r:
+        logs = r.read().decode()
+    assert "fake build done" in logs
+
+    _, job = request(f"{server}/builds/{job['id']}")
+    assert job["status"] == "success"
+
+    with urllib.request.urlopen(f"{server}/builds/{job['id']}/artifact", timeout=10) as r:
+        assert r.read().decode() == str(fake_project.parent)
+
+    _, page = request(f"{server}/builds/{job['id']}/logs?offset=1")
+    assert page["done"] is True and page["offset"] == job["log_lines"]
+
+    for bad in ("offset=abc", "offset=-1", "limit=x", "limit=-5"):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            request(f"{server}/builds/{job['id']}/logs?{bad}")
+        assert error.value.code == 400
+
+
+def test_server_serves_onedir_archive(server, fake_project, tmp_path):
+    """Test onedir builds are zipped into the artifact store, not the output folder."""
+    dist = tmp_path / "dist"
+    _, job = request(f"{server}/builds", {
+        "script_path": str(fake_project), "output_dir": str(dist), "one_file": False
+    })
+    with urllib.request.urlopen(f"{server}/builds/{job['id']}/logs?follow=1", timeout=10) as r:
+        r.read()
+
+    # Retried while the archive is still being made
+    deadline = time.monotonic() + 10
+    while True:
+        with urllib.request.urlopen(f"{server}/builds/{job['id']}/artifact", timeout=10) as r:
+            body = r.read()
+            if r.status != 202 or time.monotonic() > deadline:
+                break
+        time.sleep(0.05)
+    archive = zipfile.ZipFile(io.BytesIO(body))
+    assert "app/app" in [name.replace(".exe", "") for name in archive.namelist()]
+    assert sorted(path.name for path in dist.iterdir()) == ["app"]
+
+
+def test_server_rejects_invalid_config(server, tmp_path):
+    """Test invalid payloads are reported as client errors."""
+    with pytest.raises(urllib.error.HTTPError) as error:
+        request(f"{server}/builds", {"script_path": str(tmp_path / "missing.py")})
+    assert error.value.code == 400
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        request(f"{server}/builds/{'0' * 32}")
+    assert error.value.code == 404
+
+    # Malformed lengths are rejected instead of dropping or hanging the connection
+    host, port = urllib.parse.urlsplit(server).netloc.split(":")
+    for length in ("abc", "-1"):
+        connection = http.client.HTTPConnection(host, int(port), timeout=10)
+        connection.putrequest("POST", "/builds")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        assert connection.getresponse().status == 400
+        connection.close()
+
+
+def test_server_per_user_quota(fake_project):
+    """Test users over their queue quota get 429 while others are accepted."""
+    server = create_server(port=0, workers=1, max_queued_per_user=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/builds"
+
+    def submit(user, name):
+        body = json.dumps({"script_path": str(fake_project), "exe_name": name}).encode()
+        req = urllib.request.Request(url, data=body, headers={"X-P2E-User": user})
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return json.loads(response.read())
+
+    try:
+        running = submit("alice", "slow")
+        while server.scheduler.get(running["id"]).status != JobStatus.RUNNING:
+            time.sleep(0.01)
+        queued = submit("alice", "next")
+        assert queued["owner"] == "alice" and queued["queue_position"] == 0
+
+        with pytest.raises(urllib.error.HTTPError) as error:
+            submit("alice", "more")
+        assert error.value.code == 429
+        assert submit("bob", "other")["queue_position"] == 1
+    finally:
+        for job in server.scheduler.jobs():
+            server.scheduler.cancel(job.id)
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,62 @@
+"""Tests for build timing instrumentation."""
+
+import pytest
+
+from p2e.core.timing import RssMonitor, StageTimer, format_duration, summarize
+
+
+def test_stage_timer_uses_pyinstaller_timestamps():
+    """Test stages are timed from PyInstaller's millisecond prefixes."""
+    timer = StageTimer()
+    for line in [
+        "120 INFO: PyInstaller: 6.3.0",
+        "500 INFO: checking Analysis",
+        "2500 INFO: Processing module hooks...",
+        "4500 INFO: checking PYZ",
+        "5000 INFO: checking PKG",
+        "6000 INFO: checking EXE",
+        "6250 INFO: Build complete! The results are available in: dist",
+    ]:
+        timer.feed(line)
+
+    assert timer.finish() == pytest.approx({
+        "Analysis": 4.0, "PYZ": 0.5, "PKG": 1.0, "EXE": 0.25
+    })
+
+
+def test_stage_timer_ignores_unrelated_output():
+    """Test output without stage markers yields no stages."""
+    timer = StageTimer()
+    timer.feed("Collecting pyinstaller")
+    timer.feed("123 WARNING: checking something else")
+
+    assert timer.finish() == {}
+
+
+def test_stage_timer_finish_stays_on_log_clock():
+    """Test a stage without an end marker is closed on PyInstaller's clock."""
+    timer = StageTimer()
+    timer.feed("500 INFO: checking Analysis")
+    timer.feed("1500 INFO: Processing module hooks...")
+    timer.feed("untimestamped output")
+
+    assert timer.finish() == pytest.approx({"Analysis": 1.0})
+
+
+def test_rss_monitor_without_samples_is_unavailable():
+    """Test no peak is reported when the process could not be sampled."""
+    monitor = RssMonitor()
+    monitor.sample(None)
+
+    assert monitor.finish() is None
+
+
+def test_summarize_and_format():
+    """Test share computation and duration formatting."""
+    rows = summarize({"a": 1.0, "b": 3.0})
+
+    assert rows == [("a", 1.0, 0.25), ("b", 3.0, 0.75)]
+    assert summarize({}) == []
+    assert format_duration(0.25) == "250 ms"
+    assert format_duration(12.345) == "12.35 s"
+    assert format_duration(125) == "2m 5s"
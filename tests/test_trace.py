@@ -0,0 +1,149 @@
+"""Tests for runtime import tracing."""
+
+import sys
+import textwrap
+
+import pytest
+from click.testing import CliRunner
+
+from p2e.cli.app import cli
+from p2e.core.config import BuildConfig
+from p2e.core.converter import PyConverter
+from p2e.core.imports import ImportScanner
+from p2e.core.trace import TraceProfile, trace_imports
+
+
+def test_trace_records_imports(tmp_path):
+    """Test a traced run records static and dynamic imports."""
+    script = tmp_path / "app.py"
+    script.write_text(textwrap.dedent("""
+        import importlib
+        import json
+        importlib.import_module("csv")
+    """))
+
+    profile = trace_imports(script)
+
+    assert "json" in profile.modules
+    assert "csv" in profile.modules
+    assert profile.dynamic == ["csv"]
+    assert profile.returncode == 0
+    assert "__main__" not in profile.modules
+    assert not profile.is_stale(script)
+
+    script.write_text("import json\n")
+    assert profile.is_stale(script)
+
+
+def test_trace_command_covers_child_processes(tmp_path):
+    """Test a custom command is traced, including processes it spawns."""
+    script = tmp_path / "app.py"
+    script.write_text("import decimal\n")
+    runner = tmp_path / "runner.py"
+    runner.write_text(textwrap.dedent("""
+        import subprocess, sys
+        subprocess.run([sys.executable, "app.py"], check=True)
+    """))
+
+    profile = trace_imports(script, command=[sys.executable, str(runner)])
+
+    assert "decimal" in profile.modules
+    assert "subprocess" in profile.modules
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SIGTERM is not delivered to Python on Windows")
+def test_trace_timeout_keeps_imports(tmp_path):
+    """Test a run stopped on timeout still reports what it imported."""
+    script = tmp_path / "app.py"
+    script.write_text("import fractions\nimport time\ntime.sleep(60)\n")
+
+    profile = trace_imports(script, timeout=2)
+
+    assert profile.returncode is None
+    assert "fractions" in profile.modules
+
+
+def test_plan_excludes_unused_subpackages(tmp_path, monkeypatch):
+    """Test only bundled, unused subpackages are excluded."""
+    site = tmp_path / "site"
+    package = site / "fakepkg"
+    for name in ("core", "extra", "orphan", "kept"):
+        (package / name).mkdir(parents=True)
+        (package / name / "__init__.py").write_text("DATA = 1\n")
+    (package / "extra" / "__init__.py").write_text("DATA = '" + "x" * 4096 + "'\n")
+    (package / "__init__.py").write_text(textwrap.dedent("""
+        from . import core
+        try:
+            from fakepkg import extra, kept
+        except ImportError:
+            pass
+    """))
+    monkeypatch.syspath_prepend(str(site))
+    profile = TraceProfile(
+        script_path=str(tmp_path / "app.py"),
+        script_digest="",
+        command=[],
+        python=sys.version,
+        returncode=0,
+        modules=["fakepkg", "fakepkg.core", "importlib"],
+        dynamic=["fakepkg.extra.loader", "json"],
+        files={"fakepkg": str(package / "__init__.py")}
+    )
+
+    plan = profile.plan(keep=["fakepkg.kept"], sizes=True, scanner=ImportScanner(tmp_path / "scan.sqlite3"))
+
+    # orphan is never imported by the package, so PyInstaller would not bundle it
+    assert plan.exclude_modules == ["fakepkg.extra"]
+    assert plan.hidden_imports == ["json"]
+    assert plan.saved_bytes > 4096
+
+
+def test_converter_applies_trace_profile(tmp_path, fake_project):
+    """Test profile and configured exclusions reach the PyInstaller command."""
+    profile = TraceProfile(
+        script_path=str(fake_project),
+        script_digest="",
+        command=[],
+        python=sys.version,
+        returncode=0,
+        modules=["csv"],
+        dynamic=["csv"]
+    )
+    profile_path = tmp_path / "profile.json"
+    profile.save(profile_path)
+    config = BuildConfig(
+        script_path=fake_project,
+        exclude_modules=["tkinter", "csv"],
+        trace_profile=profile_path,
+        cache_dir=tmp_path / "cache"
+    )
+    converter = PyConverter(config, log_callback=lambda message: None)
+
+    result = converter.build()
+
+    assert result.success
+    assert converter.traced_imports == ["csv"]
+    spec = converter.build_spec()
+    assert spec.excludes == ["tkinter"]
+    assert spec.hidden_imports == ["csv"]
+
+
+def test_trace_cli_applies_plan_to_config(tmp_path):
+    """Test trace --apply merges the plan into a config and rejects other files up front."""
+    script = tmp_path / "app.py"
+    script.write_text("import json\n")
+    config = tmp_path / "p2e.yaml"
+    BuildConfig(script_path=script, exclude_modules=["tkinter"]).save_yaml(config)
+    notes = tmp_path / "notes.txt"
+    notes.write_text("")
+    profile_path = tmp_path / "trace.json"
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["trace", "--profile", str(profile_path), "--apply", str(notes), str(script)])
+    assert result.exit_code == 1
+    assert "Config file must be .json or .yaml" in result.output
+    assert not profile_path.exists()
+
+    result = runner.invoke(cli, ["trace", "--profile", str(profile_path), "--apply", str(config), str(script)])
+    assert result.exit_code == 0, result.output
+    assert "tkinter" in BuildConfig.from_yaml(config).exclude_modules
@@ -0,0 +1,105 @@
+"""Tests for upload handling."""
+
+import io
+import zipfile
+
+import pytest
+
+from p2e.utils.uploads import (
+    default_entry_script,
+    extract_project,
+    list_scripts,
+    safe_filename,
+    save_upload,
+)
+
+
+class Upload(io.BytesIO):
+    """Stand-in for a Streamlit UploadedFile."""
+
+    def __init__(self, data: bytes, name: str):
+        super().__init__(data)
+        self.name = name
+
+    def getvalue(self):
+        raise AssertionError("upload must be streamed, not materialized")
+
+
+def make_zip(files):
+    """Build an in-memory zip archive."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def test_save_upload_streams_in_chunks(tmp_path):
+    """Test uploads are copied to disk without getvalue()."""
+    data = b"x" * 100_000
+    upload = Upload(data, "../../model.bin")
+    upload.read(10)
+
+    path = save_upload(upload, tmp_path, chunk_size=4096)
+
+    assert path == tmp_path / "model.bin"
+    assert path.read_bytes() == data
+
+
+def test_safe_filename_rejects_empty_names():
+    """Test directory components are stripped and empty names rejected."""
+    assert safe_filename("C:\\Users\\me\\app.py") == "app.py"
+    with pytest.raises(ValueError):
+        safe_filename("..")
+
+
+def test_extract_project_and_pick_entry(tmp_path):
+    """Test a project archive is extracted with its layout."""
+    archive = make_zip({
+        "proj/main.py": "import pkg.util",
+        "proj/pkg/__init__.py": "",
+        "proj/pkg/util.py": "X = 1",
+        "proj/data/model.bin": b"\0" * 5000,
+    })
+
+    scripts = list_scripts(archive)
+    files = extract_project(archive, tmp_path / "out", chunk_size=1024)
+
+    assert scripts[0] == "proj/main.py"
+    assert default_entry_script(scripts) == "proj/main.py"
+    assert len(files) == 4
+    assert (tmp_path / "out" / "proj" / "data" / "model.bin").stat().st_size == 5000
+
+
+def test_default_entry_script_single_top_level():
+    """Test a lone top-level script is chosen, ambiguous ones are not."""
+    assert default_entry_script(["tool.py", "lib/a.py"]) == "tool.py"
+    assert default_entry_script(["a.py", "b.py"]) is None
+    assert default_entry_script([]) is None
+
+
+@pytest.mark.parametrize("name", ["../evil.py", "/etc/evil.py", "a/../../evil.py", "C:/evil.py"])
+def test_extract_rejects_escaping_paths(tmp_path, name):
+    """Test members outside the destination are rejected."""
+    archive = make_zip({name: "boom"})
+
+    with pytest.raises(ValueError):
+        extract_project(archive, tmp_path / "out")
+    assert not (tmp_path / "evil.py").exists()
+
+
+def test_extract_enforces_limits(tmp_path):
+    """Test the file count and expanded size are capped."""
+    with pytest.raises(ValueError, match="bytes"):
+        extract_project(make_zip({"big.bin": b"\0" * 10_000}), tmp_path / "a", max_bytes=1000)
+    with pytest.raises(ValueError, match="files"):
+        extract_project(make_zip({"a.py": "", "b.py": ""}), tmp_path / "b", max_files=1)
+
+
+def test_invalid_archive(tmp_path):
+    """Test non-zip uploads raise ValueError."""
+    with pytest.raises(ValueError):
+        list_scripts(io.BytesIO(b"not a zip"))
+    with pytest.raises(ValueError):
+        extract_project(io.BytesIO(b"not a zip"), tmp_path)
@@ -0,0 +1,96 @@
+"""Tests for pooled build virtual environments."""
+
+import os
+
+import pytest
+
+from p2e.core.cache import hash_requirements
+from p2e.core.venvs import EnvPool, env_key, env_python
+
+
+@pytest.fixture
+def fake_setup(monkeypatch):
+    """Replace venv creation and pip with stand-ins, recording the commands."""
+    commands = []
+
+    def run(self, cmd, action, cwd=None):
+        commands.append(cmd)
+        if cmd[1:3] == ["-m", "venv"]:
+            python = env_python(cmd[3])
+            python.parent.mkdir(parents=True)
+            python.write_bytes(b"\0" * 1000)
+        elif "fail" in " ".join(cmd):
+            raise RuntimeError(f"{action} failed with code 1")
+
+    monkeypatch.setattr(EnvPool, "_run", run)
+    return commands
+
+
+def test_requirements_hash_ignores_formatting(tmp_path):
+    """Test comments and whitespace do not matter but included files do."""
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    constraints = tmp_path / "constraints.txt"
+    constraints.write_text("six==1.16.0\n")
+    first.write_text("requests>=2  # http\n\n-c constraints.txt\n")
+    second.write_text("# pinned\nrequests>=2\n-c  constraints.txt\n")
+
+    digest = hash_requirements(first)
+    assert hash_requirements(second) == digest
+    constraints.write_text("six==1.17.0\n")
+    assert hash_requirements(first) != digest
+    assert env_key(first) != env_key(None)
+
+
+def test_environment_created_once(tmp_path, fake_setup):
+    """Test an environment is created on first use and reused afterwards."""
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("six\n")
+    pool = EnvPool(tmp_path / "pool")
+
+    with pool.acquire(requirements) as env:
+        assert env.created
+        assert env.python.is_file()
+    with pool.acquire(requirements) as again:
+        assert not again.created
+        assert again.path == env.path
+
+    assert len(fake_setup) == 2
+    assert fake_setup[1][-3:] == ["-r", str(requirements.absolute()), "pyinstaller"]
+    assert [listed.key for listed in pool.environments()] == [env.key]
+
+
+def test_failed_creation_is_cleaned_up(tmp_path, fake_setup):
+    """Test a failed install leaves no half-built environment behind."""
+    requirements = tmp_path / "fail.txt"
+    requirements.write_text("does-not-exist\n")
+    pool = EnvPool(tmp_path / "pool")
+
+    with pytest.raises(RuntimeError, match="failed"):
+        with pool.acquire(requirements):
+            pass
+
+    assert pool.environments() == []
+    assert not pool.env_dir(env_key(requirements)).exists()
+
+
+def test_prune_evicts_least_recently_used(tmp_path, fake_setup):
+    """Test pruning removes the oldest environments but never one in use."""
+    pool = EnvPool(tmp_path / "pool")
+    keys = []
+    for index in range(3):
+        requirements = tmp_path / f"requirements-{index}.txt"
+        requirements.write_text(f"package-{index}\n")
+        with pool.acquire(requirements) as env:
+            keys.append(env.key)
+        marker = env.path / "p2e-env.json"
+        os.utime(marker, (1000 + index, 1000 + index))
+
+    size = pool.environments()[0].size
+    with pool.acquire(tmp_path / "requirements-0.txt"):
+        removed = pool.prune(max_bytes=size)
+
+    # The oldest one is in use, so the next two go instead
+    assert [env.key for env in removed] == [keys[1], keys[2]]
+    assert [env.key for env in pool.environments()] == [keys[0]]
+    assert [env.key for env in pool.clear()] == [keys[0]]
@@ -0,0 +1,73 @@
+"""Tests for the offline wheelhouse."""
+
+import subprocess
+
+import pytest
+
+from p2e.core import converter as converter_module
+from p2e.core.config import BuildConfig
+from p2e.core.converter import PyConverter
+from p2e.core.wheelhouse import Wheelhouse
+
+
+@pytest.fixture
+def wheels(tmp_path):
+    """A folder of package files as copied from removable media."""
+    folder = tmp_path / "usb"
+    folder.mkdir()
+    (folder / "six-1.17.0-py2.py3-none-any.whl").write_bytes(b"six wheel")
+    (folder / "pyinstaller-6.0.0.tar.gz").write_bytes(b"pyinstaller sdist")
+    (folder / "README.txt").write_text("not a package")
+    return folder
+
+
+def test_sync_copies_and_records(tmp_path, wheels):
+    """Test an offline sync copies package files and records their digests."""
+    house = Wheelhouse(tmp_path / "wheelhouse")
+
+    added = house.sync(sources=[wheels], download=False)
+
+    assert added == ["pyinstaller-6.0.0.tar.gz", "six-1.17.0-py2.py3-none-any.whl"]
+    assert set(house.manifest()) == set(added)
+    assert house.verify() == []
+    assert house.sync(sources=[wheels], download=False) == []
+    assert house.install_args() == ["--no-index", "--find-links", str(house.root.absolute())]
+
+
+def test_verify_detects_changes(tmp_path, wheels):
+    """Test modified, missing and unlisted files fail verification."""
+    house = Wheelhouse(tmp_path / "wheelhouse")
+    house.sync(sources=[wheels], download=False)
+
+    (house.root / "six-1.17.0-py2.py3-none-any.whl").write_bytes(b"six wheeL")
+    (house.root / "pyinstaller-6.0.0.tar.gz").unlink()
+    (house.root / "evil-1.0-py3-none-any.whl").write_bytes(b"evil")
+
+    assert house.verify() == [
+        "missing pyinstaller-6.0.0.tar.gz",
+        "modified six-1.17.0-py2.py3-none-any.whl",
+        "unlisted evil-1.0-py3-none-any.whl",
+    ]
+    with pytest.raises(ValueError, match="failed verification"):
+        house.install_args()
+    assert Wheelhouse(tmp_path / "empty").verify()[0].startswith("No wheelhouse manifest")
+
+
+def test_pyinstaller_installed_offline(tmp_path, wheels, monkeypatch):
+    """Test PyInstaller is installed from the wheelhouse without an index."""
+    house = Wheelhouse(tmp_path / "wheelhouse")
+    house.sync(sources=[wheels], download=False)
+    script = tmp_path / "app.py"
+    script.write_text("print('hi')\n")
+    commands = []
+
+    def run(cmd, **kwargs):
+        commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, "", "")
+
+    monkeypatch.setattr(converter_module.subprocess, "run", run)
+    config = BuildConfig(script_path=script, wheelhouse=house.root, use_proxy=True, proxy_url="http://proxy:8080")
+
+    assert PyConverter(config, log_callback=lambda message: None).install_pyinstaller()
+    assert commands[0][-3:] == ["--no-index", "--find-links", str(house.root.absolute())]
+    assert "--proxy" not in commands[0]